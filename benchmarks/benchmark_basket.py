@@ -0,0 +1,61 @@
+"""
+Benchmarks of the basket calculation and summary, for catalogs with thousands of seats and many site offers.
+"""
+from __future__ import absolute_import, unicode_literals
+
+from django.urls import reverse
+from oscar.core.loading import get_model
+from six.moves import range
+from six.moves.urllib.parse import urlencode
+
+from benchmarks.mixins import BenchmarkMixin
+from ecommerce.extensions.basket.utils import prepare_basket
+from ecommerce.extensions.test.factories import (
+    EnterpriseOfferFactory,
+    PercentageDiscountBenefitWithoutRangeFactory,
+    ProgramOfferFactory
+)
+from ecommerce.tests.testcases import TestCase
+
+Basket = get_model('basket', 'Basket')
+
+
+class BasketBenchmarks(BenchmarkMixin, TestCase):
+    """ Baskets of program seats, priced against a program offer and site-wide enterprise offers. """
+
+    def setUp(self):
+        super(BasketBenchmarks, self).setUp()
+        self.mock_services()
+
+        self.seats = self.create_catalog(self.scaled(2000))
+        self.program_seats = self.seats[:5]
+        offer = ProgramOfferFactory(site=self.site, benefit=PercentageDiscountBenefitWithoutRangeFactory(value=20))
+        self.add_program(offer.condition.program_uuid, self.program_seats)
+        for __ in range(self.scaled(50)):
+            EnterpriseOfferFactory(site=self.site)
+
+        self.user = self.create_user()
+        self.client.login(username=self.user.username, password=self.password)
+        self.request.user = self.user
+
+        basket = Basket.get_basket(self.user, self.site)
+        for seat in self.program_seats:
+            basket.add_product(seat)
+
+    def calculate_url(self, **params):
+        skus = [seat.stockrecords.first().partner_sku for seat in self.program_seats]
+        return '{path}?{query}'.format(
+            path=reverse('api:v2:baskets:calculate'), query=urlencode(dict(params, sku=skus), True)
+        )
+
+    def get(self, url):
+        def get():
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+        return get
+
+    def test_basket(self):
+        self.benchmark('basket_calculate.anonymous', self.get(self.calculate_url(is_anonymous='true')))
+        self.benchmark('basket_calculate.user', self.get(self.calculate_url(username=self.user.username)))
+        self.benchmark('basket_summary', self.get(reverse('basket:summary')))
+        self.benchmark('prepare_basket', lambda: prepare_basket(self.request, self.program_seats))
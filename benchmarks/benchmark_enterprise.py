@@ -0,0 +1,112 @@
+"""
+Benchmarks of the enterprise coupon endpoints of the admin portal, for a coupon with tens of thousands of codes.
+"""
+from __future__ import absolute_import, unicode_literals
+
+import datetime
+import json
+
+import mock
+from django.urls import reverse
+from django.utils.timezone import now
+from oscar.core.loading import get_model
+
+from benchmarks.mixins import BenchmarkMixin
+from ecommerce.core.constants import ENTERPRISE_COUPON_ADMIN_ROLE, SYSTEM_ENTERPRISE_ADMIN_ROLE
+from ecommerce.core.models import EcommerceFeatureRole, EcommerceFeatureRoleAssignment
+from ecommerce.coupons.tests.mixins import CouponMixin
+from ecommerce.extensions.offer.constants import VOUCHER_NOT_ASSIGNED, VOUCHER_NOT_REDEEMED
+from ecommerce.tests.mixins import JwtMixin
+from ecommerce.tests.testcases import TestCase
+
+Benefit = get_model('offer', 'Benefit')
+OfferAssignment = get_model('offer', 'OfferAssignment')
+Product = get_model('catalogue', 'Product')
+Voucher = get_model('voucher', 'Voucher')
+
+
+class EnterpriseCouponBenchmarks(BenchmarkMixin, CouponMixin, JwtMixin, TestCase):
+    """ An enterprise coupon with a fifth of its codes assigned, listed by an enterprise admin. """
+
+    def setUp(self):
+        super(EnterpriseCouponBenchmarks, self).setUp()
+        self.mock_services()
+
+        self.user = self.create_user(is_staff=True)
+        self.client.login(username=self.user.username, password=self.password)
+        EcommerceFeatureRoleAssignment.objects.create(
+            role=EcommerceFeatureRole.objects.get(name=ENTERPRISE_COUPON_ADMIN_ROLE),
+            user=self.user,
+            enterprise_id=self.enterprise_customer_uuid
+        )
+        self.set_jwt_cookie(system_wide_role=SYSTEM_ENTERPRISE_ADMIN_ROLE, context=self.enterprise_customer_uuid)
+
+        for name in ('voucher.utils', 'api.v2.utils'):
+            patcher = mock.patch(
+                'ecommerce.extensions.{}.get_enterprise_customer'.format(name),
+                mock.Mock(return_value={
+                    'name': 'Benchmark Enterprise',
+                    'enterprise_customer_uuid': self.enterprise_customer_uuid,
+                    'slug': 'benchmark',
+                })
+            )
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch('ecommerce.extensions.api.v2.utils.send_mail')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        response = self.client.post(
+            reverse('api:v2:enterprise-coupons-list'),
+            json.dumps({
+                'benefit_type': Benefit.PERCENTAGE,
+                'benefit_value': 100,
+                'category': {'name': self.category.name},
+                'code': '',
+                'end_datetime': str(now() + datetime.timedelta(days=30)),
+                'price': 100,
+                'quantity': 1,
+                'start_datetime': str(now() - datetime.timedelta(days=1)),
+                'title': 'Benchmark Enterprise Coupon',
+                'voucher_type': Voucher.SINGLE_USE,
+                'enterprise_customer': {'name': 'Benchmark Enterprise', 'id': self.enterprise_customer_uuid},
+                'enterprise_customer_catalog': 'a9a23cbe-9bd2-4a0b-a1c8-b6ad7ec4b3e5',
+                'notify_email': 'admin@example.com',
+            }),
+            'application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.coupon_id = response.json()['coupon_id']
+
+        coupon = Product.objects.get(id=self.coupon_id)
+        quantity = self.scaled(50000)
+        voucher_ids = self.create_coupon_voucher_copies(coupon, quantity, 'BENCHMARK')
+        offer = coupon.attr.coupon_vouchers.vouchers.first().enterprise_offer
+        OfferAssignment.objects.bulk_create(
+            [
+                OfferAssignment(offer=offer, code=code, user_email='learner{}@example.com'.format(index % 100))
+                for index, code in enumerate(
+                    Voucher.objects.filter(id__in=voucher_ids[:quantity // 5]).values_list('code', flat=True)
+                )
+            ],
+            batch_size=1000
+        )
+
+    def get(self, url):
+        def get():
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+        return get
+
+    def codes_url(self, code_filter):
+        return '{path}?code_filter={code_filter}&page_size=100'.format(
+            path=reverse('api:v2:enterprise-coupons-codes', kwargs={'pk': self.coupon_id}), code_filter=code_filter
+        )
+
+    def test_enterprise_coupons(self):
+        self.benchmark('enterprise_coupons.overview', self.get(reverse(
+            'api:v2:enterprise-coupons-(?P<enterprise-id>.+)/overview-list',
+            kwargs={'enterprise_id': self.enterprise_customer_uuid}
+        )))
+        self.benchmark('enterprise_coupons.codes.unassigned', self.get(self.codes_url(VOUCHER_NOT_ASSIGNED)))
+        self.benchmark('enterprise_coupons.codes.unredeemed', self.get(self.codes_url(VOUCHER_NOT_REDEEMED)))
@@ -0,0 +1,56 @@
+"""
+Benchmarks of code redemption, for a coupon with tens of thousands of codes.
+"""
+from __future__ import absolute_import, unicode_literals
+
+import datetime
+
+from django.urls import reverse
+from django.utils.timezone import now
+from oscar.core.loading import get_model
+from six.moves.urllib.parse import urlencode
+
+from benchmarks.mixins import BenchmarkMixin
+from ecommerce.coupons.tests.mixins import CouponMixin
+from ecommerce.tests.testcases import TestCase
+
+Basket = get_model('basket', 'Basket')
+Catalog = get_model('catalogue', 'Catalog')
+Voucher = get_model('voucher', 'Voucher')
+
+
+class VoucherBenchmarks(BenchmarkMixin, CouponMixin, TestCase):
+    """ Codes of a coupon for a seat of a large catalog, applied to a basket and redeemed. """
+
+    def setUp(self):
+        super(VoucherBenchmarks, self).setUp()
+        self.mock_services()
+
+        seats = self.create_catalog(self.scaled(2000))
+        self.seat = seats[-1]
+        catalog = Catalog.objects.create(partner=self.partner)
+        catalog.stock_records.add(self.seat.stockrecords.first())
+
+        coupon = self.create_coupon(catalog=catalog, benefit_value=10, partner=self.partner, quantity=1)
+        Voucher.objects.filter(coupon_vouchers__coupon=coupon).update(
+            start_datetime=now() - datetime.timedelta(days=1), end_datetime=now() + datetime.timedelta(days=30)
+        )
+        voucher_ids = self.create_coupon_voucher_copies(coupon, self.scaled(50000), 'BENCHMARK')
+        self.code = Voucher.objects.get(id=voucher_ids[-1]).code
+
+        self.user = self.create_user()
+        self.client.login(username=self.user.username, password=self.password)
+        Basket.get_basket(self.user, self.site).add_product(self.seat)
+
+    def add_voucher(self):
+        response = self.client.post(reverse('bff:payment:v0:addvoucher'), {'code': self.code})
+        self.assertEqual(response.status_code, 200)
+
+    def redeem(self):
+        query = urlencode({'code': self.code, 'sku': self.seat.stockrecords.first().partner_sku})
+        response = self.client.get('{path}?{query}'.format(path=reverse('coupons:redeem'), query=query))
+        self.assertEqual(response.status_code, 302)
+
+    def test_vouchers(self):
+        self.benchmark('voucher_add', self.add_voucher)
+        self.benchmark('coupon_redeem', self.redeem)
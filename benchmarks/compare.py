@@ -0,0 +1,36 @@
+"""
+Compares a benchmark results file with a baseline, exiting with status 1 if any benchmark regressed.
+
+Example:
+
+    python -m benchmarks.compare log/benchmarks.json benchmarks/baseline.json --tolerance 0.25
+"""
+from __future__ import absolute_import, print_function, unicode_literals
+
+import argparse
+import sys
+
+from benchmarks.results import DEFAULT_TOLERANCE, compare_results, load_results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare benchmark results with a baseline.')
+    parser.add_argument('results', help='Results file written by the benchmark suite.')
+    parser.add_argument('baseline', help='Baseline results file.')
+    parser.add_argument(
+        '--tolerance',
+        default=DEFAULT_TOLERANCE,
+        type=float,
+        help='Tolerated increase of the median wall time, as a fraction of the baseline median.',
+    )
+    args = parser.parse_args(argv)
+
+    regressions = compare_results(load_results(args.results), load_results(args.baseline), args.tolerance)
+    for regression in regressions:
+        print(regression)
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Set up for running the benchmark suite.
+
+The suite runs against the database configured by the settings module, SQLite by default. Set DB_ENGINE, DB_NAME,
+DB_HOST, DB_PORT, DB_USER and DB_PASSWORD to run it against MySQL. A test database is created for the session, and
+every benchmark builds its data in its setUp, inside the test transaction.
+
+Results are written to a JSON file and, if a baseline is given, compared with it. The session fails if any
+benchmark regressed. To update the baseline, copy a results file written on the reference environment to
+benchmarks/baseline.json.
+
+Example:
+
+    pytest benchmarks --benchmark-output log/benchmarks.json --benchmark-baseline benchmarks/baseline.json
+"""
+from __future__ import absolute_import, print_function
+
+import os
+
+import django
+
+from benchmarks.results import DEFAULT_TOLERANCE, compare_results, load_results, results
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('benchmark')
+    group.addoption('--benchmark-output', default='log/benchmarks.json', help='Path of the results file.')
+    group.addoption('--benchmark-baseline', default=None, help='Path of the baseline results file.')
+    group.addoption(
+        '--benchmark-tolerance',
+        default=DEFAULT_TOLERANCE,
+        type=float,
+        help='Tolerated increase of the median wall time, as a fraction of the baseline median.',
+    )
+    group.addoption('--benchmark-rounds', default=5, type=int, help='Number of rounds measured per benchmark.')
+    group.addoption(
+        '--benchmark-scale',
+        default=1.0,
+        type=float,
+        help='Factor applied to the size of the data built by the benchmarks.',
+    )
+
+
+def pytest_configure(config):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecommerce.settings.test')
+    django.setup()
+
+    results.rounds = config.getoption('benchmark_rounds')
+    results.scale = config.getoption('benchmark_scale')
+
+
+def pytest_sessionstart(session):
+    from django.test.utils import setup_databases, setup_test_environment
+
+    setup_test_environment()
+    session.benchmark_database_config = setup_databases(verbosity=0, interactive=False)
+
+
+def pytest_sessionfinish(session, exitstatus):  # pylint: disable=unused-argument
+    from django.db import connection
+    from django.test.utils import teardown_databases, teardown_test_environment
+
+    config = session.config
+    database_vendor = connection.vendor
+    teardown_databases(session.benchmark_database_config, verbosity=0)
+    teardown_test_environment()
+
+    if not results.benchmarks:
+        return
+
+    results.write(config.getoption('benchmark_output'), database_vendor)
+
+    baseline = config.getoption('benchmark_baseline')
+    if baseline:
+        regressions = compare_results(
+            results.benchmarks, load_results(baseline), config.getoption('benchmark_tolerance')
+        )
+        for regression in regressions:
+            print('REGRESSION', regression)
+        if regressions:
+            session.exitstatus = 1
@@ -0,0 +1,224 @@
+"""
+Measurement and data building helpers for the benchmark suite.
+"""
+from __future__ import absolute_import, unicode_literals
+
+import json
+import re
+import time
+
+import httpretty
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from edx_django_utils.cache import RequestCache, TieredCache
+from oscar.core.loading import get_model
+from six.moves import range
+from six.moves.urllib.parse import parse_qs, unquote, urlparse
+
+from benchmarks.results import results
+from ecommerce.courses.tests.factories import CourseFactory
+
+CouponVouchers = get_model('voucher', 'CouponVouchers')
+Voucher = get_model('voucher', 'Voucher')
+
+CONTENT_TYPE = 'application/json'
+
+
+def _json_response(headers, data, status=200):
+    headers['content-type'] = CONTENT_TYPE
+    return [status, headers, json.dumps(data)]
+
+
+class BenchmarkMixin(object):
+    """
+    Measures the wall time and query count of callables, and builds the data they run against.
+
+    Remote services are answered by httpretty, so the measurements cover the work done by this service only.
+    """
+    enterprise_customer_uuid = 'cf246b88-d5f6-4908-a522-fc307e0b0c59'
+
+    def setUp(self):
+        super(BenchmarkMixin, self).setUp()
+        httpretty.enable()
+        self.addCleanup(httpretty.reset)
+        self.addCleanup(httpretty.disable)
+        self.programs = {}
+
+    @staticmethod
+    def scaled(count):
+        """ Returns the count multiplied by the scale of the run, at least 1. """
+        return max(1, int(count * results.scale))
+
+    def benchmark(self, name, func):
+        """
+        Measures func over the configured number of rounds, and records the measurements under name.
+
+        Each round starts with empty caches and runs in a transaction that is rolled back, so every round does the
+        same work against the same data.
+        """
+        durations = []
+        query_counts = []
+        for __ in range(results.rounds):
+            TieredCache.dangerous_clear_all_tiers()
+            RequestCache.clear_all_namespaces()
+            with transaction.atomic():
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.time()
+                    func()
+                    durations.append(time.time() - start)
+                transaction.set_rollback(True)
+            query_counts.append(len(queries))
+
+        results.record(name, durations, query_counts)
+
+    def create_catalog(self, seat_count):
+        """ Creates a course run with a verified seat for each seat, and returns the seats. """
+        seats = []
+        for __ in range(seat_count):
+            course = CourseFactory(partner=self.partner)
+            seats.append(course.create_or_update_seat('verified', True, 100))
+        return seats
+
+    def create_voucher_copies(self, voucher, count, prefix):
+        """
+        Creates count vouchers with the dates, usage and offers of the voucher, with codes starting with prefix.
+
+        The vouchers are inserted in bulk, since building them one at a time with factories would dominate the run.
+
+        Returns:
+            list: IDs of the new vouchers.
+        """
+        Voucher.objects.bulk_create(
+            [
+                Voucher(
+                    name=voucher.name,
+                    code='{prefix}{number:08d}'.format(prefix=prefix, number=number),
+                    usage=voucher.usage,
+                    start_datetime=voucher.start_datetime,
+                    end_datetime=voucher.end_datetime,
+                )
+                for number in range(count)
+            ],
+            batch_size=1000
+        )
+        voucher_ids = list(Voucher.objects.filter(code__startswith=prefix).values_list('id', flat=True))
+
+        VoucherOffer = Voucher.offers.through
+        VoucherOffer.objects.bulk_create(
+            [
+                VoucherOffer(voucher_id=voucher_id, conditionaloffer_id=offer_id)
+                for voucher_id in voucher_ids
+                for offer_id in voucher.offers.values_list('id', flat=True)
+            ],
+            batch_size=1000
+        )
+        return voucher_ids
+
+    def create_coupon_voucher_copies(self, coupon, count, prefix):
+        """ Adds count copies of the first voucher of the coupon to the coupon, and returns their IDs. """
+        coupon_vouchers = CouponVouchers.objects.get(coupon=coupon)
+        voucher_ids = self.create_voucher_copies(coupon_vouchers.vouchers.first(), count, prefix)
+
+        CouponVoucher = CouponVouchers.vouchers.through
+        CouponVoucher.objects.bulk_create(
+            [CouponVoucher(couponvouchers_id=coupon_vouchers.id, voucher_id=voucher_id) for voucher_id in voucher_ids],
+            batch_size=1000
+        )
+        return voucher_ids
+
+    def add_program(self, program_uuid, seats):
+        """ Makes the Discovery Service return a program with a course for each seat. """
+        self.programs[str(program_uuid)] = {
+            'uuid': str(program_uuid),
+            'title': 'Benchmark Program',
+            'status': 'active',
+            'type': 'MicroMasters',
+            'applicable_seat_types': ['verified', 'professional', 'credit'],
+            'courses': [
+                {
+                    'key': 'course-{}'.format(seat.id),
+                    'uuid': 'course-{}'.format(seat.id),
+                    'entitlements': [],
+                    'course_runs': [{
+                        'key': seat.attr.course_key,
+                        'seats': [{'type': 'verified', 'sku': seat.stockrecords.first().partner_sku}],
+                    }],
+                }
+                for seat in seats
+            ],
+        }
+
+    def mock_services(self):
+        """ Answers the Discovery, LMS and Enterprise APIs used by the benchmarked endpoints. """
+        site_configuration = self.site.siteconfiguration
+        self.mock_access_token_response()
+        httpretty.register_uri(
+            httpretty.GET, re.compile(re.escape(site_configuration.discovery_api_url) + '.*'),
+            body=self._discovery_callback
+        )
+        httpretty.register_uri(
+            httpretty.GET, re.compile(re.escape(site_configuration.lms_url_root) + '/api/.*'), body=self._lms_callback
+        )
+        httpretty.register_uri(
+            httpretty.GET, re.compile(re.escape(site_configuration.enterprise_api_url) + '.*'),
+            body=self._enterprise_callback
+        )
+
+    @staticmethod
+    def _course_run(key):
+        return {
+            'key': key,
+            'title': 'Benchmark course run',
+            'short_description': 'Benchmark course run',
+            'start': '2013-02-05T05:00:00Z',
+            'image': {'src': '/path/to/image.jpg'},
+            'enrollment_end': None,
+        }
+
+    def _discovery_callback(self, request, uri, headers):  # pylint: disable=unused-argument
+        url = urlparse(uri)
+        params = parse_qs(url.query)
+        path = [unquote(part) for part in url.path.split('/') if part]
+
+        if 'programs' in path:
+            program = self.programs.get(path[-1])
+            return _json_response(headers, program or {}, status=200 if program else 404)
+
+        if 'keys' in params:
+            course_runs = [self._course_run(key) for key in params['keys'][0].split(',')]
+            return _json_response(
+                headers, {'count': len(course_runs), 'next': None, 'previous': None, 'results': course_runs}
+            )
+
+        return _json_response(headers, self._course_run(path[-1]))
+
+    @staticmethod
+    def _lms_callback(request, uri, headers):  # pylint: disable=unused-argument
+        if '/accounts/' in uri:
+            return _json_response(headers, {'is_active': True})
+        return _json_response(headers, [])
+
+    def _enterprise_callback(self, request, uri, headers):  # pylint: disable=unused-argument
+        if 'contains_content_items' in uri:
+            return _json_response(headers, {'contains_content_items': True})
+
+        if 'enterprise-learner' in uri:
+            enterprise_customer = {
+                'uuid': self.enterprise_customer_uuid,
+                'name': 'Benchmark Enterprise',
+                'active': True,
+                'enable_data_sharing_consent': False,
+                'enforce_data_sharing_consent': 'at_login',
+                'site': {'domain': self.site.domain, 'name': self.site.name},
+            }
+            return _json_response(headers, {
+                'count': 1,
+                'num_pages': 1,
+                'current_page': 1,
+                'next': None,
+                'previous': None,
+                'start': 0,
+                'results': [{'id': 1, 'enterprise_customer': enterprise_customer, 'data_sharing_consent_records': []}],
+            })
+
+        return _json_response(headers, {'count': 0, 'next': None, 'previous': None, 'results': []})
@@ -0,0 +1,118 @@
+"""
+Benchmark results, and their comparison with a stored baseline.
+
+This module does not depend on Django, so results can be compared outside of the benchmark run.
+"""
+from __future__ import absolute_import, division, unicode_literals
+
+import io
+import json
+import os
+import platform
+from collections import OrderedDict
+
+# Tolerated increase of the median wall time of a benchmark over its baseline, as a fraction of the baseline.
+DEFAULT_TOLERANCE = 0.25
+
+
+def _median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2
+
+
+class BenchmarkResults(object):
+    """
+    Wall times and query counts of the benchmarks of a run, keyed by benchmark name.
+
+    Attributes:
+        rounds (int): Number of times each benchmark is measured.
+        scale (float): Factor applied to the size of the data built by the benchmarks.
+    """
+
+    def __init__(self, rounds=5, scale=1.0):
+        self.rounds = rounds
+        self.scale = scale
+        self.benchmarks = OrderedDict()
+
+    def record(self, name, durations, query_counts):
+        """
+        Records the measurements of a benchmark.
+
+        Arguments:
+            name (str): Unique name of the benchmark.
+            durations (list): Wall time of each round, in seconds.
+            query_counts (list): Number of database queries of each round.
+        """
+        self.benchmarks[name] = OrderedDict([
+            ('rounds', len(durations)),
+            ('min_seconds', min(durations)),
+            ('median_seconds', _median(durations)),
+            ('max_seconds', max(durations)),
+            ('queries', max(query_counts)),
+        ])
+
+    def as_dict(self, database_vendor=None):
+        return OrderedDict([
+            ('environment', OrderedDict([
+                ('python', platform.python_version()),
+                ('database', database_vendor),
+                ('rounds', self.rounds),
+                ('scale', self.scale),
+            ])),
+            ('benchmarks', self.benchmarks),
+        ])
+
+    def write(self, path, database_vendor=None):
+        """ Writes the results to a JSON file, creating its directory if needed. """
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        with io.open(path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(self.as_dict(database_vendor), indent=2, ensure_ascii=False) + '\n')
+
+
+def load_results(path):
+    """ Returns the benchmarks of a results file written by BenchmarkResults.write. """
+    with io.open(path, encoding='utf-8') as f:
+        return json.load(f)['benchmarks']
+
+
+def compare_results(benchmarks, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compares benchmark results with a baseline.
+
+    A benchmark regresses when it makes more queries than in the baseline, or when its median wall time exceeds the
+    baseline median by more than the tolerance. Benchmarks missing from either side are not compared.
+
+    Arguments:
+        benchmarks (dict): Results of the run, keyed by benchmark name.
+        baseline (dict): Results of the baseline, keyed by benchmark name.
+        tolerance (float): Tolerated wall time increase, as a fraction of the baseline median.
+
+    Returns:
+        list: A message describing each regression.
+    """
+    regressions = []
+    for name, result in benchmarks.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+
+        if result['queries'] > expected['queries']:
+            regressions.append('{name}: {queries} queries, baseline {expected}.'.format(
+                name=name, queries=result['queries'], expected=expected['queries']
+            ))
+
+        limit = expected['median_seconds'] * (1 + tolerance)
+        if result['median_seconds'] > limit:
+            regressions.append('{name}: median {median:.4f}s, baseline {expected:.4f}s (limit {limit:.4f}s).'.format(
+                name=name, median=result['median_seconds'], expected=expected['median_seconds'], limit=limit
+            ))
+
+    return regressions
+
+
+results = BenchmarkResults()
@@ -14,3 +14,6 @@ class CoreAppConfig(AppConfig):
         # Allows Celery tasks to bind themselves to an initialized instance of the Celery library.
         # noinspection PyUnresolvedReferences
         from ecommerce import celery_app  # pylint: disable=unused-variable
+
+        # noinspection PyUnresolvedReferences
+        import ecommerce.core.signals  # pylint: disable=unused-variable
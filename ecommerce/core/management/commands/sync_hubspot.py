@@ -1,27 +1,39 @@
 """
 Django management command to Sync Product, Orders and Lines to Hubspot server.
+
+The sync is incremental: for every site and HubSpot object type, a HubspotSyncWatermark records the time up to
+which carts have been synced, and each run only ships the objects of the carts created, submitted or given new lines
+since then.
+Payloads are built lazily, and their batches are pushed by a bounded pool of worker threads sharing one keep-alive
+session. Requests that fail with a connection error or a retryable status are retried with exponential backoff.
 """
 from __future__ import absolute_import
 
 import json
 import logging
+import threading
 import time
 import traceback
 from datetime import datetime, timedelta
 from decimal import Decimal as D
+from itertools import islice
+from multiprocessing.pool import ThreadPool
 
+import requests
 from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand, CommandError
 from django.db.models import Q
-from edx_rest_api_client.client import EdxRestApiClient
+from django.utils import timezone
 from oscar.core.loading import get_class, get_model
-from six.moves import range
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, RequestException, Timeout  # pylint: disable=ungrouped-imports
 from slumber.exceptions import HttpClientError, HttpServerError
 
 from ecommerce.extensions.fulfillment.status import ORDER
 
 Basket = get_model('basket', 'Basket')
 CartLine = get_model('basket', 'Line')
+HubspotSyncWatermark = get_model('core', 'HubspotSyncWatermark')
 Order = get_model('order', 'Order')
 OrderLine = get_model('order', 'Line')
 OrderNumberGenerator = get_class('order.utils', 'OrderNumberGenerator')
@@ -174,11 +186,33 @@ PRODUCT = "PRODUCT"
 LINE_ITEM = "LINE_ITEM"
 DEAL = "DEAL"
 BATCH_SIZE = 200
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_RETRY_BACKOFF = 1.0
+HUBSPOT_REQUEST_TIMEOUT = 30
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+HUBSPOT_ERRORS = (HttpClientError, HttpServerError, RequestException)
+
+
+def _get_batches(objects, size):
+    """
+    Yields lists of at most size objects from the iterable, without reading it all in memory.
+    """
+    iterator = iter(objects)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
 
 
 class Command(BaseCommand):
     help = 'Sync Product, Orders and Lines to Hubspot server.'
     initial_sync_days = None
+    workers = DEFAULT_WORKERS
+    max_retries = DEFAULT_MAX_RETRIES
+    retry_backoff = DEFAULT_RETRY_BACKOFF
+    session = None
+    pool = None
 
     def _get_hubspot_enable_sites(self):
         """
@@ -189,15 +223,41 @@ class Command(BaseCommand):
     def _hubspot_endpoint(self, hubspot_object, api_url, method, body=None, **kwargs):
         """
         This function is responsible for all the calls of hubspot.
+
+        Calls are made through the keep-alive session of the command. Connection errors and retryable statuses are
+        retried with exponential backoff, and error statuses are raised as HttpClientError or HttpServerError.
         """
-        client = EdxRestApiClient('/'.join([HUBSPOT_API_BASE_URL, api_url]))
-        if method == "GET":
-            return getattr(client, hubspot_object).get(**kwargs)
-        if method == "POST":
-            return getattr(client, hubspot_object).post(**kwargs)
-        if method == "PUT":
-            return getattr(client, hubspot_object).put(body, **kwargs)
-        raise ValueError("Unexpected method {}".format(method))
+        if method not in ("GET", "POST", "PUT"):
+            raise ValueError("Unexpected method {}".format(method))
+
+        url = '{base}/{api_url}{hubspot_object}/'.format(
+            base=HUBSPOT_API_BASE_URL, api_url=api_url, hubspot_object=hubspot_object
+        )
+        attempt = 0
+        while True:
+            try:
+                response = self.session.request(
+                    method, url, params=kwargs, json=body, timeout=HUBSPOT_REQUEST_TIMEOUT
+                )
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                    break
+            except (ConnectionError, Timeout):
+                if attempt >= self.max_retries:
+                    raise
+            time.sleep(self.retry_backoff * 2 ** attempt)
+            attempt += 1
+
+        if response.status_code >= 500:
+            raise HttpServerError(
+                'Server Error {status}: {url}'.format(status=response.status_code, url=url),
+                response=response, content=response.content
+            )
+        if response.status_code >= 400:
+            raise HttpClientError(
+                'Client Error {status}: {url}'.format(status=response.status_code, url=url),
+                response=response, content=response.content
+            )
+        return response.json() if response.content else None
 
     def _install_hubspot_ecommerce_bridge(self, site_configuration):
         """
@@ -289,25 +349,22 @@ class Command(BaseCommand):
 
     def _get_hubspot_contact_structure(self, users):
         """
-        Returns list of dicts, each dict represents hubspot CONTACT.
+        Yields dicts, each dict represents hubspot CONTACT.
         """
-        hubspot_contacts = []
         for user in users:
-            hubspot_contacts.append({
+            yield {
                 'integratorObjectId': str(user.id),
                 'action': 'UPSERT',
                 'changeOccurredTimestamp': self._get_timestamp(),
                 'propertyNameToValues': {
                     'email': user.email
                 }
-            })
-        return hubspot_contacts
+            }
 
     def _get_hubspot_deal_structure(self, carts, partner):
         """
-        Returns list of dicts, each dict represents hubspot DEAL.
+        Yields dicts, each dict represents hubspot DEAL.
         """
-        hubspot_deals = []
         for cart in carts:
             deal = {
                 'integratorObjectId': str(cart.id),
@@ -334,18 +391,16 @@ class Command(BaseCommand):
                     'user_id': str(cart.owner.id) if cart.owner else ''
                 }
             deal['propertyNameToValues']['description'] = description
-            hubspot_deals.append(deal)
-        return hubspot_deals
+            yield deal
 
     def _get_hubspot_line_item_structure(self, lines):
         """
-        Returns list of dicts, each dict represents hubspot LINE_ITEM.
+        Yields dicts, each dict represents hubspot LINE_ITEM.
         """
-        hubspot_line_items = []
         for line in lines:
             line_price_incl_tax = self._get_cart_line_prices(line, 'price_incl_tax')
             line_price_excl_tax = self._get_cart_line_prices(line, 'price_excl_tax')
-            hubspot_line_items.append({
+            yield {
                 'integratorObjectId': str(line.id),
                 'action': 'UPSERT',
                 'changeOccurredTimestamp': self._get_timestamp(),
@@ -358,20 +413,18 @@ class Command(BaseCommand):
                     'price_excl_tax': float(line_price_excl_tax),
                     'quantity': line.quantity
                 }
-            })
-        return hubspot_line_items
+            }
 
     def _get_hubspot_product_structure(self, products):
         """
-        Returns list of dicts, each dict represents hubspot PRODUCT.
+        Yields dicts, each dict represents hubspot PRODUCT.
         """
-        hubspot_products = []
         for product in products:
             if product.description:
                 description = product.description
             else:
                 description = product.course.id if product.course else ''
-            hubspot_products.append({
+            yield {
                 'integratorObjectId': str(product.id),
                 'action': 'UPSERT',
                 'changeOccurredTimestamp': self._get_timestamp(),
@@ -379,50 +432,73 @@ class Command(BaseCommand):
                     'title': str(product.title),
                     'description': description
                 }
-            })
-        return hubspot_products
+            }
+
+    def _push_batch(self, object_type, batch, site_configuration, slots):
+        """
+        Calls the sync message endpoint on one batch. Runs in a worker thread, and returns the error raised, if any.
+        """
+        try:
+            self._hubspot_endpoint(
+                object_type,
+                'extensions/ecomm/v1/sync-messages/',
+                'PUT',
+                body=batch,
+                hapikey=site_configuration.hubspot_secret_key
+            )
+            return None
+        except HUBSPOT_ERRORS as ex:
+            return ex
+        finally:
+            slots.release()
 
     def _upsert_hubspot_objects(self, object_type, objects, site_configuration):
         """
         Calls the sync message endpoint on given objects (PRODUCT, DEAL
         and LINE_ITEM) and each request can has 200 (BATCH_SIZE) objects.
+
+        Batches are built while earlier ones are being pushed by the worker pool. At most twice as many batches as
+        there are workers are held in memory at any time. Returns True if every batch was synced.
         """
-        try:
-            total = len(objects)
-            for start in range(0, total, BATCH_SIZE):
-                batch = objects[start:start + BATCH_SIZE]
-                self.stdout.write(
-                    'Syncing {object_type}s batch from {start} to {end} of total: {total} for site {site}'.format(
-                        object_type=object_type,
-                        start=start,
-                        end=start + BATCH_SIZE,
-                        total=total,
-                        site=site_configuration.site.domain
-                    )
-                )
-                self._hubspot_endpoint(
-                    object_type,
-                    'extensions/ecomm/v1/sync-messages/',
-                    'PUT',
-                    body=batch,
-                    hapikey=site_configuration.hubspot_secret_key
+        slots = threading.BoundedSemaphore(self.workers * 2)
+        pushes = []
+        for index, batch in enumerate(_get_batches(objects, BATCH_SIZE)):
+            start = index * BATCH_SIZE
+            slots.acquire()
+            self.stdout.write(
+                'Syncing {object_type}s batch from {start} to {end} for site {site}'.format(
+                    object_type=object_type,
+                    start=start,
+                    end=start + len(batch),
+                    site=site_configuration.site.domain
                 )
+            )
+            pushes.append(
+                (start, len(batch), self.pool.apply_async(
+                    self._push_batch, (object_type, batch, site_configuration, slots)
+                ))
+            )
+
+        synced = True
+        for start, size, push in pushes:
+            error = push.get()
+            if error is None:
                 self.stdout.write(
-                    'Successfully synced {object_type}s batch from {start} to {end} of total: '
-                    '{total} for site {site}'.format(
+                    'Successfully synced {object_type}s batch from {start} to {end} for site {site}'.format(
                         object_type=object_type,
                         start=start,
-                        end=start + BATCH_SIZE,
-                        total=total,
+                        end=start + size,
                         site=site_configuration.site.domain
                     )
                 )
-        except (HttpClientError, HttpServerError) as ex:
-            self.stderr.write(
-                'An error occurred while upserting {object_type} for site {site}: {message}'.format(
-                    object_type=object_type, site=site_configuration.site.domain, message=ex
+            else:
+                synced = False
+                self.stderr.write(
+                    'An error occurred while upserting {object_type} for site {site}: {message}'.format(
+                        object_type=object_type, site=site_configuration.site.domain, message=error
+                    )
                 )
-            )
+        return synced
 
     def _call_sync_errors_messages_endpoint(self, site_configuration):
         """
@@ -451,52 +527,84 @@ class Command(BaseCommand):
                 )
             )
 
-    def _get_unsynced_carts(self, site_configuration):
+    def _get_initial_sync_start(self):
+        start_date = timezone.now().date() - timedelta(self.initial_sync_days)
+        return timezone.make_aware(datetime.combine(start_date, datetime.min.time()), timezone.utc)
+
+    def _get_unsynced_carts(self, site_configuration, since, until):
         carts = Basket.objects.filter(site=site_configuration.site, lines__isnull=False)
-        start_date = datetime.now().date() - timedelta(self.initial_sync_days)
-        unsynced_carts = carts.filter(
-            Q(date_created__date=start_date) | Q(date_submitted__date=start_date)
-        )
-        self.stdout.write(
-            'Pulled unsynced carts for site {site} from {start_date} and total count is total: {count}'.format(
-                site=site_configuration.site.domain, start_date=start_date, count=unsynced_carts.count()
-            )
-        )
-        return unsynced_carts
+        return carts.filter(
+            Q(date_created__gte=since, date_created__lt=until) |
+            Q(date_submitted__gte=since, date_submitted__lt=until) |
+            Q(lines__date_created__gte=since, lines__date_created__lt=until)
+        ).distinct()
 
-    def _sync_data(self, site_configuration):
+    def _get_hubspot_objects(self, object_type, carts, site_configuration):
         """
-        Create lists of Order, OrderLine and Product objects and
-        call upsert(PUT) sync-messages endpoint for each objects.
+        Returns a generator of the hubspot objects of the given type for the carts.
         """
-        unsynced_carts = self._get_unsynced_carts(site_configuration)
-        if unsynced_carts:
+        if object_type == CONTACT:
+            return self._get_hubspot_contact_structure(User.objects.filter(baskets__in=carts).distinct().iterator())
+        if object_type == PRODUCT:
             # we need to exclude the CartLines without product
             # because product is required in hubspot for LINE_ITEM.
-            unsynced_cart_lines = CartLine.objects.filter(basket__in=unsynced_carts).exclude(product=None)
-            unsynced_products = Product.objects.filter(basket_lines__in=unsynced_cart_lines)
-            unsynced_users = User.objects.filter(baskets__in=unsynced_carts)
-            self._upsert_hubspot_objects(
-                CONTACT,
-                self._get_hubspot_contact_structure(unsynced_users),
-                site_configuration
+            return self._get_hubspot_product_structure(
+                Product.objects.filter(basket_lines__basket__in=carts).select_related('course').distinct().iterator()
             )
-            self._upsert_hubspot_objects(
-                PRODUCT,
-                self._get_hubspot_product_structure(unsynced_products),
-                site_configuration
+        if object_type == DEAL:
+            return self._get_hubspot_deal_structure(
+                carts.select_related('owner').iterator(), site_configuration.partner
             )
-            self._upsert_hubspot_objects(
-                DEAL,
-                self._get_hubspot_deal_structure(unsynced_carts, site_configuration.partner),
-                site_configuration
-            )
-            self._upsert_hubspot_objects(
-                LINE_ITEM,
-                self._get_hubspot_line_item_structure(unsynced_cart_lines),
-                site_configuration
-            )
-        else:
+        return self._get_hubspot_line_item_structure(
+            CartLine.objects.filter(basket__in=carts).exclude(product=None).select_related(
+                'basket', 'product__course'
+            ).iterator()
+        )
+
+    def _sync_data(self, site_configuration):
+        """
+        Sync the objects of each type for the carts created, submitted or given new lines since its watermark,
+        and move the watermark forward once all of them are synced.
+
+        Object types sharing a watermark share their carts, which are pulled and counted once.
+        """
+        until = timezone.now()
+        data_found = False
+        unsynced_carts_by_since = {}
+        for object_type in (CONTACT, PRODUCT, DEAL, LINE_ITEM):
+            watermark = HubspotSyncWatermark.objects.filter(
+                site_configuration=site_configuration, object_type=object_type
+            ).first()
+            since = watermark.last_synced_at if watermark else self._get_initial_sync_start()
+
+            if since not in unsynced_carts_by_since:
+                unsynced_carts = self._get_unsynced_carts(site_configuration, since, until)
+                count = unsynced_carts.count()
+                self.stdout.write(
+                    'Pulled unsynced carts for site {site} from {since} and total count is total: {count}'.format(
+                        site=site_configuration.site.domain, since=since, count=count
+                    )
+                )
+                unsynced_carts_by_since[since] = (unsynced_carts, count)
+            unsynced_carts, count = unsynced_carts_by_since[since]
+
+            synced = True
+            if count:
+                data_found = True
+                synced = self._upsert_hubspot_objects(
+                    object_type,
+                    self._get_hubspot_objects(object_type, unsynced_carts, site_configuration),
+                    site_configuration
+                )
+
+            if synced:
+                HubspotSyncWatermark.objects.update_or_create(
+                    site_configuration=site_configuration,
+                    object_type=object_type,
+                    defaults={'last_synced_at': until}
+                )
+
+        if not data_found:
             self.stdout.write('No data found to sync for site {site}'.format(site=site_configuration.site.domain))
 
     def add_arguments(self, parser):
@@ -507,12 +615,40 @@ class Command(BaseCommand):
             type=int,
             help='Number of days before today to start initial sync',
         )
+        parser.add_argument(
+            '--workers',
+            default=DEFAULT_WORKERS,
+            dest='workers',
+            type=int,
+            help='Number of batches pushed to Hubspot at the same time',
+        )
+        parser.add_argument(
+            '--max-retries',
+            default=DEFAULT_MAX_RETRIES,
+            dest='max_retries',
+            type=int,
+            help='Number of times a failed Hubspot call is retried',
+        )
+        parser.add_argument(
+            '--retry-backoff',
+            default=DEFAULT_RETRY_BACKOFF,
+            dest='retry_backoff',
+            type=float,
+            help='Seconds to wait before the first retry, doubled for each following retry',
+        )
 
     def handle(self, *args, **options):
         """
         Main command handler.
         """
         self.initial_sync_days = options['initial_sync_days']
+        self.workers = options['workers']
+        self.max_retries = options['max_retries']
+        self.retry_backoff = options['retry_backoff']
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_maxsize=self.workers))
+        self.session.mount('http://', HTTPAdapter(pool_maxsize=self.workers))
+        self.pool = ThreadPool(self.workers)
         try:
             site_configurations = self._get_hubspot_enable_sites()
             if not site_configurations:
@@ -527,3 +663,7 @@ class Command(BaseCommand):
         except Exception as ex:
             traceback.print_exc()
             raise CommandError('Command failed with traceback %s' % str(ex))
+        finally:
+            self.pool.close()
+            self.pool.join()
+            self.session.close()
@@ -3,6 +3,7 @@ Test the sync_hubspot management command
 """
 from __future__ import absolute_import
 
+import time
 from datetime import datetime, timedelta
 
 from django.core.management import call_command
@@ -16,11 +17,15 @@ from slumber.exceptions import HttpClientError
 from ecommerce.core.management.commands.sync_hubspot import Command as sync_command
 from ecommerce.extensions.test.factories import create_basket, create_order
 from ecommerce.tests.factories import SiteConfigurationFactory, UserFactory
+from ecommerce.tests.stub_server import StubServer
 
 SiteConfiguration = get_model('core', 'SiteConfiguration')
 Basket = get_model('basket', 'Basket')
+HubspotSyncWatermark = get_model('core', 'HubspotSyncWatermark')
 
 DEFAULT_INITIAL_DAYS = 1
+SYNC_ERRORS_PATH = '/extensions/ecomm/v1/sync-errors/'
+SYNC_MESSAGES_PATH = '/extensions/ecomm/v1/sync-messages/{object_type}/'
 
 
 class TestSyncHubspotCommand(TestCase):
@@ -116,7 +121,7 @@ class TestSyncHubspotCommand(TestCase):
         2. Define settings
         3. Sync-error
         """
-        with patch.object(sync_command, '_get_unsynced_carts', return_value=None):
+        with patch.object(sync_command, '_get_unsynced_carts', return_value=Basket.objects.none()):
             output = self._get_command_output()
             self.assertIn(
                 'No data found to sync for site {site}'.format(site=self.hubspot_site_configuration.site.domain),
@@ -190,22 +195,134 @@ class TestSyncHubspotCommand(TestCase):
                 output
             )
 
+    def _stub_hubspot_handler(self, request):
+        """
+        Answers the requests made to the stub Hubspot server.
+        """
+        if request.path.startswith(SYNC_ERRORS_PATH):
+            return 200, {'results': []}
+        return 200, {}
+
+    def _get_stub_server_command_output(self, server, *args):
+        """
+        Runs the command against the stub Hubspot server and returns its stdout and stderr output.
+        """
+        out = StringIO()
+        with patch('ecommerce.core.management.commands.sync_hubspot.HUBSPOT_API_BASE_URL', server.url):
+            call_command(
+                'sync_hubspot', '--initial-sync-day=' + str(DEFAULT_INITIAL_DAYS), *args, stdout=out, stderr=out
+            )
+        return out.getvalue()
+
+    def _get_request_paths(self, server):
+        return [request.path.split('?')[0] for request in server.requests]
+
     def test_hubspot_endpoint(self):
         """
         Test _hubspot_endpoint function.
         1. Install Bridge
         2. Define settings
-        3. Upsert(PRODUCT)
-        4. Upsert(CONTACT)
+        3. Upsert(CONTACT)
+        4. Upsert(PRODUCT)
         5. Upsert(DEAL)
         6. Upsert(LINE ITEM)
         7. Sync-error
         """
-        with patch('ecommerce.core.management.commands.sync_hubspot.EdxRestApiClient') as mock_client:
-            output = self._get_command_output()
-            self.assertEqual(mock_client.call_count, 7)
-            self.assertIn('Successfully installed hubspot ecommerce bridge', output)
-            self.assertIn('Successfully defined the hubspot ecommerce settings', output)
+        with StubServer(self._stub_hubspot_handler) as server:
+            output = self._get_stub_server_command_output(server, '--workers=1')
+
+        self.assertEqual(self._get_request_paths(server), [
+            '/extensions/ecomm/v1/installs/',
+            '/extensions/ecomm/v1/settings/',
+            SYNC_MESSAGES_PATH.format(object_type='CONTACT'),
+            SYNC_MESSAGES_PATH.format(object_type='PRODUCT'),
+            SYNC_MESSAGES_PATH.format(object_type='DEAL'),
+            SYNC_MESSAGES_PATH.format(object_type='LINE_ITEM'),
+            SYNC_ERRORS_PATH,
+        ])
+        # Every call is made over the same keep-alive connection.
+        self.assertEqual(len({request.client_address for request in server.requests}), 1)
+        self.assertIn('Successfully installed hubspot ecommerce bridge', output)
+        self.assertIn('Successfully defined the hubspot ecommerce settings', output)
+        self.assertEqual(len(server.requests[4].json()), 2)
+
+    def test_incremental_sync(self):
+        """
+        Test the carts synced by a run are not synced again by the next one.
+        """
+        with StubServer(self._stub_hubspot_handler) as server:
+            self._get_stub_server_command_output(server)
+            self.assertEqual(
+                HubspotSyncWatermark.objects.filter(site_configuration=self.hubspot_site_configuration).count(), 4
+            )
+
+            server.requests = []
+            output = self._get_stub_server_command_output(server)
+
+        self.assertEqual(len(server.requests), 3)
+        self.assertIn(
+            'No data found to sync for site {site}'.format(site=self.hubspot_site_configuration.site.domain),
+            output
+        )
+
+    def test_incremental_sync_new_lines(self):
+        """
+        Test a cart created before the last run is synced by the next one once it has new lines.
+        """
+        with StubServer(self._stub_hubspot_handler) as server:
+            self._get_stub_server_command_output(server)
+
+            basket = create_basket(site=self.hubspot_site_configuration.site)
+            basket.date_created = self._get_date(days=3)
+            basket.save()
+            server.requests = []
+            output = self._get_stub_server_command_output(server)
+
+        self.assertEqual(len(server.requests), 7)
+        self.assertIn('total count is total: 1', output)
+
+    def test_retry_with_backoff(self):
+        """
+        Test calls failing with a retryable status are retried after an exponential backoff.
+        """
+        failures = []
+
+        def handler(request):
+            if request.path.startswith(SYNC_MESSAGES_PATH.format(object_type='PRODUCT')) and len(failures) < 2:
+                failures.append(request)
+                return 503, {}
+            return self._stub_hubspot_handler(request)
+
+        with StubServer(handler) as server, \
+                patch('ecommerce.core.management.commands.sync_hubspot.time', wraps=time) as mock_time:
+            output = self._get_stub_server_command_output(server, '--retry-backoff=0.01')
+
+        self.assertEqual([call[0][0] for call in mock_time.sleep.call_args_list], [0.01, 0.02])
+        self.assertEqual(len(server.requests), 9)
+        self.assertNotIn('An error occurred while upserting', output)
+        self.assertEqual(
+            HubspotSyncWatermark.objects.filter(site_configuration=self.hubspot_site_configuration).count(), 4
+        )
+
+    def test_failed_batch_keeps_watermark(self):
+        """
+        Test the watermark of an object type is not moved when one of its batches fails.
+        """
+        def handler(request):
+            if request.path.startswith(SYNC_MESSAGES_PATH.format(object_type='PRODUCT')):
+                return 400, {}
+            return self._stub_hubspot_handler(request)
+
+        with StubServer(handler) as server:
+            output = self._get_stub_server_command_output(server)
+
+        self.assertIn('An error occurred while upserting PRODUCT', output)
+        self.assertEqual(
+            set(HubspotSyncWatermark.objects.filter(
+                site_configuration=self.hubspot_site_configuration
+            ).values_list('object_type', flat=True)),
+            {'CONTACT', 'DEAL', 'LINE_ITEM'}
+        )
 
     @patch.object(sync_command, '_hubspot_endpoint')
     def test_with_exception(self, mocked_hubspot):      # pylint: disable=unused-argument
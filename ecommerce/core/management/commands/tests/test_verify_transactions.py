@@ -15,7 +15,11 @@ from oscar.test.factories import OrderFactory, OrderLineFactory, ProductFactory
 
 from ecommerce.core.constants import SEAT_PRODUCT_CLASS_NAME
 from ecommerce.core.management.commands.tests.factories import PaymentEventFactory
-from ecommerce.core.management.commands.verify_transactions import DEFAULT_END_DELTA_TIME, DEFAULT_START_DELTA_TIME
+from ecommerce.core.management.commands.verify_transactions import (
+    DEFAULT_END_DELTA_TIME,
+    DEFAULT_START_DELTA_TIME,
+    split_time_window
+)
 
 PaymentEventType = get_model('order', 'PaymentEventType')
 PaymentEventTypeName = get_class('order.constants', 'PaymentEventTypeName')
@@ -192,3 +196,36 @@ class VerifyTransactionsTest(TestCase):
         self.assertIn(str(refund.id), exception)
         self.assertIn("Amount: 90.00", exception)
         self.assertIn("Amount: 100.00", exception)
+
+    def test_orders_verified_in_chunks(self):
+        """ Verify orders are verified with one grouped query per chunk, and errors in every chunk are reported."""
+        second_order = OrderFactory(total_incl_tax=90, date_placed=self.timestamp)
+        OrderLineFactory(order=second_order, product=self.product)
+        payment = PaymentEventFactory(order=self.order,
+                                      amount=100,
+                                      event_type_id=self.payevent.id,
+                                      date_created=self.timestamp)
+
+        # Two event type lookups, one query per chunk of one order plus the empty chunk ending the window, and one
+        # query per chunk in error to load the lines or payments of its orders.
+        with self.assertNumQueries(7):
+            with self.assertRaises(CommandError) as cm:
+                call_command('verify_transactions', chunk_size=1)
+        exception = six.text_type(cm.exception)
+        self.assertIn("Order totals mismatch with payments received", exception)
+        self.assertIn(str(payment.id), exception)
+        self.assertIn("The following orders are without payments", exception)
+        self.assertIn(str(second_order.id), exception)
+
+    def test_split_time_window(self):
+        """ Verify the time window is split into contiguous shards of equal length."""
+        start = datetime.datetime(2019, 1, 1, tzinfo=pytz.utc)
+        end = start + datetime.timedelta(hours=3)
+        self.assertEqual(
+            split_time_window(start, end, 3),
+            [
+                (start, start + datetime.timedelta(hours=1)),
+                (start + datetime.timedelta(hours=1), start + datetime.timedelta(hours=2)),
+                (start + datetime.timedelta(hours=2), end),
+            ]
+        )
@@ -25,22 +25,33 @@ Example output:
     'totals_mismatch': "Order totals mismatch with payments received.
     [('Order: 72 Amount: 100.00', 'Payment: 67 Amount: 10000.00'),
     ('Order: 71 Amount: 100.00', 'Payment: 65 Amount: 10.00')]"}
+
+The payment count, payment total and refund total of the orders are computed by
+the database in one grouped query per chunk of orders, and chunks are read in
+order ID order. Errors are logged as soon as they are found. With --workers,
+the time window is split into equal shards that are verified in parallel by
+separate processes.
 """
 
 from __future__ import absolute_import
 
 import datetime
 import logging
+from collections import namedtuple
+from decimal import Decimal
+from multiprocessing import Pool
 
 import pytz
 from django.core.management.base import BaseCommand, CommandError
-from django.db.models import Sum
+from django.db import connections
+from django.db.models import Case, DecimalField, F, IntegerField, Q, Sum, When
 from oscar.core.loading import get_class, get_model
 
 from ecommerce.core.constants import COURSE_ENTITLEMENT_PRODUCT_CLASS_NAME, SEAT_PRODUCT_CLASS_NAME
 from ecommerce.core.utils import use_read_replica_if_available
 
 logger = logging.getLogger(__name__)
+Line = get_model('order', 'Line')
 Order = get_model('order', 'Order')
 PaymentEvent = get_model('order', 'PaymentEvent')
 PaymentEventType = get_model('order', 'PaymentEventType')
@@ -48,16 +59,169 @@ PaymentEventTypeName = get_class('order.constants', 'PaymentEventTypeName')
 
 DEFAULT_START_DELTA_TIME = 240
 DEFAULT_END_DELTA_TIME = 60
+DEFAULT_CHUNK_SIZE = 1000
 VALID_PRODUCT_CLASS_NAMES = [SEAT_PRODUCT_CLASS_NAME, COURSE_ENTITLEMENT_PRODUCT_CLASS_NAME]
 
+ORDERS_WITHOUT_PAYMENTS = 'orders_no_pay'
+MULTI_PAYMENT_ON_ORDER = 'multi_pay_on_order'
+ORDER_PAYMENT_TOTALS_MISMATCH = 'totals_mismatch'
+REFUND_AMOUNT_EXCEEDED = 'refund_amount_exceeded'
+
+# Plain records of the orders and payment events in error, which can be sent back from worker processes.
+OrderSummary = namedtuple('OrderSummary', ['id', 'number', 'total_incl_tax'])
+PaymentSummary = namedtuple('PaymentSummary', ['id', 'processor_name', 'amount', 'event_type_name'])
+TransactionError = namedtuple('TransactionError', ['kind', 'order', 'payments'])
+
+
+def split_time_window(start, end, shards):
+    """
+    Splits the [start, end) time window into the given number of contiguous windows of equal length.
+    """
+    step = (end - start) / shards
+    bounds = [start + step * index for index in range(shards)] + [end]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+class TransactionVerifier(object):
+    """
+    Verifies the payments and refunds of the orders placed in a time window.
+
+    The orders are read in chunks of increasing ID. Each chunk is read with a single query, grouped by order, that
+    returns the payment count, payment total and refund total of every order in the chunk. Additional queries are
+    only made for the orders of a chunk that are in error.
+    """
+
+    def __init__(self, start, end, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.start = start
+        self.end = end
+        self.chunk_size = chunk_size
+        self.orders_verified = 0
+        self.paid_event_type_id = PaymentEventType.objects.get(name=PaymentEventTypeName.PAID).id
+        self.refunded_event_type_id = PaymentEventType.objects.get(name=PaymentEventTypeName.REFUNDED).id
+
+    def _sum_of_event_type(self, event_type_id, value, output_field):
+        return Sum(
+            Case(
+                When(payment_events__event_type_id=event_type_id, then=value),
+                default=0,
+                output_field=output_field
+            )
+        )
+
+    def get_chunk(self, last_order_id):
+        """ Returns the order totals of the next chunk of orders, after the order identified by last_order_id. """
+        amount_field = DecimalField(max_digits=12, decimal_places=2)
+        orders = use_read_replica_if_available(
+            Order.objects.filter(
+                date_placed__gte=self.start,
+                date_placed__lt=self.end,
+                id__gt=last_order_id,
+            ).order_by('id').values('id', 'number', 'total_incl_tax').annotate(
+                payment_count=self._sum_of_event_type(self.paid_event_type_id, 1, IntegerField()),
+                payment_total=self._sum_of_event_type(
+                    self.paid_event_type_id, F('payment_events__amount'), amount_field
+                ),
+                refund_count=self._sum_of_event_type(self.refunded_event_type_id, 1, IntegerField()),
+                refund_total=self._sum_of_event_type(
+                    self.refunded_event_type_id, F('payment_events__amount'), amount_field
+                ),
+            )
+        )
+        return list(orders[:self.chunk_size])
+
+    def verify_chunk(self, chunk):
+        """ Returns the errors of the given chunk of order totals. """
+        errors = []
+        for row in chunk:
+            order = OrderSummary(row['id'], row['number'], row['total_incl_tax'])
+            payment_count = row['payment_count'] or 0
+            payment_total = row['payment_total'] or Decimal(0)
+
+            # If a coupon is used to purchase a product for the full price, there will be no PaymentEvent
+            # so we must also verify that order had a price > 0.
+            if payment_count == 0:
+                if order.total_incl_tax > 0:
+                    errors.append(TransactionError(ORDERS_WITHOUT_PAYMENTS, order, None))
+            else:
+                # We do not support multi-payment today, so flag this for review.
+                if payment_count > 1:
+                    errors.append(TransactionError(MULTI_PAYMENT_ON_ORDER, order, self.paid_event_type_id))
+
+                # If the payment total and the order total do not match, flag for review.
+                if payment_total != order.total_incl_tax:
+                    errors.append(TransactionError(ORDER_PAYMENT_TOTALS_MISMATCH, order, self.paid_event_type_id))
+
+            if row['refund_count'] and row['refund_total'] > payment_total:
+                errors.append(TransactionError(REFUND_AMOUNT_EXCEEDED, order, self.refunded_event_type_id))
+
+        return self._resolve_errors(errors)
+
+    def _resolve_errors(self, errors):
+        """
+        Drops orders without payments that are not expected to have any, and replaces the event type of the other
+        errors by the payment events of that type.
+        """
+        unpaid_order_ids = [error.order.id for error in errors if error.kind == ORDERS_WITHOUT_PAYMENTS]
+        if unpaid_order_ids:
+            # We only expect immediate payments for Seats and Entitlements.
+            verifiable_order_ids = set(use_read_replica_if_available(
+                Line.objects.filter(order_id__in=unpaid_order_ids).filter(
+                    Q(product__product_class__name__in=VALID_PRODUCT_CLASS_NAMES) |
+                    Q(product__parent__product_class__name__in=VALID_PRODUCT_CLASS_NAMES)
+                ).values_list('order_id', flat=True)
+            ))
+            errors = [
+                error for error in errors
+                if error.kind != ORDERS_WITHOUT_PAYMENTS or error.order.id in verifiable_order_ids
+            ]
+
+        payments = {}
+        payment_order_ids = [error.order.id for error in errors if error.payments is not None]
+        if payment_order_ids:
+            payment_events = use_read_replica_if_available(
+                PaymentEvent.objects.filter(order_id__in=payment_order_ids).select_related('event_type').order_by('id')
+            )
+            for event in payment_events:
+                payments.setdefault((event.order_id, event.event_type_id), []).append(
+                    PaymentSummary(event.id, event.processor_name, event.amount, event.event_type.name)
+                )
+
+        return [
+            error if error.payments is None else error._replace(
+                payments=payments.get((error.order.id, error.payments), [])
+            )
+            for error in errors
+        ]
+
+    def verify(self):
+        """ Yields the errors of the orders in the time window, chunk by chunk. """
+        last_order_id = 0
+        while True:
+            chunk = self.get_chunk(last_order_id)
+            if not chunk:
+                break
+
+            self.orders_verified += len(chunk)
+            for error in self.verify_chunk(chunk):
+                yield error
+
+            last_order_id = chunk[-1]['id']
+
+
+def verify_time_window(window):
+    """ Returns the number of orders verified in the time window, and their errors. Used by worker processes. """
+    start, end, chunk_size = window
+    verifier = TransactionVerifier(start, end, chunk_size)
+    errors = list(verifier.verify())
+    connections.close_all()
+    return verifier.orders_verified, errors
+
 
 class Command(BaseCommand):
     ORDERS_WITHOUT_PAYMENTS = None
     MULTI_PAYMENT_ON_ORDER = None
     ORDER_PAYMENT_TOTALS_MISMATCH = None
     REFUND_AMOUNT_EXCEEDED = None
-    PAID_EVENT_TYPE = None
-    REFUNDED_EVENT_TYPE = None
 
     help = 'Management command to verify ecommerce transactions and log if there is any imbalance.'
 
@@ -78,72 +242,83 @@ class Command(BaseCommand):
             default=DEFAULT_END_DELTA_TIME,
             help='Minutes before now to end looking at orders.'
         )
+        parser.add_argument(
+            '--chunk-size',
+            action='store',
+            dest='chunk_size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='Number of orders verified per query.'
+        )
+        parser.add_argument(
+            '--workers',
+            action='store',
+            dest='workers',
+            type=int,
+            default=1,
+            help='Number of processes the time window is split across.'
+        )
 
     def handle(self, *args, **options):
         self.ORDERS_WITHOUT_PAYMENTS = []
         self.MULTI_PAYMENT_ON_ORDER = []
         self.ORDER_PAYMENT_TOTALS_MISMATCH = []
         self.REFUND_AMOUNT_EXCEEDED = []
-        self.PAID_EVENT_TYPE = PaymentEventType.objects.get(name=PaymentEventTypeName.PAID)
-        self.REFUNDED_EVENT_TYPE = PaymentEventType.objects.get(name=PaymentEventTypeName.REFUNDED)
 
         start_delta = options['start_delta']
         end_delta = options['end_delta']
+        chunk_size = options['chunk_size']
+        workers = options['workers']
 
         start = datetime.datetime.now(pytz.utc) - datetime.timedelta(minutes=start_delta)
         end = datetime.datetime.now(pytz.utc) - datetime.timedelta(minutes=end_delta)
 
-        orders = use_read_replica_if_available(
-            Order.objects.all()
-            .filter(date_placed__gte=start, date_placed__lt=end)
-            .prefetch_related('payment_events__event_type')
-        )
+        if workers > 1:
+            orders_verified = self.verify_in_workers(start, end, chunk_size, workers)
+        else:
+            verifier = TransactionVerifier(start, end, chunk_size)
+            for error in verifier.verify():
+                self.add_error(error)
+            orders_verified = verifier.orders_verified
 
-        logger.info("Number of orders to verify: %s", orders.count())
+        logger.info("Number of orders verified: %s", orders_verified)
 
-        for order in orders:
-            all_payment_events = order.payment_events
-            refunds = all_payment_events.filter(event_type=self.REFUNDED_EVENT_TYPE)
-            payments = all_payment_events.filter(event_type=self.PAID_EVENT_TYPE)
-
-            self.validate_order_payments(order, payments)
-            self.validate_order_refunds(order, refunds, payments)
-
-        self.clean_orders()
         exit_errors = self.compile_errors()
 
         if exit_errors:
             raise CommandError("Errors in transactions: {errors}".format(errors=exit_errors))
 
-    def validate_order_payments(self, order, payments):
-        # If a coupon is used to purchase a product for the full price, there will be no PaymentEvent
-        # so we must also verify that order had a price > 0.
-        if payments.count() == 0:
-            if order.total_incl_tax > 0:
-                self.ORDERS_WITHOUT_PAYMENTS.append(
-                    (order, None)
-                )
-            return
-
-        # We do not support multi-payment today, so flag this for review.
-        if payments.count() > 1:
-            self.MULTI_PAYMENT_ON_ORDER.append(
-                (order, payments)
-            )
-
-        # If the payment total and the order total do not match, flag for review.
-        if payments.aggregate(total=Sum('amount')).get('total') != order.total_incl_tax:
-            self.ORDER_PAYMENT_TOTALS_MISMATCH.append(
-                (order, payments)
-            )
-
-    def validate_order_refunds(self, order, refunds, payments):
-        refund_total = refunds.aggregate(total=Sum('amount')).get('total')
-        payment_total = payments.aggregate(total=Sum('amount')).get('total')
-        if refund_total is not None and refund_total > payment_total:
-            self.REFUND_AMOUNT_EXCEEDED.append(
-                (order, refunds)
-            )
+    def verify_in_workers(self, start, end, chunk_size, workers):
+        # Connections must not be shared with the forked worker processes.
+        connections.close_all()
+        pool = Pool(workers)
+        orders_verified = 0
+        try:
+            windows = [(shard_start, shard_end, chunk_size) for shard_start, shard_end in
+                       split_time_window(start, end, workers)]
+            for shard_orders_verified, errors in pool.imap_unordered(verify_time_window, windows):
+                orders_verified += shard_orders_verified
+                for error in errors:
+                    self.add_error(error)
+        finally:
+            pool.close()
+            pool.join()
+        return orders_verified
+
+    def add_error(self, error):
+        # Report every error as soon as it is found, instead of only when the whole time window is verified.
+        logger.error(
+            'Transaction error [%s] on order [%s]: %s',
+            error.kind,
+            error.order.number,
+            self.error_msg([(error.order, error.payments)])
+        )
+        {
+            ORDERS_WITHOUT_PAYMENTS: self.ORDERS_WITHOUT_PAYMENTS,
+            MULTI_PAYMENT_ON_ORDER: self.MULTI_PAYMENT_ON_ORDER,
+            ORDER_PAYMENT_TOTALS_MISMATCH: self.ORDER_PAYMENT_TOTALS_MISMATCH,
+            REFUND_AMOUNT_EXCEEDED: self.REFUND_AMOUNT_EXCEEDED,
+        }[error.kind].append((error.order, error.payments))
 
     def compile_errors(self):
         exit_errors = {}
@@ -180,27 +355,8 @@ class Command(BaseCommand):
                             payment_id=payment.id,
                             processor=payment.processor_name,
                             amount=payment.amount,
-                            type=payment.event_type.name
+                            type=payment.event_type_name
                         )
             msg += order_str
             msg += payment_str
         return msg
-
-    def clean_orders(self):
-        # We only expect immediate payments for Seats and Entitlements.
-        # Filter out orders that were flagged as being without payment for other product types
-        cleaned_orders_without_payments = [
-            (o, p) for o, p in self.ORDERS_WITHOUT_PAYMENTS if self.valid_order_without_payment(o)
-        ]
-        self.ORDERS_WITHOUT_PAYMENTS = cleaned_orders_without_payments
-
-    def valid_order_without_payment(self, order):
-        valid = False
-        for line in order.lines.all():
-            if self.verifiable_product(line.product):
-                valid = True
-
-        return valid
-
-    def verifiable_product(self, product):
-        return product.get_product_class().name in VALID_PRODUCT_CLASS_NAMES
@@ -0,0 +1,22 @@
+"""
+Middleware for the core app.
+"""
+from __future__ import absolute_import
+
+from ecommerce.core.site_context import site_context_registry
+
+
+class SiteContextMiddleware(object):
+    """
+    Middleware that sets the `site_context` attribute of the request, and replaces `request.site` with the site
+    of the context, whose configuration and partner are already loaded.
+
+    Note:
+        This middleware depends on "django.contrib.sites.middleware.CurrentSiteMiddleware" middleware
+        So it must be added after that middleware in django settings files.
+    """
+
+    def process_request(self, request):
+        request.site_context = site_context_registry.get_context(getattr(request, 'site', None))
+        if request.site_context:
+            request.site = request.site_context.site
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0055_add_ordermanager_role'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='siteconfiguration',
+            name='enrollment_fulfillment_max_workers',
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text='Maximum number of order lines posted to the Enrollment API at the same time. '
+                          'Defaults to the ENROLLMENT_FULFILLMENT_MAX_WORKERS setting.',
+                null=True, verbose_name='Enrollment Fulfillment Max Workers'),
+        ),
+        migrations.AddField(
+            model_name='siteconfiguration',
+            name='enrollment_fulfillment_timeout',
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text='Seconds to wait for each Enrollment API call made while fulfilling orders. '
+                          'Defaults to the ENROLLMENT_FULFILLMENT_TIMEOUT setting.',
+                null=True, verbose_name='Enrollment Fulfillment Timeout'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0056_enrollment_fulfillment_settings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HubspotSyncWatermark',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_type', models.CharField(max_length=32, verbose_name='HubSpot object type')),
+                ('last_synced_at', models.DateTimeField(help_text='Carts created or submitted before this time have been synced.', verbose_name='Last synced at')),
+                ('modified', models.DateTimeField(auto_now=True)),
+                ('site_configuration', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hubspot_sync_watermarks', to='core.SiteConfiguration')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='hubspotsyncwatermark',
+            unique_together=set([('site_configuration', 'object_type')]),
+        ),
+    ]
@@ -28,6 +28,7 @@ from slumber.exceptions import HttpNotFoundError, SlumberBaseException
 from analytics import Client as SegmentClient
 from ecommerce.core.constants import ALL_ACCESS_CONTEXT, ALLOW_MISSING_LMS_USER_ID
 from ecommerce.core.exceptions import MissingLmsUserIdException
+from ecommerce.core.site_context import invalidate_site_contexts
 from ecommerce.core.utils import log_message_and_raise_validation_error
 from ecommerce.extensions.payment.exceptions import ProcessorNotFoundError
 from ecommerce.extensions.payment.helpers import get_processor_class, get_processor_class_by_name
@@ -36,6 +37,30 @@ from ecommerce.journals.constants import JOURNAL_DISCOVERY_API_PATH  # TODO: jou
 log = logging.getLogger(__name__)
 
 
+class access_token_cached_property(object):  # pylint: disable=invalid-name
+    """
+    Caches an API client built with the site's access token, like cached_property, until the access token changes.
+
+    Site configurations are shared by the requests served by a process (see ecommerce.core.site_context), so a
+    client must not outlive the token it authenticates with.
+    """
+
+    def __init__(self, func):
+        self.func = func
+        self.__doc__ = func.__doc__
+        self.cache_attribute = '_{}_cache'.format(func.__name__)
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+
+        access_token = instance.access_token
+        cached = instance.__dict__.get(self.cache_attribute)
+        if cached is None or cached[0] != access_token:
+            cached = instance.__dict__[self.cache_attribute] = (access_token, self.func(instance))
+        return cached[1]
+
+
 class SiteConfiguration(models.Model):
     """Tenant configuration.
 
@@ -220,6 +245,20 @@ class SiteConfiguration(models.Model):
         null=True,
         blank=True
     )
+    enrollment_fulfillment_timeout = models.PositiveIntegerField(
+        verbose_name=_('Enrollment Fulfillment Timeout'),
+        help_text=_('Seconds to wait for each Enrollment API call made while fulfilling orders. '
+                    'Defaults to the ENROLLMENT_FULFILLMENT_TIMEOUT setting.'),
+        null=True,
+        blank=True
+    )
+    enrollment_fulfillment_max_workers = models.PositiveIntegerField(
+        verbose_name=_('Enrollment Fulfillment Max Workers'),
+        help_text=_('Maximum number of order lines posted to the Enrollment API at the same time. '
+                    'Defaults to the ENROLLMENT_FULFILLMENT_MAX_WORKERS setting.'),
+        null=True,
+        blank=True
+    )
 
     @property
     def payment_processors_set(self):
@@ -327,6 +366,7 @@ class SiteConfiguration(models.Model):
         # Clear Site cache upon SiteConfiguration changed
         Site.objects.clear_cache()
         super(SiteConfiguration, self).save(*args, **kwargs)
+        invalidate_site_contexts()
 
     def build_ecommerce_url(self, path=''):
         """
@@ -420,7 +460,7 @@ class SiteConfiguration(models.Model):
         TieredCache.set_all_tiers(key, access_token, expires)
         return access_token
 
-    @cached_property
+    @access_token_cached_property
     def discovery_api_client(self):
         """
         Returns an API client to access the Discovery service.
@@ -432,7 +472,7 @@ class SiteConfiguration(models.Model):
         return EdxRestApiClient(self.discovery_api_url, jwt=self.access_token)
 
     # TODO: journals dependency
-    @cached_property
+    @access_token_cached_property
     def journal_discovery_api_client(self):
         """
         Returns an Journal API client to access the Discovery service.
@@ -451,12 +491,12 @@ class SiteConfiguration(models.Model):
 
         return EdxRestApiClient(journal_discovery_url, jwt=self.access_token)
 
-    @cached_property
+    @access_token_cached_property
     def embargo_api_client(self):
         """ Returns the URL for the embargo API """
         return EdxRestApiClient(self.build_lms_url('/api/embargo/v1'), jwt=self.access_token)
 
-    @cached_property
+    @access_token_cached_property
     def enterprise_api_client(self):
         """
         Constructs a Slumber-based REST API client for the provided site.
@@ -470,11 +510,11 @@ class SiteConfiguration(models.Model):
         """
         return EdxRestApiClient(self.enterprise_api_url, jwt=self.access_token)
 
-    @cached_property
+    @access_token_cached_property
     def consent_api_client(self):
         return EdxRestApiClient(self.build_lms_url('/consent/api/v1/'), jwt=self.access_token, append_slash=False)
 
-    @cached_property
+    @access_token_cached_property
     def user_api_client(self):
         """
         Returns the API client to access the user API endpoint on LMS.
@@ -484,19 +524,19 @@ class SiteConfiguration(models.Model):
         """
         return EdxRestApiClient(self.build_lms_url('/api/user/v1/'), jwt=self.access_token)
 
-    @cached_property
+    @access_token_cached_property
     def commerce_api_client(self):
         return EdxRestApiClient(self.build_lms_url('/api/commerce/v1/'), jwt=self.access_token)
 
-    @cached_property
+    @access_token_cached_property
     def credit_api_client(self):
         return EdxRestApiClient(self.build_lms_url('/api/credit/v1/'), jwt=self.access_token)
 
-    @cached_property
+    @access_token_cached_property
     def enrollment_api_client(self):
         return EdxRestApiClient(self.build_lms_url('/api/enrollment/v1/'), jwt=self.access_token, append_slash=False)
 
-    @cached_property
+    @access_token_cached_property
     def entitlement_api_client(self):
         return EdxRestApiClient(self.build_lms_url('/api/entitlements/v1/'), jwt=self.access_token)
 
@@ -587,7 +627,7 @@ class User(AbstractUser):
             lms_user_id_social_auth, social_auth_id = self._get_lms_user_id_from_social_auth()
             if lms_user_id_social_auth:
                 self.lms_user_id = lms_user_id_social_auth
-                self.save()
+                self.save(update_fields=['lms_user_id'])
                 log.info(u'Saving lms_user_id from social auth with id %s for user %s. Called from %s', social_auth_id,
                          self.id, called_from)
             else:
@@ -776,6 +816,33 @@ class BusinessClient(models.Model):
         super(BusinessClient, self).save(*args, **kwargs)
 
 
+class HubspotSyncWatermark(models.Model):
+    """
+    Time up to which the carts of a site have been synced to HubSpot, for one HubSpot object type.
+     .. no_pii:
+    """
+
+    site_configuration = models.ForeignKey(
+        'core.SiteConfiguration', related_name='hubspot_sync_watermarks', on_delete=models.CASCADE
+    )
+    object_type = models.CharField(_('HubSpot object type'), max_length=32)
+    last_synced_at = models.DateTimeField(
+        _('Last synced at'),
+        help_text=_('Carts created or submitted before this time have been synced.')
+    )
+    modified = models.DateTimeField(auto_now=True)
+
+    class Meta(object):
+        unique_together = ('site_configuration', 'object_type')
+
+    def __str__(self):
+        return '{object_type} of {site}: {last_synced_at}'.format(
+            object_type=self.object_type,
+            site=self.site_configuration_id,
+            last_synced_at=self.last_synced_at
+        )
+
+
 class EcommerceFeatureRole(UserRole):
     """
     User role definitions specific to Ecommerce.
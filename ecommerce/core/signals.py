@@ -0,0 +1,18 @@
+from __future__ import absolute_import
+
+from django.contrib.sites.models import Site
+from django.db.models.signals import post_delete, post_save
+from oscar.core.loading import get_model
+
+from ecommerce.core.models import SiteConfiguration
+from ecommerce.core.site_context import invalidate_site_contexts
+from ecommerce.theming.models import SiteTheme
+
+Partner = get_model('partner', 'Partner')
+
+# SiteConfiguration.save invalidates the site contexts itself.
+post_delete.connect(invalidate_site_contexts, sender=SiteConfiguration, dispatch_uid='site_context_delete')
+
+for sender in (Site, Partner, SiteTheme):
+    post_save.connect(invalidate_site_contexts, sender=sender, dispatch_uid='site_context_save')
+    post_delete.connect(invalidate_site_contexts, sender=sender, dispatch_uid='site_context_delete')
@@ -0,0 +1,99 @@
+"""
+In-process cache of the site, site configuration, partner and theme used by each request.
+
+Every request needs the configuration, partner and theme of its site. The first request for a site in a process
+loads them with two queries and keeps them, so later requests for the site make none. Changes are propagated to
+every process through a version stamp stored in the shared cache, which is replaced whenever a site, site
+configuration, partner or site theme is saved or deleted. API clients built by a cached site configuration are
+kept with it, and rebuilt when the site's access token changes.
+
+The cached objects are shared by the requests of the process, and must not be modified outside of a save.
+"""
+from __future__ import absolute_import, unicode_literals
+
+import logging
+from collections import namedtuple
+
+from django.contrib.sites.models import Site
+from django.core.exceptions import ObjectDoesNotExist
+
+from ecommerce.core.utils import VersionedRegistry, bump_cache_version, get_cache_version, invalidate_on_commit
+from ecommerce.theming.models import SiteTheme
+
+logger = logging.getLogger(__name__)
+
+SITE_CONTEXT_VERSION_CACHE_KEY = 'core.site_context.version'
+
+SiteContext = namedtuple('SiteContext', ['site', 'site_configuration', 'partner', 'theme'])
+
+
+def get_site_context_version():
+    """
+    Returns the current site context version from the shared cache, creating one if none exists.
+    """
+    return get_cache_version(SITE_CONTEXT_VERSION_CACHE_KEY)
+
+
+def bump_site_context_version():
+    """
+    Stores a new site context version in the shared cache, causing every process to reload its site contexts.
+    """
+    return bump_cache_version(SITE_CONTEXT_VERSION_CACHE_KEY)
+
+
+def invalidate_site_contexts(*_args, **_kwargs):
+    """
+    When a site or one of its parts changes, every process must reload its site contexts.
+    """
+    invalidate_on_commit(bump_site_context_version)
+
+
+class SiteContextRegistry(VersionedRegistry):
+    """
+    Site contexts of the process, keyed by site ID, and loaded on first use.
+    """
+    version_cache_key = SITE_CONTEXT_VERSION_CACHE_KEY
+
+    def __init__(self):
+        super(SiteContextRegistry, self).__init__()
+        self._contexts = {}
+
+    @staticmethod
+    def _load(site_id):
+        site = Site.objects.select_related('siteconfiguration__partner').get(id=site_id)
+        try:
+            site_configuration = site.siteconfiguration
+        except ObjectDoesNotExist:
+            site_configuration = None
+        partner = site_configuration.partner if site_configuration else None
+
+        return SiteContext(
+            site=site,
+            site_configuration=site_configuration,
+            partner=partner,
+            theme=SiteTheme.get_theme(site),
+        )
+
+    def _build(self, version):
+        # Contexts are loaded when first requested.
+        self._contexts = {}
+        logger.info('Site context version changed to [%s], clearing site contexts.', version)
+
+    def get_context(self, site):
+        """
+        Returns the SiteContext of the given site, or None if no site is given.
+        """
+        if site is None:
+            return None
+
+        self._ensure_current()
+        context = self._contexts.get(site.id)
+        if context is None:
+            with self._lock:
+                context = self._contexts.get(site.id)
+                if context is None:
+                    context = self._contexts[site.id] = self._load(site.id)
+        return context
+
+
+site_context_registry = SiteContextRegistry()
@@ -447,6 +447,19 @@ class SiteConfigurationTests(TestCase):
         self.assertIsInstance(client_auth, SuppliedJwtAuth)
         self.assertEqual(client_auth.token, token)
 
+    def test_api_client_rebuilt_for_new_access_token(self):
+        """ Verify API clients are reused until the access token of the site changes. """
+        with mock.patch.object(SiteConfiguration, 'access_token', new_callable=mock.PropertyMock) as access_token:
+            access_token.return_value = 'abc123'
+            client = self.site_configuration.discovery_api_client
+            self.assertIs(self.site_configuration.discovery_api_client, client)
+
+            access_token.return_value = 'def456'
+            new_client = self.site_configuration.discovery_api_client
+
+        self.assertIsNot(new_client, client)
+        self.assertEqual(new_client._store['session'].auth.token, 'def456')  # pylint: disable=protected-access
+
     @httpretty.activate
     def test_enrollment_api_client(self):
         """ Verify the property an Enrollment API client."""
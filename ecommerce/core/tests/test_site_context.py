@@ -0,0 +1,59 @@
+from __future__ import absolute_import, unicode_literals
+
+from django.test import RequestFactory
+
+from ecommerce.core.middleware import SiteContextMiddleware
+from ecommerce.core.site_context import SiteContextRegistry, site_context_registry
+from ecommerce.tests.factories import PartnerFactory
+from ecommerce.tests.testcases import TestCase
+from ecommerce.theming.models import SiteTheme
+
+
+class SiteContextRegistryTests(TestCase):
+    def setUp(self):
+        super(SiteContextRegistryTests, self).setUp()
+        self.registry = SiteContextRegistry()
+
+    def test_get_context(self):
+        """ Verify the context of a site is loaded once, with its configuration, partner and theme. """
+        SiteTheme.objects.create(site=self.site, theme_dir_name='test-theme')
+
+        with self.assertNumQueries(2):
+            context = self.registry.get_context(self.site)
+        with self.assertNumQueries(0):
+            self.assertIs(self.registry.get_context(self.site), context)
+            self.assertEqual(context.site.siteconfiguration, self.site_configuration)
+            self.assertEqual(context.site.siteconfiguration.partner, self.partner)
+            self.assertEqual(context.site_configuration.site, self.site)
+
+        self.assertEqual(context.partner, self.partner)
+        self.assertEqual(context.theme.theme_dir_name, 'test-theme')
+        self.assertIsNone(self.registry.get_context(None))
+
+    def test_invalidated_on_save(self):
+        """ Verify contexts are reloaded when a site configuration, partner or site theme is saved. """
+        context = self.registry.get_context(self.site)
+
+        self.site_configuration.segment_key = 'new-key'
+        self.site_configuration.save()
+        new_context = self.registry.get_context(self.site)
+        self.assertIsNot(new_context, context)
+        self.assertEqual(new_context.site_configuration.segment_key, 'new-key')
+
+        PartnerFactory()
+        self.assertIsNot(self.registry.get_context(self.site), new_context)
+
+        SiteTheme.objects.create(site=self.site, theme_dir_name='new-theme')
+        self.assertEqual(self.registry.get_context(self.site).theme.theme_dir_name, 'new-theme')
+
+
+class SiteContextMiddlewareTests(TestCase):
+    def test_process_request(self):
+        """ Verify the middleware replaces the site of the request with the site of its context. """
+        request = RequestFactory().get('/')
+        request.site = self.site
+
+        SiteContextMiddleware().process_request(request)
+
+        self.assertEqual(request.site_context, site_context_registry.get_context(self.site))
+        self.assertIs(request.site, request.site_context.site)
@@ -2,11 +2,15 @@ from __future__ import absolute_import, unicode_literals
 
 import hashlib
 import logging
+import threading
+import uuid
 
 import six  # pylint: disable=ungrouped-imports
 import waffle
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.db import transaction
+from edx_django_utils.cache import TieredCache
 from six.moves.urllib.parse import parse_qs, urlparse
 
 logger = logging.getLogger(__name__)
@@ -92,3 +96,67 @@ def use_read_replica_if_available(queryset):
     If there is a database called 'read_replica', use that database for the queryset.
     """
     return queryset.using("read_replica") if "read_replica" in settings.DATABASES else queryset
+
+
+def get_cache_version(cache_key):
+    """
+    Returns the version stamp stored in the shared cache under the given key, creating one if none exists.
+    """
+    cached_response = TieredCache.get_cached_response(cache_key)
+    if cached_response.is_found:
+        return cached_response.value
+    return bump_cache_version(cache_key)
+
+
+def bump_cache_version(cache_key):
+    """
+    Stores a new version stamp in the shared cache under the given key, and returns it.
+
+    Every process holding data built for the previous version rebuilds it when next read.
+    """
+    version = uuid.uuid4().hex
+    TieredCache.set_all_tiers(cache_key, version, None)
+    return version
+
+
+def invalidate_on_commit(invalidate):
+    """
+    Calls the given function now, and again once the current transaction commits.
+
+    Invalidating immediately keeps the writing process from reading stale data within the transaction. A process
+    that rebuilds its data before the commit reads the uncommitted state, so the second call makes it rebuild again
+    once the changes are visible.
+    """
+    invalidate()
+    transaction.on_commit(invalidate)
+
+
+class VersionedRegistry(object):
+    """
+    Data of the process built from the database, and rebuilt whenever the version stamp stored in the shared cache
+    under `version_cache_key` changes.
+
+    Subclasses implement `_build`, and call `_ensure_current` before reading the data.
+    """
+    version_cache_key = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = None
+
+    def _build(self, version):
+        """ Builds the data of the given version. """
+        raise NotImplementedError
+
+    def _ensure_current(self):
+        version = get_cache_version(self.version_cache_key)
+        if version != self.version:
+            with self._lock:
+                if version != self.version:
+                    self._build(version)
+                    self.version = version
+
+    def reset(self):
+        """ Discards the data, so it is built again on next use. """
+        with self._lock:
+            self.version = None
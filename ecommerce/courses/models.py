@@ -17,6 +17,7 @@ from ecommerce.core.constants import (
     SEAT_PRODUCT_CLASS_NAME
 )
 from ecommerce.courses.publishers import LMSPublisher
+from ecommerce.courses.utils import invalidate_seat_enrollment_code_skus
 from ecommerce.extensions.catalogue.utils import generate_sku
 
 logger = logging.getLogger(__name__)
@@ -275,6 +276,7 @@ class Course(models.Model):
                 orders=0
             ).delete()
 
+        invalidate_seat_enrollment_code_skus(self.id)
         return seat
 
     def get_enrollment_code(self):
@@ -335,6 +337,7 @@ class Course(models.Model):
         stock_record.price_currency = settings.OSCAR_DEFAULT_CURRENCY
         stock_record.save()
 
+        invalidate_seat_enrollment_code_skus(self.id)
         return enrollment_code
 
     def toggle_enrollment_code_status(self, is_active):
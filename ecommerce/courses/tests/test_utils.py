@@ -1,6 +1,7 @@
 from __future__ import absolute_import
 
 import hashlib
+import json
 
 import ddt
 import httpretty
@@ -15,6 +16,7 @@ from ecommerce.courses.utils import (
     get_certificate_type_display_value,
     get_course_catalogs,
     get_course_info_from_catalog,
+    get_course_info_from_catalog_for_products,
     mode_for_product
 )
 from ecommerce.entitlements.utils import create_or_update_course_entitlement
@@ -102,6 +104,70 @@ class UtilsTests(DiscoveryTestMixin, DiscoveryMockMixin, TestCase):
             _ = get_course_info_from_catalog(self.request.site, product)
             self.assertEqual(mocked_set_all_tiers.call_count, 2)
 
+    def test_get_course_info_from_catalog_for_products(self):
+        """ Verify missing course runs and courses are retrieved with one search each, and cached. """
+        self.mock_access_token_response()
+        discovery_api_url = self.site_configuration.discovery_api_url
+        courses = [CourseFactory(partner=self.partner) for __ in range(3)]
+        seats = [course.create_or_update_seat('verified', True, 100) for course in courses]
+        entitlements = [
+            create_or_update_course_entitlement('verified', 100, self.partner, uuid, 'Entitlement')
+            for uuid in ('foo-bar', 'baz-qux')
+        ]
+        products = seats + entitlements
+
+        # The first seat is cached, and should not be searched.
+        cached_course_run = {'key': courses[0].id, 'title': 'Cached'}
+        self.mock_course_run_detail_endpoint(
+            courses[0], discovery_api_url=discovery_api_url, course_run_info=cached_course_run
+        )
+        get_course_info_from_catalog(self.request.site, seats[0])
+
+        course_runs = [{'key': course.id, 'title': course.name} for course in courses[1:]]
+        entitlement_courses = [{'uuid': product.attr.UUID, 'title': product.title} for product in entitlements]
+        for path, results in (('course_runs/', course_runs), ('courses/', entitlement_courses)):
+            httpretty.register_uri(
+                httpretty.GET, '{}{}'.format(discovery_api_url, path),
+                body=json.dumps({'next': None, 'results': results}),
+                content_type='application/json'
+            )
+
+        num_requests = len(httpretty.httpretty.latest_requests)
+        course_info = get_course_info_from_catalog_for_products(self.request.site, products)
+
+        self.assertEqual(
+            course_info,
+            dict(
+                [(seats[0].id, cached_course_run)] +
+                list(zip([seat.id for seat in seats[1:]], course_runs)) +
+                list(zip([product.id for product in entitlements], entitlement_courses))
+            )
+        )
+        searches = httpretty.httpretty.latest_requests[num_requests:]
+        self.assertEqual(len(searches), 2)
+        self.assertEqual(searches[0].querystring['keys'], [','.join(sorted(course.id for course in courses[1:]))])
+        self.assertEqual(searches[1].querystring['uuids'], ['baz-qux,foo-bar'])
+
+        # Everything is now cached.
+        num_requests = len(httpretty.httpretty.latest_requests)
+        self.assertEqual(get_course_info_from_catalog_for_products(self.request.site, products), course_info)
+        self.assertEqual(len(httpretty.httpretty.latest_requests), num_requests)
+        self.assertEqual(get_course_info_from_catalog(self.request.site, entitlements[0]), entitlement_courses[0])
+
+    def test_get_course_info_from_catalog_for_products_search_failure(self):
+        """ Verify products that could not be searched are left out. """
+        self.mock_access_token_response()
+        seats = [CourseFactory(partner=self.partner).create_or_update_seat('verified', True, 100) for __ in range(2)]
+
+        def callback(request, uri, headers):  # pylint: disable=unused-argument
+            raise ConnectionError
+
+        httpretty.register_uri(
+            httpretty.GET, '{}course_runs/'.format(self.site_configuration.discovery_api_url), body=callback
+        )
+
+        self.assertEqual(get_course_info_from_catalog_for_products(self.request.site, seats), {})
+
     @ddt.data(
         ('honor', 'Honor'),
         ('verified', 'Verified'),
@@ -1,13 +1,22 @@
 from __future__ import absolute_import
 
 import hashlib
+import logging
+from collections import defaultdict
 
+import six
 from django.conf import settings
+from django.core.cache import cache
 from django.utils.translation import ugettext_lazy as _
 from edx_django_utils.cache import TieredCache
 from opaque_keys.edx.keys import CourseKey
+from oscar.core.loading import get_model
+from requests.exceptions import ConnectionError, Timeout
+from slumber.exceptions import SlumberBaseException
 
-from ecommerce.core.utils import deprecated_traverse_pagination
+from ecommerce.core.utils import deprecated_traverse_pagination, get_cache_key, invalidate_on_commit
+
+logger = logging.getLogger(__name__)
 
 
 def mode_for_product(product):
@@ -25,18 +34,26 @@ def mode_for_product(product):
     return mode
 
 
+def _get_course_info_key(product):
+    """ Returns the Discovery Service key of a product: a course UUID for entitlements, or a course run key. """
+    if product.is_course_entitlement_product:
+        return product.attr.UUID
+    return CourseKey.from_string(product.attr.course_key)
+
+
+def _get_course_info_cache_key(key, partner_short_code):
+    cache_key = u'courses_api_detail_{}{}'.format(key, partner_short_code)
+    return hashlib.md5(cache_key.encode('utf-8')).hexdigest()
+
+
 def get_course_info_from_catalog(site, product):
     """ Get course or course_run information from Discovery Service and cache """
-    if product.is_course_entitlement_product:
-        key = product.attr.UUID
-    else:
-        key = CourseKey.from_string(product.attr.course_key)
+    key = _get_course_info_key(product)
 
     api = site.siteconfiguration.discovery_api_client
     partner_short_code = site.siteconfiguration.partner.short_code
 
-    cache_key = u'courses_api_detail_{}{}'.format(key, partner_short_code)
-    cache_key = hashlib.md5(cache_key.encode('utf-8')).hexdigest()
+    cache_key = _get_course_info_cache_key(key, partner_short_code)
     course_cached_response = TieredCache.get_cached_response(cache_key)
     if course_cached_response.is_found:
         return course_cached_response.value
@@ -50,6 +67,146 @@ def get_course_info_from_catalog(site, product):
     return course
 
 
+def get_course_info_from_catalog_for_products(site, products):
+    """
+    Get course or course_run information from Discovery Service for many products at once.
+
+    Cached information is read with a single cache call. When more than one product is missing from the cache,
+    the missing course runs and courses are retrieved with one ``keys``/``uuids`` search each and cached.
+    Products that could not be retrieved are left out, so their information can be retrieved one product at a
+    time with get_course_info_from_catalog.
+
+    Arguments:
+        site (Site): Site whose Discovery Service is queried.
+        products (iterable): Seat, enrollment code and course entitlement products.
+
+    Returns:
+        dict: Maps the ID of each product whose information was found to its course or course run information.
+    """
+    partner_short_code = site.siteconfiguration.partner.short_code
+    keys_by_cache_key = {}
+    products_by_key = defaultdict(list)
+    for product in products:
+        key = six.text_type(_get_course_info_key(product))
+        keys_by_cache_key[_get_course_info_cache_key(key, partner_short_code)] = key
+        products_by_key[key].append(product)
+
+    if not keys_by_cache_key:
+        return {}
+
+    course_info_by_key = {
+        keys_by_cache_key[cache_key]: course_info
+        for cache_key, course_info in cache.get_many(list(keys_by_cache_key)).items()
+    }
+    missing_keys = set(products_by_key) - set(course_info_by_key)
+
+    if len(missing_keys) > 1:
+        api = site.siteconfiguration.discovery_api_client
+        course_run_keys = sorted(
+            key for key in missing_keys if not products_by_key[key][0].is_course_entitlement_product
+        )
+        course_uuids = sorted(missing_keys.difference(course_run_keys))
+        searches = (
+            # (endpoint, key field of the results, search parameter, keys to search, other parameters)
+            (api.course_runs, 'key', 'keys', course_run_keys, {'partner': partner_short_code}),
+            (api.courses, 'uuid', 'uuids', course_uuids, {}),
+        )
+
+        fetched = {}
+        for endpoint, key_field, search_param, search_keys, querystring in searches:
+            if not search_keys:
+                continue
+
+            querystring[search_param] = ','.join(search_keys)
+            try:
+                results = deprecated_traverse_pagination(endpoint.get(**querystring), endpoint)
+            except (ConnectionError, SlumberBaseException, Timeout):
+                logger.warning('Failed to search the Discovery Service for %s [%s].', key_field, search_keys)
+                continue
+
+            for course_info in results:
+                key = course_info.get(key_field)
+                if key in missing_keys:
+                    fetched[key] = course_info
+
+        if fetched:
+            cache.set_many(
+                {
+                    _get_course_info_cache_key(key, partner_short_code): course_info
+                    for key, course_info in fetched.items()
+                },
+                settings.COURSES_API_CACHE_TIMEOUT
+            )
+            course_info_by_key.update(fetched)
+
+    return {
+        product.id: course_info
+        for key, course_info in course_info_by_key.items()
+        for product in products_by_key[key]
+    }
+
+
+def _get_seat_enrollment_code_skus_cache_key(course_id):
+    return get_cache_key(resource='seat_enrollment_code_skus', course_id=course_id)
+
+
+def get_seat_enrollment_code_skus(course_id):
+    """
+    Returns the SKUs of the seats and enrollment codes of a course, indexed by certificate type.
+
+    The index is built with two queries and cached until the products of the course change.
+
+    Arguments:
+        course_id (str): Course run ID.
+
+    Returns:
+        dict: {
+            'seat': Maps the certificate_type of each seat to its SKU,
+            'enrollment_code': Maps the seat_type of each enrollment code to its SKU,
+        }
+    """
+    cache_key = _get_seat_enrollment_code_skus_cache_key(course_id)
+    skus_cached_response = TieredCache.get_cached_response(cache_key)
+    if skus_cached_response.is_found:
+        return skus_cached_response.value
+
+    ProductAttributeValue = get_model('catalogue', 'ProductAttributeValue')
+    StockRecord = get_model('partner', 'StockRecord')
+
+    types_by_product = {
+        product_id: (code, value)
+        for product_id, code, value in ProductAttributeValue.objects.filter(
+            product__course_id=course_id,
+            attribute__code__in=('certificate_type', 'seat_type'),
+        ).values_list('product_id', 'attribute__code', 'value_text')
+    }
+
+    skus = {'seat': {}, 'enrollment_code': {}}
+    stock_records = StockRecord.objects.filter(
+        product__course_id=course_id,
+        product__structure__in=('child', 'standalone'),
+    ).order_by('id').values_list('product_id', 'product__structure', 'partner_sku')
+    for product_id, structure, partner_sku in stock_records:
+        code, value = types_by_product.get(product_id, (None, None))
+        # Seats are child products with a certificate_type attribute, and enrollment codes are standalone
+        # products with a seat_type attribute.
+        if value and code == 'certificate_type' and structure == 'child':
+            skus['seat'].setdefault(value, partner_sku)
+        elif value and code == 'seat_type' and structure == 'standalone':
+            skus['enrollment_code'].setdefault(value, partner_sku)
+
+    TieredCache.set_all_tiers(cache_key, skus, settings.SEAT_ENROLLMENT_CODE_SKUS_CACHE_TIMEOUT)
+    return skus
+
+
+def invalidate_seat_enrollment_code_skus(course_id):
+    """
+    Discards the cached seat and enrollment code SKUs of a course, so they are rebuilt when next read.
+    """
+    cache_key = _get_seat_enrollment_code_skus_cache_key(course_id)
+    invalidate_on_commit(lambda: TieredCache.delete_all_tiers(cache_key))
+
+
 def get_course_catalogs(site, resource_id=None):
     """
     Get details related to course catalogs from Discovery Service.
@@ -10,8 +10,8 @@ from oscar.core.loading import get_model
 from requests.exceptions import ConnectionError, Timeout
 from slumber.exceptions import SlumberHttpBaseException
 
-from ecommerce.enterprise.api import catalog_contains_course_runs, fetch_enterprise_learner_data
-from ecommerce.extensions.basket.utils import ENTERPRISE_CATALOG_ATTRIBUTE_TYPE
+from ecommerce.enterprise.constants import ENTERPRISE_CATALOG_ATTRIBUTE_TYPE
+from ecommerce.enterprise.context import get_enterprise_learner_context
 from ecommerce.extensions.offer.constants import OFFER_ASSIGNMENT_REVOKED, OFFER_REDEEMED
 from ecommerce.extensions.offer.mixins import ConditionWithoutRangeMixin, SingleItemConsumptionConditionMixin
 
@@ -24,6 +24,40 @@ Voucher = get_model('voucher', 'Voucher')
 logger = logging.getLogger(__name__)
 
 
+def get_enterprise_catalog_uuid_from_basket(basket):
+    """
+    Returns the valid enterprise catalog UUID the basket is pinned to, if any.
+
+    Arguments:
+         basket (Basket): The provided basket can be either temporary (just
+         for calculating discounts) or an actual one to buy a product.
+    """
+    # For temporary basket try to get `catalog` from request
+    catalog = basket.strategy.request.GET.get(
+        'catalog'
+    ) if basket.strategy.request else None
+
+    if not catalog:
+        # For actual baskets get `catalog` from basket attribute
+        enterprise_catalog_attribute, __ = BasketAttributeType.objects.get_or_create(
+            name=ENTERPRISE_CATALOG_ATTRIBUTE_TYPE
+        )
+        enterprise_customer_catalog = BasketAttribute.objects.filter(
+            basket=basket,
+            attribute_type=enterprise_catalog_attribute,
+        ).first()
+        if enterprise_customer_catalog:
+            catalog = enterprise_customer_catalog.value_text
+
+    # Return only valid UUID
+    try:
+        catalog = UUID(catalog) if catalog else None
+    except ValueError:
+        catalog = None
+
+    return catalog
+
+
 class EnterpriseCustomerCondition(ConditionWithoutRangeMixin, SingleItemConsumptionConditionMixin, Condition):
     class Meta(object):
         app_label = 'enterprise'
@@ -79,9 +113,10 @@ class EnterpriseCustomerCondition(ConditionWithoutRangeMixin, SingleItemConsumpt
             course_run_ids.append(course.id)
 
         courses_in_basket = ','.join(course_run_ids)
+        enterprise_context = get_enterprise_learner_context(basket.site, basket.owner)
         learner_data = {}
         try:
-            learner_data = fetch_enterprise_learner_data(basket.site, basket.owner)['results'][0]
+            learner_data = enterprise_context.get_learner_data()['results'][0]
         except (ConnectionError, KeyError, SlumberHttpBaseException, Timeout) as exc:
             logger.exception('[Code Redemption Failure] Unable to apply enterprise offer because '
                              'we failed to retrieve enterprise learner data for the user. '
@@ -120,7 +155,7 @@ class EnterpriseCustomerCondition(ConditionWithoutRangeMixin, SingleItemConsumpt
         # Verify that the current conditional offer is related to the provided
         # enterprise catalog, this will also filter out offers which don't
         # have `enterprise_customer_catalog_uuid` value set on the condition.
-        catalog = self._get_enterprise_catalog_uuid_from_basket(basket)
+        catalog = get_enterprise_catalog_uuid_from_basket(basket)
         if catalog:
             if offer.condition.enterprise_customer_catalog_uuid != catalog:
                 logger.warning('Unable to apply enterprise offer %s because '
@@ -130,8 +165,8 @@ class EnterpriseCustomerCondition(ConditionWithoutRangeMixin, SingleItemConsumpt
                 return False
 
         try:
-            catalog_contains_course = catalog_contains_course_runs(
-                basket.site, course_run_ids, enterprise_customer, enterprise_customer_catalog_uuid=enterprise_catalog
+            catalog_contains_course = enterprise_context.catalog_contains_course_runs(
+                course_run_ids, enterprise_customer, enterprise_customer_catalog_uuid=enterprise_catalog
             )
         except (ConnectionError, KeyError, SlumberHttpBaseException, Timeout) as exc:
             logger.exception('[Code Redemption Failure] Unable to apply enterprise offer because '
@@ -160,40 +195,6 @@ class EnterpriseCustomerCondition(ConditionWithoutRangeMixin, SingleItemConsumpt
 
         return True
 
-    @staticmethod
-    def _get_enterprise_catalog_uuid_from_basket(basket):
-        """
-        Helper method for fetching valid enterprise catalog UUID from basket.
-
-        Arguments:
-             basket (Basket): The provided basket can be either temporary (just
-             for calculating discounts) or an actual one to buy a product.
-        """
-        # For temporary basket try to get `catalog` from request
-        catalog = basket.strategy.request.GET.get(
-            'catalog'
-        ) if basket.strategy.request else None
-
-        if not catalog:
-            # For actual baskets get `catalog` from basket attribute
-            enterprise_catalog_attribute, __ = BasketAttributeType.objects.get_or_create(
-                name=ENTERPRISE_CATALOG_ATTRIBUTE_TYPE
-            )
-            enterprise_customer_catalog = BasketAttribute.objects.filter(
-                basket=basket,
-                attribute_type=enterprise_catalog_attribute,
-            ).first()
-            if enterprise_customer_catalog:
-                catalog = enterprise_customer_catalog.value_text
-
-        # Return only valid UUID
-        try:
-            catalog = UUID(catalog) if catalog else None
-        except ValueError:
-            catalog = None
-
-        return catalog
-
 
 class AssignableEnterpriseCustomerCondition(EnterpriseCustomerCondition):
     """An enterprise condition that can be redeemed by one or more assigned users."""
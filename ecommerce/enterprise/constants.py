@@ -6,3 +6,6 @@ ENTERPRISE_OFFERS_FOR_COUPONS_SWITCH = 'enable_enterprise_offers_for_coupons'
 
 # Waffle switch used to enable/disable using role based access control.
 USE_ROLE_BASED_ACCESS_CONTROL = 'use_role_based_access_control'
+
+# Name of the basket attribute type holding the enterprise catalog a basket is pinned to.
+ENTERPRISE_CATALOG_ATTRIBUTE_TYPE = 'enterprise_catalog_uuid'
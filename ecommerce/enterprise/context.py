@@ -0,0 +1,147 @@
+"""
+Request-scoped enterprise data for a learner.
+
+Applying offers to a basket evaluates every enterprise offer that may apply to it, and each evaluation needs the
+learner's enterprise data and the catalog membership of the basket's course runs. The EnterpriseLearnerContext
+loads each of these once per request, including failures, and shares them with every offer evaluated during the
+request.
+"""
+from __future__ import absolute_import, unicode_literals
+
+from edx_django_utils import monitoring as monitoring_utils
+from edx_django_utils.cache import RequestCache
+from requests.exceptions import ConnectionError, Timeout
+from slumber.exceptions import SlumberHttpBaseException
+
+from ecommerce.enterprise.api import catalog_contains_course_runs, fetch_enterprise_learner_data
+
+ENTERPRISE_CONTEXT_CACHE_NAMESPACE = 'enterprise.context'
+
+# Errors raised by the Enterprise API calls, which are remembered and raised again to every reader.
+ENTERPRISE_API_ERRORS = (ConnectionError, KeyError, SlumberHttpBaseException, Timeout)
+
+
+class EnterpriseLearnerContext(object):
+    """
+    Enterprise learner data and catalog membership of a learner, loaded at most once per request.
+
+    Attributes:
+        remote_calls (int): Number of Enterprise API lookups made through the context.
+        remote_calls_saved (int): Number of lookups answered by the context without calling the Enterprise API.
+    """
+
+    def __init__(self, site, user):
+        self.site = site
+        self.user = user
+        self.remote_calls = 0
+        self.remote_calls_saved = 0
+        self._learner_data = None
+        self._catalog_membership = {}
+
+    def _record_remote_call(self):
+        self.remote_calls += 1
+        monitoring_utils.set_custom_metric('enterprise_context_remote_calls', self.remote_calls)
+
+    def _record_remote_call_saved(self):
+        self.remote_calls_saved += 1
+        monitoring_utils.set_custom_metric('enterprise_context_remote_calls_saved', self.remote_calls_saved)
+
+    @staticmethod
+    def _get_result(result):
+        value, exc = result
+        if exc is not None:
+            raise exc
+        return value
+
+    def get_learner_data(self):
+        """
+        Returns the response of fetch_enterprise_learner_data for the learner.
+
+        Raises:
+            The error raised by the Enterprise API call, every time the learner data is read.
+        """
+        if self._learner_data is None:
+            self._record_remote_call()
+            try:
+                self._learner_data = (fetch_enterprise_learner_data(self.site, self.user), None)
+            except ENTERPRISE_API_ERRORS as exc:
+                self._learner_data = (None, exc)
+        else:
+            self._record_remote_call_saved()
+
+        return self._get_result(self._learner_data)
+
+    @staticmethod
+    def _get_catalog_membership_key(course_run_ids, enterprise_customer_uuid, enterprise_customer_catalog_uuid):
+        return tuple(sorted(course_run_ids)), enterprise_customer_uuid, enterprise_customer_catalog_uuid
+
+    def _load_catalog_membership(self, key, course_run_ids, enterprise_customer_uuid,
+                                 enterprise_customer_catalog_uuid):
+        self._record_remote_call()
+        try:
+            result = (
+                catalog_contains_course_runs(
+                    self.site,
+                    course_run_ids,
+                    enterprise_customer_uuid,
+                    enterprise_customer_catalog_uuid=enterprise_customer_catalog_uuid
+                ),
+                None
+            )
+        except ENTERPRISE_API_ERRORS as exc:
+            result = (None, exc)
+        self._catalog_membership[key] = result
+        return result
+
+    def prefetch_catalog_membership(self, course_run_ids, catalogs):
+        """
+        Loads the membership of the course runs in every candidate catalog, looking up each catalog only once.
+
+        Arguments:
+            course_run_ids (list): Course run IDs of a basket.
+            catalogs (iterable): (enterprise customer UUID, enterprise customer catalog UUID) pairs.
+        """
+        for enterprise_customer_uuid, enterprise_customer_catalog_uuid in set(catalogs):
+            key = self._get_catalog_membership_key(
+                course_run_ids, enterprise_customer_uuid, enterprise_customer_catalog_uuid
+            )
+            if key not in self._catalog_membership:
+                self._load_catalog_membership(
+                    key, course_run_ids, enterprise_customer_uuid, enterprise_customer_catalog_uuid
+                )
+
+    def catalog_contains_course_runs(self, course_run_ids, enterprise_customer_uuid,
+                                     enterprise_customer_catalog_uuid=None):
+        """
+        Returns whether the course runs are associated with the enterprise customer, or one of its catalogs.
+
+        Raises:
+            The error raised by the Enterprise API call, every time the membership is read.
+        """
+        key = self._get_catalog_membership_key(
+            course_run_ids, enterprise_customer_uuid, enterprise_customer_catalog_uuid
+        )
+        result = self._catalog_membership.get(key)
+        if result is None:
+            result = self._load_catalog_membership(
+                key, course_run_ids, enterprise_customer_uuid, enterprise_customer_catalog_uuid
+            )
+        else:
+            self._record_remote_call_saved()
+
+        return self._get_result(result)
+
+
+def get_enterprise_learner_context(site, user):
+    """
+    Returns the EnterpriseLearnerContext of the learner for the current request, creating it if needed.
+    """
+    request_cache = RequestCache(ENTERPRISE_CONTEXT_CACHE_NAMESPACE)
+    cache_key = (site.domain, user.username)
+    cached_response = request_cache.get_cached_response(cache_key)
+    if cached_response.is_found:
+        return cached_response.value
+
+    context = EnterpriseLearnerContext(site, user)
+    request_cache.set(cache_key, context)
+    return context
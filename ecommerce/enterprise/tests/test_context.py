@@ -0,0 +1,65 @@
+from __future__ import absolute_import
+
+import mock
+from requests.exceptions import ConnectionError
+
+from ecommerce.enterprise.context import EnterpriseLearnerContext, get_enterprise_learner_context
+from ecommerce.tests.factories import UserFactory
+from ecommerce.tests.testcases import TestCase
+
+LEARNER_DATA = {'results': [{'enterprise_customer': {'uuid': 'enterprise-uuid'}}]}
+
+
+class EnterpriseLearnerContextTests(TestCase):
+    def setUp(self):
+        super(EnterpriseLearnerContextTests, self).setUp()
+        self.user = UserFactory()
+
+    def test_get_enterprise_learner_context(self):
+        """ The same context should be returned for a learner during a request. """
+        context = get_enterprise_learner_context(self.site, self.user)
+        self.assertIsInstance(context, EnterpriseLearnerContext)
+        self.assertIs(get_enterprise_learner_context(self.site, self.user), context)
+        self.assertIsNot(get_enterprise_learner_context(self.site, UserFactory()), context)
+
+    @mock.patch('ecommerce.enterprise.context.fetch_enterprise_learner_data', return_value=LEARNER_DATA)
+    def test_get_learner_data(self, mock_fetch):
+        """ Learner data should be fetched once, and the lookups saved should be reported. """
+        context = EnterpriseLearnerContext(self.site, self.user)
+        with mock.patch('ecommerce.enterprise.context.monitoring_utils.set_custom_metric') as mock_metric:
+            for __ in range(3):
+                self.assertEqual(context.get_learner_data(), LEARNER_DATA)
+
+        mock_fetch.assert_called_once_with(self.site, self.user)
+        self.assertEqual((context.remote_calls, context.remote_calls_saved), (1, 2))
+        mock_metric.assert_called_with('enterprise_context_remote_calls_saved', 2)
+
+    @mock.patch('ecommerce.enterprise.context.fetch_enterprise_learner_data', side_effect=ConnectionError)
+    def test_get_learner_data_error(self, mock_fetch):
+        """ A failure to fetch learner data should be raised to every reader without calling the API again. """
+        context = EnterpriseLearnerContext(self.site, self.user)
+        for __ in range(2):
+            with self.assertRaises(ConnectionError):
+                context.get_learner_data()
+
+        self.assertEqual(mock_fetch.call_count, 1)
+
+    @mock.patch('ecommerce.enterprise.context.catalog_contains_course_runs', return_value=True)
+    def test_catalog_contains_course_runs(self, mock_contains):
+        """ Membership should be looked up once per catalog, including catalogs prefetched together. """
+        context = EnterpriseLearnerContext(self.site, self.user)
+        course_run_ids = ['course-v1:a+b+c', 'course-v1:d+e+f']
+        context.prefetch_catalog_membership(
+            course_run_ids, [('enterprise-uuid', 'catalog-1'), ('enterprise-uuid', 'catalog-2')] * 2
+        )
+        self.assertEqual(mock_contains.call_count, 2)
+
+        self.assertTrue(context.catalog_contains_course_runs(course_run_ids[::-1], 'enterprise-uuid', 'catalog-1'))
+        self.assertTrue(context.catalog_contains_course_runs(course_run_ids, 'enterprise-uuid', 'catalog-2'))
+        self.assertEqual(mock_contains.call_count, 2)
+
+        self.assertTrue(context.catalog_contains_course_runs(course_run_ids, 'enterprise-uuid', 'catalog-3'))
+        mock_contains.assert_called_with(
+            self.site, course_run_ids, 'enterprise-uuid', enterprise_customer_catalog_uuid='catalog-3'
+        )
+        self.assertEqual((context.remote_calls, context.remote_calls_saved), (3, 2))
@@ -248,7 +248,7 @@ class EnterpriseUtilsTests(EnterpriseServiceMockMixin, TestCase):
         mock_get_jwt_uuid.return_value = 'my-uuid'
         assert get_enterprise_id_for_user('some-site', self.learner) == 'my-uuid'
 
-    @patch('ecommerce.enterprise.utils.fetch_enterprise_learner_data')
+    @patch('ecommerce.enterprise.context.fetch_enterprise_learner_data')
     @patch('ecommerce.enterprise.utils.get_enterprise_id_for_current_request_user_from_jwt')
     def test_get_enterprise_id_for_user_fetch_learner_data_has_uuid(self, mock_get_jwt_uuid, mock_fetch):
         """
@@ -265,9 +265,9 @@ class EnterpriseUtilsTests(EnterpriseServiceMockMixin, TestCase):
                 }
             ]
         }
-        assert get_enterprise_id_for_user('some-site', self.learner) == 'my-uuid'
+        assert get_enterprise_id_for_user(self.site, self.learner) == 'my-uuid'
 
-    @patch('ecommerce.enterprise.utils.fetch_enterprise_learner_data')
+    @patch('ecommerce.enterprise.context.fetch_enterprise_learner_data')
     @patch('ecommerce.enterprise.utils.get_enterprise_id_for_current_request_user_from_jwt')
     def test_get_enterprise_id_for_user_fetch_errors(self, mock_get_jwt_uuid, mock_fetch):
         """
@@ -277,9 +277,9 @@ class EnterpriseUtilsTests(EnterpriseServiceMockMixin, TestCase):
         mock_get_jwt_uuid.return_value = None
         mock_fetch.side_effect = [KeyError]
 
-        assert get_enterprise_id_for_user('some-site', self.learner) is None
+        assert get_enterprise_id_for_user(self.site, self.learner) is None
 
-    @patch('ecommerce.enterprise.utils.fetch_enterprise_learner_data')
+    @patch('ecommerce.enterprise.context.fetch_enterprise_learner_data')
     @patch('ecommerce.enterprise.utils.get_enterprise_id_for_current_request_user_from_jwt')
     def test_get_enterprise_id_for_user_no_uuid_in_response(self, mock_get_jwt_uuid, mock_fetch):
         """
@@ -290,7 +290,7 @@ class EnterpriseUtilsTests(EnterpriseServiceMockMixin, TestCase):
         mock_fetch.return_value = {
             'results': []
         }
-        assert get_enterprise_id_for_user('some-site', self.learner) is None
+        assert get_enterprise_id_for_user(self.site, self.learner) is None
 
     def test_get_enterprise_customer_catalogs(self):
         """
@@ -26,7 +26,7 @@ from slumber.exceptions import SlumberHttpBaseException
 
 from ecommerce.core.constants import SYSTEM_ENTERPRISE_LEARNER_ROLE
 from ecommerce.core.utils import deprecated_traverse_pagination
-from ecommerce.enterprise.api import fetch_enterprise_learner_data
+from ecommerce.enterprise.context import get_enterprise_learner_context
 from ecommerce.enterprise.exceptions import EnterpriseDoesNotExist
 from ecommerce.extensions.offer.models import OFFER_PRIORITY_ENTERPRISE
 
@@ -598,7 +598,7 @@ def get_enterprise_id_for_user(site, user):
         return enterprise_from_jwt
 
     try:
-        enterprise_learner_response = fetch_enterprise_learner_data(site, user)
+        enterprise_learner_response = get_enterprise_learner_context(site, user).get_learner_data()
     except (ConnectionError, KeyError, SlumberHttpBaseException, Timeout) as exc:
         logging.exception('Unable to retrieve enterprise learner data for the user!'
                           'User: %s, Exception: %s', user, exc)
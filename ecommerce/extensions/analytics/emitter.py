@@ -0,0 +1,145 @@
+"""
+Buffered emission of Segment events.
+
+Events tracked while a request is processed are collected in a buffer, with the tracking context of each user built
+once, and handed to the Segment client of their site after the response is ready. The Segment client queues them
+and uploads them in batches from its own background thread. Events dropped because a buffer or a client queue is full
+are counted per process, and reported as custom metrics.
+
+For tests, the SEGMENT_EVENT_FILE_SINK setting names a file to which events are appended as JSON lines, instead of
+being sent to Segment.
+"""
+from __future__ import absolute_import
+
+import json
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+from edx_django_utils import monitoring as monitoring_utils
+from edx_django_utils.cache import RequestCache
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_EVENT_BUFFER_NAMESPACE = 'analytics.segment_events'
+SEGMENT_EVENT_BUFFER_KEY = 'buffer'
+
+# Reasons for which events are dropped
+BUFFER_FULL = 'buffer_full'
+QUEUE_FULL = 'queue_full'
+
+dropped_event_counts = Counter()
+_dropped_event_counts_lock = threading.Lock()
+_file_sink_lock = threading.Lock()
+
+
+def record_dropped_event(event, reason):
+    """
+    Counts an event dropped for the given reason.
+    """
+    with _dropped_event_counts_lock:
+        dropped_event_counts[reason] += 1
+    logger.warning('Segment event [%s] was dropped: %s.', event, reason)
+
+
+def write_segment_event_to_file(path, site, user_tracking_id, event, properties, context):
+    """
+    Appends an event to the file sink, as a line of JSON.
+    """
+    line = json.dumps({
+        'site': site.domain,
+        'user_id': user_tracking_id,
+        'event': event,
+        'properties': properties,
+        'context': context,
+    }, default=str, sort_keys=True)
+
+    with _file_sink_lock:
+        with open(path, 'a') as sink:
+            sink.write(line + '\n')
+
+
+def emit_segment_event(site, user_tracking_id, event, properties, context):
+    """
+    Hands an event to the file sink, if one is set, or else to the Segment client of the site.
+
+    Returns:
+        (success, msg): Tuple indicating the success of enqueuing the event on the message queue.
+    """
+    file_sink = settings.SEGMENT_EVENT_FILE_SINK
+    if file_sink:
+        write_segment_event_to_file(file_sink, site, user_tracking_id, event, properties, context)
+        return True, 'Event [{event}] was written to the file sink.'.format(event=event)
+
+    # The client adds its own entries to the context, which may be shared by several events.
+    result = site.siteconfiguration.segment_client.track(user_tracking_id, event, properties, context=dict(context))
+    if not result[0]:
+        record_dropped_event(event, QUEUE_FULL)
+    return result
+
+
+class SegmentEventBuffer(object):
+    """
+    Events tracked during a request, and the tracking context of each of their users.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.events = []
+        self.contexts = {}
+        self.dropped = 0
+
+    def add(self, site, user_tracking_id, event, properties, context):
+        """
+        Adds an event to the buffer, unless it is full.
+
+        Returns:
+            (success, msg): Tuple indicating whether the event was buffered.
+        """
+        if len(self.events) >= self.max_size:
+            self.dropped += 1
+            record_dropped_event(event, BUFFER_FULL)
+            return False, 'Event [{event}] was NOT buffered because the buffer is full.'.format(event=event)
+
+        self.events.append((site, user_tracking_id, event, properties, context))
+        return True, 'Event [{event}] was buffered.'.format(event=event)
+
+    def flush(self):
+        """
+        Emits the buffered events, in the order they were tracked.
+        """
+        events, self.events = self.events, []
+        for site, user_tracking_id, event, properties, context in events:
+            emit_segment_event(site, user_tracking_id, event, properties, context)
+
+        monitoring_utils.set_custom_metric('ecommerce_segment_events_emitted', len(events))
+        if self.dropped:
+            monitoring_utils.set_custom_metric('ecommerce_segment_events_dropped', self.dropped)
+
+
+def get_segment_event_buffer():
+    """
+    Returns the SegmentEventBuffer of the current request, or None outside of a request.
+    """
+    cached_response = RequestCache(SEGMENT_EVENT_BUFFER_NAMESPACE).get_cached_response(SEGMENT_EVENT_BUFFER_KEY)
+    return cached_response.value if cached_response.is_found else None
+
+
+def start_segment_event_buffer():
+    """
+    Starts buffering the events tracked in the current request.
+    """
+    RequestCache(SEGMENT_EVENT_BUFFER_NAMESPACE).set(
+        SEGMENT_EVENT_BUFFER_KEY, SegmentEventBuffer(settings.SEGMENT_EVENT_BUFFER_SIZE)
+    )
+
+
+def flush_segment_event_buffer():
+    """
+    Stops buffering the events tracked in the current request, and emits those already buffered.
+    """
+    segment_event_buffer = get_segment_event_buffer()
+    if segment_event_buffer is not None:
+        RequestCache(SEGMENT_EVENT_BUFFER_NAMESPACE).delete(SEGMENT_EVENT_BUFFER_KEY)
+        segment_event_buffer.flush()
@@ -5,6 +5,11 @@ from __future__ import absolute_import
 
 import logging
 
+from django.conf import settings
+from edx_django_utils.cache import TieredCache
+
+from ecommerce.core.utils import get_cache_key
+from ecommerce.extensions.analytics.emitter import flush_segment_event_buffer, start_segment_event_buffer
 from ecommerce.extensions.analytics.utils import get_google_analytics_client_id
 
 logger = logging.getLogger(__name__)
@@ -17,6 +22,9 @@ class TrackingMiddleware(object):
         2) extracts the LMS user_id
         3) updates the user if necessary.
 
+    The GA client id and LMS user_id seen for each user are cached, so requests that bring nothing new skip the
+    checks, including the social auth lookup made for users without an LMS user_id. Only changed fields are written.
+
     Side effect:
         If the LMS user_id cannot be found, writes custom metrics to record this fact.
 
@@ -25,18 +33,52 @@ class TrackingMiddleware(object):
     def process_request(self, request):
         user = request.user
         if user.is_authenticated():
-            tracking_context = user.tracking_context or {}
+            ga_client_id = get_google_analytics_client_id(request)
+
+            cache_key = get_cache_key(tracking_context_user_id=user.id)
+            fingerprint_cached_response = TieredCache.get_cached_response(cache_key)
+            if fingerprint_cached_response.is_found and fingerprint_cached_response.value == (
+                    ga_client_id, user.lms_user_id):
+                return
 
             # Check for the GA client id
+            tracking_context = user.tracking_context or {}
             old_client_id = tracking_context.get('ga_client_id')
-            ga_client_id = get_google_analytics_client_id(request)
             if ga_client_id and ga_client_id != old_client_id:
                 tracking_context['ga_client_id'] = ga_client_id
                 user.tracking_context = tracking_context
-                user.save()
+                user.save(update_fields=['tracking_context'])
 
             # If the user does not already have an LMS user id, add it
             called_from = u'middleware with request path: {request}, referrer: {referrer}'.format(
                 request=request.get_full_path(),
                 referrer=request.META.get('HTTP_REFERER'))
             user.add_lms_user_id('ecommerce_missing_lms_user_id_middleware', called_from)
+
+            # A missing LMS user_id is only cached if it was allowed. Once the LMS user_id is added to the user,
+            # the fingerprint no longer matches, and the user is checked again.
+            TieredCache.set_all_tiers(
+                cache_key, (ga_client_id, user.lms_user_id), settings.TRACKING_CONTEXT_CACHE_TIMEOUT
+            )
+
+
+class SegmentEventBufferMiddleware(object):
+    """
+    Middleware that buffers the Segment events tracked during a request, and emits them after the response, or
+    after the view raised an exception.
+
+    Note:
+        This middleware depends on "edx_django_utils.cache.middleware.RequestCacheMiddleware" middleware
+        So it must be added after that middleware in django settings files. Its process_exception then runs
+        before the request cache, and the buffer in it, is cleared.
+    """
+
+    def process_request(self, request):  # pylint: disable=unused-argument
+        start_segment_event_buffer()
+
+    def process_response(self, request, response):  # pylint: disable=unused-argument
+        flush_segment_event_buffer()
+        return response
+
+    def process_exception(self, request, exception):  # pylint: disable=unused-argument
+        flush_segment_event_buffer()
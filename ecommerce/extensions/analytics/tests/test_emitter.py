@@ -0,0 +1,110 @@
+from __future__ import absolute_import
+
+import json
+import os
+import tempfile
+
+import mock
+from django.http import HttpResponse
+from django.test import override_settings
+from django.test.client import RequestFactory
+
+from analytics import Client
+from ecommerce.extensions.analytics import emitter
+from ecommerce.extensions.analytics.middleware import SegmentEventBufferMiddleware
+from ecommerce.extensions.analytics.utils import track_segment_event
+from ecommerce.tests.testcases import TestCase
+
+
+class SegmentEventBufferTests(TestCase):
+    """ Tests for the buffering of Segment events. """
+
+    def setUp(self):
+        super(SegmentEventBufferTests, self).setUp()
+        self.site_configuration.segment_key = 'fake-key'
+        self.site_configuration.save()
+        self.user = self.create_user(tracking_context={'ga_client_id': 'test-client-id', 'lms_ip': '18.0.0.1'})
+        self.middleware = SegmentEventBufferMiddleware()
+        self.request = RequestFactory().get('/')
+
+    def test_events_emitted_after_response(self):
+        """ Verify events tracked in a request are emitted once the response is ready, with a context built once. """
+        with mock.patch.object(Client, 'track', return_value=(True, '')) as mock_track:
+            with mock.patch(
+                'ecommerce.extensions.analytics.utils.parse_tracking_context',
+                return_value=(self.user.lms_user_id, 'test-client-id', '18.0.0.1')
+            ) as mock_parse_tracking_context:
+                self.middleware.process_request(self.request)
+                track_segment_event(self.site, self.user, 'foo', {'key': 'value'})
+                track_segment_event(self.site, self.user, 'bar', {})
+                self.assertFalse(mock_track.called)
+
+                self.middleware.process_response(self.request, HttpResponse())
+
+        self.assertEqual(mock_parse_tracking_context.call_count, 1)
+        self.assertEqual([call[0][1] for call in mock_track.call_args_list], ['foo', 'bar'])
+        self.assertEqual(mock_track.call_args[1]['context']['Google Analytics'], {'clientId': 'test-client-id'})
+        self.assertIsNone(emitter.get_segment_event_buffer())
+
+    def test_events_emitted_after_exception(self):
+        """ Verify events tracked in a request are emitted if the view raises an exception. """
+        with mock.patch.object(Client, 'track', return_value=(True, '')) as mock_track:
+            self.middleware.process_request(self.request)
+            track_segment_event(self.site, self.user, 'foo', {})
+            self.assertFalse(mock_track.called)
+
+            self.assertIsNone(self.middleware.process_exception(self.request, ValueError()))
+
+        self.assertEqual([call[0][1] for call in mock_track.call_args_list], ['foo'])
+        self.assertIsNone(emitter.get_segment_event_buffer())
+
+    def test_event_emitted_outside_of_request(self):
+        """ Verify events tracked outside of a request are emitted immediately. """
+        with mock.patch.object(Client, 'track', return_value=(True, '')) as mock_track:
+            self.assertEqual(track_segment_event(self.site, self.user, 'foo', {}), (True, ''))
+        self.assertTrue(mock_track.called)
+
+    @override_settings(SEGMENT_EVENT_BUFFER_SIZE=1)
+    def test_full_buffer(self):
+        """ Verify events tracked once the buffer is full are dropped, and counted. """
+        dropped = emitter.dropped_event_counts[emitter.BUFFER_FULL]
+
+        with mock.patch.object(Client, 'track', return_value=(True, '')) as mock_track:
+            self.middleware.process_request(self.request)
+            self.assertTrue(track_segment_event(self.site, self.user, 'foo', {})[0])
+            self.assertFalse(track_segment_event(self.site, self.user, 'bar', {})[0])
+            self.middleware.process_response(self.request, HttpResponse())
+
+        self.assertEqual(mock_track.call_count, 1)
+        self.assertEqual(emitter.dropped_event_counts[emitter.BUFFER_FULL], dropped + 1)
+
+    def test_full_queue(self):
+        """ Verify events rejected by the Segment client are counted. """
+        dropped = emitter.dropped_event_counts[emitter.QUEUE_FULL]
+
+        with mock.patch.object(Client, 'track', return_value=(False, 'queue is full')):
+            self.assertEqual(track_segment_event(self.site, self.user, 'foo', {}), (False, 'queue is full'))
+
+        self.assertEqual(emitter.dropped_event_counts[emitter.QUEUE_FULL], dropped + 1)
+
+    def test_file_sink(self):
+        """ Verify events are written to the file sink, if one is set, instead of being sent to Segment. """
+        file_descriptor, path = tempfile.mkstemp()
+        os.close(file_descriptor)
+        self.addCleanup(os.remove, path)
+
+        with override_settings(SEGMENT_EVENT_FILE_SINK=path):
+            with mock.patch.object(Client, 'track') as mock_track:
+                self.middleware.process_request(self.request)
+                track_segment_event(self.site, self.user, 'foo', {'key': 'value'})
+                track_segment_event(self.site, self.user, 'bar', {})
+                self.middleware.process_response(self.request, HttpResponse())
+
+        self.assertFalse(mock_track.called)
+        with open(path) as sink:
+            events = [json.loads(line) for line in sink]
+        self.assertEqual([event['event'] for event in events], ['foo', 'bar'])
+        self.assertEqual(events[0]['properties'], {'key': 'value'})
+        self.assertEqual(events[0]['user_id'], self.user.lms_user_id)
+        self.assertEqual(events[0]['site'], self.site.domain)
+        self.assertEqual(events[0]['context']['ip'], '18.0.0.1')
@@ -165,3 +165,35 @@ class TrackingMiddlewareTests(TestCase):
 
         same_user = User.objects.get(id=user.id)
         self.assertIsNone(same_user.lms_user_id)
+
+    def test_unchanged_user_not_saved(self):
+        """ Test that middleware makes no queries for a user whose GA client id and LMS user_id were seen before. """
+        self._assert_ga_client_id('test-client-id')
+
+        with self.assertNumQueries(0):
+            self._assert_ga_client_id('test-client-id')
+
+    def test_only_tracking_context_saved(self):
+        """ Test that middleware saves only the tracking context of the user. """
+        self.user.full_name = 'Unsaved Name'
+        self._assert_ga_client_id('test-client-id')
+
+        same_user = User.objects.get(id=self.user.id)
+        self.assertEqual(same_user.tracking_context['ga_client_id'], 'test-client-id')
+        self.assertNotEqual(same_user.full_name, 'Unsaved Name')
+
+    @override_switch(ALLOW_MISSING_LMS_USER_ID, active=True)
+    def test_missing_lms_user_id_cached(self):
+        """ Test that middleware does not look for the LMS user_id again once it was found to be missing. """
+        user = self.create_user(lms_user_id=None)
+        same_user = User.objects.get(id=user.id)
+        self._process_request(same_user)
+
+        with self.assertNumQueries(0):
+            self._process_request(same_user)
+
+        # The user is checked again once it has an LMS user_id.
+        same_user.lms_user_id = 13579
+        self.request_factory.cookies['_ga'] = 'GA1.2.test-client-id'
+        self._process_request(same_user)
+        self.assertEqual(User.objects.get(id=user.id).tracking_context['ga_client_id'], 'test-client-id')
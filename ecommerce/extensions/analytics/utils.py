@@ -7,6 +7,7 @@ from functools import wraps
 from six.moves.urllib.parse import urlunsplit  # pylint: disable=import-error
 
 from ecommerce.courses.utils import mode_for_product
+from ecommerce.extensions.analytics.emitter import emit_segment_event, get_segment_event_buffer
 
 logger = logging.getLogger(__name__)
 
@@ -130,6 +131,8 @@ def prepare_analytics_data(user, segment_key):
 def track_segment_event(site, user, event, properties):
     """ Fire a tracking event via Segment.
 
+    Within a request, the event is buffered, and emitted after the response.
+
     Args:
         site (Site): Site whose Segment client should be used.
         user (User): User to which the event should be associated.
@@ -150,7 +153,22 @@ def track_segment_event(site, user, event, properties):
         logger.debug(msg)
         return False, msg
 
-    user_tracking_id, ga_client_id, lms_ip = parse_tracking_context(user, usage=event)
+    segment_event_buffer = get_segment_event_buffer()
+    if segment_event_buffer is None:
+        user_tracking_id, context = _build_segment_context(site, user, event)
+        return emit_segment_event(site, user_tracking_id, event, properties, context)
+
+    # Within a request, the context of each user is built once, and events are emitted after the response.
+    context_key = (site.id, user.id)
+    if context_key not in segment_event_buffer.contexts:
+        segment_event_buffer.contexts[context_key] = _build_segment_context(site, user, event)
+    user_tracking_id, context = segment_event_buffer.contexts[context_key]
+    return segment_event_buffer.add(site, user_tracking_id, event, properties, context)
+
+
+def _build_segment_context(site, user, usage):
+    """ Returns the tracking id of the user, and the context of the Segment events of the user on the site. """
+    user_tracking_id, ga_client_id, lms_ip = parse_tracking_context(user, usage=usage)
     # construct a URL, so that hostname can be sent to GA.
     # For now, send a dummy value for path.  Segment parses the URL and sends
     # the host and path separately. When needed, the path can be fetched by adding:
@@ -171,7 +189,7 @@ def track_segment_event(site, user, event, properties):
             'url': page,
         }
     }
-    return site.siteconfiguration.segment_client.track(user_tracking_id, event, properties, context=context)
+    return user_tracking_id, context
 
 
 def translate_basket_line_for_segment(line):
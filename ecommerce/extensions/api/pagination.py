@@ -1,6 +1,15 @@
 from __future__ import absolute_import
 
+import base64
+import json
+
+from django.db.models import Q
 from edx_rest_framework_extensions.paginators import DefaultPagination
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
 from rest_framework_datatables.pagination import DatatablesPageNumberPagination
 
 
@@ -14,3 +23,90 @@ class PageNumberPagination(DatatablesPageNumberPagination):
 
 class DatatablesDefaultPagination(DefaultPagination, PageNumberPagination):
     pass
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginates a queryset by the values of its ordering fields instead of by offset.
+
+    The cursor of the next page holds the ordering values of the last item of the current page, so every page is
+    fetched with an indexed range condition and no COUNT query, no matter how deep into the results it is. The
+    ordering fields must be ascending and, together, unique for every item of the queryset.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = PageNumberPagination.max_page_size
+
+    def __init__(self, ordering):
+        self.ordering = tuple(ordering)
+        self.base_url = None
+        self.page = []
+        self.next_position = None
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def encode_cursor(self, position):
+        return base64.urlsafe_b64encode(json.dumps(position).encode('utf-8')).decode('ascii')
+
+    def get_position(self, item):
+        if isinstance(item, dict):
+            return [item[field] for field in self.ordering]
+        return [getattr(item, field) for field in self.ordering]
+
+    def get_position_filter(self, position):
+        """ Return a filter that matches the items ordered after the given position. """
+        position_filter = Q()
+        for index, field in enumerate(self.ordering):
+            equal_fields = dict(zip(self.ordering[:index], position[:index]))
+            equal_fields[field + '__gt'] = position[index]
+            position_filter |= Q(**equal_fields)
+        return position_filter
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.get_position_filter(position))
+
+        # Fetch one extra item to find out whether there is a next page.
+        results = list(queryset[:page_size + 1])
+        self.page = results[:page_size]
+        self.next_position = self.get_position(self.page[-1]) if len(results) > page_size else None
+        return self.page
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
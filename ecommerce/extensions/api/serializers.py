@@ -2,7 +2,7 @@
 from __future__ import absolute_import, unicode_literals
 
 import logging
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
 from datetime import timedelta
 from decimal import Decimal
 
@@ -11,7 +11,7 @@ import waffle
 from dateutil.parser import parse
 from django.contrib.auth import get_user_model
 from django.db import transaction
-from django.db.models import Q
+from django.db.models import Count, Min, Prefetch, Q, Sum
 from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 from oscar.core.loading import get_class, get_model
@@ -43,6 +43,7 @@ from ecommerce.extensions.offer.utils import (
     send_assigned_offer_reminder_email,
     send_revoked_offer_email
 )
+from ecommerce.extensions.voucher.utils import get_best_prefetched_offer
 from ecommerce.invoice.models import Invoice
 
 logger = logging.getLogger(__name__)
@@ -53,6 +54,7 @@ Benefit = get_model('offer', 'Benefit')
 BillingAddress = get_model('order', 'BillingAddress')
 Catalog = get_model('catalogue', 'Catalog')
 Category = get_model('catalogue', 'Category')
+CouponVouchers = get_model('voucher', 'CouponVouchers')
 Line = get_model('order', 'Line')
 OfferAssignment = get_model('offer', 'OfferAssignment')
 Order = get_model('order', 'Order')
@@ -67,6 +69,7 @@ Voucher = get_model('voucher', 'Voucher')
 VoucherApplication = get_model('voucher', 'VoucherApplication')
 User = get_user_model()
 
+CODE_USAGE_BATCH_SIZE = 500
 COURSE_DETAIL_VIEW = 'api:v2:course-detail'
 PRODUCT_DETAIL_VIEW = 'api:v2:product-detail'
 
@@ -689,12 +692,92 @@ class VoucherSerializer(serializers.ModelSerializer):
         )
 
 
+def _get_max_coupon_usage(voucher, offer):
+    """Helper method to return the maximum number of redemptions of a voucher. """
+    if voucher.usage == Voucher.SINGLE_USE:
+        return 1
+    elif offer.max_global_applications is None:
+        return OFFER_MAX_USES_DEFAULT
+    return offer.max_global_applications
+
+
+def get_code_usage_data(codes):
+    """
+    Collect the redemption and assignment counts shown for coupon codes with a fixed number of queries per batch.
+
+    Arguments:
+        codes (list): Voucher codes.
+
+    Returns:
+        dict: Holds the `redemptions` ({'used', 'total'}) of every voucher keyed on code, and the number of active
+            `assignments` and of `applications` keyed on (code, email) pairs.
+    """
+    ConditionalOffer = get_model('offer', 'ConditionalOffer')
+    code_usage_data = {
+        'redemptions': {},
+        'assignments': defaultdict(int),
+        'applications': defaultdict(int),
+    }
+    codes = list(OrderedDict.fromkeys(code for code in codes if code))
+    for start in range(0, len(codes), CODE_USAGE_BATCH_SIZE):
+        batch = codes[start:start + CODE_USAGE_BATCH_SIZE]
+
+        vouchers = Voucher.objects.filter(code__in=batch).prefetch_related(
+            Prefetch('offers', queryset=ConditionalOffer.objects.select_related('condition'))
+        )
+        for voucher in vouchers:
+            code_usage_data['redemptions'][voucher.code] = {
+                'used': voucher.num_orders,
+                'total': _get_max_coupon_usage(voucher, get_best_prefetched_offer(voucher)),
+            }
+
+        assignments = OfferAssignment.objects.filter(
+            code__in=batch,
+            status__in=[OFFER_ASSIGNED, OFFER_ASSIGNMENT_EMAIL_PENDING, OFFER_ASSIGNMENT_EMAIL_BOUNCED],
+        ).values('code', 'user_email').annotate(count=Count('id')).order_by()
+        for assignment in assignments:
+            code_usage_data['assignments'][(assignment['code'], assignment['user_email'])] += assignment['count']
+            code_usage_data['assignments'][(assignment['code'], None)] += assignment['count']
+
+        applications = VoucherApplication.objects.filter(voucher__code__in=batch).values(
+            'voucher__code', 'user__email'
+        ).annotate(count=Count('id')).order_by()
+        for application in applications:
+            code_usage_data['applications'][(application['voucher__code'], application['user__email'])] += \
+                application['count']
+
+    return code_usage_data
+
+
+class CodeUsageBulkSerializer(serializers.ListSerializer):  # pylint: disable=abstract-method
+    """
+    Serializes a page of code usages with a fixed number of queries, regardless of the size of the coupon.
+    """
+
+    def to_representation(self, data):
+        usages = list(data.all() if hasattr(data, 'all') else data)
+        self.child.code_usage_data = get_code_usage_data([self.child.get_code(usage) for usage in usages])
+        return super(CodeUsageBulkSerializer, self).to_representation(usages)
+
+
 class CodeUsageSerializer(serializers.Serializer):  # pylint: disable=abstract-method
     code = serializers.SerializerMethodField()
     assigned_to = serializers.SerializerMethodField()
     redeem_url = serializers.SerializerMethodField()
     redemptions = serializers.SerializerMethodField()
 
+    def __init__(self, *args, **kwargs):
+        super(CodeUsageSerializer, self).__init__(*args, **kwargs)
+        self.code_usage_data = None
+
+    def _get_code_usage_data(self, code):
+        """
+        Return the usage data collected for the list being serialized, or collect it for a single code.
+        """
+        if self.code_usage_data is None or code not in self.code_usage_data['redemptions']:
+            return get_code_usage_data([code])
+        return self.code_usage_data
+
     def get_code(self, obj):
         return obj.get('code')
 
@@ -706,31 +789,17 @@ class CodeUsageSerializer(serializers.Serializer):  # pylint: disable=abstract-m
         return obj.get('user_email')
 
     def get_redemptions(self, obj):
-        voucher = Voucher.objects.get(code=self.get_code(obj))
-        offer = voucher.best_offer
-        redemption_count = voucher.num_orders
-
-        if voucher.usage == Voucher.SINGLE_USE:
-            max_coupon_usage = 1
-        elif offer.max_global_applications is None:
-            max_coupon_usage = OFFER_MAX_USES_DEFAULT
-        else:
-            max_coupon_usage = offer.max_global_applications
-
-        return {
-            'used': redemption_count,
-            'total': max_coupon_usage,
-        }
+        code = self.get_code(obj)
+        return dict(self._get_code_usage_data(code)['redemptions'][code])
 
     def num_assignments(self, code, user_email=None):
-        offer_assignments = OfferAssignment.objects.filter(
-            code=code,
-            status__in=[OFFER_ASSIGNED, OFFER_ASSIGNMENT_EMAIL_PENDING, OFFER_ASSIGNMENT_EMAIL_BOUNCED],
-        )
-        if user_email:
-            offer_assignments = offer_assignments.filter(user_email=user_email)
+        return self._get_code_usage_data(code)['assignments'][(code, user_email or None)]
+
+    def num_applications(self, code, user_email):
+        return self._get_code_usage_data(code)['applications'][(code, user_email)]
 
-        return offer_assignments.count()
+    class Meta(object):
+        list_serializer_class = CodeUsageBulkSerializer
 
 
 class NotAssignedCodeUsageSerializer(CodeUsageSerializer):  # pylint: disable=abstract-method
@@ -765,10 +834,7 @@ class PartialRedeemedCodeUsageSerializer(CodeUsageSerializer):  # pylint: disabl
             return super(PartialRedeemedCodeUsageSerializer, self).get_redemptions(obj)
 
         num_assignments = self.num_assignments(code=self.get_code(obj), user_email=self.get_assigned_to(obj))
-        num_applications = VoucherApplication.objects.filter(
-            voucher__code=self.get_code(obj),
-            user__email=self.get_assigned_to(obj)
-        ).count()
+        num_applications = self.num_applications(code=self.get_code(obj), user_email=self.get_assigned_to(obj))
         return {'used': num_applications, 'total': num_assignments + num_applications}
 
 
@@ -781,10 +847,7 @@ class RedeemedCodeUsageSerializer(CodeUsageSerializer):  # pylint: disable=abstr
         return obj.get('user__email')
 
     def get_redemptions(self, obj):
-        num_applications = VoucherApplication.objects.filter(
-            voucher__code=self.get_code(obj),
-            user__email=self.get_assigned_to(obj)
-        ).count()
+        num_applications = self.num_applications(code=self.get_code(obj), user_email=self.get_assigned_to(obj))
         return {'used': num_applications, 'total': num_applications}
 
 
@@ -840,6 +903,139 @@ class OfferAssignmentSummarySerializer(serializers.BaseSerializer):  # pylint: d
         return representation
 
 
+def _get_slots_available_for_assignment(usage, num_orders, num_assignments, max_global_applications):
+    """
+    Helper method that mirrors Voucher.slots_available_for_assignment for a voucher with an enterprise offer.
+    """
+    if usage in (Voucher.SINGLE_USE, Voucher.MULTI_USE_PER_CUSTOMER):
+        if num_orders or num_assignments:
+            return 0
+        return max_global_applications or 1
+    return (max_global_applications or OFFER_MAX_USES_DEFAULT) - (num_orders + num_assignments)
+
+
+def get_enterprise_coupon_overview_data(coupons):
+    """
+    Collect the data shown in the enterprise coupon overview for many coupons at once.
+
+    The number of queries is fixed and does not depend on the number of coupons or vouchers.
+
+    Arguments:
+        coupons (iterable): Coupon products.
+
+    Returns:
+        dict: Maps coupon IDs to dicts with the `first_voucher`, `num_codes`, `num_uses`, `num_unassigned` and
+            `errors` of the coupon, and the `max_global_applications` of the first voucher's enterprise offer.
+            `first_voucher_has_enterprise_offer` is False if that value could not be collected.
+    """
+    coupon_ids = [coupon.id for coupon in coupons]
+    if not coupon_ids:
+        return {}
+
+    overview = {
+        coupon_id: {
+            'first_voucher': None,
+            'num_codes': 0,
+            'num_uses': 0,
+            'num_unassigned': 0,
+            'errors': [],
+            'first_voucher_has_enterprise_offer': False,
+            'max_global_applications': None,
+        }
+        for coupon_id in coupon_ids
+    }
+
+    # Codes, redemptions and the first voucher (by primary key, as with vouchers.first()) of every coupon.
+    voucher_totals = CouponVouchers.objects.filter(coupon_id__in=coupon_ids).values('coupon_id').annotate(
+        num_codes=Count('vouchers'),
+        num_uses=Sum('vouchers__num_orders'),
+        first_voucher_id=Min('vouchers__id'),
+    ).order_by()
+    first_voucher_ids = {}
+    for totals in voucher_totals:
+        coupon_data = overview[totals['coupon_id']]
+        coupon_data['num_codes'] += totals['num_codes']
+        coupon_data['num_uses'] += totals['num_uses'] or 0
+        if totals['first_voucher_id'] is not None:
+            first_voucher_ids[totals['coupon_id']] = min(
+                totals['first_voucher_id'], first_voucher_ids.get(totals['coupon_id'], totals['first_voucher_id'])
+            )
+
+    first_vouchers = Voucher.objects.in_bulk(list(first_voucher_ids.values()))
+    for coupon_id, voucher_id in first_voucher_ids.items():
+        overview[coupon_id]['first_voucher'] = first_vouchers[voucher_id]
+
+    # The enterprise offer of every voucher, ordered as in Voucher.enterprise_offer.
+    coupon_vouchers = Voucher.objects.filter(coupon_vouchers__coupon_id__in=coupon_ids)
+    enterprise_offer_rows = Voucher.offers.through.objects.filter(
+        voucher__coupon_vouchers__coupon_id__in=coupon_ids,
+        conditionaloffer__condition__enterprise_customer_uuid__isnull=False,
+    ).values_list(
+        'voucher__coupon_vouchers__coupon_id',
+        'voucher_id',
+        'voucher__code',
+        'voucher__usage',
+        'voucher__num_orders',
+        'conditionaloffer_id',
+        'conditionaloffer__max_global_applications',
+    ).order_by('voucher_id', '-conditionaloffer__priority', 'conditionaloffer_id')
+
+    enterprise_vouchers = OrderedDict()
+    for row in enterprise_offer_rows:
+        enterprise_vouchers.setdefault((row[0], row[1]), row)
+
+    # Active assignments of every code, counted per enterprise offer.
+    num_assignments = {
+        (assignment['offer_id'], assignment['code']): assignment['num_assignments']
+        for assignment in OfferAssignment.objects.filter(
+            offer_id__in=list({row[5] for row in enterprise_vouchers.values()}),
+            code__in=coupon_vouchers.values('code'),
+        ).exclude(
+            status__in=[OFFER_REDEEMED, OFFER_ASSIGNMENT_REVOKED]
+        ).values('offer_id', 'code').annotate(num_assignments=Count('id')).order_by()
+    }
+
+    for (coupon_id, voucher_id), row in enterprise_vouchers.items():
+        code, usage, num_orders, offer_id, max_global_applications = row[2:]
+        slots_available = _get_slots_available_for_assignment(
+            usage, num_orders, num_assignments.get((offer_id, code), 0), max_global_applications
+        )
+        if slots_available > 0:
+            overview[coupon_id]['num_unassigned'] += slots_available
+        if voucher_id == first_voucher_ids.get(coupon_id):
+            overview[coupon_id]['first_voucher_has_enterprise_offer'] = True
+            overview[coupon_id]['max_global_applications'] = max_global_applications
+
+    offer_assignments_with_error = list(OfferAssignment.objects.filter(
+        code__in=coupon_vouchers.values('code'),
+        status=OFFER_ASSIGNMENT_EMAIL_BOUNCED
+    ))
+    if offer_assignments_with_error:
+        code_coupons = defaultdict(set)
+        for code, coupon_id in Voucher.objects.filter(
+                code__in={assignment.code for assignment in offer_assignments_with_error},
+                coupon_vouchers__coupon_id__in=coupon_ids
+        ).values_list('code', 'coupon_vouchers__coupon_id'):
+            code_coupons[code].add(coupon_id)
+
+        for assignment in offer_assignments_with_error:
+            for coupon_id in code_coupons[assignment.code]:
+                overview[coupon_id]['errors'].append(assignment)
+
+    return overview
+
+
+class EnterpriseCouponOverviewBulkSerializer(serializers.ListSerializer):  # pylint: disable=abstract-method
+    """
+    Serializes many coupons for the enterprise coupon overview with a fixed number of queries.
+    """
+
+    def to_representation(self, data):
+        coupons = list(data.all() if hasattr(data, 'all') else data)
+        self.child.overview_data = get_enterprise_coupon_overview_data(coupons)
+        return super(EnterpriseCouponOverviewBulkSerializer, self).to_representation(coupons)
+
+
 class EnterpriseCouponOverviewListSerializer(serializers.ModelSerializer):
     """
     Serializer for Enterprise Coupons list overview.
@@ -853,65 +1049,62 @@ class EnterpriseCouponOverviewListSerializer(serializers.ModelSerializer):
     start_date = serializers.SerializerMethodField()
     usage_limitation = serializers.SerializerMethodField()
 
+    def __init__(self, *args, **kwargs):
+        super(EnterpriseCouponOverviewListSerializer, self).__init__(*args, **kwargs)
+        self.overview_data = {}
+
+    def _get_overview_data(self, coupon):
+        """
+        Return the overview data of the coupon, collecting it if the coupon was not serialized as part of a list.
+        """
+        if coupon.id not in self.overview_data:
+            self.overview_data.update(get_enterprise_coupon_overview_data([coupon]))
+        return self.overview_data[coupon.id]
+
     def get_num_unassigned(self, coupon):
         """
         Return number of available assignments.
         """
-        all_slots_available = []
-        vouchers = coupon.attr.coupon_vouchers.vouchers.all()
-        for voucher in vouchers:
-            voucher_slots_available = voucher.slots_available_for_assignment
-            if voucher_slots_available > 0:
-                all_slots_available.append(voucher_slots_available)
-
-        return sum(all_slots_available)
+        return self._get_overview_data(coupon)['num_unassigned']
 
     def get_errors(self, coupon):
         """
         Returns a list of OfferAssignment errors associated with coupon.
         """
-        codes = coupon.attr.coupon_vouchers.vouchers.values_list('code', flat=True)
-        offer_assignments_with_error = OfferAssignment.objects.filter(
-            code__in=codes,
-            status=OFFER_ASSIGNMENT_EMAIL_BOUNCED
-        )
-        return OfferAssignmentSerializer(offer_assignments_with_error, many=True).data
+        return OfferAssignmentSerializer(self._get_overview_data(coupon)['errors'], many=True).data
 
     # Max number of codes available (Maximum Coupon Usage).
     def get_max_uses(self, obj):
-        voucher_usage = retrieve_voucher_usage(obj)
-        offer = retrieve_offer(obj)
+        overview_data = self._get_overview_data(obj)
+        voucher_usage = overview_data['first_voucher'].usage
         max_uses_per_code = None
         if voucher_usage == Voucher.SINGLE_USE:
             max_uses_per_code = 1
-        elif offer.max_global_applications:
-            max_uses_per_code = offer.max_global_applications
         else:
-            max_uses_per_code = OFFER_MAX_USES_DEFAULT
+            max_global_applications = overview_data['max_global_applications']
+            if not overview_data['first_voucher_has_enterprise_offer']:
+                max_global_applications = overview_data['first_voucher'].best_offer.max_global_applications
+            max_uses_per_code = max_global_applications or OFFER_MAX_USES_DEFAULT
 
-        return max_uses_per_code * retrieve_quantity(obj)
+        return max_uses_per_code * overview_data['num_codes']
 
     # Redemption count.
     def get_num_uses(self, obj):
-        vouchers = retrieve_all_vouchers(obj)
-        num_uses = 0
-        for voucher in vouchers:
-            num_uses += voucher.num_orders
-        return num_uses
+        return self._get_overview_data(obj)['num_uses']
 
     # Number of codes.
     def get_num_codes(self, obj):
-        return retrieve_quantity(obj)
+        return self._get_overview_data(obj)['num_codes']
 
     # Usage Limitation (Maximum # of usages per code).
     def get_usage_limitation(self, obj):
-        return retrieve_voucher_usage(obj)
+        return self._get_overview_data(obj)['first_voucher'].usage
 
     def get_start_date(self, obj):
-        return retrieve_start_date(obj)
+        return self._get_overview_data(obj)['first_voucher'].start_datetime
 
     def get_end_date(self, obj):
-        return retrieve_end_date(obj)
+        return self._get_overview_data(obj)['first_voucher'].end_datetime
 
     class Meta(object):
         model = Product
@@ -919,6 +1112,7 @@ class EnterpriseCouponOverviewListSerializer(serializers.ModelSerializer):
             'end_date', 'errors', 'id', 'max_uses', 'num_codes', 'num_unassigned',
             'num_uses', 'start_date', 'title', 'usage_limitation'
         )
+        list_serializer_class = EnterpriseCouponOverviewBulkSerializer
 
 
 class EnterpriseCouponSearchSerializer(serializers.Serializer):  # pylint: disable=abstract-method
@@ -3,7 +3,11 @@ from __future__ import absolute_import, unicode_literals
 
 import datetime
 import json
+import logging
+import os
+import time
 from collections import Counter
+from unittest import skipUnless
 from uuid import uuid4
 
 import ddt
@@ -12,7 +16,9 @@ import mock
 import rules
 import six  # pylint: disable=ungrouped-imports
 from django.conf import settings
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils.http import urlencode
 from django.utils.timezone import now
@@ -57,6 +63,8 @@ Product = get_model('catalogue', 'Product')
 Voucher = get_model('voucher', 'Voucher')
 VoucherApplication = get_model('voucher', 'VoucherApplication')
 
+logger = logging.getLogger(__name__)
+
 ENTERPRISE_COUPONS_LINK = reverse('api:v2:enterprise-coupons-list')
 OFFER_ASSIGNMENT_SUMMARY_LINK = reverse('api:v2:enterprise-offer-assignment-summary-list')
 
@@ -900,6 +908,155 @@ class EnterpriseCouponViewSetRbacTests(
             pagination=pagination,
         )
 
+    def test_coupon_codes_detail_with_keyset_pagination(self):
+        """
+        Verify that `/api/v2/enterprise/coupons/{coupon_id}/codes/` endpoint paginates by keyset given a cursor.
+        """
+        coupon_id = self.create_coupon_with_applications(self.data, Voucher.MULTI_USE, 2, 3)
+        endpoint = '/api/v2/enterprise/coupons/{}/codes/?code_filter={}&page_size=4&cursor='.format(
+            coupon_id, VOUCHER_REDEEMED
+        )
+
+        first_page = self.get_response('GET', endpoint).json()
+        self.assertEqual(len(first_page['results']), 4)
+        self.assertNotIn('count', first_page)
+        self.assertIsNotNone(first_page['next'])
+
+        second_page = self.get_response('GET', first_page['next']).json()
+        self.assertEqual(len(second_page['results']), 2)
+        self.assertIsNone(second_page['next'])
+
+        results = first_page['results'] + second_page['results']
+        emails = [result['assigned_to'] for result in results]
+        self.assertEqual(emails, sorted(emails))
+        self.assertEqual(len(set(emails)), 6)
+
+    def test_coupon_codes_detail_with_invalid_cursor(self):
+        coupon_id = self.create_coupon_with_applications(self.data, Voucher.MULTI_USE, 1, 1)
+        response = self.get_response(
+            'GET',
+            '/api/v2/enterprise/coupons/{}/codes/?code_filter={}&cursor=invalid'.format(coupon_id, VOUCHER_REDEEMED)
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def create_coupon_with_code_usages(self, quantity):
+        """
+        Create a multi-use coupon where every code has unassigned, unredeemed, partially redeemed and redeemed usages.
+        """
+        coupon_post_data = dict(
+            self.data, title='coupon-{}'.format(quantity), voucher_type=Voucher.MULTI_USE, quantity=quantity, max_uses=5
+        )
+        coupon_id = self.get_response('POST', ENTERPRISE_COUPONS_LINK, coupon_post_data).json()['coupon_id']
+        for index, voucher in enumerate(Product.objects.get(id=coupon_id).attr.coupon_vouchers.vouchers.all()):
+            partial_user = self.create_user(email='partial{}@example.com'.format(index))
+            self.use_voucher(voucher, partial_user)
+            self.use_voucher(voucher, self.create_user())
+            self.assign_user_to_code(
+                coupon_id, [partial_user.email, 'assigned{}@example.com'.format(index)], [voucher.code]
+            )
+        return coupon_id
+
+    @ddt.data(VOUCHER_NOT_ASSIGNED, VOUCHER_NOT_REDEEMED, VOUCHER_PARTIAL_REDEEMED, VOUCHER_REDEEMED)
+    def test_coupon_codes_detail_query_count(self, code_filter):
+        """
+        Verify the number of queries made by the codes endpoint does not grow with the number of codes.
+        """
+        queries = []
+        for quantity in (1, 4):
+            coupon_id = self.create_coupon_with_code_usages(quantity)
+            with CaptureQueriesContext(connection) as captured:
+                for cursor in ('', '&cursor='):
+                    response = self.get_response(
+                        'GET',
+                        '/api/v2/enterprise/coupons/{}/codes/?code_filter={}&page_size=100{}'.format(
+                            coupon_id, code_filter, cursor
+                        )
+                    )
+                    self.assertEqual(response.status_code, status.HTTP_200_OK)
+            queries.append(len(captured))
+
+        self.assertEqual(queries[0], queries[1])
+
+    def get_not_assigned_codes(self, coupon_id):
+        """
+        Returns the codes listed by the codes endpoint as not assigned.
+        """
+        response = self.get_response(
+            'GET', '/api/v2/enterprise/coupons/{}/codes/?code_filter={}'.format(coupon_id, VOUCHER_NOT_ASSIGNED)
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [result['code'] for result in response.json()['results']]
+
+    def test_not_assigned_codes_without_enterprise_offer(self):
+        """
+        Verify codes of vouchers without an enterprise offer, which have no slots count, are listed as not assigned.
+        """
+        coupon_id = self.get_response('POST', ENTERPRISE_COUPONS_LINK, self.data).json()['coupon_id']
+        voucher = Product.objects.get(id=coupon_id).attr.coupon_vouchers.vouchers.first()
+        self.use_voucher(voucher, self.create_user())
+        voucher.offers.remove(voucher.enterprise_offer)
+        voucher.offers.add(factories.ConditionalOfferFactory(name='Non-enterprise offer'))
+
+        self.assertIsNone(voucher.slots_available_for_assignment)
+        self.assertIn(voucher.code, self.get_not_assigned_codes(coupon_id))
+
+    def test_not_assigned_codes_with_several_enterprise_offers(self):
+        """
+        Verify only the assignments of the first enterprise offer of a voucher are counted against its slots.
+        """
+        coupon_id = self.get_response('POST', ENTERPRISE_COUPONS_LINK, self.data).json()['coupon_id']
+        voucher = Product.objects.get(id=coupon_id).attr.coupon_vouchers.vouchers.first()
+        other_offer = voucher.enterprise_offer
+        other_offer.pk = None
+        other_offer.name = 'Lower priority enterprise offer'
+        other_offer.slug = ''
+        other_offer.priority -= 1
+        other_offer.save()
+        voucher.offers.add(other_offer)
+        OfferAssignment.objects.create(offer=other_offer, code=voucher.code, user_email='other@example.com')
+
+        self.assertEqual(voucher.slots_available_for_assignment, 1)
+        self.assertIn(voucher.code, self.get_not_assigned_codes(coupon_id))
+
+    @skipUnless(os.environ.get('ENTERPRISE_CODES_BENCHMARK'), 'Set ENTERPRISE_CODES_BENCHMARK to run benchmarks.')
+    @ddt.data(VOUCHER_NOT_ASSIGNED, VOUCHER_NOT_REDEEMED, VOUCHER_PARTIAL_REDEEMED, VOUCHER_REDEEMED)
+    def test_coupon_codes_detail_benchmark(self, code_filter):
+        """
+        Time the codes endpoint for a coupon with 50,000 codes, a fifth of which are assigned and a tenth redeemed.
+        """
+        quantity = 50000
+        coupon_id = self.get_response(
+            'POST', ENTERPRISE_COUPONS_LINK, dict(self.data, voucher_type=Voucher.MULTI_USE, quantity=quantity)
+        ).json()['coupon_id']
+        vouchers = list(Product.objects.get(id=coupon_id).attr.coupon_vouchers.vouchers.order_by('id'))
+        offer = vouchers[0].enterprise_offer
+
+        OfferAssignment.objects.bulk_create(
+            OfferAssignment(offer=offer, code=voucher.code, user_email='learner{}@example.com'.format(index % 100))
+            for index, voucher in enumerate(vouchers[:quantity // 5])
+        )
+        users = [self.create_user(email='learner{}@example.com'.format(index)) for index in range(100)]
+        order = factories.OrderFactory()
+        VoucherApplication.objects.bulk_create(
+            VoucherApplication(voucher=voucher, user=users[index % 100], order=order)
+            for index, voucher in enumerate(vouchers[:quantity // 10])
+        )
+        Voucher.objects.filter(id__lte=vouchers[quantity // 10 - 1].id, id__gte=vouchers[0].id).update(num_orders=1)
+
+        endpoint = '/api/v2/enterprise/coupons/{}/codes/?code_filter={}&page_size=100&cursor='.format(
+            coupon_id, code_filter
+        )
+        start = time.time()
+        with CaptureQueriesContext(connection) as captured:
+            response = self.get_response('GET', endpoint)
+        elapsed = time.time() - start
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        logger.info(
+            'Codes endpoint [%s] for a coupon with [%d] codes took [%.3f] seconds and [%d] queries.',
+            code_filter, quantity, elapsed, len(captured)
+        )
+
     def test_unredeemed_filter_email_bounced_codes(self):
         """
         Test that codes with `OFFER_ASSIGNMENT_EMAIL_BOUNCED` error status are shown in unredeemed filter.
@@ -1374,6 +1531,35 @@ class EnterpriseCouponViewSetRbacTests(
 
         self.assertEqual(overview_response, expected_results[0])
 
+    def test_enterprise_coupon_overview_query_count(self):
+        """
+        Verify the number of queries made by the overview does not grow with the number of coupons or codes.
+        """
+        overview_url = reverse(
+            'api:v2:enterprise-coupons-(?P<enterprise-id>.+)/overview-list',
+            kwargs={'enterprise_id': self.data['enterprise_customer']['id']}
+        )
+        coupon_id = self.get_response('POST', ENTERPRISE_COUPONS_LINK, self.data).json()['coupon_id']
+        self.assign_user_to_code(coupon_id, ['user1@example.com'], [])
+
+        with CaptureQueriesContext(connection) as single_coupon_queries:
+            self.get_response('GET', overview_url)
+
+        for quantity in (3, 5):
+            coupon_id = self.get_response(
+                'POST', ENTERPRISE_COUPONS_LINK, dict(self.data, title='coupon-{}'.format(quantity), quantity=quantity)
+            ).json()['coupon_id']
+            self.assign_user_to_code(coupon_id, ['user1@example.com', 'user2@example.com'], [])
+
+        with CaptureQueriesContext(connection) as many_coupon_queries:
+            overview_response = self.get_response_json('GET', overview_url)
+
+        self.assertEqual(overview_response['count'], 3)
+        self.assertEqual(
+            sorted(result['num_unassigned'] for result in overview_response['results']), [1, 1, 3]
+        )
+        self.assertEqual(len(many_coupon_queries), len(single_coupon_queries))
+
     @ddt.data(
         {
             'voucher_type': Voucher.SINGLE_USE,
@@ -5,7 +5,8 @@ import logging
 import six
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
-from django.db.models import Q
+from django.db.models import Case, Count, Exists, F, IntegerField, Min, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
 from django.http import Http404
 from django.shortcuts import get_object_or_404
 from edx_rbac.decorators import permission_required
@@ -26,7 +27,7 @@ from ecommerce.enterprise.utils import (
     get_enterprise_customer_catalogs,
     get_enterprise_customers
 )
-from ecommerce.extensions.api.pagination import DatatablesDefaultPagination
+from ecommerce.extensions.api.pagination import DatatablesDefaultPagination, KeysetPagination
 from ecommerce.extensions.api.serializers import (
     CouponCodeAssignmentSerializer,
     CouponCodeRemindSerializer,
@@ -51,6 +52,9 @@ from ecommerce.extensions.offer.constants import (
     OFFER_ASSIGNED,
     OFFER_ASSIGNMENT_EMAIL_BOUNCED,
     OFFER_ASSIGNMENT_EMAIL_PENDING,
+    OFFER_ASSIGNMENT_REVOKED,
+    OFFER_MAX_USES_DEFAULT,
+    OFFER_REDEEMED,
     VOUCHER_NOT_ASSIGNED,
     VOUCHER_NOT_REDEEMED,
     VOUCHER_PARTIAL_REDEEMED,
@@ -63,6 +67,7 @@ from ecommerce.extensions.voucher.utils import (
 )
 
 logger = logging.getLogger(__name__)
+ConditionalOffer = get_model('offer', 'ConditionalOffer')
 Order = get_model('order', 'Order')
 Line = get_model('basket', 'Line')
 OfferAssignment = get_model('offer', 'OfferAssignment')
@@ -74,6 +79,14 @@ User = get_user_model()
 
 DEPRECATED_COUPON_CATEGORIES = ['Bulk Enrollment']
 
+# Unique ordering of the code usages returned for each code filter, used to paginate them by keyset.
+CODE_USAGE_KEYSET_ORDERING = {
+    VOUCHER_NOT_ASSIGNED: ('code',),
+    VOUCHER_NOT_REDEEMED: ('user_email', 'code'),
+    VOUCHER_PARTIAL_REDEEMED: ('user_email', 'code'),
+    VOUCHER_REDEEMED: ('user__email', 'voucher__code'),
+}
+
 
 class EnterpriseCustomerViewSet(generics.GenericAPIView):
 
@@ -312,6 +325,9 @@ class EnterpriseCouponViewSet(CouponViewSet):
                 },
             ]
         }
+
+        Results are paginated by page number. If the `cursor` query parameter is given (empty for the first page),
+        they are paginated by keyset instead, and the response holds a `next` link rather than a count.
         """
         coupon = self.get_object()
         coupon_vouchers = coupon.attr.coupon_vouchers.vouchers.all()
@@ -340,6 +356,12 @@ class EnterpriseCouponViewSet(CouponViewSet):
             raise serializers.ValidationError('Invalid code_filter specified: {}'.format(code_filter))
 
         if format is None:
+            if KeysetPagination.cursor_query_param in request.query_params:
+                paginator = KeysetPagination(ordering=CODE_USAGE_KEYSET_ORDERING[code_filter])
+                page = paginator.paginate_queryset(queryset, request, view=self)
+                serializer = serializer_class(page, many=True, context={'usage_type': usage_type})
+                return paginator.get_paginated_response(serializer.data)
+
             page = self.paginate_queryset(queryset)
             serializer = serializer_class(page, many=True, context={'usage_type': usage_type})
             return self.get_paginated_response(serializer.data)
@@ -352,38 +374,61 @@ class EnterpriseCouponViewSet(CouponViewSet):
         Returns a queryset containing Vouchers with slots that have not been assigned.
         Unique Vouchers will be included in the final queryset for all types.
         """
-        vouchers_with_slots = []
-        for voucher in vouchers:
-            slots_available = voucher.slots_available_for_assignment
-            if slots_available == 0:
-                continue
-
-            vouchers_with_slots.append(voucher.id)
+        enterprise_offers = ConditionalOffer.objects.filter(
+            vouchers=OuterRef('pk'),
+            condition__enterprise_customer_uuid__isnull=False
+        ).order_by('-priority', 'pk')
+        # Like Voucher.enterprise_offer, only the assignments of the first enterprise offer are counted.
+        active_assignments = OfferAssignment.objects.filter(
+            offer=OuterRef('enterprise_offer_id'),
+            code=OuterRef('code'),
+        ).exclude(
+            status__in=[OFFER_REDEEMED, OFFER_ASSIGNMENT_REVOKED]
+        ).order_by().values('code').annotate(count=Count('id')).values('count')
+
+        # Mirrors Voucher.slots_available_for_assignment, which is None for vouchers without an enterprise offer.
+        vouchers = Voucher.objects.filter(id__in=vouchers.values('id')).annotate(
+            enterprise_offer_id=Subquery(enterprise_offers.values('pk')[:1], output_field=IntegerField()),
+        ).annotate(
+            has_enterprise_offer=Exists(enterprise_offers),
+            max_global_applications=Subquery(
+                enterprise_offers.values('max_global_applications')[:1], output_field=IntegerField()
+            ),
+            num_assignments=Coalesce(Subquery(active_assignments[:1], output_field=IntegerField()), 0),
+        ).annotate(
+            slots_available=Case(
+                When(has_enterprise_offer=False, then=Value(None)),
+                When(
+                    Q(usage__in=[Voucher.SINGLE_USE, Voucher.MULTI_USE_PER_CUSTOMER]) &
+                    (Q(num_orders__gt=0) | Q(num_assignments__gt=0)),
+                    then=Value(0)
+                ),
+                When(
+                    usage__in=[Voucher.SINGLE_USE, Voucher.MULTI_USE_PER_CUSTOMER],
+                    then=Coalesce('max_global_applications', Value(1))
+                ),
+                default=(
+                    Coalesce('max_global_applications', Value(OFFER_MAX_USES_DEFAULT)) -
+                    F('num_orders') - F('num_assignments')
+                ),
+                output_field=IntegerField()
+            )
+        )
 
-        return Voucher.objects.filter(id__in=vouchers_with_slots).values('code').order_by('code')
+        # Filtering on an annotation adds no IS NULL guard, so vouchers without slots_available are kept explicitly.
+        return vouchers.filter(
+            Q(slots_available__isnull=True) | ~Q(slots_available=0)
+        ).values('code').order_by('code')
 
     def _get_not_redeemed_usages(self, vouchers):
         """
         Returns a queryset containing unique code and user_email pairs from OfferAssignments.
         Only code and user_email pairs that have no corresponding VoucherApplication are returned.
         """
-        unredeemed_assignments = []
-        for voucher in vouchers:
-            users_having_usages = VoucherApplication.objects.filter(
-                voucher=voucher).values_list('user__email', flat=True)
-
-            assignments = voucher.enterprise_offer.offerassignment_set.filter(
-                code=voucher.code,
-                status__in=[OFFER_ASSIGNED, OFFER_ASSIGNMENT_EMAIL_BOUNCED, OFFER_ASSIGNMENT_EMAIL_PENDING]
-            ).exclude(user_email__in=users_having_usages)
-
-            if assignments.count() == 0:
-                continue
-
-            unredeemed_assignments.extend(assignments.values_list('id', flat=True))
-
-        return OfferAssignment.objects.filter(
-            id__in=unredeemed_assignments).values('code', 'user_email').order_by('user_email').distinct()
+        return self._get_enterprise_offer_assignments(vouchers).filter(
+            status__in=[OFFER_ASSIGNED, OFFER_ASSIGNMENT_EMAIL_BOUNCED, OFFER_ASSIGNMENT_EMAIL_PENDING],
+            is_redeemed=False
+        ).values('code', 'user_email').order_by('user_email').distinct()
 
     def _get_partial_redeemed_usages(self, vouchers):
         """
@@ -394,46 +439,51 @@ class EnterpriseCouponViewSet(CouponViewSet):
         if vouchers.first().usage == Voucher.SINGLE_USE:
             return OfferAssignment.objects.none()
 
-        parially_redeemed_assignments = []
-        for voucher in vouchers:
-            users_having_usages = VoucherApplication.objects.filter(
-                voucher=voucher).values_list('user__email', flat=True)
-
-            assignments = voucher.enterprise_offer.offerassignment_set.filter(
-                code=voucher.code,
-                status__in=[OFFER_ASSIGNED, OFFER_ASSIGNMENT_EMAIL_PENDING],
-                user_email__in=users_having_usages
-            )
-
-            if assignments.count() == 0:
-                continue
-
-            parially_redeemed_assignments.append(assignments.first().id)
+        # Only the first partially redeemed assignment of each code is returned.
+        first_assignments = self._get_enterprise_offer_assignments(vouchers).filter(
+            status__in=[OFFER_ASSIGNED, OFFER_ASSIGNMENT_EMAIL_PENDING],
+            is_redeemed=True
+        ).values('code').annotate(first_id=Min('id')).values('first_id')
 
         return OfferAssignment.objects.filter(
-            id__in=parially_redeemed_assignments).values('code', 'user_email').order_by('user_email')
+            id__in=first_assignments).values('code', 'user_email').order_by('user_email')
 
     def _get_redeemed_usages(self, vouchers):
         """
         Returns a queryset containing unique voucher.code and user.email pairs from VoucherApplications.
         Only code and email pairs that have no corresponding active OfferAssignments are returned.
         """
-        voucher_applications = VoucherApplication.objects.filter(voucher__in=vouchers)
-        redeemed_voucher_application_ids = []
-        for voucher_application in voucher_applications:
-            unredeemed_voucher_assignments = OfferAssignment.objects.filter(
-                code=voucher_application.voucher.code,
-                user_email=voucher_application.user.email,
-                status__in=[OFFER_ASSIGNED, OFFER_ASSIGNMENT_EMAIL_PENDING]
-            )
-
-            if unredeemed_voucher_assignments.count() == 0:
-                redeemed_voucher_application_ids.append(voucher_application.id)
-
-        return VoucherApplication.objects.filter(
-            id__in=redeemed_voucher_application_ids
+        active_assignments = OfferAssignment.objects.filter(
+            code=OuterRef('voucher__code'),
+            user_email=OuterRef('user__email'),
+            status__in=[OFFER_ASSIGNED, OFFER_ASSIGNMENT_EMAIL_PENDING]
+        )
+        return VoucherApplication.objects.filter(voucher__in=vouchers).annotate(
+            has_active_assignment=Exists(active_assignments)
+        ).filter(
+            has_active_assignment=False
         ).values('voucher__code', 'user__email').distinct().order_by('user__email')
 
+    def _get_enterprise_offer_assignments(self, vouchers):
+        """
+        Returns the OfferAssignments made against the enterprise offers of the given vouchers, annotated with
+        whether the assigned user has redeemed the assigned code (`is_redeemed`).
+        """
+        voucher_offers = Voucher.offers.through.objects.filter(
+            voucher__in=vouchers,
+            voucher__code=OuterRef('code'),
+            conditionaloffer=OuterRef('offer'),
+            conditionaloffer__condition__enterprise_customer_uuid__isnull=False
+        )
+        voucher_applications = VoucherApplication.objects.filter(
+            voucher__code=OuterRef('code'),
+            user__email=OuterRef('user_email')
+        )
+        return OfferAssignment.objects.filter(code__in=vouchers.values('code')).annotate(
+            is_voucher_offer=Exists(voucher_offers),
+            is_redeemed=Exists(voucher_applications)
+        ).filter(is_voucher_offer=True)
+
     @list_route(url_path=r'(?P<enterprise_id>.+)/search', permission_classes=[IsAuthenticated])
     @permission_required('enterprise.can_view_coupon', fn=lambda request, enterprise_id: enterprise_id)
     def search(self, request, enterprise_id):     # pylint: disable=unused-argument
@@ -1,20 +1,136 @@
 """
 Management command that deletes baskets associated with orders.
 
-These baskets don't have much value once the order is placed, and unnecessarily take up space.
+These baskets don't have much value once the order is placed, and unnecessarily take up space. Optionally, anonymous
+baskets and abandoned baskets older than a retention period are deleted as well.
 """
 from __future__ import absolute_import, unicode_literals
 
+import datetime
 import time
 
-from django.core.management import BaseCommand
-from django.db import transaction
+from django.core.management import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, models, transaction
+from django.utils import timezone
 from oscar.core.loading import get_model
-from six.moves import range
 
 Basket = get_model('basket', 'Basket')
 
 
+def get_purge_statements(model, selector, quote_name):
+    """
+    Returns the SQL statements removing the rows that reference the model rows whose primary keys are returned by
+    selector, children before parents.
+
+    Rows that cascade are deleted, nullable references are set to NULL and many-to-many links are deleted, which
+    mirrors what the deletion collector does one object at a time.
+
+    Arguments:
+        model (Model): Model whose rows are removed.
+        selector (str): SQL expression listing the primary keys of the rows, e.g. '%s, %s' or a subquery.
+        quote_name (callable): Quotes table and column names for the database.
+
+    Raises:
+        CommandError: If a reference to the model cannot be removed in bulk.
+    """
+    statements = []
+    for field in model._meta.local_many_to_many:
+        through = field.remote_field.through
+        if through._meta.auto_created:
+            statements.append('DELETE FROM {table} WHERE {column} IN ({selector})'.format(
+                table=quote_name(through._meta.db_table),
+                column=quote_name(field.m2m_column_name()),
+                selector=selector,
+            ))
+
+    for rel in model._meta.related_objects:
+        related_model = rel.related_model
+        table = quote_name(related_model._meta.db_table)
+        if rel.many_to_many:
+            if rel.through._meta.auto_created:
+                statements.append('DELETE FROM {table} WHERE {column} IN ({selector})'.format(
+                    table=quote_name(rel.through._meta.db_table),
+                    column=quote_name(rel.field.m2m_reverse_name()),
+                    selector=selector,
+                ))
+            continue
+
+        column = quote_name(rel.field.column)
+        if rel.on_delete is models.CASCADE:
+            related_selector = 'SELECT {pk} FROM {table} WHERE {column} IN ({selector})'.format(
+                pk=quote_name(related_model._meta.pk.column), table=table, column=column, selector=selector
+            )
+            statements.extend(get_purge_statements(related_model, related_selector, quote_name))
+            statements.append('DELETE FROM {table} WHERE {column} IN ({selector})'.format(
+                table=table, column=column, selector=selector
+            ))
+        elif rel.on_delete is models.SET_NULL:
+            statements.append('UPDATE {table} SET {column} = NULL WHERE {column} IN ({selector})'.format(
+                table=table, column=column, selector=selector
+            ))
+        elif rel.on_delete is not models.DO_NOTHING:
+            raise CommandError('[{model}] rows cannot be deleted in bulk, they are referenced by [{related}].'.format(
+                model=model.__name__, related=related_model.__name__
+            ))
+
+    return statements
+
+
+class AdaptiveBatchThrottle(object):
+    """
+    Sizes the batches of a bulk deletion, and the pauses between them, from the duration of each batch.
+
+    The duration of a batch is the time its transaction holds locks, so batches are shrunk when they take longer
+    than target_seconds and grown when they take less than half of it. The pause after a batch grows with the
+    overshoot, and with the replica lag above max_replica_lag, when it is measured.
+    """
+
+    def __init__(self, batch_size, min_batch_size, max_batch_size, target_seconds, sleep_seconds,
+                 max_replica_lag=None):
+        self.min_batch_size = max(1, min(min_batch_size, batch_size))
+        self.max_batch_size = max(max_batch_size, batch_size)
+        self.batch_size = batch_size
+        self.target_seconds = target_seconds
+        self.sleep_seconds = sleep_seconds
+        self.max_replica_lag = max_replica_lag
+
+    def record(self, duration, replica_lag=None):
+        """
+        Adjusts the batch size after a batch took duration seconds.
+
+        Returns:
+            float: Seconds to sleep before the next batch.
+        """
+        ratio = duration / self.target_seconds if self.target_seconds else 1
+        if ratio > 1:
+            self.batch_size = max(self.min_batch_size, int(self.batch_size / ratio))
+        elif ratio < 0.5:
+            self.batch_size = min(self.max_batch_size, self.batch_size * 2)
+
+        sleep_seconds = self.sleep_seconds * max(1, ratio)
+        if replica_lag is not None and self.max_replica_lag is not None and replica_lag > self.max_replica_lag:
+            self.batch_size = max(self.min_batch_size, self.batch_size // 2)
+            sleep_seconds = max(sleep_seconds, replica_lag - self.max_replica_lag)
+
+        return sleep_seconds
+
+
+def get_replica_lag(using):
+    """ Returns the replication lag, in seconds, of a MySQL replica, or None if it cannot be measured. """
+    connection = connections[using]
+    if connection.vendor != 'mysql':
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute('SHOW SLAVE STATUS')
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        status = dict(zip([column[0] for column in cursor.description], row))
+
+    return status.get('Seconds_Behind_Master')
+
+
 class Command(BaseCommand):
     help = 'Delete baskets for which orders have been placed.'
 
@@ -25,47 +141,167 @@ class Command(BaseCommand):
                             dest='batch_size',
                             default=1000,
                             type=int,
-                            help='Size of each batch of baskets to be deleted.')
+                            help='Size of the first batch of baskets to be deleted.')
+        parser.add_argument('--min-batch-size',
+                            action='store',
+                            dest='min_batch_size',
+                            default=100,
+                            type=int,
+                            help='Smallest batch the batch size is reduced to when batches are slow.')
+        parser.add_argument('--max-batch-size',
+                            action='store',
+                            dest='max_batch_size',
+                            default=10000,
+                            type=int,
+                            help='Largest batch the batch size is increased to when batches are fast.')
+        parser.add_argument('--target-seconds',
+                            action='store',
+                            dest='target_seconds',
+                            default=1.0,
+                            type=float,
+                            help='Time each batch deletion should hold its locks for.')
         # Sleeping between each batch deletion gives MySQL time to process other connections.
         parser.add_argument('-s', '--sleep-seconds',
                             action='store',
                             dest='sleep_seconds',
                             default=3,
+                            type=float,
+                            help='Seconds to sleep between each batch deletion, when batches are not slow.')
+        parser.add_argument('--replica',
+                            action='store',
+                            dest='replica',
+                            default=None,
+                            help='Database alias of a MySQL replica whose lag slows the deletion down.')
+        parser.add_argument('--max-replica-lag',
+                            action='store',
+                            dest='max_replica_lag',
+                            default=5,
+                            type=float,
+                            help='Replica lag, in seconds, above which batches are shrunk and delayed.')
+        parser.add_argument('--anonymous-days',
+                            action='store',
+                            dest='anonymous_days',
+                            default=None,
+                            type=int,
+                            help='Also delete baskets without an owner created more than this many days ago.')
+        parser.add_argument('--abandoned-days',
+                            action='store',
+                            dest='abandoned_days',
+                            default=None,
                             type=int,
-                            help='Seconds to sleep between each batch deletion.')
+                            help='Also delete open and merged baskets created more than this many days ago.')
         parser.add_argument('--commit',
                             action='store_true',
                             dest='commit',
                             default=False,
                             help='Actually delete the baskets.')
 
-    def handle(self, *args, **options):
+    def get_querysets(self, options):
+        """ Returns the (description, queryset) pairs of the baskets to be deleted. """
         # Only select those baskets linked to an order, and those not linked to an invoice.
         # TODO: Simplify this query when the foreign key to Basket is removed from Invoice.
-        queryset = Basket.objects.filter(order__isnull=False, invoice__isnull=True)
-        count = queryset.count()
-
-        if options['commit']:
-            if count:
-                self.stderr.write('Deleting [{}] baskets.'.format(count))
-
-                batch_size = options['batch_size']
-                sleep_seconds = options['sleep_seconds']
-
-                max_id = queryset.order_by('-id')[0].id
-                for start in range(0, max_id, batch_size):
-                    end = min(start + batch_size, max_id)
-                    self.stderr.write('Deleting baskets [{start}] through [{end}].'.format(start=start, end=end))
-                    with transaction.atomic():
-                        queryset.filter(pk__gte=start, pk__lte=end).delete()
-
-                    self.stderr.write('Complete. Sleeping.'.format(start=start, end=end))
-                    time.sleep(sleep_seconds)
-
-                self.stderr.write('All baskets deleted.')
-            else:
-                self.stderr.write('No baskets to delete.')
-        else:
+        querysets = [('ordered', Basket.objects.filter(order__isnull=False, invoice__isnull=True))]
+
+        now = timezone.now()
+        unordered = Basket.objects.filter(order__isnull=True, invoice__isnull=True)
+        if options['anonymous_days'] is not None:
+            querysets.append(('anonymous', unordered.filter(
+                owner__isnull=True,
+                date_created__lt=now - datetime.timedelta(days=options['anonymous_days']),
+            )))
+        if options['abandoned_days'] is not None:
+            querysets.append(('abandoned', unordered.filter(
+                owner__isnull=False,
+                status__in=(Basket.OPEN, Basket.MERGED),
+                date_created__lt=now - datetime.timedelta(days=options['abandoned_days']),
+            )))
+
+        return querysets
+
+    def delete_baskets(self, basket_ids, statements):
+        """ Deletes the baskets and the rows referencing them, returning the number of rows deleted. """
+        params = list(basket_ids)
+        placeholders = ', '.join(['%s'] * len(params))
+        deleted = 0
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement.format(ids=placeholders), params)
+                    if statement.startswith('DELETE'):
+                        deleted += cursor.rowcount
+        return deleted
+
+    def handle(self, *args, **options):
+        querysets = self.get_querysets(options)
+        count = sum(queryset.count() for __, queryset in querysets)
+
+        if not options['commit']:
             msg = 'This has been an example operation. If the --commit flag had been included, the command ' \
                   'would have deleted [{}] baskets.'.format(count)
             self.stderr.write(msg)
+            return
+
+        if not count:
+            self.stderr.write('No baskets to delete.')
+            return
+
+        self.stderr.write('Deleting [{}] baskets.'.format(count))
+
+        quote_name = connections[DEFAULT_DB_ALIAS].ops.quote_name
+        # Statements keep an {ids} placeholder, filled with one parameter per basket of each batch.
+        statements = get_purge_statements(Basket, '{ids}', quote_name)
+        statements.append('DELETE FROM {table} WHERE {pk} IN ({{ids}})'.format(
+            table=quote_name(Basket._meta.db_table), pk=quote_name(Basket._meta.pk.column)
+        ))
+
+        throttle = AdaptiveBatchThrottle(
+            options['batch_size'],
+            options['min_batch_size'],
+            options['max_batch_size'],
+            options['target_seconds'],
+            options['sleep_seconds'],
+            max_replica_lag=options['max_replica_lag'] if options['replica'] else None,
+        )
+        baskets_deleted = 0
+        rows_deleted = 0
+        start = time.time()
+
+        for description, queryset in querysets:
+            last_id = 0
+            while True:
+                batch_size = throttle.batch_size
+                basket_ids = list(
+                    queryset.filter(id__gt=last_id).order_by('id').values_list('id', flat=True).distinct()[:batch_size]
+                )
+                if not basket_ids:
+                    break
+
+                self.stderr.write('Deleting [{count}] {description} baskets [{start}] through [{end}].'.format(
+                    count=len(basket_ids), description=description, start=basket_ids[0], end=basket_ids[-1]
+                ))
+                batch_start = time.time()
+                rows = self.delete_baskets(basket_ids, statements)
+                duration = time.time() - batch_start
+
+                baskets_deleted += len(basket_ids)
+                rows_deleted += rows
+                last_id = basket_ids[-1]
+
+                replica_lag = get_replica_lag(options['replica']) if options['replica'] else None
+                sleep_seconds = throttle.record(duration, replica_lag)
+                if len(basket_ids) < batch_size:
+                    break
+
+                self.stderr.write('Complete in [{duration:.2f}] seconds. Sleeping [{sleep:.2f}] seconds.'.format(
+                    duration=duration, sleep=sleep_seconds
+                ))
+                time.sleep(sleep_seconds)
+
+        elapsed = time.time() - start
+        rate = rows_deleted / elapsed if elapsed else float(rows_deleted)
+        self.stderr.write(
+            'Deleted [{baskets}] baskets and [{rows}] rows in [{elapsed:.2f}] seconds ([{rate:.1f}] rows/sec).'.format(
+                baskets=baskets_deleted, rows=rows_deleted, elapsed=elapsed, rate=rate
+            )
+        )
+        self.stderr.write('All baskets deleted.')
@@ -1,18 +1,26 @@
 from __future__ import absolute_import, unicode_literals
 
+import datetime
 from StringIO import StringIO
 
 from django.contrib.sites.models import Site
 from django.core.management import CommandError, call_command
+from django.utils import timezone
 from oscar.core.loading import get_model
 from oscar.test import factories
 from six.moves import range
 
+from ecommerce.extensions.basket.management.commands.delete_ordered_baskets import AdaptiveBatchThrottle
+from ecommerce.extensions.basket.models import BasketAttribute, BasketAttributeType
+from ecommerce.extensions.payment.models import PaymentProcessorResponse
 from ecommerce.extensions.test.factories import create_order
 from ecommerce.invoice.models import Invoice
 from ecommerce.tests.testcases import TestCase
 
 Basket = get_model('basket', 'Basket')
+Line = get_model('basket', 'Line')
+Order = get_model('order', 'Order')
+Voucher = get_model('voucher', 'Voucher')
 
 
 class DeleteOrderedBasketsCommandTests(TestCase):
@@ -78,6 +86,90 @@ class DeleteOrderedBasketsCommandTests(TestCase):
 
         self.assertEqual(out.getvalue().strip(), 'No baskets to delete.')
 
+    def test_related_rows_deleted(self):
+        """ Verify the lines, attributes and voucher links of deleted baskets are deleted, and other references to
+        them are cleared. """
+        basket = self.orders[0].basket
+        voucher = factories.VoucherFactory()
+        basket.vouchers.add(voucher)
+        attribute_type = BasketAttributeType.objects.create(name='test')
+        BasketAttribute.objects.create(basket=basket, attribute_type=attribute_type, value_text='test')
+        response = PaymentProcessorResponse.objects.create(processor_name='test', basket=basket, response={})
+        kept_line_count = Line.objects.exclude(basket__in=[order.basket for order in self.orders]).count()
+
+        call_command(self.command, commit=True, sleep_seconds=0, stderr=StringIO())
+
+        self.assertEqual(Line.objects.count(), kept_line_count)
+        self.assertFalse(BasketAttribute.objects.exists())
+        self.assertFalse(Basket.vouchers.through.objects.filter(basket_id=basket.id).exists())
+        self.assertIsNone(PaymentProcessorResponse.objects.get(id=response.id).basket)
+        self.assertIsNone(Order.objects.get(id=self.orders[0].id).basket)
+        self.assertTrue(Voucher.objects.filter(id=voucher.id).exists())
+
+    def test_keyset_batches(self):
+        """ Verify baskets are deleted in batches of matching baskets. """
+        out = StringIO()
+        call_command(self.command, commit=True, batch_size=1, min_batch_size=1, max_batch_size=1, sleep_seconds=0,
+                     stderr=out)
+
+        actual = out.getvalue()
+        for order in self.orders:
+            self.assertIn(
+                'Deleting [1] ordered baskets [{id}] through [{id}].'.format(id=order.basket_id), actual
+            )
+        self.assertIn('Deleted [{}] baskets and'.format(len(self.orders)), actual)
+        self.assertIn('rows/sec', actual)
+
+    def test_retention(self):
+        """ Verify stale anonymous and abandoned baskets are deleted when a retention period is given. """
+        user = self.create_user()
+        stale_anonymous = factories.BasketFactory(owner=None)
+        stale_abandoned = factories.BasketFactory(owner=user)
+        stale_frozen = factories.BasketFactory(owner=user, status=Basket.FROZEN)
+        recent_abandoned = factories.BasketFactory(owner=user)
+        Basket.objects.filter(
+            id__in=[stale_anonymous.id, stale_abandoned.id, stale_frozen.id]
+        ).update(date_created=timezone.now() - datetime.timedelta(days=31))
+
+        out = StringIO()
+        call_command(self.command, commit=False, anonymous_days=30, abandoned_days=30, stderr=out)
+        self.assertIn('would have deleted [{}] baskets.'.format(len(self.orders) + 2), out.getvalue())
+
+        call_command(self.command, commit=True, anonymous_days=30, abandoned_days=30, sleep_seconds=0,
+                     stderr=StringIO())
+        self.assertEqual(
+            set(Basket.objects.all()),
+            set(self.unordered_baskets + self.invoiced_baskets + [stale_frozen, recent_abandoned])
+        )
+
+
+class AdaptiveBatchThrottleTests(TestCase):
+    def test_slow_batches_shrink(self):
+        """ Verify slow batches shrink the batch size and lengthen the pause. """
+        throttle = AdaptiveBatchThrottle(1000, 100, 10000, 1.0, 2)
+        self.assertEqual(throttle.record(4.0), 8.0)
+        self.assertEqual(throttle.batch_size, 250)
+        throttle.record(100.0)
+        self.assertEqual(throttle.batch_size, 100)
+
+    def test_fast_batches_grow(self):
+        """ Verify fast batches grow the batch size up to its maximum. """
+        throttle = AdaptiveBatchThrottle(1000, 100, 3000, 1.0, 2)
+        self.assertEqual(throttle.record(0.1), 2)
+        self.assertEqual(throttle.batch_size, 2000)
+        throttle.record(0.1)
+        self.assertEqual(throttle.batch_size, 3000)
+        throttle.record(0.7)
+        self.assertEqual(throttle.batch_size, 3000)
+
+    def test_replica_lag(self):
+        """ Verify replica lag above the maximum shrinks the batch size and delays the next batch. """
+        throttle = AdaptiveBatchThrottle(1000, 100, 10000, 1.0, 2, max_replica_lag=5)
+        self.assertEqual(throttle.record(0.7, replica_lag=3), 2)
+        self.assertEqual(throttle.batch_size, 1000)
+        self.assertEqual(throttle.record(0.7, replica_lag=15), 10)
+        self.assertEqual(throttle.batch_size, 500)
+
 
 class AddSiteToBasketsBasketsCommandTests(TestCase):
     command = 'add_site_to_baskets'
@@ -17,6 +17,7 @@ from oscar.test.factories import BasketFactory, ProductFactory, RangeFactory
 from ecommerce.core.constants import ENROLLMENT_CODE_PRODUCT_CLASS_NAME
 from ecommerce.core.tests import toggle_switch
 from ecommerce.courses.tests.factories import CourseFactory
+from ecommerce.courses.utils import get_seat_enrollment_code_skus
 from ecommerce.entitlements.utils import create_or_update_course_entitlement
 from ecommerce.extensions.basket.tests.mixins import BasketMixin
 from ecommerce.extensions.basket.utils import (
@@ -371,7 +372,7 @@ class BasketUtilsTests(DiscoveryTestMixin, BasketMixin, TestCase):
         course = CourseFactory(partner=self.partner)
         course.create_or_update_seat('verified', False, 10, create_enrollment_code=True)
         enrollment_code = Product.objects.get(product_class__name=ENROLLMENT_CODE_PRODUCT_CLASS_NAME)
-        with mock.patch.object(UserAlreadyPlacedOrder, 'user_already_placed_order', return_value=True):
+        with mock.patch.object(UserAlreadyPlacedOrder, 'already_purchased', return_value={enrollment_code.id}):
             basket = prepare_basket(self.request, [enrollment_code])
             self.assertIsNotNone(basket)
 
@@ -473,6 +474,24 @@ class BasketUtilsTests(DiscoveryTestMixin, BasketMixin, TestCase):
         __, partner_sku = get_basket_switch_data(entitlement)
         self.assertIsNone(partner_sku)
 
+    def test_basket_switch_data_index(self):
+        """Verify the seat and enrollment code SKUs of a course are cached, and rebuilt when the products change."""
+        course, seat, enrollment_code = self.prepare_course_seat_and_enrollment_code()
+        seat_stock_record = StockRecord.objects.get(product=seat)
+        ec_sku = StockRecord.objects.get(product=enrollment_code).partner_sku
+
+        expected = {'seat': {'verified': seat_stock_record.partner_sku}, 'enrollment_code': {'verified': ec_sku}}
+        self.assertEqual(get_seat_enrollment_code_skus(course.id), expected)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_seat_enrollment_code_skus(course.id), expected)
+
+        seat_stock_record.partner_sku = 'NEW-SKU'
+        seat_stock_record.save()
+        expected['seat']['verified'] = 'NEW-SKU'
+        self.assertEqual(get_seat_enrollment_code_skus(course.id), expected)
+        __, partner_sku = get_basket_switch_data(enrollment_code)
+        self.assertEqual(partner_sku, 'NEW-SKU')
+
     def test_basket_switch_data_for_non_course_run_products(self):
         """
         Verify that no basket switch data is retrieved for product classes that
@@ -202,7 +202,7 @@ class BasketAddItemsViewTests(
         stock_record = StockRecordFactory(product=product2, partner=self.partner)
         catalog.stock_records.add(stock_record)
 
-        with mock.patch.object(UserAlreadyPlacedOrder, 'user_already_placed_order', return_value=True):
+        with mock.patch.object(UserAlreadyPlacedOrder, 'already_purchased', return_value={product1.id, product2.id}):
             response = self._get_response(
                 [product.stockrecords.first().partner_sku for product in [product1, product2]],
             )
@@ -214,7 +214,7 @@ class BasketAddItemsViewTests(
         Test user can purchase products which have not been already purchased
         """
         products = ProductFactory.create_batch(3, stockrecords__partner=self.partner)
-        with mock.patch.object(UserAlreadyPlacedOrder, 'user_already_placed_order', return_value=False):
+        with mock.patch.object(UserAlreadyPlacedOrder, 'already_purchased', return_value=set()):
             response = self._get_response([product.stockrecords.first().partner_sku for product in products])
             self.assertEqual(response.status_code, 303)
 
@@ -15,7 +15,8 @@ from oscar.apps.basket.signals import voucher_addition
 from oscar.core.loading import get_class, get_model
 from six.moves.urllib.parse import unquote, urlencode
 
-from ecommerce.courses.utils import mode_for_product
+from ecommerce.courses.utils import get_seat_enrollment_code_skus, mode_for_product
+from ecommerce.enterprise.constants import ENTERPRISE_CATALOG_ATTRIBUTE_TYPE
 from ecommerce.extensions.offer.constants import CUSTOM_APPLICATOR_USE_FLAG
 from ecommerce.extensions.order.exceptions import AlreadyPlacedOrderException
 from ecommerce.extensions.order.utils import UserAlreadyPlacedOrder
@@ -29,7 +30,6 @@ BasketAttribute = get_model('basket', 'BasketAttribute')
 BasketAttributeType = get_model('basket', 'BasketAttributeType')
 BUNDLE = 'bundle_identifier'
 ORGANIZATION_ATTRIBUTE_TYPE = 'organization'
-ENTERPRISE_CATALOG_ATTRIBUTE_TYPE = 'enterprise_catalog_uuid'
 StockRecord = get_model('partner', 'StockRecord')
 OrderLine = get_model('order', 'Line')
 Refund = get_model('refund', 'Refund')
@@ -92,10 +92,13 @@ def prepare_basket(request, products, voucher=None):
             return basket
 
     is_multi_product_basket = True if len(products) > 1 else False
+    purchased_product_ids = UserAlreadyPlacedOrder.already_purchased(
+        user=request.user,
+        products=[product for product in products if not product.is_enrollment_code_product],
+        site=request.site
+    )
     for product in products:
-        if product.is_enrollment_code_product or \
-                not UserAlreadyPlacedOrder.user_already_placed_order(user=request.user,
-                                                                     product=product, site=request.site):
+        if product.is_enrollment_code_product or product.id not in purchased_product_ids:
             basket.add_product(product, 1)
             # Call signal handler to notify listeners that something has been added to the basket
             basket_addition.send(sender=basket_addition, product=product, user=request.user, request=request,
@@ -170,11 +173,8 @@ def _find_seat_enrollment_toggle_sku(product, target_structure):
         sku (str): The sku of the associated Seat or Enrollment Code product.
     """
 
-    # Note: This query filter will not perform well with products that do not have a course_id
-    stock_records = StockRecord.objects.filter(
-        product__course_id=product.course_id,
-        product__structure=target_structure
-    )
+    if not product.course_id:
+        return None
 
     # Determine the proper partner SKU to embed in the single/multiple basket switch link
     # The logic here is a little confusing.  "Seat" products have "certificate_type" attributes, and
@@ -183,16 +183,13 @@ def _find_seat_enrollment_toggle_sku(product, target_structure):
     # SKU from the corresponding Enrollment Code product.  If the basket is in multi-purchase mode,
     # we are working with an Enrollment Code product and must present the 'buy single' switch link
     # and SKU from the corresponding Seat product.
+    skus = get_seat_enrollment_code_skus(product.course_id)
+    if target_structure == 'child':
+        product_seat_type = getattr(product.attr, 'seat_type', None)
+        return skus['seat'].get(product_seat_type) if product_seat_type else None
+
     product_cert_type = getattr(product.attr, 'certificate_type', None)
-    product_seat_type = getattr(product.attr, 'seat_type', None)
-    for stock_record in stock_records:
-        stock_record_cert_type = getattr(stock_record.product.attr, 'certificate_type', None)
-        stock_record_seat_type = getattr(stock_record.product.attr, 'seat_type', None)
-        if (product_seat_type and product_seat_type == stock_record_cert_type) or \
-                (product_cert_type and product_cert_type == stock_record_seat_type):
-            return stock_record.partner_sku
-
-    return None
+    return skus['enrollment_code'].get(product_cert_type) if product_cert_type else None
 
 
 @newrelic.agent.function_trace()
@@ -27,7 +27,11 @@ from slumber.exceptions import SlumberBaseException
 
 from ecommerce.core.exceptions import SiteConfigurationError
 from ecommerce.core.url_utils import absolute_redirect, get_lms_course_about_url, get_lms_url
-from ecommerce.courses.utils import get_certificate_type_display_value, get_course_info_from_catalog
+from ecommerce.courses.utils import (
+    get_certificate_type_display_value,
+    get_course_info_from_catalog,
+    get_course_info_from_catalog_for_products
+)
 from ecommerce.enterprise.entitlements import get_enterprise_code_redemption_redirect
 from ecommerce.enterprise.utils import CONSENT_FAILED_PARAM, get_enterprise_customer_from_voucher, has_enterprise_offer
 from ecommerce.extensions.analytics.utils import (
@@ -256,18 +260,19 @@ class BasketLogicMixin(object):
             'is_enrollment_code_purchase': False
         }
 
+        course_info_by_product = self._get_course_info_by_product(lines)
         lines_data = []
         for line in lines:
             product = line.product
             if product.is_seat_product or product.is_course_entitlement_product:
-                line_data, _ = self._get_course_data(product)
+                line_data, _ = self._get_course_data(product, course_info_by_product.get(product.id))
 
                 # TODO this is only used by hosted_checkout_basket template, which may no longer be
                 # used. Consider removing both.
                 if self._is_id_verification_required(product):
                     context_updates['display_verification_message'] = True
             elif product.is_enrollment_code_product:
-                line_data, course = self._get_course_data(product)
+                line_data, course = self._get_course_data(product, course_info_by_product.get(product.id))
                 self._set_single_enrollment_code_warning_if_needed(product, course)
                 context_updates['is_enrollment_code_purchase'] = True
                 context_updates['show_voucher_form'] = False
@@ -356,12 +361,31 @@ class BasketLogicMixin(object):
             )
 
     @newrelic.agent.function_trace()
-    def _get_course_data(self, product):
+    def _get_course_info_by_product(self, lines):
+        """
+        Returns the Discovery Service information of the course products in the basket, retrieved together.
+
+        Products whose information could not be retrieved are left out.
+        """
+        products = [
+            line.product for line in lines
+            if line.product.is_seat_product or line.product.is_course_entitlement_product or
+            line.product.is_enrollment_code_product
+        ]
+        try:
+            return get_course_info_from_catalog_for_products(self.request.site, products)
+        except (ConnectionError, SlumberBaseException, Timeout):
+            logger.exception('Failed to retrieve data from Discovery Service for the basket lines.')
+            return {}
+
+    @newrelic.agent.function_trace()
+    def _get_course_data(self, product, course=None):
         """
         Return course data.
 
         Args:
             product (Product): A product that has course_key as attribute (seat or bulk enrollment coupon)
+            course (dict): Course information from the Discovery Service, if already retrieved.
         Returns:
             A dictionary containing product title, course key, image URL, description, and start and end dates.
             Also returns course information found from catalog.
@@ -374,13 +398,12 @@ class BasketLogicMixin(object):
             'course_start': None,
             'course_end': None,
         }
-        course = None
-
         if product.is_seat_product:
             course_data['course_key'] = CourseKey.from_string(product.attr.course_key)
 
         try:
-            course = get_course_info_from_catalog(self.request.site, product)
+            if course is None:
+                course = get_course_info_from_catalog(self.request.site, product)
             try:
                 course_data['image_url'] = course['image']['src']
             except (KeyError, TypeError):
@@ -0,0 +1,93 @@
+"""
+This command copies the course_key attribute of products to their course_key column.
+"""
+from __future__ import absolute_import, unicode_literals
+
+import logging
+import time
+from collections import defaultdict
+
+from django.core.management import BaseCommand
+from oscar.core.loading import get_model
+
+Product = get_model('catalogue', 'Product')
+ProductAttributeValue = get_model('catalogue', 'ProductAttributeValue')
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Populate the course_key column of products from their course_key attribute.
+
+    Existing products are populated by migration 0042_populate_product_course_key. This command repairs products
+    whose column fell out of sync with their attribute. Products are processed in batches of increasing ID, and each
+    batch is updated with one query per distinct course key, so the command can be stopped and resumed from the
+    last ID it logged.
+
+    Example:
+
+        ./manage.py populate_product_course_key --batch-size 1000 --sleep 1
+    """
+
+    help = "Populate the course_key column of products from their course_key attribute."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            dest='batch_size',
+            default=1000,
+            help='Number of products to update per batch.',
+            type=int,
+        )
+        parser.add_argument(
+            '--start-id',
+            dest='start_id',
+            default=0,
+            help='Only products with an ID greater than this one are updated.',
+            type=int,
+        )
+        parser.add_argument(
+            '--sleep',
+            dest='sleep',
+            default=0,
+            help='Seconds to sleep between batches.',
+            type=float,
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = options['start_id']
+        sleep = options['sleep']
+        updated = 0
+
+        while True:
+            product_ids = list(
+                Product.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not product_ids:
+                break
+
+            course_keys = dict(
+                ProductAttributeValue.objects.filter(
+                    product_id__in=product_ids,
+                    attribute__code='course_key',
+                ).values_list('product_id', 'value_text')
+            )
+            product_ids_by_course_key = defaultdict(list)
+            for product_id in product_ids:
+                product_ids_by_course_key[course_keys.get(product_id) or None].append(product_id)
+
+            for course_key, course_key_product_ids in product_ids_by_course_key.items():
+                updated += Product.objects.filter(
+                    id__in=course_key_product_ids
+                ).exclude(
+                    course_key=course_key
+                ).update(course_key=course_key)
+
+            last_id = product_ids[-1]
+            logger.info('Processed products up to ID %d, %d updated so far.', last_id, updated)
+
+            if sleep:
+                time.sleep(sleep)
+
+        logger.info('Finished populating course keys, %d products updated.', updated)
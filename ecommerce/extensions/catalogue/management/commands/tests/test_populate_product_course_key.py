@@ -0,0 +1,33 @@
+from __future__ import absolute_import
+
+from django.core.management import call_command
+from oscar.core.loading import get_model
+
+from ecommerce.extensions.catalogue.tests.mixins import DiscoveryTestMixin
+from ecommerce.tests.testcases import TestCase
+
+Product = get_model('catalogue', 'Product')
+
+
+class PopulateProductCourseKeyTests(DiscoveryTestMixin, TestCase):
+    """Tests for populate_product_course_key management command."""
+
+    def test_populate_product_course_key(self):
+        """Test that command copies the course_key attribute of products, batch by batch."""
+        course, seat, enrollment_code = self.create_course_seat_and_enrollment_code()
+        Product.objects.update(course_key=None)
+
+        call_command('populate_product_course_key', batch_size=1)
+
+        self.assertEqual(Product.objects.get(id=seat.id).course_key, course.id)
+        self.assertEqual(Product.objects.get(id=enrollment_code.id).course_key, course.id)
+        self.assertEqual(Product.objects.get(id=seat.parent_id).course_key, course.id)
+
+    def test_start_id(self):
+        """Test that products with an ID up to start_id are skipped."""
+        __, seat, enrollment_code = self.create_course_seat_and_enrollment_code()
+        Product.objects.update(course_key=None)
+
+        call_command('populate_product_course_key', start_id=max(seat.id, enrollment_code.id))
+
+        self.assertEqual(Product.objects.exclude(course_key=None).count(), 0)
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogue', '0040_historicalcategory_historicaloption_historicalproductattribute_historicalproductcategory_historicalp'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicalproduct',
+            name='course_key',
+            field=models.CharField(blank=True, db_index=True, help_text='Copy of the course_key attribute, used to look up the products of a course run.', max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='course_key',
+            field=models.CharField(blank=True, db_index=True, help_text='Copy of the course_key attribute, used to look up the products of a course run.', max_length=255, null=True),
+        ),
+    ]
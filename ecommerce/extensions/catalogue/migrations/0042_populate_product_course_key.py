@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+from collections import defaultdict
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def populate_course_key(apps, schema_editor):
+    """Copy the course_key attribute of existing products to their course_key column."""
+    Product = apps.get_model('catalogue', 'Product')
+    ProductAttributeValue = apps.get_model('catalogue', 'ProductAttributeValue')
+
+    last_id = 0
+    while True:
+        product_ids = list(
+            Product.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:BATCH_SIZE]
+        )
+        if not product_ids:
+            break
+
+        product_ids_by_course_key = defaultdict(list)
+        for product_id, course_key in ProductAttributeValue.objects.filter(
+                product_id__in=product_ids,
+                attribute__code='course_key',
+        ).exclude(value_text__isnull=True).exclude(value_text='').values_list('product_id', 'value_text'):
+            product_ids_by_course_key[course_key].append(product_id)
+
+        for course_key, course_key_product_ids in product_ids_by_course_key.items():
+            Product.objects.filter(id__in=course_key_product_ids).update(course_key=course_key)
+
+        last_id = product_ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogue', '0041_product_course_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_course_key, migrations.RunPython.noop),
+    ]
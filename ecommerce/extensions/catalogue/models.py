@@ -68,6 +68,10 @@ class Product(AbstractProduct):
     )
     expires = models.DateTimeField(null=True, blank=True,
                                    help_text=_('Last date/time on which this product can be purchased.'))
+    course_key = models.CharField(
+        max_length=255, null=True, blank=True, db_index=True,
+        help_text=_('Copy of the course_key attribute, used to look up the products of a course run.')
+    )
     original_expires = None
 
     history = HistoricalRecords()
@@ -112,6 +116,8 @@ class Product(AbstractProduct):
         except AttributeError:
             pass
 
+        self.course_key = getattr(self.attr, 'course_key', None) or None
+
         super(Product, self).save(*args, **kwargs)  # pylint: disable=bad-super-call
 
 
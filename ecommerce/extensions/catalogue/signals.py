@@ -0,0 +1,49 @@
+from __future__ import absolute_import
+
+from django.db.models.signals import post_delete, post_save
+from oscar.core.loading import get_model
+
+from ecommerce.courses.utils import invalidate_seat_enrollment_code_skus
+
+Product = get_model('catalogue', 'Product')
+ProductAttributeValue = get_model('catalogue', 'ProductAttributeValue')
+StockRecord = get_model('partner', 'StockRecord')
+
+
+def invalidate_product_seat_enrollment_code_skus(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    When a course product, its stock record or one of its attributes changes, the seat and enrollment code SKUs
+    cached for the course must be rebuilt.
+    """
+    if sender is Product:
+        course_id = instance.course_id
+    else:
+        course_id = Product.objects.filter(id=instance.product_id).values_list('course_id', flat=True).first()
+
+    if course_id:
+        invalidate_seat_enrollment_code_skus(course_id)
+
+
+for sender in (Product, ProductAttributeValue, StockRecord):
+    post_save.connect(
+        invalidate_product_seat_enrollment_code_skus, sender=sender, dispatch_uid='seat_enrollment_code_skus_save'
+    )
+    post_delete.connect(
+        invalidate_product_seat_enrollment_code_skus, sender=sender, dispatch_uid='seat_enrollment_code_skus_delete'
+    )
+
+
+def update_product_course_key(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Keeps the course_key column of a product in sync with its course_key attribute, when the attribute value is
+    saved or deleted without saving the product.
+    """
+    if instance.attribute.code != 'course_key':
+        return
+
+    course_key = (instance.value_text or None) if kwargs.get('signal') is post_save else None
+    Product.objects.filter(id=instance.product_id).exclude(course_key=course_key).update(course_key=course_key)
+
+
+post_save.connect(update_product_course_key, sender=ProductAttributeValue, dispatch_uid='product_course_key_save')
+post_delete.connect(update_product_course_key, sender=ProductAttributeValue, dispatch_uid='product_course_key_delete')
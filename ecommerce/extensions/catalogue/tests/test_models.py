@@ -111,3 +111,19 @@ class ProductTests(CouponMixin, DiscoveryTestMixin, TestCase):
 
         exception = ve.exception
         self.assertIn('Notification email must be a valid email address.', exception.message)
+
+    def test_course_key_synced(self):
+        """
+        Verify the course_key column follows the course_key attribute, whether it is saved with the product or not.
+        """
+        course, seat, enrollment_code = self.create_course_seat_and_enrollment_code()
+        self.assertEqual(seat.course_key, course.id)
+        self.assertEqual(Product.objects.get(id=enrollment_code.id).course_key, course.id)
+
+        attribute_value = seat.attribute_values.get(attribute__code='course_key')
+        attribute_value.value_text = 'course-v1:edX+Other+Run'
+        attribute_value.save()
+        self.assertEqual(Product.objects.get(id=seat.id).course_key, 'course-v1:edX+Other+Run')
+
+        attribute_value.delete()
+        self.assertIsNone(Product.objects.get(id=seat.id).course_key)
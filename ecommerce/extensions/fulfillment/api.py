@@ -8,12 +8,11 @@ can successfully fulfill the product. Success can be reported back based on each
 from __future__ import absolute_import
 
 import logging
-from importlib import import_module
 
-from django.conf import settings
 from django.utils.timezone import now
 
 from ecommerce.extensions.fulfillment import exceptions
+from ecommerce.extensions.fulfillment.registry import fulfillment_module_registry
 from ecommerce.extensions.fulfillment.status import LINE, ORDER
 from ecommerce.extensions.refund.status import REFUND_LINE
 
@@ -50,16 +49,12 @@ def fulfill_order(order, lines, email_opt_in=False):
     line_items = list(lines.all())
 
     try:
-        # Iterate over the Fulfillment Modules defined in our configuration and determine if they support
-        # any of the lines in the order. Fulfill line items in the order they are designated by the configuration.
-        # Remaining line items should be marked with a fulfillment error since we have no configuration that
-        # allows them to be fulfilled.
-        for module_class in get_fulfillment_modules():
-            module = module_class()
-            supported_lines = module.get_supported_lines(line_items)
-            if supported_lines:
-                line_items = list(set(line_items) - set(supported_lines))
-                module.fulfill_product(order, supported_lines, email_opt_in=email_opt_in)
+        # Route the lines to the Fulfillment Modules defined in our configuration, based on their product class.
+        # Fulfill line items in the order the modules are designated by the configuration. Remaining line items
+        # should be marked with a fulfillment error since we have no configuration that allows them to be fulfilled.
+        routed_lines, line_items = fulfillment_module_registry.route_lines(line_items)
+        for module, supported_lines in routed_lines:
+            fulfillment_module_registry.fulfill(module, order, supported_lines, email_opt_in=email_opt_in)
 
         # Check to see if any line items in the order have not been accounted for by a FulfillmentModule
         # Any product does not line up with a module, we have to mark a fulfillment error.
@@ -94,18 +89,7 @@ def fulfill_order(order, lines, email_opt_in=False):
 
 def get_fulfillment_modules():
     """ Retrieves all fulfillment modules declared in settings. """
-    module_paths = getattr(settings, 'FULFILLMENT_MODULES', [])
-    modules = []
-
-    for cls_path in module_paths:
-        try:
-            module_path, _, name = cls_path.rpartition('.')
-            module = getattr(import_module(module_path), name)
-            modules.append(module)
-        except (ImportError, ValueError, AttributeError):
-            logger.exception("Could not load module at [%s]", cls_path)
-
-    return modules
+    return fulfillment_module_registry.get_module_classes()
 
 
 def get_fulfillment_modules_for_line(line):
@@ -115,7 +99,7 @@ def get_fulfillment_modules_for_line(line):
     Arguments
         line (Line): Line to be considered for fulfillment.
     """
-    return [module for module in get_fulfillment_modules() if module().supports_line(line)]
+    return [module.__class__ for module in fulfillment_module_registry.get_modules_for_line(line)]
 
 
 def revoke_fulfillment_for_refund(refund):
@@ -134,14 +118,12 @@ def revoke_fulfillment_for_refund(refund):
         for refund_line in refund.lines.all():
             refund_line.set_status(REFUND_LINE.COMPLETE)
     else:
-        # TODO (CCB): As our list of product types and fulfillment modules grows, this may become slow,
-        # and should be updated. Runtime is O(n^2).
         for refund_line in refund.lines.all():
             order_line = refund_line.order_line
-            modules = get_fulfillment_modules_for_line(order_line)
+            modules = fulfillment_module_registry.get_modules_for_line(order_line)
 
             for module in modules:
-                if module().revoke_line(order_line):
+                if module.revoke_line(order_line):
                     refund_line.set_status(REFUND_LINE.COMPLETE)
                 else:
                     succeeded = False
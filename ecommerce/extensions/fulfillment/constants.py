@@ -0,0 +1,2 @@
+# switch is used to send the seat lines of an order to the LMS bulk enrollment endpoint in a single request
+BULK_ENROLLMENT_FULFILLMENT_SWITCH = 'enable_bulk_enrollment_fulfillment'
@@ -9,21 +9,31 @@ import abc
 import datetime
 import json
 import logging
+import threading
+from collections import OrderedDict, namedtuple
+from multiprocessing.pool import ThreadPool
 
 import requests
 import six
+import waffle
 from django.conf import settings
 from django.urls import reverse
+from edx_django_utils.cache import TieredCache
 from edx_rest_api_client.client import EdxRestApiClient
 from oscar.core.loading import get_model
+from requests.adapters import HTTPAdapter  # pylint: disable=ungrouped-imports
 from requests.exceptions import ConnectionError, Timeout  # pylint: disable=ungrouped-imports
 from rest_framework import status
 
 from ecommerce.core.constants import (
+    COUPON_PRODUCT_CLASS_NAME,
+    COURSE_ENTITLEMENT_PRODUCT_CLASS_NAME,
     DONATIONS_FROM_CHECKOUT_TESTS_PRODUCT_TYPE_NAME,
-    ENROLLMENT_CODE_PRODUCT_CLASS_NAME
+    ENROLLMENT_CODE_PRODUCT_CLASS_NAME,
+    SEAT_PRODUCT_CLASS_NAME
 )
-from ecommerce.core.url_utils import get_lms_enrollment_api_url, get_lms_entitlement_api_url
+from ecommerce.core.url_utils import get_lms_enrollment_api_url, get_lms_entitlement_api_url, get_lms_url
+from ecommerce.core.utils import get_cache_key
 from ecommerce.courses.models import Course
 from ecommerce.courses.utils import mode_for_product
 from ecommerce.enterprise.utils import (
@@ -33,6 +43,7 @@ from ecommerce.enterprise.utils import (
 from ecommerce.extensions.analytics.utils import audit_log, parse_tracking_context
 from ecommerce.extensions.api.v2.views.coupons import CouponViewSet
 from ecommerce.extensions.checkout.utils import get_receipt_page_url
+from ecommerce.extensions.fulfillment.constants import BULK_ENROLLMENT_FULFILLMENT_SWITCH
 from ecommerce.extensions.fulfillment.status import LINE
 from ecommerce.extensions.voucher.models import OrderLineVouchers
 from ecommerce.extensions.voucher.utils import create_vouchers
@@ -46,14 +57,65 @@ Voucher = get_model('voucher', 'Voucher')
 StockRecord = get_model('partner', 'StockRecord')
 logger = logging.getLogger(__name__)
 
+_enrollment_api_session = None
+_enrollment_api_session_lock = threading.Lock()
+
+# Bulk enrollment URLs that answered with one of these statuses are not tried again for
+# ENROLLMENT_FULFILLMENT_BULK_UNSUPPORTED_TIMEOUT seconds.
+BULK_ENROLLMENT_UNSUPPORTED_STATUSES = (
+    status.HTTP_404_NOT_FOUND,
+    status.HTTP_405_METHOD_NOT_ALLOWED,
+    status.HTTP_501_NOT_IMPLEMENTED,
+)
+
+# A seat line to enroll. error holds the network exception raised while collecting the enrollment data, if any.
+PendingEnrollment = namedtuple(
+    'PendingEnrollment', ['order', 'line', 'course_key', 'mode', 'provider', 'data', 'request_kwargs', 'error']
+)
+
+
+def get_enrollment_api_session():
+    """ Returns the session used by this process to call the Enrollment API.
+
+    The session keeps connections to the LMS alive between calls. Its connection pool is shared by the threads
+    that fulfill order lines concurrently.
+    """
+    global _enrollment_api_session  # pylint: disable=global-statement
+    if _enrollment_api_session is None:
+        with _enrollment_api_session_lock:
+            if _enrollment_api_session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_maxsize=settings.ENROLLMENT_FULFILLMENT_CONNECTION_POOL_SIZE)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _enrollment_api_session = session
+    return _enrollment_api_session
+
+
+class BulkEnrollmentItemResponse(object):
+    """ The result of one enrollment of a bulk enrollment request, exposed like the response of a single POST. """
+
+    def __init__(self, status_code, message=None):
+        self.status_code = status_code
+        self.message = message
+
+    def json(self):
+        return {'message': self.message}
+
 
 class BaseFulfillmentModule(six.with_metaclass(abc.ABCMeta, object)):  # pragma: no cover
     """
     Base FulfillmentModule class for containing Product specific fulfillment logic.
 
     All modules should extend the FulfillmentModule and adhere to the defined contract.
+
+    Modules that support lines based only on the product class of their products should list those product classes
+    in product_class_names, which lets the fulfillment module registry route lines without calling supports_line.
     """
 
+    # Names of the product classes supported by the module, or None if support must be checked line by line.
+    product_class_names = None
+
     @abc.abstractmethod
     def supports_line(self, line):
         """
@@ -122,6 +184,8 @@ class DonationsFromCheckoutTestFulfillmentModule(BaseFulfillmentModule):
     If that test, or any follow up tests around donations at checkout are not implemented, this module will be reverted.
     Don't use this code for your own purposes, thanks.
     """
+    product_class_names = (DONATIONS_FROM_CHECKOUT_TESTS_PRODUCT_TYPE_NAME,)
+
     def supports_line(self, line):
         """
         Returns True if the given Line has a donation product.
@@ -179,10 +243,33 @@ class EnrollmentFulfillmentModule(BaseFulfillmentModule):
         usage (string): A description of why data is being posted to the enrollment API. This will be included in log
             messages if the LMS user id cannot be found.
     """
+    product_class_names = (SEAT_PRODUCT_CLASS_NAME,)
+
+    def _get_enrollment_api_timeout(self, site):
+        site_configuration = getattr(site, 'siteconfiguration', None)
+        timeout = getattr(site_configuration, 'enrollment_fulfillment_timeout', None)
+        return timeout or settings.ENROLLMENT_FULFILLMENT_TIMEOUT
+
+    def _get_enrollment_api_max_workers(self, site):
+        site_configuration = getattr(site, 'siteconfiguration', None)
+        max_workers = getattr(site_configuration, 'enrollment_fulfillment_max_workers', None)
+        return max_workers or settings.ENROLLMENT_FULFILLMENT_MAX_WORKERS
+
+    def _build_enrollment_api_request(self, data, user, usage, site=None):
+        """ Returns the keyword arguments of a POST to the enrollment API.
 
-    def _post_to_enrollment_api(self, data, user, usage):
-        enrollment_api_url = get_lms_enrollment_api_url()
-        timeout = settings.ENROLLMENT_FULFILLMENT_TIMEOUT
+        Everything that needs the database or the current request is resolved here, so the request itself can be
+        sent from any thread.
+        """
+        return {
+            'url': get_lms_enrollment_api_url(),
+            'data': json.dumps(data),
+            'headers': self._get_enrollment_api_headers(user, usage),
+            'timeout': self._get_enrollment_api_timeout(site),
+        }
+
+    def _get_enrollment_api_headers(self, user, usage):
+        """ Returns the headers of a POST to the enrollment API on behalf of the user. """
         headers = {
             'Content-Type': 'application/json',
             'X-Edx-Api-Key': settings.EDX_API_KEY
@@ -196,7 +283,25 @@ class EnrollmentFulfillmentModule(BaseFulfillmentModule):
         if ip:
             headers['X-Forwarded-For'] = ip
 
-        return requests.post(enrollment_api_url, data=json.dumps(data), headers=headers, timeout=timeout)
+        return headers
+
+    def _send_enrollment_api_request(self, request_kwargs):
+        """ Sends a request built by _build_enrollment_api_request.
+
+        Returns:
+            tuple: The response, or None, and the network exception raised while sending the request, or None.
+        """
+        if request_kwargs is None:
+            return None, None
+
+        try:
+            return get_enrollment_api_session().post(**request_kwargs), None
+        except (ConnectionError, Timeout) as exc:
+            return None, exc
+
+    def _post_to_enrollment_api(self, data, user, usage, site=None):
+        request_kwargs = self._build_enrollment_api_request(data, user, usage, site=site)
+        return get_enrollment_api_session().post(**request_kwargs)
 
     def _add_enterprise_data_to_enrollment_api_post(self, data, order):
         """ Augment enrollment api POST data with enterprise specific data.
@@ -266,19 +371,72 @@ class EnrollmentFulfillmentModule(BaseFulfillmentModule):
             The original set of lines, with new statuses set based on the success or failure of fulfillment.
 
         """
-        logger.info("Attempting to fulfill 'Seat' product types for order [%s]", order.number)
+        self.fulfill_orders([(order, lines)], email_opt_in=email_opt_in)
+        return order, lines
+
+    def fulfill_orders(self, orders_and_lines, email_opt_in=False):  # pylint: disable=unused-argument
+        """ Fulfills the 'seat' lines of several orders at once.
+
+        If the bulk enrollment switch is active, the lines of every order are sent to the LMS in bulk enrollment
+        requests, one per set of learner tracking headers. Lines are posted one by one, concurrently if the site
+        allows it, when the switch is off, when they are alone in their bulk request, or when the bulk request fails
+        or is not supported by the LMS.
 
+        Args:
+            orders_and_lines (list): (Order, list of Lines) pairs.
+            email_opt_in (bool): Whether the users should be opted in to emails as part of the fulfillment.
+        """
         api_key = getattr(settings, 'EDX_API_KEY', None)
-        if not api_key:
-            logger.error(
-                'EDX_API_KEY must be set to use the EnrollmentFulfillmentModule'
-            )
-            for line in lines:
-                line.set_status(LINE.FULFILLMENT_CONFIGURATION_ERROR)
+        enrollments = []
+        for order, lines in orders_and_lines:
+            logger.info("Attempting to fulfill 'Seat' product types for order [%s]", order.number)
+            if not api_key:
+                logger.error(
+                    'EDX_API_KEY must be set to use the EnrollmentFulfillmentModule'
+                )
+                for line in lines:
+                    line.set_status(LINE.FULFILLMENT_CONFIGURATION_ERROR)
+                continue
+            enrollments.extend(self._get_order_enrollments(order, lines))
+
+        if enrollments:
+            results = [None] * len(enrollments)
+            if len(enrollments) > 1 and waffle.switch_is_active(BULK_ENROLLMENT_FULFILLMENT_SWITCH):
+                for positions in self._group_enrollments_by_headers(enrollments):
+                    if len(positions) > 1:
+                        bulk_results = self._send_bulk_enrollment_api_request(
+                            [enrollments[position] for position in positions]
+                        )
+                        for position, result in zip(positions, bulk_results or ()):
+                            results[position] = result
+
+            unsent_positions = [position for position, result in enumerate(results) if result is None]
+            if unsent_positions:
+                max_workers = self._get_enrollment_api_max_workers(enrollments[0].order.site)
+                unsent_results = self._send_enrollment_api_requests(
+                    [enrollments[position].request_kwargs for position in unsent_positions], max_workers
+                )
+                for position, result in zip(unsent_positions, unsent_results):
+                    results[position] = result
 
-            return order, lines
+            # Statuses, notes and audit log entries are written in line order, once every request is done.
+            for enrollment, (response, exc) in zip(enrollments, results):
+                self._record_enrollment_result(enrollment, response, exc)
 
+        for order, __ in orders_and_lines:
+            if api_key:
+                logger.info("Finished fulfilling 'Seat' product types for order [%s]", order.number)
+
+    def _get_order_enrollments(self, order, lines):
+        """ Returns the enrollments to request for the lines of an order that have not been fulfilled yet.
+
+        Lines without the attributes needed to enroll are marked with a configuration error.
+        """
+        enrollments = []
         for line in lines:
+            if line.status == LINE.COMPLETE:
+                logger.info('Line [%d] of order [%s] has already been fulfilled.', line.id, order.number)
+                continue
             try:
                 mode = mode_for_product(line.product)
                 course_key = line.product.attr.course_key
@@ -315,53 +473,169 @@ class EnrollmentFulfillmentModule(BaseFulfillmentModule):
                         'value': provider
                     }
                 )
-            try:
-                self._add_enterprise_data_to_enrollment_api_post(data, order)
-
-                # Post to the Enrollment API. The LMS will take care of posting a new EnterpriseCourseEnrollment to
-                # the Enterprise service if the user+course has a corresponding EnterpriseCustomerUser.
-                response = self._post_to_enrollment_api(data, user=order.user, usage='fulfill enrollment')
-
-                if response.status_code == status.HTTP_200_OK:
-                    line.set_status(LINE.COMPLETE)
-
-                    audit_log(
-                        'line_fulfilled',
-                        order_line_id=line.id,
-                        order_number=order.number,
-                        product_class=line.product.get_product_class().name,
-                        course_id=course_key,
-                        mode=mode,
-                        user_id=order.user.id,
-                        credit_provider=provider,
-                    )
-                else:
-                    try:
-                        data = response.json()
-                        reason = data.get('message')
-                    except Exception:  # pylint: disable=broad-except
-                        reason = '(No detail provided.)'
-
-                    logger.error(
-                        "Fulfillment of line [%d] on order [%s] failed with status code [%d]: %s",
-                        line.id, order.number, response.status_code, reason
-                    )
-                    order.notes.create(message=reason, note_type='Error')
-                    line.set_status(LINE.FULFILLMENT_SERVER_ERROR)
-            except ConnectionError:
-                logger.error(
-                    "Unable to fulfill line [%d] of order [%s] due to a network problem", line.id, order.number
-                )
-                order.notes.create(message='Fulfillment of order failed due to a network problem.', note_type='Error')
-                line.set_status(LINE.FULFILLMENT_NETWORK_ERROR)
-            except Timeout:
-                logger.error(
-                    "Unable to fulfill line [%d] of order [%s] due to a request time out", line.id, order.number
+            enrollments.append(PendingEnrollment(order, line, course_key, mode, provider, data, None, None))
+
+        if not enrollments:
+            return enrollments
+
+        # The enterprise data is the same for every line of the order, so it is collected once.
+        enterprise_data = {}
+        try:
+            self._add_enterprise_data_to_enrollment_api_post(enterprise_data, order)
+        except (ConnectionError, Timeout) as exc:
+            return [enrollment._replace(error=exc) for enrollment in enrollments]
+
+        # The LMS will take care of posting a new EnterpriseCourseEnrollment to the Enterprise service
+        # if the user+course has a corresponding EnterpriseCustomerUser.
+        return [
+            enrollment._replace(
+                data=dict(enrollment.data, **enterprise_data),
+                request_kwargs=self._build_enrollment_api_request(
+                    dict(enrollment.data, **enterprise_data),
+                    user=order.user,
+                    usage='fulfill enrollment',
+                    site=order.site
                 )
-                order.notes.create(message='Fulfillment of order failed due to a request time out.', note_type='Error')
-                line.set_status(LINE.FULFILLMENT_TIMEOUT_ERROR)
-        logger.info("Finished fulfilling 'Seat' product types for order [%s]", order.number)
-        return order, lines
+            )
+            for enrollment in enrollments
+        ]
+
+    def _group_enrollments_by_headers(self, enrollments):
+        """ Returns the positions of the enrollments that can be sent in the same bulk request, grouped in order.
+
+        The GA client id and IP headers belong to a learner, so each set of headers gets its own bulk request.
+        Enrollments whose data could not be collected are left out.
+        """
+        positions_by_headers = OrderedDict()
+        for position, enrollment in enumerate(enrollments):
+            if enrollment.error is None:
+                headers = tuple(sorted(enrollment.request_kwargs['headers'].items()))
+                positions_by_headers.setdefault(headers, []).append(position)
+        return list(positions_by_headers.values())
+
+    def _send_bulk_enrollment_api_request(self, enrollments):
+        """ Sends the enrollments to the LMS bulk enrollment endpoint in a single request.
+
+        The enrollments must share the headers built by _get_enrollment_api_headers.
+
+        The endpoint receives {"enrollments": [...]}, where every item is the body of a regular Enrollment API
+        POST, and answers {"results": [{"status": <HTTP status>, "message": <optional detail>}, ...]} with one
+        result per enrollment, in the same order.
+
+        Returns:
+            list: The (response, exception) pair of each enrollment, in order; or None if the request failed or the
+                endpoint is not supported, in which case the enrollments should be posted one by one.
+        """
+        url = get_lms_url(settings.ENROLLMENT_FULFILLMENT_BULK_API_PATH)
+        unsupported_cache_key = get_cache_key(bulk_enrollment_unsupported_url=url)
+        if TieredCache.get_cached_response(unsupported_cache_key).is_found:
+            return None
+
+        bulk_enrollments = [enrollment for enrollment in enrollments if enrollment.error is None]
+        if not bulk_enrollments:
+            return None
+
+        headers = bulk_enrollments[0].request_kwargs['headers']
+        timeout = max(enrollment.request_kwargs['timeout'] for enrollment in bulk_enrollments)
+        try:
+            response = get_enrollment_api_session().post(
+                url,
+                data=json.dumps({'enrollments': [enrollment.data for enrollment in bulk_enrollments]}),
+                headers=headers,
+                timeout=timeout
+            )
+        except (ConnectionError, Timeout):
+            logger.warning('Bulk enrollment request to [%s] failed. Enrollments will be posted one by one.', url)
+            return None
+
+        if response.status_code in BULK_ENROLLMENT_UNSUPPORTED_STATUSES:
+            logger.info('Bulk enrollment is not supported by [%s]. Enrollments will be posted one by one.', url)
+            TieredCache.set_all_tiers(
+                unsupported_cache_key, True, settings.ENROLLMENT_FULFILLMENT_BULK_UNSUPPORTED_TIMEOUT
+            )
+            return None
+
+        try:
+            bulk_results = response.json()['results'] if response.status_code == status.HTTP_200_OK else None
+        except (KeyError, TypeError, ValueError):
+            bulk_results = None
+
+        if not (
+                isinstance(bulk_results, list) and len(bulk_results) == len(bulk_enrollments) and
+                all(isinstance(result, dict) and isinstance(result.get('status'), int) for result in bulk_results)
+        ):
+            logger.warning(
+                'Bulk enrollment request to [%s] failed with status code [%d]. Enrollments will be posted one by one.',
+                url, response.status_code
+            )
+            return None
+
+        results_by_line = {
+            enrollment.line.id: (BulkEnrollmentItemResponse(result.get('status'), result.get('message')), None)
+            for enrollment, result in zip(bulk_enrollments, bulk_results)
+        }
+        return [results_by_line.get(enrollment.line.id, (None, enrollment.error)) for enrollment in enrollments]
+
+    def _send_enrollment_api_requests(self, requests_kwargs, max_workers):
+        """ Sends many requests built by _build_enrollment_api_request, at most max_workers at a time.
+
+        Requests given as None are not sent, and their result is (None, None).
+
+        Returns:
+            list: The (response, exception) pair of each request, in the order of the requests.
+        """
+        workers = min(max_workers, len(requests_kwargs))
+        if workers <= 1:
+            return [self._send_enrollment_api_request(request_kwargs) for request_kwargs in requests_kwargs]
+
+        pool = ThreadPool(workers)
+        try:
+            return pool.map(self._send_enrollment_api_request, requests_kwargs)
+        finally:
+            pool.close()
+            pool.join()
+
+    def _record_enrollment_result(self, enrollment, response, exc):
+        """ Sets the status of an enrolled line, and records the order note or audit log entry for it. """
+        order, line = enrollment.order, enrollment.line
+        exc = exc or enrollment.error
+        if isinstance(exc, ConnectionError):
+            logger.error(
+                "Unable to fulfill line [%d] of order [%s] due to a network problem", line.id, order.number
+            )
+            order.notes.create(message='Fulfillment of order failed due to a network problem.', note_type='Error')
+            line.set_status(LINE.FULFILLMENT_NETWORK_ERROR)
+        elif isinstance(exc, Timeout):
+            logger.error(
+                "Unable to fulfill line [%d] of order [%s] due to a request time out", line.id, order.number
+            )
+            order.notes.create(message='Fulfillment of order failed due to a request time out.', note_type='Error')
+            line.set_status(LINE.FULFILLMENT_TIMEOUT_ERROR)
+        elif response.status_code == status.HTTP_200_OK:
+            line.set_status(LINE.COMPLETE)
+
+            audit_log(
+                'line_fulfilled',
+                order_line_id=line.id,
+                order_number=order.number,
+                product_class=line.product.get_product_class().name,
+                course_id=enrollment.course_key,
+                mode=enrollment.mode,
+                user_id=order.user.id,
+                credit_provider=enrollment.provider,
+            )
+        else:
+            try:
+                reason = response.json().get('message')
+            except Exception:  # pylint: disable=broad-except
+                reason = '(No detail provided.)'
+
+            logger.error(
+                "Fulfillment of line [%d] on order [%s] failed with status code [%d]: %s",
+                line.id, order.number, response.status_code, reason
+            )
+            order.notes.create(message=reason, note_type='Error')
+            line.set_status(LINE.FULFILLMENT_SERVER_ERROR)
 
     def revoke_line(self, line):
         try:
@@ -378,7 +652,9 @@ class EnrollmentFulfillmentModule(BaseFulfillmentModule):
                 },
             }
 
-            response = self._post_to_enrollment_api(data, user=line.order.user, usage='revoke enrollment')
+            response = self._post_to_enrollment_api(
+                data, user=line.order.user, usage='revoke enrollment', site=line.order.site
+            )
 
             if response.status_code == status.HTTP_200_OK:
                 audit_log(
@@ -411,6 +687,7 @@ class EnrollmentFulfillmentModule(BaseFulfillmentModule):
 
 class CouponFulfillmentModule(BaseFulfillmentModule):
     """ Fulfillment Module for coupons. """
+    product_class_names = (COUPON_PRODUCT_CLASS_NAME,)
 
     def supports_line(self, line):
         """
@@ -469,6 +746,8 @@ class CouponFulfillmentModule(BaseFulfillmentModule):
 
 
 class EnrollmentCodeFulfillmentModule(BaseFulfillmentModule):
+    product_class_names = (ENROLLMENT_CODE_PRODUCT_CLASS_NAME,)
+
     def supports_line(self, line):
         """
         Check whether the product in line is an Enrollment code.
@@ -515,8 +794,7 @@ class EnrollmentCodeFulfillmentModule(BaseFulfillmentModule):
         for line in lines:
             name = 'Enrollment Code Range for {}'.format(line.product.attr.course_key)
             seat = Product.objects.filter(
-                attributes__name='course_key',
-                attribute_values__value_text=line.product.attr.course_key
+                course_key=line.product.attr.course_key
             ).get(
                 attributes__name='certificate_type',
                 attribute_values__value_text=line.product.attr.seat_type
@@ -599,6 +877,7 @@ class CourseEntitlementFulfillmentModule(BaseFulfillmentModule):
     """ Fulfillment Module for granting students an entitlement.
     Allows the entitlement of a student via purchase of a 'Course Entitlement'.
     """
+    product_class_names = (COURSE_ENTITLEMENT_PRODUCT_CLASS_NAME,)
 
     def supports_line(self, line):
         return line.product.is_course_entitlement_product
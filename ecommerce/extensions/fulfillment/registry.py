@@ -0,0 +1,204 @@
+"""
+In-process registry of fulfillment modules.
+
+The modules declared in ``settings.FULFILLMENT_MODULES`` are imported and instantiated once per process, and the
+product classes they declare are compiled into a routing table, so fulfilling an order does not import modules or
+ask every module whether it supports every line. The registry is rebuilt whenever the setting changes.
+
+The time spent by each module fulfilling lines is collected in process-wide histograms, and reported to New Relic
+for every fulfillment run.
+"""
+from __future__ import absolute_import, unicode_literals
+
+import bisect
+import logging
+import threading
+import time
+from collections import OrderedDict
+from importlib import import_module
+
+from django.conf import settings
+from edx_django_utils import monitoring as monitoring_utils
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds, in seconds, of the buckets of the fulfillment timing histograms. Durations above the last bound are
+# counted in an additional overflow bucket.
+FULFILLMENT_TIMING_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class FulfillmentTimingHistogram(object):
+    """
+    Process-wide histograms of the time spent by each fulfillment module fulfilling lines.
+    """
+
+    def __init__(self, buckets=FULFILLMENT_TIMING_BUCKETS):
+        self._lock = threading.Lock()
+        self.buckets = tuple(buckets)
+        self.counts = {}
+        self.totals = {}
+
+    def record(self, module_name, duration):
+        with self._lock:
+            counts = self.counts.setdefault(module_name, [0] * (len(self.buckets) + 1))
+            counts[bisect.bisect_left(self.buckets, duration)] += 1
+            self.totals[module_name] = self.totals.get(module_name, 0) + duration
+
+    def reset(self):
+        with self._lock:
+            self.counts = {}
+            self.totals = {}
+
+    def as_dict(self):
+        """
+        Returns the histogram of each module, keyed by module name.
+
+        Each histogram maps the upper bound of its buckets, or 'inf' for the overflow bucket, to the number of runs
+        that took at most that long, and includes the number of runs and their total duration.
+        """
+        with self._lock:
+            bounds = [str(bound) for bound in self.buckets] + ['inf']
+            return {
+                module_name: {
+                    'buckets': OrderedDict(zip(bounds, counts)),
+                    'count': sum(counts),
+                    'total_seconds': self.totals[module_name],
+                }
+                for module_name, counts in self.counts.items()
+            }
+
+
+timings = FulfillmentTimingHistogram()
+
+
+class FulfillmentModuleRegistry(object):
+    """
+    Fulfillment modules declared in settings, instantiated and indexed by the product classes they support.
+
+    Modules that do not declare product_class_names cannot be routed through the table. When any such module is
+    configured, lines are offered to each module in configuration order through get_supported_lines instead.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.module_paths = None
+        self.module_classes = []
+        self.modules = []
+        self.routes = {}
+        self._positions = {}
+        self._has_unrouted_modules = False
+
+    def _build(self, module_paths):
+        module_classes = []
+        for cls_path in module_paths:
+            try:
+                module_path, _, name = cls_path.rpartition('.')
+                module_classes.append(getattr(import_module(module_path), name))
+            except (ImportError, ValueError, AttributeError):
+                logger.exception("Could not load module at [%s]", cls_path)
+
+        modules = [module_class() for module_class in module_classes]
+        routes = {}
+        for module in modules:
+            for product_class_name in module.product_class_names or ():
+                routes.setdefault(product_class_name, []).append(module)
+
+        self.module_classes = module_classes
+        self.modules = modules
+        self.routes = {product_class_name: tuple(route) for product_class_name, route in routes.items()}
+        self._positions = {id(module): position for position, module in enumerate(modules)}
+        self._has_unrouted_modules = any(module.product_class_names is None for module in modules)
+        self.module_paths = module_paths
+
+    def _ensure_current(self):
+        module_paths = tuple(getattr(settings, 'FULFILLMENT_MODULES', []))
+        if module_paths != self.module_paths:
+            with self._lock:
+                if module_paths != self.module_paths:
+                    self._build(module_paths)
+
+    def reset(self):
+        """ Discards the loaded modules, so they are loaded again on next use. """
+        with self._lock:
+            self.module_paths = None
+
+    def get_module_classes(self):
+        """ Returns the classes of the fulfillment modules that could be loaded, in configuration order. """
+        self._ensure_current()
+        return list(self.module_classes)
+
+    def get_modules_for_line(self, line):
+        """ Returns the fulfillment modules that support the given Line, in configuration order. """
+        self._ensure_current()
+        if self._has_unrouted_modules:
+            return [module for module in self.modules if module.supports_line(line)]
+        return list(self.routes.get(line.product.get_product_class().name, ()))
+
+    def route_lines(self, lines):
+        """
+        Assigns each line to the first configured fulfillment module that supports it.
+
+        Arguments:
+            lines (list of Line): Lines to be fulfilled.
+
+        Returns:
+            tuple: A list of (module, lines) pairs in configuration order, and the list of lines that no module
+                supports.
+        """
+        self._ensure_current()
+        lines_by_product_class = OrderedDict()
+        for line in lines:
+            lines_by_product_class.setdefault(line.product.get_product_class().name, []).append(line)
+
+        if self._has_unrouted_modules:
+            return self._route_lines_by_module(lines_by_product_class)
+
+        lines_by_module = {}
+        unsupported_lines = []
+        for product_class_name, product_class_lines in lines_by_product_class.items():
+            route = self.routes.get(product_class_name)
+            if route:
+                lines_by_module.setdefault(id(route[0]), (route[0], []))[1].extend(product_class_lines)
+            else:
+                unsupported_lines.extend(product_class_lines)
+
+        routed = sorted(lines_by_module.values(), key=lambda item: self._positions[id(item[0])])
+        return routed, unsupported_lines
+
+    def _route_lines_by_module(self, lines_by_product_class):
+        routed = []
+        for module in self.modules:
+            if module.product_class_names is None:
+                remaining_lines = [line for lines in lines_by_product_class.values() for line in lines]
+                supported_lines = module.get_supported_lines(remaining_lines) if remaining_lines else []
+                if supported_lines:
+                    supported_ids = {line.id for line in supported_lines}
+                    for product_class_name, lines in list(lines_by_product_class.items()):
+                        lines_by_product_class[product_class_name] = [
+                            line for line in lines if line.id not in supported_ids
+                        ]
+            else:
+                supported_lines = []
+                for product_class_name in module.product_class_names:
+                    supported_lines.extend(lines_by_product_class.pop(product_class_name, []))
+
+            if supported_lines:
+                routed.append((module, supported_lines))
+
+        return routed, [line for lines in lines_by_product_class.values() for line in lines]
+
+    def fulfill(self, module, order, lines, email_opt_in=False):
+        """
+        Fulfills the lines with the module, recording the time spent in the module's timing histogram.
+        """
+        module_name = module.__class__.__name__
+        start = time.time()
+        try:
+            return module.fulfill_product(order, lines, email_opt_in=email_opt_in)
+        finally:
+            duration = time.time() - start
+            timings.record(module_name, duration)
+            monitoring_utils.set_custom_metric('fulfillment_module_{}_seconds'.format(module_name), duration)
+
+
+fulfillment_module_registry = FulfillmentModuleRegistry()
@@ -13,6 +13,7 @@ from ecommerce.extensions.fulfillment.api import (
     get_fulfillment_modules_for_line,
     revoke_fulfillment_for_refund
 )
+from ecommerce.extensions.fulfillment.registry import fulfillment_module_registry
 from ecommerce.extensions.fulfillment.status import LINE, ORDER
 from ecommerce.extensions.fulfillment.tests.mixins import FulfillmentTestMixin
 from ecommerce.extensions.fulfillment.tests.modules import FakeFulfillmentModule
@@ -27,6 +28,7 @@ class FulfillmentApiTests(FulfillmentTestMixin, TestCase):
 
     def setUp(self):
         super(FulfillmentApiTests, self).setUp()
+        fulfillment_module_registry.reset()
         self.order = self.generate_open_order()
 
     @override_settings(FULFILLMENT_MODULES=['ecommerce.extensions.fulfillment.tests.modules.FakeFulfillmentModule', ])
@@ -80,7 +82,7 @@ class FulfillmentApiTests(FulfillmentTestMixin, TestCase):
         Verify the function retrieves the modules specified in settings.
         An error should be logged for modules that cannot be loaded.
         """
-        logger_name = 'ecommerce.extensions.fulfillment.api'
+        logger_name = 'ecommerce.extensions.fulfillment.registry'
 
         with LogCapture(logger_name) as logger:
             actual = get_fulfillment_modules()
@@ -4,10 +4,12 @@ from __future__ import absolute_import
 import datetime
 import json
 import uuid
+from multiprocessing.pool import ThreadPool
 
 import ddt
 import httpretty
 import mock
+from django.conf import settings
 from django.test import override_settings
 from oscar.core.loading import get_class, get_model
 from oscar.test import factories
@@ -21,12 +23,14 @@ from ecommerce.core.constants import (
     ENROLLMENT_CODE_PRODUCT_CLASS_NAME,
     SEAT_PRODUCT_CLASS_NAME
 )
+from ecommerce.core.tests import toggle_switch
 from ecommerce.core.url_utils import get_lms_enrollment_api_url, get_lms_entitlement_api_url
 from ecommerce.coupons.tests.mixins import CouponMixin
 from ecommerce.courses.tests.factories import CourseFactory
 from ecommerce.courses.utils import mode_for_product
 from ecommerce.entitlements.utils import create_or_update_course_entitlement
 from ecommerce.extensions.catalogue.tests.mixins import DiscoveryTestMixin
+from ecommerce.extensions.fulfillment.constants import BULK_ENROLLMENT_FULFILLMENT_SWITCH
 from ecommerce.extensions.fulfillment.modules import (
     CouponFulfillmentModule,
     CourseEntitlementFulfillmentModule,
@@ -41,6 +45,7 @@ from ecommerce.extensions.voucher.models import OrderLineVouchers
 from ecommerce.extensions.voucher.utils import create_vouchers
 from ecommerce.programs.tests.mixins import ProgramTestMixin
 from ecommerce.tests.factories import UserFactory
+from ecommerce.tests.stub_server import StubServer
 from ecommerce.tests.testcases import TestCase
 
 JSON = 'application/json'
@@ -215,18 +220,196 @@ class EnrollmentFulfillmentModuleTests(ProgramTestMixin, DiscoveryTestMixin, Ful
         EnrollmentFulfillmentModule().fulfill_product(self.order, list(self.order.lines.all()))
         self.assertEqual(LINE.FULFILLMENT_CONFIGURATION_ERROR, self.order.lines.all()[0].status)
 
-    @mock.patch('requests.post', mock.Mock(side_effect=ConnectionError))
+    @mock.patch('requests.Session.post', mock.Mock(side_effect=ConnectionError))
     def test_enrollment_module_network_error(self):
         """Test that lines receive a network error status if a fulfillment request experiences a network error."""
         EnrollmentFulfillmentModule().fulfill_product(self.order, list(self.order.lines.all()))
         self.assertEqual(LINE.FULFILLMENT_NETWORK_ERROR, self.order.lines.all()[0].status)
 
-    @mock.patch('requests.post', mock.Mock(side_effect=Timeout))
+    @mock.patch('requests.Session.post', mock.Mock(side_effect=Timeout))
     def test_enrollment_module_request_timeout(self):
         """Test that lines receive a timeout error status if a fulfillment request times out."""
         EnrollmentFulfillmentModule().fulfill_product(self.order, list(self.order.lines.all()))
         self.assertEqual(LINE.FULFILLMENT_TIMEOUT_ERROR, self.order.lines.all()[0].status)
 
+    def create_multi_seat_order(self, num_seats, number=3, user=None):
+        """ Create an order for seats in several courses, returning the order and its lines in order. """
+        user = user or self.user
+        basket = factories.BasketFactory(owner=user, site=self.site)
+        for index in range(num_seats):
+            course = CourseFactory(id='edX/DemoX{}/Course_{}'.format(number, index), partner=self.partner)
+            basket.add_product(course.create_or_update_seat('verified', True, 100), 1)
+        order = create_order(number=number, basket=basket, user=user)
+        order.site = self.site
+        order.save()
+        return order, list(order.lines.order_by('id'))
+
+    def test_enrollment_module_fulfill_concurrently(self):
+        """Test that lines are posted concurrently, and that their results are recorded in line order."""
+        self.site.siteconfiguration.enrollment_fulfillment_max_workers = 3
+        self.site.siteconfiguration.enrollment_fulfillment_timeout = 2
+        self.site.siteconfiguration.save()
+        order, lines = self.create_multi_seat_order(3)
+
+        def post(url, data, headers, timeout):  # pylint: disable=unused-argument
+            course_id = json.loads(data)['course_details']['course_id']
+            if course_id == lines[1].product.attr.course_key:
+                return mock.Mock(status_code=500, json=mock.Mock(return_value={'message': 'Oops!'}))
+            return mock.Mock(status_code=200)
+
+        with mock.patch('requests.Session.post', side_effect=post) as mock_post:
+            with mock.patch('ecommerce.extensions.fulfillment.modules.ThreadPool', wraps=ThreadPool) as mock_pool:
+                with LogCapture(LOGGER_NAME) as logger:
+                    EnrollmentFulfillmentModule().fulfill_product(order, lines)
+
+        mock_pool.assert_called_once_with(3)
+        self.assertEqual(mock_post.call_count, 3)
+        self.assertEqual({call[1]['timeout'] for call in mock_post.call_args_list}, {2})
+        self.assertEqual(
+            [line.status for line in lines],
+            [LINE.COMPLETE, LINE.FULFILLMENT_SERVER_ERROR, LINE.COMPLETE]
+        )
+        self.assertEqual(
+            [
+                record.getMessage().split('order_line_id="')[1].split('"')[0]
+                for record in logger.records if record.getMessage().startswith('line_fulfilled')
+            ],
+            [str(lines[0].id), str(lines[2].id)]
+        )
+        self.assertEqual(list(order.notes.values_list('message', flat=True)), ['Oops!'])
+
+    def test_enrollment_module_skips_fulfilled_lines(self):
+        """Test that fulfilling an order again does not post lines that have already been fulfilled."""
+        order, lines = self.create_multi_seat_order(2)
+        lines[0].set_status(LINE.COMPLETE)
+
+        with mock.patch('requests.Session.post', return_value=mock.Mock(status_code=200)) as mock_post:
+            EnrollmentFulfillmentModule().fulfill_product(order, lines)
+
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertEqual(
+            json.loads(mock_post.call_args[1]['data'])['course_details']['course_id'],
+            lines[1].product.attr.course_key
+        )
+        self.assertEqual([line.status for line in lines], [LINE.COMPLETE, LINE.COMPLETE])
+
+    def fulfill_with_bulk_enrollment_server(self, handler, num_orders=1, num_seats=2):
+        """ Fulfill orders with bulk enrollment enabled, against a stub LMS answering with the given handler. """
+        toggle_switch(BULK_ENROLLMENT_FULFILLMENT_SWITCH, True)
+        orders_and_lines = [
+            self.create_multi_seat_order(num_seats, number=number) for number in range(3, 3 + num_orders)
+        ]
+
+        with StubServer(handler) as server:
+            self.site.siteconfiguration.lms_url_root = server.url
+            EnrollmentFulfillmentModule().fulfill_orders(orders_and_lines)
+
+        return server, orders_and_lines
+
+    def test_enrollment_module_bulk_fulfill(self):
+        """Test that the lines of several orders are enrolled with a single bulk enrollment request."""
+        def handler(request):
+            enrollments = request.json()['enrollments']
+            return 200, {
+                'results': [
+                    {'status': 500, 'message': 'Oops!'} if index == 1 else {'status': 200}
+                    for index in range(len(enrollments))
+                ]
+            }
+
+        server, orders_and_lines = self.fulfill_with_bulk_enrollment_server(handler, num_orders=2)
+
+        self.assertEqual(len(server.requests), 1)
+        bulk_request = server.requests_to(settings.ENROLLMENT_FULFILLMENT_BULK_API_PATH)[0]
+        self.assertEqual(bulk_request.headers['X-Edx-Api-Key'], 'foo')
+        self.assertEqual(
+            [
+                (enrollment['course_details']['course_id'], enrollment['enrollment_attributes'][0]['value'])
+                for enrollment in bulk_request.json()['enrollments']
+            ],
+            [
+                (line.product.attr.course_key, order.number)
+                for order, lines in orders_and_lines for line in lines
+            ]
+        )
+        (first_order, first_lines), (second_order, second_lines) = orders_and_lines
+        self.assertEqual(
+            [line.status for line in first_lines + second_lines],
+            [LINE.COMPLETE, LINE.FULFILLMENT_SERVER_ERROR, LINE.COMPLETE, LINE.COMPLETE]
+        )
+        self.assertEqual(list(first_order.notes.values_list('message', flat=True)), ['Oops!'])
+        self.assertFalse(second_order.notes.exists())
+
+    def test_enrollment_module_bulk_fulfill_tracking_headers(self):
+        """Test that bulk enrollment requests carry the tracking headers of their learner, one request per learner."""
+        self.user.tracking_context = {'ga_client_id': 'test-client-id', 'lms_ip': '11.22.33.44'}
+        self.user.save()
+        other_user = self.create_user(tracking_context={'ga_client_id': 'other-client-id', 'lms_ip': '55.66.77.88'})
+        toggle_switch(BULK_ENROLLMENT_FULFILLMENT_SWITCH, True)
+        orders_and_lines = [
+            self.create_multi_seat_order(2, number=3),
+            self.create_multi_seat_order(2, number=4, user=other_user),
+        ]
+
+        def handler(request):
+            return 200, {'results': [{'status': 200} for __ in request.json()['enrollments']]}
+
+        with StubServer(handler) as server:
+            self.site.siteconfiguration.lms_url_root = server.url
+            EnrollmentFulfillmentModule().fulfill_orders(orders_and_lines)
+
+        bulk_requests = server.requests_to(settings.ENROLLMENT_FULFILLMENT_BULK_API_PATH)
+        self.assertEqual(
+            [
+                (
+                    request.headers['X-Edx-Ga-Client-Id'],
+                    request.headers['X-Forwarded-For'],
+                    len(request.json()['enrollments'])
+                )
+                for request in bulk_requests
+            ],
+            [('test-client-id', '11.22.33.44', 2), ('other-client-id', '55.66.77.88', 2)]
+        )
+        self.assertEqual(
+            [line.status for __, lines in orders_and_lines for line in lines], [LINE.COMPLETE] * 4
+        )
+
+    @ddt.data(
+        (404, {}),
+        (500, {}),
+        (200, {'results': [{'status': 200}]}),
+        (200, {'unexpected': 'body'}),
+    )
+    @ddt.unpack
+    def test_enrollment_module_bulk_fulfill_fallback(self, bulk_status, bulk_body):
+        """Test that lines are posted one by one when the bulk enrollment request fails or is not supported."""
+        def handler(request):
+            if request.path == settings.ENROLLMENT_FULFILLMENT_BULK_API_PATH:
+                return bulk_status, bulk_body
+            return 200, {}
+
+        server, orders_and_lines = self.fulfill_with_bulk_enrollment_server(handler)
+
+        self.assertEqual(len(server.requests_to(settings.ENROLLMENT_FULFILLMENT_BULK_API_PATH)), 1)
+        self.assertEqual(len(server.requests_to('/api/enrollment/v1/enrollment')), 2)
+        self.assertEqual([line.status for line in orders_and_lines[0][1]], [LINE.COMPLETE, LINE.COMPLETE])
+
+    def test_enrollment_module_bulk_fulfill_unsupported(self):
+        """Test that a bulk enrollment endpoint that is not supported is not requested again."""
+        def handler(request):
+            if request.path == settings.ENROLLMENT_FULFILLMENT_BULK_API_PATH:
+                return 404, {}
+            return 200, {}
+
+        with StubServer(handler) as server:
+            self.site.siteconfiguration.lms_url_root = server.url
+            toggle_switch(BULK_ENROLLMENT_FULFILLMENT_SWITCH, True)
+            for number in (3, 4):
+                EnrollmentFulfillmentModule().fulfill_product(*self.create_multi_seat_order(2, number=number))
+
+        self.assertEqual(len(server.requests_to(settings.ENROLLMENT_FULFILLMENT_BULK_API_PATH)), 1)
+        self.assertEqual(len(server.requests_to('/api/enrollment/v1/enrollment')), 4)
+
     @httpretty.activate
     @ddt.data(None, '{"message": "Oops!"}')
     def test_enrollment_module_server_error(self, body):
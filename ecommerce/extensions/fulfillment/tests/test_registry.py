@@ -0,0 +1,84 @@
+from __future__ import absolute_import, unicode_literals
+
+from importlib import import_module
+
+from django.test.utils import override_settings
+from mock import patch
+
+from ecommerce.extensions.fulfillment import api
+from ecommerce.extensions.fulfillment.modules import (
+    CouponFulfillmentModule,
+    DonationsFromCheckoutTestFulfillmentModule,
+    EnrollmentFulfillmentModule
+)
+from ecommerce.extensions.fulfillment.registry import FulfillmentModuleRegistry, timings
+from ecommerce.extensions.fulfillment.tests.mixins import FulfillmentTestMixin
+from ecommerce.tests.testcases import TestCase
+
+MODULES = [
+    'ecommerce.extensions.fulfillment.modules.EnrollmentFulfillmentModule',
+    'ecommerce.extensions.fulfillment.modules.CouponFulfillmentModule',
+    'ecommerce.extensions.fulfillment.modules.DonationsFromCheckoutTestFulfillmentModule',
+]
+
+
+@override_settings(FULFILLMENT_MODULES=MODULES)
+class FulfillmentModuleRegistryTests(FulfillmentTestMixin, TestCase):
+    def setUp(self):
+        super(FulfillmentModuleRegistryTests, self).setUp()
+        timings.reset()
+        self.registry = FulfillmentModuleRegistry()
+
+    def test_modules_loaded_once(self):
+        """ Verify modules are imported and instantiated once, and reloaded when the setting changes. """
+        with patch('ecommerce.extensions.fulfillment.registry.import_module', wraps=import_module) as mock_import:
+            self.registry.get_module_classes()
+            modules = self.registry.modules
+            self.assertEqual(
+                self.registry.get_module_classes(),
+                [EnrollmentFulfillmentModule, CouponFulfillmentModule, DonationsFromCheckoutTestFulfillmentModule]
+            )
+            self.assertIs(self.registry.modules, modules)
+            self.assertEqual(mock_import.call_count, len(MODULES))
+
+            with override_settings(FULFILLMENT_MODULES=MODULES[:1]):
+                self.assertEqual(self.registry.get_module_classes(), [EnrollmentFulfillmentModule])
+
+    def test_route_lines(self):
+        """ Verify lines are routed by product class, without asking modules whether they support each line. """
+        order = self.generate_open_order(product_class='Donation')
+        lines = list(order.lines.all())
+
+        with patch.object(DonationsFromCheckoutTestFulfillmentModule, 'supports_line') as mock_supports_line:
+            routed, unsupported_lines = self.registry.route_lines(lines)
+            mock_supports_line.assert_not_called()
+
+        self.assertEqual(len(routed), 1)
+        module, module_lines = routed[0]
+        self.assertIsInstance(module, DonationsFromCheckoutTestFulfillmentModule)
+        self.assertEqual(module_lines, lines)
+        self.assertEqual(unsupported_lines, [])
+        self.assertEqual(self.registry.get_modules_for_line(lines[0]), [module])
+
+    def test_route_unsupported_lines(self):
+        """ Verify lines of product classes without a module are returned as unsupported. """
+        order = self.generate_open_order()
+        lines = list(order.lines.all())
+
+        self.assertEqual(self.registry.route_lines(lines), ([], lines))
+        self.assertEqual(self.registry.get_modules_for_line(lines[0]), [])
+
+    def test_fulfillment_timings(self):
+        """ Verify the time spent fulfilling lines is recorded in the module's histogram. """
+        order = self.generate_open_order(product_class='Donation')
+
+        with patch('ecommerce.extensions.fulfillment.registry.monitoring_utils.set_custom_metric') as mock_metric:
+            api.fulfill_order(order, order.lines)
+            self.assert_order_fulfilled(order)
+            mock_metric.assert_called_once_with(
+                'fulfillment_module_DonationsFromCheckoutTestFulfillmentModule_seconds', mock_metric.call_args[0][1]
+            )
+
+        histogram = timings.as_dict()['DonationsFromCheckoutTestFulfillmentModule']
+        self.assertEqual(histogram['count'], 1)
+        self.assertEqual(sum(histogram['buckets'].values()), 1)
@@ -7,12 +7,14 @@ import waffle
 from oscar.apps.offer.applicator import Applicator
 from oscar.core.loading import get_model
 
+from ecommerce.enterprise.conditions import get_enterprise_catalog_uuid_from_basket
+from ecommerce.enterprise.context import ENTERPRISE_API_ERRORS, get_enterprise_learner_context
 from ecommerce.enterprise.utils import get_enterprise_id_for_user
 from ecommerce.extensions.offer.constants import CUSTOM_APPLICATOR_LOG_FLAG
+from ecommerce.extensions.offer.registry import site_offer_registry
 
 logger = logging.getLogger(__name__)
 BasketAttribute = get_model('basket', 'BasketAttribute')
-BasketAttributeType = get_model('basket', 'BasketAttributeType')
 BUNDLE = 'bundle_identifier'
 
 
@@ -39,12 +41,12 @@ class CustomApplicator(Applicator):
             list of Offer: A sorted list of all the offers that apply to the
                 basket.
         """
-        bundle_attributes = BasketAttribute.objects.filter(
+        bundle_id = BasketAttribute.objects.filter(
             basket=basket,
-            attribute_type=BasketAttributeType.objects.get(name=BUNDLE)
-        )
-        if bundle_attributes.count() > 0:
-            program_offers = self.get_program_offers(bundle_attributes.first())
+            attribute_type__name=BUNDLE
+        ).values_list('value_text', flat=True).first()
+        if bundle_id:
+            program_offers = self.get_program_offers(bundle_id)
             site_offers = []
             if waffle.flag_is_active(request, CUSTOM_APPLICATOR_LOG_FLAG):
                 logger.warning(
@@ -68,25 +70,21 @@ class CustomApplicator(Applicator):
         user_offers = self.get_user_offers(user)
         session_offers = self.get_session_offers(request)
 
-        return list(
+        offers = list(
             sorted(
                 chain(session_offers, basket_offers, user_offers, program_offers, enterprise_offers, site_offers),
                 key=lambda o: o.priority,
                 reverse=True,
             )
         )
+        self.prefetch_enterprise_catalog_membership(basket, offers)
+        return offers
 
     def get_site_offers(self):
         """
         Return site offers that are available to baskets without bundle ids.
         """
-        ConditionalOffer = get_model('offer', 'ConditionalOffer')
-        qs = ConditionalOffer.active.filter(
-            offer_type=ConditionalOffer.SITE,
-            condition__program_uuid__isnull=True,
-            condition__enterprise_customer_uuid__isnull=True,
-        )
-        return qs.select_related('condition', 'benefit')
+        return site_offer_registry.get_site_offers()
 
     def get_enterprise_offers(self, site, user):
         """
@@ -94,28 +92,66 @@ class CustomApplicator(Applicator):
         """
         enterprise_id = get_enterprise_id_for_user(site, user)
         if enterprise_id:
-            ConditionalOffer = get_model('offer', 'ConditionalOffer')
-            offers = ConditionalOffer.active.filter(
-                offer_type=ConditionalOffer.SITE,
-                condition__enterprise_customer_uuid=enterprise_id
-            )
-            return offers.select_related('condition', 'benefit')
+            return site_offer_registry.get_enterprise_offers(enterprise_id)
 
         return []
 
-    def get_program_offers(self, bundle_attribute):
+    def get_program_offers(self, bundle_id):
         """
         Returns offers that apply to the program by matching the bundle id.
 
         Args:
-            bundle_attribute (BasketAttribute): The BasketAttribute object
-                associated with program bundling for this basket.
+            bundle_id (str): The program UUID stored in the basket's bundle attribute.
 
         Returns:
             list of Offer: List of all the offers applicable to the program.
         """
-        bundle_id = bundle_attribute.value_text
-        ConditionalOffer = get_model('offer', 'ConditionalOffer')
-        offers = ConditionalOffer.active.filter(offer_type=ConditionalOffer.SITE, condition__program_uuid=bundle_id)
+        return site_offer_registry.get_program_offers(bundle_id)
 
-        return offers.select_related('condition', 'benefit')
+    def prefetch_enterprise_catalog_membership(self, basket, offers):
+        """
+        Loads, for the enterprise offers of the learner's enterprise, whether the course runs in the basket are in
+        the offer's catalog. Each catalog is looked up once, and the enterprise conditions of the offers read the
+        result from the learner's enterprise context instead of looking it up one offer at a time.
+
+        If the basket is pinned to a catalog, only that catalog is looked up: the enterprise conditions of the offers
+        of other catalogs are not satisfied before they read the membership.
+        """
+        if not (basket.owner and basket.site):
+            return
+
+        catalogs = [
+            (str(offer.condition.enterprise_customer_uuid), str(offer.condition.enterprise_customer_catalog_uuid))
+            for offer in offers if offer.condition.enterprise_customer_uuid
+        ]
+        if not catalogs:
+            return
+
+        basket_catalog = get_enterprise_catalog_uuid_from_basket(basket)
+        if basket_catalog:
+            catalogs = [catalog for catalog in catalogs if catalog[1] == str(basket_catalog)]
+        if len(catalogs) < 2:
+            return
+
+        course_run_ids = []
+        for line in basket.all_lines():
+            course = line.product.course
+            if not course:
+                # Enterprise conditions are never satisfied by baskets with products not related to a course run.
+                return
+            course_run_ids.append(course.id)
+
+        if not course_run_ids:
+            return
+
+        enterprise_context = get_enterprise_learner_context(basket.site, basket.owner)
+        try:
+            learner_data = enterprise_context.get_learner_data()['results'][0]
+            enterprise_customer_uuid = learner_data['enterprise_customer']['uuid']
+        except ENTERPRISE_API_ERRORS + (IndexError, TypeError):
+            return
+
+        enterprise_context.prefetch_catalog_membership(
+            course_run_ids,
+            [catalog for catalog in catalogs if catalog[0] == enterprise_customer_uuid]
+        )
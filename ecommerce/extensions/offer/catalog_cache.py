@@ -0,0 +1,113 @@
+"""
+Bulk cache of catalog query membership for course runs and courses.
+
+Benefits with a dynamic ``catalog_query`` range need to know, for every line in a basket, whether the line's
+course run (seats) or course (entitlements) is part of the query. Membership is resolved by the Discovery Service
+``query_contains`` endpoint and cached in the shared (memcached) tier. This module reads and writes those entries
+for a whole basket with a single ``get_many``/``set_many`` round trip instead of one round trip per line.
+"""
+from __future__ import absolute_import, unicode_literals
+
+import hashlib
+import logging
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from edx_django_utils import monitoring as monitoring_utils
+
+from ecommerce.core.utils import get_cache_key
+
+logger = logging.getLogger(__name__)
+
+CATALOG_QUERY_CONTAINS_RESOURCE = 'catalog_query.contains'
+
+
+class CatalogMembershipCacheStats(object):
+    """
+    Process-wide hit/miss counters for the catalog membership cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hits, misses):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def as_dict(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+stats = CatalogMembershipCacheStats()
+
+
+class CatalogMembershipCache(object):
+    """
+    Reads and writes catalog query membership for many product identifiers at once.
+
+    Entries are keyed on (partner, catalog query hash, product identifier), so the same answer is shared by every
+    site of a partner and by every range that uses the same query.
+    """
+
+    def __init__(self, partner_code, query, timeout=None):
+        self.partner_code = partner_code
+        self.query = query
+        self.query_hash = hashlib.md5(query.encode('utf-8')).hexdigest()
+        self.timeout = settings.COURSES_API_CACHE_TIMEOUT if timeout is None else timeout
+
+    def cache_key(self, product_identifier):
+        return get_cache_key(
+            partner_code=self.partner_code,
+            resource=CATALOG_QUERY_CONTAINS_RESOURCE,
+            query_hash=self.query_hash,
+            course_id=product_identifier,
+        )
+
+    def get_many(self, product_identifiers):
+        """
+        Look up catalog membership for the given identifiers with one cache call.
+
+        Arguments:
+            product_identifiers (iterable): Course run IDs and/or course UUIDs.
+
+        Returns:
+            dict: Maps each identifier found in the cache to a boolean. Missing identifiers are omitted.
+        """
+        keys_to_identifiers = {self.cache_key(identifier): identifier for identifier in product_identifiers}
+        if not keys_to_identifiers:
+            return {}
+
+        cached = cache.get_many(list(keys_to_identifiers))
+        found = {keys_to_identifiers[key]: bool(value) for key, value in cached.items()}
+
+        hits = len(found)
+        misses = len(keys_to_identifiers) - hits
+        stats.record(hits, misses)
+        monitoring_utils.set_custom_metric('catalog_membership_cache_hits', hits)
+        monitoring_utils.set_custom_metric('catalog_membership_cache_misses', misses)
+        return found
+
+    def set_many(self, membership):
+        """
+        Store catalog membership for many identifiers with one cache call.
+
+        Arguments:
+            membership (dict): Maps course run IDs and/or course UUIDs to a boolean.
+        """
+        if not membership:
+            return
+
+        # Store ints rather than booleans to match what memcached returns.
+        cache.set_many(
+            {self.cache_key(identifier): int(in_range) for identifier, in_range in membership.items()},
+            self.timeout
+        )
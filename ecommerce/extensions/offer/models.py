@@ -23,6 +23,7 @@ from slumber.exceptions import SlumberBaseException
 from threadlocals.threadlocals import get_current_request
 
 from ecommerce.core.utils import get_cache_key, log_message_and_raise_validation_error
+from ecommerce.extensions.offer.catalog_cache import CatalogMembershipCache
 from ecommerce.extensions.offer.constants import (
     OFFER_ASSIGNED,
     OFFER_ASSIGNMENT_EMAIL_BOUNCED,
@@ -72,39 +73,36 @@ class Benefit(AbstractBenefit):
             line.product.attr.certificate_type.lower() in applicable_range.course_seat_types
         ]
 
-    def _identify_uncached_product_identifiers(self, lines, domain, partner_code, query):
+    def _get_product_identifier(self, product):
+        """ Returns the course run ID for seats and the course UUID for entitlements. """
+        if product.is_seat_product:
+            return product.course.id
+        # All products passed to this method should either be a seat or an entitlement
+        return product.attr.UUID
+
+    def _identify_uncached_product_identifiers(self, lines, membership_cache):
         """
-        Checks the cache to see if each line is in the catalog range specified by the given query
-        and tracks identifiers for which discovery service data is still needed.
+        Checks the cache, in a single call, to see if each line is in the catalog range specified by the
+        given cache's query and tracks identifiers for which discovery service data is still needed.
+
+        Returns:
+            tuple: uncached course run IDs, uncached course UUIDs, and the cached membership of all other
+                identifiers as a dict.
         """
+        products = [line.product for line in lines]
+        cached_membership = membership_cache.get_many(
+            [self._get_product_identifier(product) for product in products]
+        )
+
         uncached_course_run_ids = []
         uncached_course_uuids = []
+        for product in products:
+            product_id = self._get_product_identifier(product)
+            uncached_ids = uncached_course_run_ids if product.is_seat_product else uncached_course_uuids
+            if product_id not in cached_membership and product_id not in uncached_ids:
+                uncached_ids.append(product_id)
 
-        applicable_lines = lines
-        for line in applicable_lines:
-            if line.product.is_seat_product:
-                product_id = line.product.course.id
-            else:  # All lines passed to this method should either have a seat or an entitlement product
-                product_id = line.product.attr.UUID
-
-            cache_key = get_cache_key(
-                site_domain=domain,
-                partner_code=partner_code,
-                resource='catalog_query.contains',
-                course_id=product_id,
-                query=query
-            )
-            in_catalog_range_cached_response = TieredCache.get_cached_response(cache_key)
-
-            if not in_catalog_range_cached_response.is_found:
-                if line.product.is_seat_product:
-                    uncached_course_run_ids.append({'id': product_id, 'cache_key': cache_key, 'line': line})
-                else:
-                    uncached_course_uuids.append({'id': product_id, 'cache_key': cache_key, 'line': line})
-            elif not in_catalog_range_cached_response.value:
-                applicable_lines.remove(line)
-
-        return uncached_course_run_ids, uncached_course_uuids, applicable_lines
+        return uncached_course_run_ids, uncached_course_uuids, cached_membership
 
     def get_applicable_lines(self, offer, basket, range=None):  # pylint: disable=redefined-builtin
         """
@@ -115,20 +113,21 @@ class Benefit(AbstractBenefit):
         if applicable_range and applicable_range.catalog_query is not None:
 
             query = applicable_range.catalog_query
-            applicable_lines = self._filter_for_paid_course_products(basket.all_lines(), applicable_range)
+            lines = self._filter_for_paid_course_products(basket.all_lines(), applicable_range)
 
             site = basket.site
             partner_code = site.siteconfiguration.partner.short_code
-            course_run_ids, course_uuids, applicable_lines = self._identify_uncached_product_identifiers(
-                applicable_lines, site.domain, partner_code, query
+            membership_cache = CatalogMembershipCache(partner_code, query)
+            course_run_ids, course_uuids, membership = self._identify_uncached_product_identifiers(
+                lines, membership_cache
             )
 
             if course_run_ids or course_uuids:
                 # Hit Discovery Service to determine if remaining courses and runs are in the range.
                 try:
                     response = site.siteconfiguration.discovery_api_client.catalog.query_contains.get(
-                        course_run_ids=','.join([metadata['id'] for metadata in course_run_ids]),
-                        course_uuids=','.join([metadata['id'] for metadata in course_uuids]),
+                        course_run_ids=','.join(course_run_ids),
+                        course_uuids=','.join(course_uuids),
                         query=query,
                         partner=partner_code
                     )
@@ -141,19 +140,15 @@ class Benefit(AbstractBenefit):
                     )
                     raise Exception('Failed to contact Discovery Service to retrieve offer catalog_range data.')
 
-                # Cache range-state individually for each course or run identifier and remove lines not in the range.
-                for metadata in course_run_ids + course_uuids:
-                    in_range = response[str(metadata['id'])]
-
-                    # Convert to int, because this is what memcached will return, and the request cache should return
-                    # the same value.
-                    # Note: once the TieredCache is fixed to handle this case, we could remove this line.
-                    in_range = int(in_range)
-                    TieredCache.set_all_tiers(metadata['cache_key'], in_range, settings.COURSES_API_CACHE_TIMEOUT)
-
-                    if not in_range:
-                        applicable_lines.remove(metadata['line'])
+                fetched_membership = {
+                    product_id: bool(response[str(product_id)]) for product_id in course_run_ids + course_uuids
+                }
+                membership_cache.set_many(fetched_membership)
+                membership.update(fetched_membership)
 
+            applicable_lines = [
+                line for line in lines if membership[self._get_product_identifier(line.product)]
+            ]
             return [(line.product.stockrecords.first().price_excl_tax, line) for line in applicable_lines]
         else:
             return super(Benefit, self).get_applicable_lines(offer, basket, range=range)  # pylint: disable=bad-super-call
@@ -161,6 +156,8 @@ class Benefit(AbstractBenefit):
 
 class ConditionalOffer(AbstractConditionalOffer):
     UPDATABLE_OFFER_FIELDS = ['email_domains', 'max_uses']
+    # Counters updated each time an order uses the offer
+    USAGE_FIELDS = ('num_applications', 'total_discount', 'num_orders')
     email_domains = models.CharField(max_length=255, blank=True, null=True)
     site = models.ForeignKey(
         'sites.Site', verbose_name=_('Site'), null=True, blank=True, default=None
@@ -175,6 +172,18 @@ class ConditionalOffer(AbstractConditionalOffer):
         self.clean()
         super(ConditionalOffer, self).save(*args, **kwargs)  # pylint: disable=bad-super-call
 
+    def record_usage(self, discount):
+        """
+        Records the usage of the offer by an order, saving only the usage counters.
+
+        Saving only the counters does not rebuild the site offer registry, which reads them from the database.
+        """
+        self.num_applications += discount['freq']
+        self.total_discount += discount['discount']
+        self.num_orders += 1
+        self.save(update_fields=self.USAGE_FIELDS)
+    record_usage.alters_data = True
+
     def clean(self):
         self.clean_email_domains()
         self.clean_max_global_applications()  # Our frontend uses the name max_uses instead of max_global_applications
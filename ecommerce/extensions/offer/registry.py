@@ -0,0 +1,142 @@
+"""
+In-process registry of active site offers.
+
+The registry is built from the database once per process and indexed by program UUID, enterprise customer UUID,
+and "no bundle", so the CustomApplicator can find the site offers for a basket without querying the database.
+Changes to offers are propagated to every process through a version stamp stored in the shared cache, which the
+offer signal handlers replace whenever an offer or one of its parts is saved or deleted.
+
+Saving the usage counters of an offer does not rebuild the registry. Instead, the counters of offers whose
+availability depends on them are read from the database each time the offers are returned. Each call returns copies
+of the offers, but their conditions and benefits are shared by the threads of the process, and must not be modified.
+"""
+from __future__ import absolute_import, unicode_literals
+
+import copy
+import logging
+import uuid
+from collections import defaultdict
+
+from django.utils.timezone import now
+from oscar.core.loading import get_model
+
+from ecommerce.core.utils import VersionedRegistry, bump_cache_version, get_cache_version
+
+logger = logging.getLogger(__name__)
+
+OFFER_REGISTRY_VERSION_CACHE_KEY = 'offer.registry.version'
+
+
+def _normalize_uuid(value):
+    """ Returns the canonical string form of a UUID, or None if the value is not a valid UUID. """
+    if not value:
+        return None
+    try:
+        return str(value if isinstance(value, uuid.UUID) else uuid.UUID(str(value)))
+    except ValueError:
+        return None
+
+
+def get_offer_registry_version():
+    """
+    Returns the current registry version from the shared cache, creating one if none exists.
+    """
+    return get_cache_version(OFFER_REGISTRY_VERSION_CACHE_KEY)
+
+
+def bump_offer_registry_version():
+    """
+    Stores a new registry version in the shared cache, causing every process to rebuild its registry.
+    """
+    return bump_cache_version(OFFER_REGISTRY_VERSION_CACHE_KEY)
+
+
+def _copy_offer(offer):
+    """ Returns a copy of the offer, sharing its condition and benefit. """
+    offer_copy = copy.copy(offer)
+    offer_copy._state = copy.copy(offer._state)  # pylint: disable=protected-access
+    return offer_copy
+
+
+class SiteOfferRegistry(VersionedRegistry):
+    """
+    Active site offers indexed for the CustomApplicator.
+
+    Offers are kept in the same order as the database returns them. Offers that are open but outside of their
+    date range are kept in the registry and filtered out when read, so expiring offers do not require a rebuild.
+    """
+    version_cache_key = OFFER_REGISTRY_VERSION_CACHE_KEY
+
+    def __init__(self):
+        super(SiteOfferRegistry, self).__init__()
+        self.no_bundle_offers = []
+        self.program_offers = {}
+        self.enterprise_offers = {}
+
+    def _build(self, version):
+        ConditionalOffer = get_model('offer', 'ConditionalOffer')
+        offers = ConditionalOffer.objects.filter(
+            offer_type=ConditionalOffer.SITE,
+            status=ConditionalOffer.OPEN,
+        ).select_related('condition', 'benefit')
+
+        no_bundle_offers = []
+        program_offers = defaultdict(list)
+        enterprise_offers = defaultdict(list)
+        for offer in offers:
+            program_uuid = _normalize_uuid(offer.condition.program_uuid)
+            enterprise_customer_uuid = _normalize_uuid(offer.condition.enterprise_customer_uuid)
+            if program_uuid:
+                program_offers[program_uuid].append(offer)
+            if enterprise_customer_uuid:
+                enterprise_offers[enterprise_customer_uuid].append(offer)
+            if not (program_uuid or enterprise_customer_uuid):
+                no_bundle_offers.append(offer)
+
+        self.no_bundle_offers = no_bundle_offers
+        self.program_offers = dict(program_offers)
+        self.enterprise_offers = dict(enterprise_offers)
+        logger.info('Built site offer registry version [%s] with [%d] offers.', version, len(offers))
+
+    @staticmethod
+    def _active(offers):
+        cutoff = now()
+        active_offers = [
+            _copy_offer(offer) for offer in offers
+            if (offer.start_datetime is None or offer.start_datetime <= cutoff) and
+            (offer.end_datetime is None or offer.end_datetime >= cutoff)
+        ]
+
+        limited_offers = {
+            offer.id: offer for offer in active_offers if offer.max_global_applications or offer.max_discount
+        }
+        if limited_offers:
+            ConditionalOffer = get_model('offer', 'ConditionalOffer')
+            usage = ConditionalOffer.objects.filter(id__in=limited_offers).values_list(
+                'id', *ConditionalOffer.USAGE_FIELDS
+            )
+            for offer_id, num_applications, total_discount, num_orders in usage:
+                offer = limited_offers[offer_id]
+                offer.num_applications = num_applications
+                offer.total_discount = total_discount
+                offer.num_orders = num_orders
+
+        return active_offers
+
+    def get_site_offers(self):
+        """ Returns active site offers that are not associated with a program or an enterprise customer. """
+        self._ensure_current()
+        return self._active(self.no_bundle_offers)
+
+    def get_program_offers(self, program_uuid):
+        """ Returns active site offers associated with the given program. """
+        self._ensure_current()
+        return self._active(self.program_offers.get(_normalize_uuid(program_uuid), []))
+
+    def get_enterprise_offers(self, enterprise_customer_uuid):
+        """ Returns active site offers associated with the given enterprise customer. """
+        self._ensure_current()
+        return self._active(self.enterprise_offers.get(_normalize_uuid(enterprise_customer_uuid), []))
+
+
+site_offer_registry = SiteOfferRegistry()
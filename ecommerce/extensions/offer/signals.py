@@ -0,0 +1,34 @@
+from __future__ import absolute_import
+
+from django.db.models.signals import post_delete, post_save
+from oscar.core.loading import get_model
+
+from ecommerce.core.utils import invalidate_on_commit
+from ecommerce.extensions.offer.registry import bump_offer_registry_version
+
+Benefit = get_model('offer', 'Benefit')
+Condition = get_model('offer', 'Condition')
+ConditionalOffer = get_model('offer', 'ConditionalOffer')
+Range = get_model('offer', 'Range')
+RangeProduct = get_model('offer', 'RangeProduct')
+
+
+def invalidate_site_offer_registry(*_args, **_kwargs):
+    """
+    When an offer or one of its parts changes, every process must rebuild its site offer registry.
+    """
+    invalidate_on_commit(bump_offer_registry_version)
+
+
+def invalidate_site_offer_registry_on_save(sender, update_fields=None, **kwargs):
+    """
+    Invalidates the site offer registry, unless only the usage counters of an offer were saved.
+    """
+    if sender is ConditionalOffer and update_fields and set(update_fields) <= set(ConditionalOffer.USAGE_FIELDS):
+        return
+    invalidate_site_offer_registry(sender, **kwargs)
+
+
+for sender in (ConditionalOffer, Condition, Benefit, Range, RangeProduct):
+    post_save.connect(invalidate_site_offer_registry_on_save, sender=sender, dispatch_uid='offer_registry_save')
+    post_delete.connect(invalidate_site_offer_registry, sender=sender, dispatch_uid='offer_registry_delete')
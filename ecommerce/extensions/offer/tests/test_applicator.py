@@ -11,10 +11,13 @@ from testfixtures import LogCapture
 from waffle.testutils import override_flag
 
 from ecommerce.core.constants import SYSTEM_ENTERPRISE_LEARNER_ROLE
+from ecommerce.courses.tests.factories import CourseFactory
+from ecommerce.enterprise.constants import ENTERPRISE_CATALOG_ATTRIBUTE_TYPE
 from ecommerce.extensions.offer.applicator import CustomApplicator
 from ecommerce.extensions.offer.constants import CUSTOM_APPLICATOR_LOG_FLAG
+from ecommerce.extensions.offer.registry import get_offer_registry_version
 from ecommerce.extensions.test.factories import ConditionalOfferFactory, ConditionFactory, ProgramOfferFactory
-from ecommerce.tests.factories import UserFactory
+from ecommerce.tests.factories import SiteConfigurationFactory, UserFactory
 from ecommerce.tests.testcases import TestCase
 
 BasketAttribute = get_model('basket', 'BasketAttribute')
@@ -132,7 +135,7 @@ class CustomApplicatorTests(TestCase):
                 enterprise_customer_uuid=None
             )
             ConditionalOfferFactory(condition=condition)
-        assert self.applicator.get_site_offers().count() == 3 + len(existing_offers)
+        assert len(self.applicator.get_site_offers()) == 3 + len(existing_offers)
 
     @ddt.data(
         (uuid4(), 2),
@@ -174,4 +177,107 @@ class CustomApplicatorTests(TestCase):
         if num_expected_offers == 0:
             assert not enterprise_offers
         else:
-            assert enterprise_offers.count() == num_expected_offers
+            assert len(enterprise_offers) == num_expected_offers
+
+    def test_get_offers_uses_registry(self):
+        """ Verify offers are served from the registry without querying offers once it is built. """
+        ConditionalOfferFactory.create_batch(2)
+        site_offers = self.applicator.get_site_offers()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.applicator.get_site_offers(), site_offers)
+
+    def test_registry_invalidated_on_change(self):
+        """ Verify saving or deleting offers and conditions rebuilds the registry. """
+        program_offer = ProgramOfferFactory()
+        program_uuid = program_offer.condition.program_uuid
+        self.assertEqual(self.applicator.get_program_offers(str(program_uuid)), [program_offer])
+
+        program_offer.status = ConditionalOffer.SUSPENDED
+        program_offer.save()
+        self.assertEqual(self.applicator.get_program_offers(str(program_uuid)), [])
+
+        site_offer = ConditionalOfferFactory()
+        self.assertIn(site_offer, self.applicator.get_site_offers())
+
+        site_offer.condition.program_uuid = program_uuid
+        site_offer.condition.save()
+        self.assertNotIn(site_offer, self.applicator.get_site_offers())
+
+        site_offer.delete()
+        self.assertEqual(self.applicator.get_program_offers(str(program_uuid)), [])
+
+    def test_registry_not_invalidated_on_usage(self):
+        """ Verify recording the usage of an offer does not rebuild the registry. """
+        offer = ConditionalOfferFactory()
+        self.applicator.get_site_offers()
+        version = get_offer_registry_version()
+
+        offer.record_usage(discount={'freq': 1, 'discount': 1})
+        self.assertEqual(get_offer_registry_version(), version)
+
+    def test_registry_reads_fresh_usage(self):
+        """ Verify the usage counters of offers limited by usage are read from the database. """
+        limited_offer = ConditionalOfferFactory(max_global_applications=2)
+        self.applicator.get_site_offers()
+
+        ConditionalOffer.objects.get(id=limited_offer.id).record_usage(discount={'freq': 2, 'discount': 1})
+        with self.assertNumQueries(1):
+            site_offers = self.applicator.get_site_offers()
+
+        offer = site_offers[site_offers.index(limited_offer)]
+        self.assertEqual(offer.num_applications, 2)
+        self.assertEqual(offer.get_max_applications(), 0)
+
+    def test_registry_returns_copies(self):
+        """ Verify changes to the returned offers are not seen by other callers. """
+        ConditionalOfferFactory()
+        offer = self.applicator.get_site_offers()[0]
+        offer.num_applications = 5
+
+        self.assertEqual(self.applicator.get_site_offers()[0].num_applications, 0)
+
+    def prefetch_enterprise_catalog_membership(self, catalog_uuids):
+        """
+        Prefetches the catalog membership of a course run basket for two offers of each catalog, and returns the
+        catalogs looked up.
+        """
+        enterprise_customer_uuid = uuid4()
+        offers = [
+            ConditionalOfferFactory(condition=ConditionFactory(
+                enterprise_customer_uuid=enterprise_customer_uuid, enterprise_customer_catalog_uuid=catalog_uuid
+            ))
+            for catalog_uuid in catalog_uuids + catalog_uuids
+        ]
+        offers.append(ConditionalOfferFactory(condition=ConditionFactory(enterprise_customer_uuid=uuid4())))
+
+        site_configuration = SiteConfigurationFactory()
+        course = CourseFactory(partner=site_configuration.partner)
+        self.basket.owner = self.user
+        self.basket.site = site_configuration.site
+        self.basket.add_product(course.create_or_update_seat('verified', True, 100))
+        learner_data = {'results': [{'enterprise_customer': {'uuid': str(enterprise_customer_uuid)}}]}
+
+        with mock.patch('ecommerce.enterprise.context.fetch_enterprise_learner_data', return_value=learner_data):
+            with mock.patch('ecommerce.enterprise.context.catalog_contains_course_runs') as mock_contains:
+                self.applicator.prefetch_enterprise_catalog_membership(self.basket, offers)
+
+        return sorted(call[1]['enterprise_customer_catalog_uuid'] for call in mock_contains.call_args_list)
+
+    def test_prefetch_enterprise_catalog_membership(self):
+        """ Verify the catalogs of the learner's enterprise offers are looked up once each. """
+        catalog_uuids = [uuid4(), uuid4()]
+        self.assertEqual(
+            self.prefetch_enterprise_catalog_membership(catalog_uuids),
+            sorted(str(catalog_uuid) for catalog_uuid in catalog_uuids)
+        )
+
+    def test_prefetch_enterprise_catalog_membership_pinned_catalog(self):
+        """ Verify only the catalog the basket is pinned to is looked up. """
+        catalog_uuids = [uuid4(), uuid4()]
+        BasketAttribute.objects.create(
+            basket=self.basket,
+            attribute_type=BasketAttributeType.objects.get_or_create(name=ENTERPRISE_CATALOG_ATTRIBUTE_TYPE)[0],
+            value_text=str(catalog_uuids[1]),
+        )
+        self.assertEqual(self.prefetch_enterprise_catalog_membership(catalog_uuids), [str(catalog_uuids[1])])
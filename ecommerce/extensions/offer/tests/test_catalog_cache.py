@@ -0,0 +1,39 @@
+from __future__ import absolute_import, unicode_literals
+
+from django.core.cache import cache
+from mock import patch
+
+from ecommerce.extensions.offer.catalog_cache import CatalogMembershipCache, stats
+from ecommerce.tests.testcases import TestCase
+
+
+class CatalogMembershipCacheTests(TestCase):
+    def setUp(self):
+        super(CatalogMembershipCacheTests, self).setUp()
+        stats.reset()
+        self.membership_cache = CatalogMembershipCache('edX', 'key:*')
+
+    def test_get_many_empty(self):
+        """ Verify no cache call is made when there is nothing to look up. """
+        with patch.object(cache, 'get_many') as mock_get_many:
+            self.assertEqual(self.membership_cache.get_many([]), {})
+            mock_get_many.assert_not_called()
+
+    def test_set_many_and_get_many(self):
+        """ Verify membership is stored and read back for many identifiers in one call each. """
+        self.membership_cache.set_many({'course-v1:a+b+c': True, 'uuid-1': False})
+
+        with patch.object(cache, 'get_many', wraps=cache.get_many) as mock_get_many:
+            found = self.membership_cache.get_many(['course-v1:a+b+c', 'uuid-1', 'uuid-2'])
+            self.assertEqual(mock_get_many.call_count, 1)
+
+        self.assertEqual(found, {'course-v1:a+b+c': True, 'uuid-1': False})
+        self.assertEqual(stats.as_dict(), {'hits': 2, 'misses': 1})
+
+    def test_keys_scoped_by_partner_and_query(self):
+        """ Verify entries are not shared across partners or queries. """
+        self.membership_cache.set_many({'uuid-1': True})
+
+        self.assertEqual(CatalogMembershipCache('other', 'key:*').get_many(['uuid-1']), {})
+        self.assertEqual(CatalogMembershipCache('edX', 'uuid:*').get_many(['uuid-1']), {})
+        self.assertEqual(CatalogMembershipCache('edX', 'key:*').get_many(['uuid-1']), {'uuid-1': True})
@@ -5,6 +5,7 @@ from uuid import uuid4
 
 import ddt
 import httpretty
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from edx_django_utils.cache import TieredCache
 from mock import patch
@@ -576,3 +577,32 @@ class BenefitTests(DiscoveryTestMixin, DiscoveryMockMixin, TestCase):
         # Verify that the API return value is cached
         httpretty.disable()
         self.assertEqual(self.benefit.get_applicable_lines(self.offer, basket), applicable_lines)
+
+    @httpretty.activate
+    def test_get_applicable_lines_single_cache_call(self):
+        """ Verify cached membership for the whole basket is read with one cache call and no Discovery call. """
+        basket = factories.BasketFactory(site=self.site, owner=self.user)
+        in_range_product = self.create_entitlement_product()
+        out_of_range_product = self.create_entitlement_product()
+        another_in_range_product = self.create_entitlement_product()
+
+        for product in (in_range_product, out_of_range_product, another_in_range_product):
+            basket.add_product(product)
+
+        self.mock_access_token_response()
+        self.mock_catalog_query_contains_endpoint(
+            course_run_ids=[], course_uuids=[in_range_product.attr.UUID, another_in_range_product.attr.UUID],
+            absent_ids=[out_of_range_product.attr.UUID],
+            query=self.benefit.range.catalog_query, discovery_api_url=self.site_configuration.discovery_api_url
+        )
+        expected = [
+            (line.product.stockrecords.first().price_excl_tax, line) for line in basket.all_lines()
+            if line.product != out_of_range_product
+        ]
+        self.assertEqual(self.benefit.get_applicable_lines(self.offer, basket), expected)
+
+        httpretty.disable()
+        with patch.object(cache, 'get_many', wraps=cache.get_many) as mock_get_many:
+            # Lines adjacent to a line that is out of range must not be skipped.
+            self.assertEqual(self.benefit.get_applicable_lines(self.offer, basket), expected)
+            self.assertEqual(mock_get_many.call_count, 1)
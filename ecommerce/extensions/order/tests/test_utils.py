@@ -9,6 +9,7 @@ import ddt
 import httpretty
 import mock
 import pytz
+from django.test import override_settings
 from django.test.client import RequestFactory
 from edx_django_utils.cache import TieredCache
 from oscar.core.loading import get_class, get_model
@@ -17,6 +18,7 @@ from requests import Timeout
 from testfixtures import LogCapture
 
 from ecommerce.core.url_utils import get_lms_entitlement_api_url
+from ecommerce.entitlements.utils import create_or_update_course_entitlement
 from ecommerce.extensions.fulfillment.status import ORDER
 from ecommerce.extensions.order.utils import UserAlreadyPlacedOrder
 from ecommerce.extensions.refund.tests.factories import RefundFactory
@@ -344,3 +346,119 @@ class UserAlreadyPlacedOrderTests(RefundTestMixin, TestCase):
 
             _ = UserAlreadyPlacedOrder.is_entitlement_expired(self.course_entitlement_uuid, site=self.site)
             self.assertEqual(mocked_set_all_tiers.call_count, 2)
+
+    def create_entitlement_order(self, entitlement_uuid, title, with_uuid_attribute=True):
+        """ Creates an order of the user for a new course entitlement identified by entitlement_uuid. """
+        course_entitlement = create_or_update_course_entitlement(
+            certificate_type='verified',
+            price=100,
+            partner=self.partner,
+            UUID=entitlement_uuid,
+            title=title
+        )
+        basket = BasketFactory(owner=self.user, site=self.site)
+        basket.add_product(course_entitlement)
+        order = create_order(basket=basket, user=self.user)
+        if with_uuid_attribute:
+            order.lines.first().attributes.create(option=self.entitlement_option, value=entitlement_uuid)
+        return course_entitlement
+
+    def test_already_purchased_single_query(self):
+        """
+        Verify the purchased products are found with a single query, excluding refunded and unpurchased products.
+        """
+        refund = RefundFactory(user=self.user)
+        RefundLine.objects.filter(refund=refund).update(status='Complete')
+        refunded_product = self.get_order_product(order=refund.order)
+        not_purchased_product = self.create_order(user=self.create_user()).lines.first().product
+        products = [self.product, refunded_product, not_purchased_product]
+
+        # Warm up the switch cache, which is not part of the check itself.
+        UserAlreadyPlacedOrder.already_purchased(self.user, products, self.site)
+        with self.assertNumQueries(1):
+            purchased = UserAlreadyPlacedOrder.already_purchased(self.user, products, self.site)
+
+        self.assertEqual(purchased, {self.product.id})
+
+    def test_already_purchased_no_products(self):
+        """ Verify no query is made when there are no products to check. """
+        with self.assertNumQueries(0):
+            self.assertEqual(UserAlreadyPlacedOrder.already_purchased(self.user, [], self.site), set())
+
+    @httpretty.activate
+    def test_already_purchased_entitlements_bulk_fetch(self):
+        """
+        Verify the entitlements missing from the cache are fetched with a single request, and cached.
+        """
+        self.mock_access_token_response()
+        active_entitlement = self.create_entitlement_order('222', 'Bar')
+        expired_entitlement = self.create_entitlement_order('333', 'Baz')
+        body = {
+            'next': None,
+            'results': [
+                {'uuid': '111', 'expired_at': None},
+                {'uuid': '222', 'expired_at': None},
+                {'uuid': '333', 'expired_at': '2017-12-16T21:36:19.279647Z'},
+            ]
+        }
+        httpretty.register_uri(httpretty.GET, get_lms_entitlement_api_url() + 'entitlements/',
+                               status=200, body=json.dumps(body), content_type='application/json')
+        products = [self.course_entitlement, active_entitlement, expired_entitlement]
+
+        purchased = UserAlreadyPlacedOrder.already_purchased(self.user, products, self.site)
+        self.assertEqual(purchased, {self.course_entitlement.id, active_entitlement.id})
+        entitlement_requests = [
+            request for request in httpretty.HTTPretty.latest_requests if request.path.startswith('/api/entitlements/')
+        ]
+        self.assertEqual(len(entitlement_requests), 1)
+        self.assertEqual(set(entitlement_requests[0].querystring['uuid'][0].split(',')), {'111', '222', '333'})
+
+        httpretty.reset()
+        self.assertEqual(UserAlreadyPlacedOrder.already_purchased(self.user, products, self.site), purchased)
+        self.assertEqual(httpretty.HTTPretty.latest_requests, [])
+
+    @httpretty.activate
+    @override_settings(ENTITLEMENT_API_MAX_PAGE_SIZE=2)
+    def test_already_purchased_entitlements_paginated(self):
+        """
+        Verify entitlements are requested in chunks no larger than a page, and the pages of each chunk are followed.
+        """
+        self.mock_access_token_response()
+        expired_entitlement = self.create_entitlement_order('222', 'Bar')
+        other_expired_entitlement = self.create_entitlement_order('333', 'Baz')
+
+        def entitlements_callback(request, uri, headers):  # pylint: disable=unused-argument
+            uuids = request.querystring['uuid'][0].split(',')
+            page = int(request.querystring['page'][0])
+            # Each page holds a single entitlement, so every entitlement after the first needs another page.
+            body = {
+                'next': 'next-page' if page < len(uuids) else None,
+                'results': [{'uuid': uuids[page - 1], 'expired_at': '2017-12-16T21:36:19.279647Z'}],
+            }
+            return 200, headers, json.dumps(body)
+
+        httpretty.register_uri(httpretty.GET, get_lms_entitlement_api_url() + 'entitlements/',
+                               body=entitlements_callback, content_type='application/json')
+        products = [self.course_entitlement, expired_entitlement, other_expired_entitlement]
+
+        self.assertEqual(UserAlreadyPlacedOrder.already_purchased(self.user, products, self.site), set())
+        entitlement_requests = [
+            request for request in httpretty.HTTPretty.latest_requests if request.path.startswith('/api/entitlements/')
+        ]
+        self.assertEqual(len(entitlement_requests), 3)
+        self.assertTrue(all(len(request.querystring['uuid'][0].split(',')) <= 2 for request in entitlement_requests))
+
+    def test_already_purchased_entitlement_without_uuid(self):
+        """ Verify an entitlement order line without an entitlement UUID is logged, and not considered purchased. """
+        course_entitlement = self.create_entitlement_order('444', 'Qux', with_uuid_attribute=False)
+
+        with LogCapture(LOGGER_NAME) as logger:
+            purchased = UserAlreadyPlacedOrder.already_purchased(self.user, [course_entitlement], self.site)
+            logger.check_present((
+                LOGGER_NAME,
+                'WARNING',
+                'Order line of course entitlement [{}] for user [{}] has no entitlement UUID. '
+                'The entitlement is not considered purchased.'.format(course_entitlement.id, self.user.id)
+            ))
+
+        self.assertEqual(purchased, set())
@@ -5,6 +5,8 @@ import logging
 
 import waffle
 from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Subquery
 from edx_django_utils.cache import TieredCache
 from edx_rest_api_client.client import EdxRestApiClient
 from edx_rest_api_client.exceptions import HttpNotFoundError
@@ -13,6 +15,7 @@ from oscar.core.loading import get_model
 from requests.exceptions import ConnectionError, ConnectTimeout  # pylint: disable=ungrouped-imports
 from threadlocals.threadlocals import get_current_request
 
+from ecommerce.core.constants import COURSE_ENTITLEMENT_PRODUCT_CLASS_NAME
 from ecommerce.core.url_utils import get_lms_entitlement_api_url
 from ecommerce.extensions.order.constants import DISABLE_REPEAT_ORDER_CHECK_SWITCH_NAME
 from ecommerce.extensions.refund.status import REFUND_LINE
@@ -20,9 +23,9 @@ from ecommerce.referrals.models import Referral
 
 logger = logging.getLogger(__name__)
 
-Option = get_model('catalogue', 'Option')
 Order = get_model('order', 'Order')
 OrderLine = get_model('order', 'Line')
+OrderLineAttribute = get_model('order', 'LineAttribute')
 RefundLine = get_model('refund', 'RefundLine')
 
 
@@ -133,6 +136,11 @@ class UserAlreadyPlacedOrder(object):
     Provides utils methods to check if user has already placed an order
     """
 
+    @staticmethod
+    def _get_entitlement_cache_key(entitlement_uuid, site):
+        partner_short_code = site.siteconfiguration.partner.short_code
+        return 'course_entitlement_detail_{}{}'.format(entitlement_uuid, partner_short_code)
+
     @staticmethod
     def is_entitlement_expired(entitlement_uuid, site):
         """
@@ -148,8 +156,7 @@ class UserAlreadyPlacedOrder(object):
         """
         entitlement_api_client = EdxRestApiClient(get_lms_entitlement_api_url(),
                                                   jwt=site.siteconfiguration.access_token)
-        partner_short_code = site.siteconfiguration.partner.short_code
-        key = 'course_entitlement_detail_{}{}'.format(entitlement_uuid, partner_short_code)
+        key = UserAlreadyPlacedOrder._get_entitlement_cache_key(entitlement_uuid, site)
         entitlement_cached_response = TieredCache.get_cached_response(key)
         if entitlement_cached_response.is_found:
             entitlement = entitlement_cached_response.value
@@ -163,6 +170,143 @@ class UserAlreadyPlacedOrder(object):
 
         return expired
 
+    @staticmethod
+    def get_expired_entitlements(entitlement_uuids, site):
+        """
+        Returns the UUIDs of the given entitlements that are expired.
+
+        Entitlements are read from the same cache as is_entitlement_expired. The entitlements missing from the cache
+        are fetched from the LMS with list requests of at most ENTITLEMENT_API_MAX_PAGE_SIZE UUIDs, or with a detail
+        request if only one is missing, and cached individually.
+
+        Args:
+            entitlement_uuids: (iterable) Entitlement UUIDs
+            site: (Site)
+
+        Returns:
+            set: UUIDs of the expired entitlements
+
+        Raises:
+            ConnectTimeout, ConnectionError, HttpNotFoundError: If the entitlements can not be fetched from the LMS.
+        """
+        keys = {
+            UserAlreadyPlacedOrder._get_entitlement_cache_key(entitlement_uuid, site): entitlement_uuid
+            for entitlement_uuid in set(entitlement_uuids)
+        }
+        cached_entitlements = cache.get_many(list(keys))
+        expired_uuids = {
+            keys[key] for key, entitlement in cached_entitlements.items() if entitlement.get('expired_at')
+        }
+        missing_uuids = [entitlement_uuid for key, entitlement_uuid in keys.items() if key not in cached_entitlements]
+
+        if len(missing_uuids) == 1:
+            if UserAlreadyPlacedOrder.is_entitlement_expired(missing_uuids[0], site):
+                expired_uuids.add(missing_uuids[0])
+        elif missing_uuids:
+            entitlement_api_client = EdxRestApiClient(get_lms_entitlement_api_url(),
+                                                      jwt=site.siteconfiguration.access_token)
+            fetched_uuids = set()
+            # The LMS caps the page size, so the UUIDs are requested in chunks no larger than a page, and the
+            # pages of each chunk are followed.
+            page_size = settings.ENTITLEMENT_API_MAX_PAGE_SIZE
+            for start in range(0, len(missing_uuids), page_size):
+                chunk = missing_uuids[start:start + page_size]
+                logger.debug('Trying to get entitlements {%s}', chunk)
+                page = 1
+                while page:
+                    response = entitlement_api_client.entitlements.get(
+                        uuid=','.join(chunk), page_size=len(chunk), page=page
+                    )
+                    for entitlement in response.get('results', []):
+                        fetched_uuids.add(entitlement['uuid'])
+                        if entitlement.get('expired_at'):
+                            expired_uuids.add(entitlement['uuid'])
+                        TieredCache.set_all_tiers(
+                            UserAlreadyPlacedOrder._get_entitlement_cache_key(entitlement['uuid'], site),
+                            entitlement,
+                            settings.COURSES_API_CACHE_TIMEOUT
+                        )
+                    page = page + 1 if response.get('next') else None
+
+            for entitlement_uuid in set(missing_uuids) - fetched_uuids:
+                logger.warning('Entitlement [%s] was not returned by the LMS.', entitlement_uuid)
+
+        return expired_uuids
+
+    @staticmethod
+    def already_purchased(user, products, site):
+        """
+        Returns the IDs of the given products that the user has already purchased.
+
+        A product is considered purchased if an OrderLine exists for the product, it has not been refunded and,
+        for course entitlements, the entitlement has not expired. The order lines of all products are read with a
+        single query, and the expiry of their entitlements is resolved with one LMS request per page of entitlements.
+
+        Args:
+            user: (User)
+            products: (iterable) Products
+            site: (Site)
+
+        Returns:
+            set: IDs of the products the user has purchased.
+
+        Notes:
+            If the switch with the name `ecommerce.extensions.order.constants.DISABLE_REPEAT_ORDER_SWITCH_NAME`
+            is active this check will be disabled, and this method will always return an empty set.
+        """
+        product_ids = {product.id for product in products}
+        if not product_ids or waffle.switch_is_active(DISABLE_REPEAT_ORDER_CHECK_SWITCH_NAME):
+            return set()
+
+        order_lines = OrderLine.objects.filter(
+            product_id__in=product_ids,
+            order__user=user,
+        ).annotate(
+            is_refunded=Exists(RefundLine.objects.filter(order_line=OuterRef('pk'), status=REFUND_LINE.COMPLETE)),
+            entitlement_uuid=Subquery(
+                OrderLineAttribute.objects.filter(
+                    line=OuterRef('pk'),
+                    option__code='course_entitlement',
+                ).values('value')[:1]
+            ),
+        ).filter(
+            is_refunded=False,
+        ).values_list(
+            'product_id',
+            'entitlement_uuid',
+            'product__product_class__name',
+            'product__parent__product_class__name',
+        )
+
+        purchased = set()
+        entitlement_product_ids = {}
+        for product_id, entitlement_uuid, product_class_name, parent_product_class_name in order_lines:
+            if (product_class_name or parent_product_class_name) != COURSE_ENTITLEMENT_PRODUCT_CLASS_NAME:
+                purchased.add(product_id)
+            elif entitlement_uuid:
+                entitlement_product_ids.setdefault(entitlement_uuid, set()).add(product_id)
+            else:
+                logger.warning(
+                    'Order line of course entitlement [%d] for user [%d] has no entitlement UUID. '
+                    'The entitlement is not considered purchased.',
+                    product_id, user.id
+                )
+
+        if entitlement_product_ids:
+            try:
+                expired_uuids = UserAlreadyPlacedOrder.get_expired_entitlements(entitlement_product_ids, site)
+            except (ConnectTimeout, ConnectionError, HttpNotFoundError):
+                logger.exception(
+                    'Unable to get entitlements info [%s] due to a network problem',
+                    ', '.join(sorted(entitlement_product_ids))
+                )
+            else:
+                for entitlement_uuid, entitlement_product_id_set in entitlement_product_ids.items():
+                    if entitlement_uuid not in expired_uuids:
+                        purchased.update(entitlement_product_id_set)
+
+        return purchased
+
     @staticmethod
     def user_already_placed_order(user, product, site):
         """
@@ -182,28 +326,7 @@ class UserAlreadyPlacedOrder(object):
             If the switch with the name `ecommerce.extensions.order.constants.DISABLE_REPEAT_ORDER_SWITCH_NAME`
             is active this check will be disabled, and this method will already return `False`.
         """
-        if waffle.switch_is_active(DISABLE_REPEAT_ORDER_CHECK_SWITCH_NAME):
-            return False
-
-        entitlement_option = Option.objects.get(code='course_entitlement')
-
-        orders_lines = OrderLine.objects.filter(product=product, order__user=user)
-        for order_line in orders_lines:
-            if not UserAlreadyPlacedOrder.is_order_line_refunded(order_line):
-                if not order_line.product.is_course_entitlement_product:
-                    return True
-
-                entitlement_uuid = order_line.attributes.get(option=entitlement_option).value
-                try:
-                    if not UserAlreadyPlacedOrder.is_entitlement_expired(entitlement_uuid, site):
-                        return True
-                except (ConnectTimeout, ConnectionError, HttpNotFoundError):
-                    logger.exception(
-                        'Unable to get entitlement info [%s] due to a network problem',
-                        entitlement_uuid
-                    )
-
-        return False
+        return product.id in UserAlreadyPlacedOrder.already_purchased(user, [product], site)
 
     @staticmethod
     def is_order_line_refunded(order_line):
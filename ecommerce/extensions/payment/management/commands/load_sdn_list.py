@@ -0,0 +1,149 @@
+"""
+This command loads the individuals of a downloaded consolidated screening list into the local SDN index.
+"""
+from __future__ import absolute_import, unicode_literals
+
+import io
+import json
+import logging
+import os
+import re
+
+import six
+import unicodecsv as csv
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+
+from ecommerce.extensions.payment.models import SDNListEntry
+from ecommerce.extensions.payment.sdn import bump_sdn_index_version, normalize_name
+
+logger = logging.getLogger(__name__)
+
+ADDRESS_FIELDS = ('address', 'city', 'state', 'postal_code', 'country')
+
+
+def get_source_abbreviation(source):
+    """ Returns the abbreviation of a list, e.g. SDN for 'Specially Designated Nationals (SDN) - Treasury Dept.' """
+    match = re.search(r'\(([A-Z0-9]+)\)', source or '')
+    return match.group(1) if match else (source or '').strip().upper()[:32]
+
+
+def parse_csv_record(row):
+    """
+    Returns the entry of a row of the CSV file in the shape returned by the consolidated screening list API.
+
+    The CSV file separates alternate names and addresses with semicolons, and the fields of an address with commas.
+    """
+    record = dict(row)
+    record['alt_names'] = [name.strip() for name in (row.get('alt_names') or '').split(';') if name.strip()]
+
+    addresses = []
+    for address in (row.get('addresses') or '').split(';'):
+        parts = [part.strip() for part in address.split(',')]
+        if not any(parts):
+            continue
+        # The street address may contain commas, the country is always the last field.
+        if len(parts) > len(ADDRESS_FIELDS):
+            parts = [', '.join(parts[:-4])] + parts[-4:]
+        else:
+            parts = [''] * (len(ADDRESS_FIELDS) - len(parts)) + parts
+        addresses.append(dict(zip(ADDRESS_FIELDS, parts)))
+    record['addresses'] = addresses
+    return record
+
+
+def get_entry(record):
+    """ Returns the SDNListEntry of an individual of the list. """
+    names = []
+    for name in [record['name']] + list(record.get('alt_names') or []):
+        name = normalize_name(name)
+        if name and name not in names:
+            names.append(name)
+
+    addresses = record.get('addresses') or []
+    countries = sorted({(address.get('country') or '').strip().upper() for address in addresses} - {''})
+    normalized_addresses = [
+        normalize_name(' '.join(address.get(field) or '' for field in ADDRESS_FIELDS)) for address in addresses
+    ]
+
+    return SDNListEntry(
+        source=get_source_abbreviation(record.get('source')),
+        name=record['name'][:255],
+        names='\n'.join(names),
+        countries=','.join(countries),
+        addresses='\n'.join(address for address in normalized_addresses if address),
+        record=record,
+    )
+
+
+class Command(BaseCommand):
+    """
+    Replace the local SDN index with the individuals of a consolidated screening list file.
+
+    The file is downloaded from https://api.trade.gov/consolidated_screening_list/search.json (JSON) or the
+    equivalent CSV export. Entries other than individuals are skipped, since checkouts only screen individuals.
+    Every process rebuilds its index the next time it screens a user.
+
+    Example:
+
+        ./manage.py load_sdn_list --file consolidated.csv
+    """
+
+    help = 'Replace the local SDN index with the individuals of a consolidated screening list file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            dest='file',
+            required=True,
+            help='Path of the downloaded CSV or JSON file.',
+        )
+        parser.add_argument(
+            '--format',
+            dest='format',
+            choices=('csv', 'json'),
+            default=None,
+            help='Format of the file, guessed from its extension if not given.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            dest='batch_size',
+            default=1000,
+            help='Number of entries to insert per query.',
+            type=int,
+        )
+
+    def read_records(self, path, file_format):
+        if file_format == 'json':
+            with io.open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            return data['results'] if isinstance(data, dict) else data
+
+        with open(path, 'rb') as f:
+            return [parse_csv_record(row) for row in csv.DictReader(f, encoding='utf-8')]
+
+    def handle(self, *args, **options):
+        path = options['file']
+        file_format = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if file_format not in ('csv', 'json'):
+            raise CommandError('The format of [{}] must be csv or json.'.format(path))
+
+        try:
+            records = self.read_records(path, file_format)
+        except (IOError, KeyError, ValueError) as exc:
+            raise CommandError('Unable to read the screening list [{}]: {}'.format(path, six.text_type(exc)))
+
+        entries = [
+            get_entry(record) for record in records
+            if (record.get('type') or '').lower() == 'individual' and record.get('name')
+        ]
+
+        with transaction.atomic():
+            SDNListEntry.objects.all().delete()
+            SDNListEntry.objects.bulk_create(entries, batch_size=options['batch_size'])
+
+        version = bump_sdn_index_version()
+        logger.info(
+            'Loaded [%d] individuals of [%d] entries from [%s] into SDN index version [%s].',
+            len(entries), len(records), path, version
+        )
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import io
+import json
+import os
+import shutil
+import tempfile
+
+import six
+from django.core.management import CommandError, call_command
+
+from ecommerce.extensions.payment.models import SDNListEntry
+from ecommerce.extensions.payment.sdn import get_sdn_index_version
+from ecommerce.tests.testcases import TestCase
+
+CSV_HEADER = 'source,type,name,alt_names,addresses\n'
+CSV_ROWS = (
+    'Specially Designated Nationals (SDN) - Treasury Department,Individual,Keyser Söze,'
+    '"Söze, Keyser; Kobayashi","Calle 1, Apt 2, Havana, , 10100, CU; Main St, Paris, , , FR"\n'
+    'Specially Designated Nationals (SDN) - Treasury Department,Entity,Acme Corp,,"Main St, Paris, , , FR"\n'
+)
+
+
+class LoadSDNListTests(TestCase):
+    """Tests for load_sdn_list management command."""
+
+    def setUp(self):
+        super(LoadSDNListTests, self).setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+
+    def write_file(self, name, content):
+        path = os.path.join(self.tmp_dir, name)
+        with io.open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def test_load_csv(self):
+        """Test that the individuals of a CSV file replace the loaded entries, and the index version changes."""
+        SDNListEntry.objects.create(source='SDN', name='Old', names='old', record={})
+        version = get_sdn_index_version()
+
+        call_command('load_sdn_list', file=self.write_file('list.csv', CSV_HEADER + CSV_ROWS))
+
+        entry = SDNListEntry.objects.get()
+        self.assertEqual(entry.source, 'SDN')
+        self.assertEqual(entry.name, 'Keyser Söze')
+        self.assertEqual(entry.names.splitlines(), ['keyser soze', 'soze keyser', 'kobayashi'])
+        self.assertEqual(entry.countries, 'CU,FR')
+        self.assertEqual(entry.addresses.splitlines(), ['calle 1 apt 2 havana 10100 cu', 'main st paris fr'])
+        self.assertEqual(entry.record['addresses'][0]['city'], 'Havana')
+        self.assertNotEqual(get_sdn_index_version(), version)
+
+    def test_load_json(self):
+        """Test that the individuals of a JSON file, in the shape returned by the API, are loaded."""
+        results = [{
+            'source': 'Nonproliferation Sanctions (ISN) - State Department',
+            'type': 'Individual',
+            'name': 'Verbal Kint',
+            'alt_names': ['Roger Kint'],
+            'addresses': [
+                {'address': None, 'city': 'San Pedro', 'state': 'CA', 'postal_code': None, 'country': 'US'}
+            ],
+        }]
+        path = self.write_file('list.json', six.text_type(json.dumps({'results': results})))
+        call_command('load_sdn_list', file=path)
+
+        entry = SDNListEntry.objects.get()
+        self.assertEqual(entry.source, 'ISN')
+        self.assertEqual(entry.names.splitlines(), ['verbal kint', 'roger kint'])
+        self.assertEqual(entry.countries, 'US')
+        self.assertEqual(entry.addresses, 'san pedro ca us')
+        self.assertEqual(entry.record, results[0])
+
+    def test_invalid_file(self):
+        """Test that unknown formats and unreadable files are reported."""
+        with self.assertRaises(CommandError):
+            call_command('load_sdn_list', file=self.write_file('list.txt', ''))
+
+        with self.assertRaises(CommandError):
+            call_command('load_sdn_list', file=os.path.join(self.tmp_dir, 'missing.csv'))
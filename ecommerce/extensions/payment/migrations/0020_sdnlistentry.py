@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import jsonfield.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payment', '0019_auto_20180628_2011'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SDNListEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(db_index=True, help_text='Abbreviation of the list, e.g. SDN.', max_length=32)),
+                ('name', models.CharField(max_length=255)),
+                ('names', models.TextField(help_text='Normalized name and alternate names, one per line.')),
+                ('countries', models.CharField(blank=True, default='', help_text='Comma-separated ISO 3166-1 alpha-2 codes of the countries of the addresses.', max_length=255)),
+                ('addresses', models.TextField(blank=True, default='', help_text='Normalized addresses, one per line.')),
+                ('record', jsonfield.fields.JSONField(help_text='Entry as returned by the consolidated screening list API.')),
+            ],
+            options={
+                'verbose_name': 'SDN List Entry',
+                'verbose_name_plural': 'SDN List Entries',
+            },
+        ),
+    ]
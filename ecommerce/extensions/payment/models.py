@@ -68,5 +68,27 @@ class SDNCheckFailure(TimeStampedModel):
         verbose_name = 'SDN Check Failure'
 
 
+class SDNListEntry(models.Model):
+    """
+    Individual of the consolidated screening list, loaded by the load_sdn_list command for local SDN checks.
+    """
+    source = models.CharField(max_length=32, db_index=True, help_text=_('Abbreviation of the list, e.g. SDN.'))
+    name = models.CharField(max_length=255)
+    names = models.TextField(help_text=_('Normalized name and alternate names, one per line.'))
+    countries = models.CharField(
+        max_length=255, blank=True, default='',
+        help_text=_('Comma-separated ISO 3166-1 alpha-2 codes of the countries of the addresses.')
+    )
+    addresses = models.TextField(blank=True, default='', help_text=_('Normalized addresses, one per line.'))
+    record = JSONField(help_text=_('Entry as returned by the consolidated screening list API.'))
+
+    def __unicode__(self):
+        return '{source} entry [{name}]'.format(source=self.source, name=self.name)
+
+    class Meta(object):
+        verbose_name = 'SDN List Entry'
+        verbose_name_plural = 'SDN List Entries'
+
+
 # noinspection PyUnresolvedReferences
 from oscar.apps.payment.models import *  # noqa isort:skip pylint: disable=ungrouped-imports, wildcard-import,unused-wildcard-import,wrong-import-position,wrong-import-order
@@ -0,0 +1,162 @@
+"""
+In-process index of the consolidated screening list, used to screen users without calling the US Treasury SDN API.
+
+The load_sdn_list command stores the individuals of a downloaded list as SDNListEntry rows. Each process compiles
+them once into an index of normalized names, keyed by name token, and rebuilds it when the command stores a new
+version stamp in the shared cache.
+
+Names are lowercased and stripped of accents and punctuation. A name is a hit if it has the same tokens as the
+searched name, if the tokens of one include at least two tokens that make up the other, or if their sorted tokens
+are at least ``settings.SDN_CHECK_FUZZY_MATCH_THRESHOLD`` similar. Only entries sharing a token with the searched
+name are compared, so a misspelled name is found as long as one of its tokens is spelled correctly.
+"""
+from __future__ import absolute_import, unicode_literals
+
+import logging
+import re
+import unicodedata
+from collections import namedtuple
+from difflib import SequenceMatcher
+
+import six
+from django.conf import settings
+
+from ecommerce.core.utils import VersionedRegistry, bump_cache_version, get_cache_version
+from ecommerce.extensions.payment.models import SDNListEntry
+
+logger = logging.getLogger(__name__)
+
+SDN_INDEX_VERSION_CACHE_KEY = 'payment.sdn_index.version'
+
+# An individual of the index. names holds a (tokens, sorted tokens) pair for the name and each alternate name.
+SDNIndexEntry = namedtuple('SDNIndexEntry', ['id', 'source', 'names', 'countries', 'address_tokens'])
+
+
+def normalize_name(value):
+    """ Returns the value lowercased, without accents and punctuation, with single spaces between words. """
+    value = unicodedata.normalize('NFKD', six.text_type(value or ''))
+    value = ''.join(character for character in value if not unicodedata.combining(character))
+    return ' '.join(re.sub(r'[^\w\s]|_', ' ', value.lower(), flags=re.UNICODE).split())
+
+
+def get_sdn_index_version():
+    """
+    Returns the current index version from the shared cache, creating one if none exists.
+    """
+    return get_cache_version(SDN_INDEX_VERSION_CACHE_KEY)
+
+
+def bump_sdn_index_version():
+    """
+    Stores a new index version in the shared cache, causing every process to rebuild its index.
+    """
+    return bump_cache_version(SDN_INDEX_VERSION_CACHE_KEY)
+
+
+class SDNIndex(object):
+    """
+    Screening list individuals indexed by name token.
+    """
+
+    def __init__(self, entries, fuzzy_match_threshold):
+        self.entries = tuple(entries)
+        self.fuzzy_match_threshold = fuzzy_match_threshold
+
+        token_index = {}
+        for position, entry in enumerate(self.entries):
+            for tokens, __ in entry.names:
+                for token in tokens:
+                    token_index.setdefault(token, set()).add(position)
+        self.token_index = {token: tuple(sorted(positions)) for token, positions in token_index.items()}
+
+    def __len__(self):
+        return len(self.entries)
+
+    @classmethod
+    def get_entry(cls, entry_id, source, names, countries, addresses):
+        """ Returns the SDNIndexEntry of the fields of an SDNListEntry. """
+        compiled_names = []
+        for name in names.splitlines():
+            tokens = frozenset(name.split())
+            if tokens:
+                compiled_names.append((tokens, ' '.join(sorted(tokens))))
+
+        return SDNIndexEntry(
+            id=entry_id,
+            source=source,
+            names=tuple(compiled_names),
+            countries=frozenset(country for country in countries.split(',') if country),
+            address_tokens=frozenset(addresses.split()),
+        )
+
+    def _name_matches(self, query_tokens, query_key, tokens, key):
+        if query_tokens == tokens:
+            return True
+
+        common = query_tokens & tokens
+        if len(common) >= 2 and common in (query_tokens, tokens):
+            return True
+
+        return SequenceMatcher(None, query_key, key).ratio() >= self.fuzzy_match_threshold
+
+    def search(self, name, city, country, sources=None):
+        """
+        Returns the IDs of the SDNListEntry individuals matching the name, with an address in the country and city.
+
+        Arguments:
+            name (str): Individual's full name.
+            city (str): Individual's city, ignored if empty.
+            country (str): ISO 3166-1 alpha-2 country code, ignored if empty.
+            sources (iterable): Abbreviations of the lists to search, all lists if empty.
+        """
+        query_tokens = frozenset(normalize_name(name).split())
+        if not query_tokens:
+            return []
+        query_key = ' '.join(sorted(query_tokens))
+        city_tokens = frozenset(normalize_name(city).split())
+        country = (country or '').upper()
+        sources = {source.strip().upper() for source in sources or () if source.strip()}
+
+        positions = set()
+        for token in query_tokens:
+            positions.update(self.token_index.get(token, ()))
+
+        entry_ids = []
+        for position in sorted(positions):
+            entry = self.entries[position]
+            if sources and entry.source not in sources:
+                continue
+            if country and country not in entry.countries:
+                continue
+            if not city_tokens <= entry.address_tokens:
+                continue
+            if any(self._name_matches(query_tokens, query_key, tokens, key) for tokens, key in entry.names):
+                entry_ids.append(entry.id)
+
+        return entry_ids
+
+
+class SDNIndexRegistry(VersionedRegistry):
+    """
+    The SDNIndex of the process, rebuilt from the database whenever the index version changes.
+    """
+    version_cache_key = SDN_INDEX_VERSION_CACHE_KEY
+
+    def __init__(self):
+        super(SDNIndexRegistry, self).__init__()
+        self.index = SDNIndex((), settings.SDN_CHECK_FUZZY_MATCH_THRESHOLD)
+
+    def _build(self, version):
+        entries = SDNListEntry.objects.values_list('id', 'source', 'names', 'countries', 'addresses').iterator()
+        self.index = SDNIndex(
+            (SDNIndex.get_entry(*entry) for entry in entries), settings.SDN_CHECK_FUZZY_MATCH_THRESHOLD
+        )
+        logger.info('Built SDN index version [%s] with [%d] entries.', version, len(self.index))
+
+    def get_index(self):
+        """ Returns the current SDNIndex. """
+        self._ensure_current()
+        return self.index
+
+
+sdn_index_registry = SDNIndexRegistry()
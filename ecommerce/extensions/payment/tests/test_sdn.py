@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+from ecommerce.extensions.payment.models import SDNListEntry
+from ecommerce.extensions.payment.sdn import (
+    SDNIndex,
+    SDNIndexRegistry,
+    bump_sdn_index_version,
+    normalize_name
+)
+from ecommerce.tests.testcases import TestCase
+
+
+class SDNIndexTests(TestCase):
+    def setUp(self):
+        super(SDNIndexTests, self).setUp()
+        self.index = SDNIndex([
+            SDNIndex.get_entry(1, 'SDN', 'keyser soze\nkobayashi', 'CU,FR', 'calle 1 havana cu\nmain st paris fr'),
+            SDNIndex.get_entry(2, 'ISN', 'verbal kint', 'US', 'san pedro ca us'),
+            SDNIndex.get_entry(3, 'SDN', 'dean keaton', '', ''),
+        ], 0.9)
+
+    def test_normalize_name(self):
+        """ Verify names are lowercased and stripped of accents and punctuation. """
+        self.assertEqual(normalize_name(' Söze,  Keyser-Jr. '), 'soze keyser jr')
+        self.assertEqual(normalize_name(None), '')
+
+    def test_search(self):
+        """ Verify names are matched by tokens, in any order, and by similarity. """
+        self.assertEqual(self.index.search('Keyser Söze', 'Havana', 'CU'), [1])
+        self.assertEqual(self.index.search('SOZE, Keyser', '', ''), [1])
+        self.assertEqual(self.index.search('Keyser Soze Jr', '', ''), [1])
+        self.assertEqual(self.index.search('Keyzer Soze', '', ''), [1])
+        self.assertEqual(self.index.search('Kobayashi', 'Paris', 'fr'), [1])
+        self.assertEqual(self.index.search('Keyser Smith', '', ''), [])
+        self.assertEqual(self.index.search('Keyser', '', ''), [])
+        self.assertEqual(self.index.search('', '', ''), [])
+
+    def test_search_filters(self):
+        """ Verify hits must have an address in the country and city, and belong to one of the lists. """
+        self.assertEqual(self.index.search('Keyser Soze', 'Havana', 'US'), [])
+        self.assertEqual(self.index.search('Keyser Soze', 'Boston', 'CU'), [])
+        self.assertEqual(self.index.search('Dean Keaton', 'Boston', ''), [])
+        self.assertEqual(self.index.search('Dean Keaton', '', ''), [3])
+        self.assertEqual(self.index.search('Verbal Kint', 'San Pedro', 'US', sources=['SDN', 'TEST']), [])
+        self.assertEqual(self.index.search('Verbal Kint', 'San Pedro', 'US', sources=['isn']), [2])
+
+
+class SDNIndexRegistryTests(TestCase):
+    def test_rebuilt_on_version_change(self):
+        """ Verify the index is built once per version. """
+        registry = SDNIndexRegistry()
+        SDNListEntry.objects.create(source='SDN', name='Keyser Söze', names='keyser soze', record={})
+
+        with self.assertNumQueries(1):
+            self.assertEqual(len(registry.get_index()), 1)
+        with self.assertNumQueries(0):
+            registry.get_index()
+
+        SDNListEntry.objects.create(source='SDN', name='Verbal Kint', names='verbal kint', record={})
+        bump_sdn_index_version()
+        with self.assertNumQueries(1):
+            self.assertEqual(len(registry.get_index()), 2)
@@ -14,7 +14,8 @@ from requests.exceptions import HTTPError, Timeout
 from six.moves.urllib.parse import urlencode
 
 from ecommerce.core.models import User
-from ecommerce.extensions.payment.models import SDNCheckFailure
+from ecommerce.extensions.payment.models import SDNCheckFailure, SDNListEntry
+from ecommerce.extensions.payment.sdn import bump_sdn_index_version
 from ecommerce.extensions.payment.utils import SDNClient, clean_field_value, middle_truncate
 from ecommerce.tests.testcases import TestCase
 
@@ -126,6 +127,35 @@ class SDNCheckTests(TestCase):
         response = self.sdn_validator.search(self.name, self.city, self.country)
         self.assertEqual(response, sdn_response)
 
+    @override_settings(SDN_CHECK_USE_LOCAL_INDEX=True)
+    def test_sdn_check_local_index(self):
+        """ Verify the loaded list is searched without calling the SDN API. """
+        record = {'name': 'Dr Evil', 'source': 'Specially Designated Nationals (SDN) - Treasury Department'}
+        SDNListEntry.objects.create(
+            source='SDN', name='Dr Evil', names='dr evil', countries='EL', addresses='top secret lair el', record=record
+        )
+        SDNListEntry.objects.create(source='SDN', name='Mini Me', names='mini me', record={'name': 'Mini Me'})
+        bump_sdn_index_version()
+
+        self.assertEqual(
+            self.sdn_validator.search(self.name, self.city, self.country), {'total': 1, 'results': [record]}
+        )
+        self.assertEqual(self.sdn_validator.search('Scott Evil', self.city, self.country), {'total': 0, 'results': []})
+
+    @httpretty.activate
+    @override_settings(SDN_CHECK_USE_LOCAL_INDEX=True)
+    def test_sdn_check_local_index_fallback(self):
+        """ Verify the SDN API is searched while no list is loaded, unless the fallback is disabled. """
+        sdn_response = {'total': 1}
+        self.mock_sdn_response(json.dumps(sdn_response))
+        bump_sdn_index_version()
+        self.assertEqual(self.sdn_validator.search(self.name, self.city, self.country), sdn_response)
+
+        with override_settings(SDN_CHECK_REMOTE_FALLBACK=False):
+            self.assertEqual(
+                self.sdn_validator.search(self.name, self.city, self.country), {'total': 0, 'results': []}
+            )
+
     def test_deactivate_user(self):
         """ Verify an SDN failure is logged. """
         response = {'description': 'Bad dude.'}
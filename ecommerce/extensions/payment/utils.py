@@ -13,13 +13,17 @@ from six.moves.urllib.parse import urlencode
 
 from ecommerce.core.constants import SEAT_PRODUCT_CLASS_NAME
 from ecommerce.extensions.analytics.utils import parse_tracking_context
-from ecommerce.extensions.payment.models import SDNCheckFailure
+from ecommerce.extensions.payment.models import SDNCheckFailure, SDNListEntry
+from ecommerce.extensions.payment.sdn import sdn_index_registry
 
 logger = logging.getLogger(__name__)
 Basket = get_model('basket', 'Basket')
 BasketAttribute = get_model('basket', 'BasketAttribute')
 BasketAttributeType = get_model('basket', 'BasketAttributeType')
 
+# Connections to the SDN API are kept alive and shared by every check made by the process.
+sdn_api_session = requests.Session()
+
 
 def get_basket_program_uuid(basket):
     """
@@ -151,6 +155,41 @@ class SDNClient(object):
     def search(self, name, city, country):
         """
         Searches the OFAC list for an individual with the specified details.
+
+        The list loaded by the load_sdn_list command is searched when settings.SDN_CHECK_USE_LOCAL_INDEX is set.
+        The SDN API is searched otherwise, or when no list is loaded and settings.SDN_CHECK_REMOTE_FALLBACK is set.
+
+        Args:
+            name (str): Individual's full name.
+            city (str): Individual's city.
+            country (str): ISO 3166-1 alpha-2 country code where the individual is from.
+        Returns:
+            dict: SDN API response, or a response of the same shape listing the local hits.
+        """
+        if settings.SDN_CHECK_USE_LOCAL_INDEX:
+            index = sdn_index_registry.get_index()
+            if len(index) or not settings.SDN_CHECK_REMOTE_FALLBACK:
+                return self.search_local_index(index, name, city, country)
+            logger.warning('No SDN list is loaded, checking [%s] against the US Treasury SDN API.', name)
+
+        return self.search_api(name, city, country)
+
+    def search_local_index(self, index, name, city, country):
+        """
+        Searches the SDNIndex for an individual with the specified details.
+
+        Returns:
+            dict: The total number of hits and the matching entries, as returned by the SDN API.
+        """
+        entry_ids = index.search(name, city, country, sources=self.sdn_list.split(','))
+        results = []
+        if entry_ids:
+            results = list(SDNListEntry.objects.filter(id__in=entry_ids).values_list('record', flat=True))
+        return {'total': len(results), 'results': results}
+
+    def search_api(self, name, city, country):
+        """
+        Searches the SDN API for an individual with the specified details.
         The check returns zero hits if:
             * request to the SDN API times out
             * SDN API returns a non-200 status code response
@@ -179,7 +218,7 @@ class SDNClient(object):
         )
 
         try:
-            response = requests.get(sdn_check_url, timeout=settings.SDN_CHECK_REQUEST_TIMEOUT)
+            response = sdn_api_session.get(sdn_check_url, timeout=settings.SDN_CHECK_REQUEST_TIMEOUT)
         except requests.exceptions.Timeout:
             logger.warning('Connection to US Treasury SDN API timed out for [%s].', name)
             raise
@@ -5,9 +5,11 @@ import uuid
 
 import ddt
 import httpretty
+import six
 from django.core.exceptions import ValidationError
-from django.db import IntegrityError
+from django.db import IntegrityError, connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils.translation import ugettext_lazy as _
 from factory.fuzzy import FuzzyText
 from oscar.templatetags.currency_filters import currency
@@ -36,9 +38,11 @@ from ecommerce.extensions.test.factories import create_order, prepare_voucher
 from ecommerce.extensions.voucher.utils import (
     create_vouchers,
     generate_coupon_report,
+    generate_coupon_report_rows,
     get_voucher_and_products_from_code,
     get_voucher_discount_info,
-    update_voucher_offer
+    update_voucher_offer,
+    write_coupon_report_csv
 )
 from ecommerce.tests.factories import UserFactory
 from ecommerce.tests.mixins import LmsApiMockMixin
@@ -240,6 +244,45 @@ class UtilTests(CouponMixin, DiscoveryMockMixin, DiscoveryTestMixin, LmsApiMockM
         self.assertEqual(voucher.start_datetime, self.data['start_datetime'])
         self.assertEqual(voucher.usage, Voucher.SINGLE_USE)
 
+    @override_settings(VOUCHER_BULK_CREATE_CHUNK_SIZE=3)
+    def test_create_multi_use_vouchers_in_chunks(self):
+        """
+        Verify multi-use vouchers are created in chunks, each with its own offer sharing one condition and benefit.
+        """
+        self.data.update({
+            'max_uses': 5,
+            'quantity': 7,
+            'site': self.site,
+            'voucher_type': Voucher.MULTI_USE,
+        })
+        vouchers = create_vouchers(**self.data)
+
+        self.assertEqual(len(vouchers), 7)
+        self.assertEqual(len(set(voucher.code for voucher in vouchers)), 7)
+
+        offers = [voucher.offers.get() for voucher in vouchers]
+        self.assertEqual(len(set(offer.id for offer in offers)), 7)
+        self.assertEqual(len(set(offer.condition_id for offer in offers)), 1)
+        self.assertEqual(len(set(offer.benefit_id for offer in offers)), 1)
+        for offer in offers:
+            self.assertEqual(offer.max_global_applications, 5)
+            self.assertEqual(offer.priority, OFFER_PRIORITY_VOUCHER)
+            self.assertEqual(offer.history.count(), 1)
+
+    def test_create_vouchers_query_count(self):
+        """ Verify the number of voucher queries does not grow with the number of single-use vouchers. """
+        self.data['quantity'] = 1
+        # Create the range, condition, benefit and offer up front, so both measured calls only reuse them.
+        create_vouchers(**self.data)
+        with CaptureQueriesContext(connection) as single:
+            create_vouchers(**self.data)
+
+        self.data['quantity'] = 50
+        with CaptureQueriesContext(connection) as many:
+            create_vouchers(**self.data)
+
+        self.assertEqual(len(single.captured_queries), len(many.captured_queries))
+
     def test_create_voucher_with_long_name(self):
         self.data.update({
             'name': (
@@ -486,6 +529,45 @@ class UtilTests(CouponMixin, DiscoveryMockMixin, DiscoveryTestMixin, LmsApiMockM
         self.assertNotIn('Course Seat Types', field_names)
         self.assertNotIn('Redeemed For Course ID', field_names)
 
+    @override_settings(COUPON_REPORT_CHUNK_SIZE=2)
+    def test_generate_coupon_report_rows_query_count(self):
+        """ Verify the number of report queries depends on the number of chunks, not on the number of vouchers. """
+        def count_report_queries():
+            field_names, rows = generate_coupon_report_rows(self.coupon_vouchers)
+            with CaptureQueriesContext(connection) as queries:
+                rows = list(rows)
+            return len(queries.captured_queries), field_names, rows
+
+        self.use_voucher('TESTORDER1', self.coupon_vouchers.first().vouchers.first(), self.user)
+        num_queries, __, __ = count_report_queries()
+
+        # Fill up the only chunk with another redeemed voucher.
+        self.data.update({'quantity': 1})
+        voucher = create_vouchers(**self.data)[0]
+        self.coupon_vouchers.first().vouchers.add(voucher)
+        self.use_voucher('TESTORDER2', voucher, self.user)
+        self.assertEqual(count_report_queries()[0], num_queries)
+
+    def test_write_coupon_report_csv(self):
+        """ Verify the coupon report CSV contains the header, the coupon row and one row per voucher. """
+        self.mock_course_api_response(course=self.course)
+        output = six.StringIO()
+        write_coupon_report_csv(self.coupon_vouchers, output)
+
+        lines = output.getvalue().splitlines()
+        field_names, rows = generate_coupon_report(self.coupon_vouchers)
+        self.assertEqual(len(lines), len(rows) + 1)
+        self.assertEqual(lines[0].split(','), [six.text_type(name) for name in field_names])
+
+    def test_generate_coupon_report_rows_missing_stockrecord(self):
+        """ Verify a coupon without a stock record is found before any row is generated. """
+        coupon = self.create_coupon(title='Coupon without stock record')
+        StockRecord.objects.filter(product=coupon).delete()
+        coupon_vouchers = list(self.coupon_vouchers) + [CouponVouchers.objects.get(coupon=coupon)]
+
+        with self.assertRaises(StockRecord.DoesNotExist):
+            generate_coupon_report_rows(coupon_vouchers)
+
     def test_report_for_dynamic_coupon_with_fixed_benefit_type(self):
         """ Verify the coupon report contains correct data for coupon with fixed benefit type. """
         dynamic_coupon = self.create_coupon(
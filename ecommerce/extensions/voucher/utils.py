@@ -2,15 +2,19 @@
 from __future__ import absolute_import, unicode_literals
 
 import base64
+import csv
 import datetime
 import hashlib
+import itertools
 import logging
 import uuid
 from decimal import Decimal, DecimalException
 
 import dateutil.parser
 import pytz
+import six
 from django.conf import settings
+from django.db.models import Prefetch
 from django.urls import reverse
 from django.utils.translation import ugettext_lazy as _
 from edx_django_utils.cache import TieredCache
@@ -19,6 +23,7 @@ from oscar.core.loading import get_model
 from oscar.templatetags.currency_filters import currency
 from six.moves import range
 
+from ecommerce.core.constants import COURSE_ENTITLEMENT_PRODUCT_CLASS_NAME
 from ecommerce.core.url_utils import get_ecommerce_url
 from ecommerce.core.utils import log_message_and_raise_validation_error
 from ecommerce.enterprise.benefits import BENEFIT_MAP as ENTERPRISE_BENEFIT_MAP
@@ -40,8 +45,10 @@ Benefit = get_model('offer', 'Benefit')
 Condition = get_model('offer', 'Condition')
 ConditionalOffer = get_model('offer', 'ConditionalOffer')
 CouponVouchers = get_model('voucher', 'CouponVouchers')
+Line = get_model('order', 'Line')
 Order = get_model('order', 'Order')
 Product = get_model('catalogue', 'Product')
+ProductAttributeValue = get_model('catalogue', 'ProductAttributeValue')
 ProductCategory = get_model('catalogue', 'ProductCategory')
 Range = get_model('offer', 'Range')
 StockRecord = get_model('partner', 'StockRecord')
@@ -197,11 +204,12 @@ def _get_info_for_coupon_report(coupon, voucher):
     return coupon_data
 
 
-def _get_voucher_info_for_coupon_report(voucher):
-    offer = voucher.best_offer
+def _get_voucher_info_for_coupon_report(voucher, offer=None, offer_url=None):
+    offer = offer or voucher.best_offer
     status = _get_voucher_status(voucher, offer)
-    path = '{path}?code={code}'.format(path=reverse('coupons:offer'), code=voucher.code)
-    url = get_ecommerce_url(path)
+    if offer_url is None:
+        offer_url = get_ecommerce_url(reverse('coupons:offer'))
+    url = '{offer_url}?code={code}'.format(offer_url=offer_url, code=voucher.code)
 
     # Set the max_uses_count for single-use vouchers to 1,
     # for other usage limitations (once per customer and multi-use)
@@ -228,31 +236,138 @@ def _get_voucher_info_for_coupon_report(voucher):
     return coupon_data
 
 
-def _get_line_id(line):
+def get_best_prefetched_offer(voucher):
+    """
+    Return the same offer as Voucher.best_offer, using the voucher's prefetched offers and their conditions.
+    """
+    offers = list(voucher.offers.all())
+    for offer in offers:
+        if offer.condition.enterprise_customer_uuid:
+            return offer
+    for offer in offers:
+        if offer.condition.range_id:
+            return offer
+    return min(offers, key=lambda offer: offer.date_created)
+
+
+def _get_redemptions_for_vouchers(voucher_ids):
     """
-    Return unique id of line
+    Retrieve redemptions of the given vouchers with a fixed number of queries.
+
     Args:
-        line: line in application orders
+        voucher_ids (list): IDs of the vouchers that have been redeemed.
 
     Returns:
-         if product is entitlement product then uuid
-         else course_id.
+        dict: Maps voucher IDs to lists of (order number, username, redemption course IDs) tuples.
     """
-    if line.product.is_course_entitlement_product:
-        return line.product.attr.UUID
-    return line.product.course_id
+    if not voucher_ids:
+        return {}
+
+    applications = list(VoucherApplication.objects.filter(voucher_id__in=voucher_ids).values_list(
+        'voucher_id', 'order_id', 'order__number', 'user__username'
+    ).order_by('id'))
+
+    order_ids = set(application[1] for application in applications)
+    lines = list(Line.objects.filter(order_id__in=order_ids).values_list(
+        'order_id',
+        'product_id',
+        'product__course_id',
+        'product__product_class__name',
+        'product__parent__product_class__name',
+    ).order_by('pk'))
+
+    entitlement_product_ids = set(
+        product_id for __, product_id, __, product_class, parent_product_class in lines
+        if (product_class or parent_product_class) == COURSE_ENTITLEMENT_PRODUCT_CLASS_NAME
+    )
+    entitlement_uuids = {
+        attribute_value.product_id: attribute_value.value
+        for attribute_value in ProductAttributeValue.objects.filter(
+            product_id__in=entitlement_product_ids, attribute__code='UUID'
+        ).select_related('attribute')
+    }
 
+    course_ids_by_order = {}
+    for order_id, product_id, course_id, __, __ in lines:
+        course_ids_by_order.setdefault(order_id, []).append(entitlement_uuids.get(product_id, course_id))
 
-def generate_coupon_report(coupon_vouchers):
+    redemptions = {}
+    for voucher_id, order_id, order_number, username in applications:
+        redemptions.setdefault(voucher_id, []).append(
+            (order_number, username, course_ids_by_order.get(order_id, []))
+        )
+    return redemptions
+
+
+def _iter_coupon_voucher_rows(coupon_vouchers, coupon_rows, header_row, offer_url):
     """
-    Generate coupon report data
+    Yield the report rows for each coupon, reading its vouchers in keyset-paginated chunks.
+
+    Each chunk of COUPON_REPORT_CHUNK_SIZE vouchers costs a fixed number of queries, regardless of
+    the number of vouchers or redemptions in it.
+    """
+    chunk_size = settings.COUPON_REPORT_CHUNK_SIZE
+    offers = Prefetch('offers', queryset=ConditionalOffer.objects.select_related('condition'))
+
+    for coupon_voucher, coupon_row in zip(coupon_vouchers, coupon_rows):
+        if coupon_row is not header_row:
+            coupon_row[_('Client')] = _get_coupon_client(coupon_voucher.coupon)
+        yield coupon_row
+
+        vouchers = coupon_voucher.vouchers.order_by('id').prefetch_related(offers)
+        last_id = 0
+        while True:
+            chunk = list(vouchers.filter(id__gt=last_id)[:chunk_size])
+            if not chunk:
+                break
+            last_id = chunk[-1].id
+
+            redemptions = _get_redemptions_for_vouchers([voucher.id for voucher in chunk if voucher.num_orders > 0])
+            for voucher in chunk:
+                row = _get_voucher_info_for_coupon_report(
+                    voucher, offer=get_best_prefetched_offer(voucher), offer_url=offer_url
+                )
+
+                for item in (_('Order Number'), _('Redeemed By Username'),):
+                    row[item] = ''
+
+                yield row
+
+                for order_number, redemption_user_username, redemption_course_ids in redemptions.get(voucher.id, []):
+                    new_row = row.copy()
+                    _add_redemption_course_ids(new_row, header_row, redemption_course_ids)
+                    new_row.update({
+                        _('Status'): _('Redeemed'),
+                        _('Order Number'): order_number,
+                        _('Redeemed By Username'): redemption_user_username,
+                        _('Maximum Coupon Usage'): 1,
+                        _('Redemption Count'): 1,
+                    })
+                    yield new_row
+
+
+def _get_coupon_client(coupon):
+    return Invoice.objects.get(order__lines__product=coupon).business_client.name
+
+
+def generate_coupon_report_rows(coupon_vouchers):
+    """
+    Generate coupon report data as a stream of rows.
+
+    The summary row of the first coupon, which determines the report columns, is computed
+    immediately; all other rows are computed as the returned iterator is consumed, so memory
+    use does not grow with the number of vouchers.
 
     Args:
-        coupon_vouchers (List[CouponVouchers]): List of coupon_vouchers the report should be generated for
+        coupon_vouchers (Iterable[CouponVouchers]): coupon_vouchers the report should be generated for
 
     Returns:
         List[str]
-        List[dict]
+        Iterator[dict]
+
+    Raises:
+        StockRecord.DoesNotExist: if a coupon has no stock record. This is checked for every coupon before the
+            rows are generated, so a streamed report does not fail after it was started.
     """
 
     field_names = [
@@ -284,51 +399,33 @@ def generate_coupon_report(coupon_vouchers):
         _('Coupon Expiry Date'),
         _('Email Domains'),
     ]
-    rows = []
-
-    for coupon_voucher in coupon_vouchers:
-        coupon = coupon_voucher.coupon
-        client = Invoice.objects.get(order__lines__product=coupon).business_client.name
-        rows.append(_get_info_for_coupon_report(coupon, coupon_voucher.vouchers.first()))
-        rows[0][_('Client')] = client
-
-        for voucher in coupon_voucher.vouchers.all().prefetch_related('offers'):
-            row = _get_voucher_info_for_coupon_report(voucher)
 
-            for item in (_('Order Number'), _('Redeemed By Username'),):
-                row[item] = ''
-
-            rows.append(row)
-
-            if voucher.num_orders > 0:
-                voucher_applications = VoucherApplication.objects.filter(
-                    voucher=voucher).prefetch_related('user', 'order__lines')
-
-                for application in voucher_applications:
-                    redemption_course_ids = []
-                    redemption_user_username = application.user.username
+    coupon_vouchers = list(coupon_vouchers)
+    coupon_ids = {coupon_voucher.coupon_id for coupon_voucher in coupon_vouchers}
+    missing_stockrecord_coupon_ids = coupon_ids - set(
+        StockRecord.objects.filter(product_id__in=coupon_ids).values_list('product_id', flat=True)
+    )
+    if missing_stockrecord_coupon_ids:
+        raise StockRecord.DoesNotExist(
+            'No StockRecord for coupons {}.'.format(sorted(missing_stockrecord_coupon_ids))
+        )
 
-                    for line in application.order.lines.all():
-                        redemption_course_ids.append(_get_line_id(line))
+    first_coupon_voucher = coupon_vouchers[0]
+    header_row = _get_info_for_coupon_report(first_coupon_voucher.coupon, first_coupon_voucher.vouchers.first())
+    header_row[_('Client')] = _get_coupon_client(first_coupon_voucher.coupon)
 
-                    new_row = row.copy()
-                    _add_redemption_course_ids(new_row, rows[0], redemption_course_ids)
-                    new_row.update({
-                        _('Status'): _('Redeemed'),
-                        _('Order Number'): application.order.number,
-                        _('Redeemed By Username'): redemption_user_username,
-                        _('Maximum Coupon Usage'): 1,
-                        _('Redemption Count'): 1,
-                    })
-                    rows.append(new_row)
+    coupon_rows = itertools.chain([header_row], (
+        _get_info_for_coupon_report(coupon_voucher.coupon, coupon_voucher.vouchers.first())
+        for coupon_voucher in coupon_vouchers[1:]
+    ))
 
-    if _('Program UUID') in rows[0]:
+    if _('Program UUID') in header_row:
         field_names.remove(_('Course ID'))
         field_names.remove(_('Organization'))
         field_names.remove(_('Catalog Query'))
         field_names.remove(_('Course Seat Types'))
         field_names.remove(_('Redeemed For Course ID'))
-    elif _('Catalog Query') in rows[0]:
+    elif _('Catalog Query') in header_row:
         field_names.remove(_('Course ID'))
         field_names.remove(_('Organization'))
         field_names.remove(_('Program UUID'))
@@ -339,7 +436,60 @@ def generate_coupon_report(coupon_vouchers):
         field_names.remove(_('Redeemed For Course IDs'))
         field_names.remove(_('Program UUID'))
 
-    return field_names, rows
+    # The URL is resolved now, as the current request may no longer be available while the rows are consumed.
+    offer_url = get_ecommerce_url(reverse('coupons:offer'))
+
+    return field_names, _iter_coupon_voucher_rows(coupon_vouchers, coupon_rows, header_row, offer_url)
+
+
+def generate_coupon_report(coupon_vouchers):
+    """
+    Generate coupon report data
+
+    Args:
+        coupon_vouchers (List[CouponVouchers]): List of coupon_vouchers the report should be generated for
+
+    Returns:
+        List[str]
+        List[dict]
+    """
+    field_names, rows = generate_coupon_report_rows(coupon_vouchers)
+    return field_names, list(rows)
+
+
+class _EchoBuffer(object):
+    """
+    File-like object that returns what is written to it, so CSV lines can be yielded one at a time.
+    """
+
+    def write(self, value):
+        return value
+
+
+def iter_coupon_report_csv(field_names, rows):
+    """
+    Yield the CSV header and then one CSV line per report row.
+
+    Args:
+        field_names (List[str]): Report columns, as returned by generate_coupon_report_rows.
+        rows (Iterable[dict]): Report rows, as returned by generate_coupon_report_rows.
+    """
+    writer = csv.DictWriter(_EchoBuffer(), fieldnames=field_names)
+    yield writer.writerow(dict(zip(field_names, field_names)))
+    for row in rows:
+        for key, value in row.items():
+            if isinstance(value, six.text_type):
+                row[key] = value.encode('utf-8')
+        yield writer.writerow(row)
+
+
+def write_coupon_report_csv(coupon_vouchers, output_file):
+    """
+    Write the coupon report for the given coupon_vouchers to a file as CSV, one row at a time.
+    """
+    field_names, rows = generate_coupon_report_rows(coupon_vouchers)
+    for line in iter_coupon_report_csv(field_names, rows):
+        output_file.write(line)
 
 
 def generate_offer_name(coupon_id, benefit_type, benefit_value, offer_number=None, is_enterprise=False):
@@ -351,40 +501,36 @@ def generate_offer_name(coupon_id, benefit_type, benefit_value, offer_number=Non
     return offer_name
 
 
-def _get_or_create_offer(
-        product_range,
-        benefit_type,
-        benefit_value,
-        offer_name,
-        max_uses,
-        site,
-        email_domains=None,
-        program_uuid=None
-):
+def _get_offer_kwargs(offer_condition, offer_benefit, max_uses, site, email_domains=None):
     """
-    Return an offer for a catalog with condition and benefit.
+    Return the field values shared by all voucher offers with the given condition and benefit.
+    """
+    return {
+        'offer_type': ConditionalOffer.VOUCHER,
+        'condition': offer_condition,
+        'benefit': offer_benefit,
+        'max_global_applications': int(max_uses) if max_uses is not None else None,
+        'email_domains': email_domains,
+        'site': site,
+        'partner': site.siteconfiguration.partner if site else None,
+        'priority': OFFER_PRIORITY_VOUCHER,
+    }
 
-    If offer doesn't exist, new offer will be created and associated with
-    provided Offer condition and benefit.
+
+def _get_or_create_offer_condition_and_benefit(product_range, benefit_type, benefit_value, program_uuid=None):
+    """
+    Return the condition and benefit for a catalog or program offer, creating them if they don't exist.
 
     Args:
         product_range (Range): Range of products associated with condition
         benefit_type (str): Type of benefit associated with the offer
         benefit_value (Decimal): Value of benefit associated with the offer
     Kwargs:
-        coupon_id (int): ID of the coupon
-        max_uses (int): number of maximum global application number an offer can have
-        offer_number (int): number of the consecutive offer - used in case of a multiple
-                            multi-use coupon
-        email_domains (str): a comma-separated string of email domains allowed to apply
-                            this offer
         program_uuid (str): the Program UUID
-        site (site): Site for which the Coupon is created. Defaults to None.
 
     Returns:
-        Offer
+        tuple: Condition, Benefit
     """
-
     if program_uuid:
         try:
             offer_condition = ProgramCourseRunSeatsCondition.objects.get(program_uuid=program_uuid)
@@ -407,8 +553,6 @@ def _get_or_create_offer(
                 offer_benefit.proxy_class = proxy_class
                 offer_benefit.value = benefit_value
                 offer_benefit.save()
-
-            offer_name = "{}-{}".format(offer_name, offer_benefit.name)
         else:
             offer_benefit, __ = Benefit.objects.get_or_create(
                 range=product_range,
@@ -422,31 +566,103 @@ def _get_or_create_offer(
             'Failed to create Benefit. Benefit value must be a positive number or 0.'
         )
 
-    offer_kwargs = {
-        'offer_type': ConditionalOffer.VOUCHER,
-        'condition': offer_condition,
-        'benefit': offer_benefit,
-        'max_global_applications': int(max_uses) if max_uses is not None else None,
-        'email_domains': email_domains,
-        'site': site,
-        'partner': site.siteconfiguration.partner if site else None,
-        'priority': OFFER_PRIORITY_VOUCHER,
-    }
+    return offer_condition, offer_benefit
+
+
+def _get_or_create_offer(
+        product_range,
+        benefit_type,
+        benefit_value,
+        offer_name,
+        max_uses,
+        site,
+        email_domains=None,
+        program_uuid=None
+):
+    """
+    Return an offer for a catalog with condition and benefit.
+
+    If offer doesn't exist, new offer will be created and associated with
+    provided Offer condition and benefit.
+
+    Args:
+        product_range (Range): Range of products associated with condition
+        benefit_type (str): Type of benefit associated with the offer
+        benefit_value (Decimal): Value of benefit associated with the offer
+    Kwargs:
+        coupon_id (int): ID of the coupon
+        max_uses (int): number of maximum global application number an offer can have
+        offer_number (int): number of the consecutive offer - used in case of a multiple
+                            multi-use coupon
+        email_domains (str): a comma-separated string of email domains allowed to apply
+                            this offer
+        program_uuid (str): the Program UUID
+        site (site): Site for which the Coupon is created. Defaults to None.
+
+    Returns:
+        Offer
+    """
+    offer_condition, offer_benefit = _get_or_create_offer_condition_and_benefit(
+        product_range, benefit_type, benefit_value, program_uuid=program_uuid
+    )
+    if program_uuid:
+        offer_name = "{}-{}".format(offer_name, offer_benefit.name)
+
+    offer_kwargs = _get_offer_kwargs(offer_condition, offer_benefit, max_uses, site, email_domains=email_domains)
     offer, __ = ConditionalOffer.objects.update_or_create(name=offer_name, defaults=offer_kwargs)
 
     return offer
 
 
-def get_or_create_enterprise_offer(
+def _bulk_get_or_create_offers(offer_names, offer_kwargs):
+    """
+    Return one offer per name, all sharing the same field values.
+
+    Existing offers are updated, as update_or_create would do. Missing offers are
+    inserted with bulk_create, one chunk of VOUCHER_BULK_CREATE_CHUNK_SIZE names at a time.
+
+    Args:
+        offer_names (list): Unique offer names.
+        offer_kwargs (dict): Field values for every offer, see _get_offer_kwargs.
+
+    Returns:
+        List[ConditionalOffer], in the same order as offer_names.
+    """
+    chunk_size = settings.VOUCHER_BULK_CREATE_CHUNK_SIZE
+    offers = []
+    for chunk_start in range(0, len(offer_names), chunk_size):
+        names = offer_names[chunk_start:chunk_start + chunk_size]
+        offers_by_name = {offer.name: offer for offer in ConditionalOffer.objects.filter(name__in=names)}
+
+        for offer in offers_by_name.values():
+            for field, value in offer_kwargs.items():
+                setattr(offer, field, value)
+            offer.save()
+
+        new_offers = [ConditionalOffer(name=name, **offer_kwargs) for name in names if name not in offers_by_name]
+        if new_offers:
+            # All new offers share the same field values, so validating one of them validates them all.
+            new_offers[0].clean()
+            ConditionalOffer.objects.bulk_create(new_offers)
+            # Primary keys are not set by bulk_create on all databases, so read the new rows back.
+            created_offers = list(ConditionalOffer.objects.filter(name__in=[offer.name for offer in new_offers]))
+            ConditionalOffer.history.bulk_history_create(created_offers)
+            offers_by_name.update({offer.name: offer for offer in created_offers})
+
+        offers.extend(offers_by_name[name] for name in names)
+
+    return offers
+
+
+def _get_or_create_enterprise_condition_and_benefit(
         benefit_type,
         benefit_value,
         enterprise_customer,
         enterprise_customer_catalog,
-        offer_name,
-        site,
-        max_uses=None,
-        email_domains=None):
-
+        site):
+    """
+    Return the condition and benefit for an enterprise offer, creating them if they don't exist.
+    """
     enterprise_customer_object = get_enterprise_customer(site, enterprise_customer) if site else {}
     enterprise_customer_name = enterprise_customer_object.get('name', '')
 
@@ -472,79 +688,150 @@ def get_or_create_enterprise_offer(
         max_affected_items=1,
     )
 
-    offer_kwargs = {
-        'offer_type': ConditionalOffer.VOUCHER,
-        'condition': condition,
-        'benefit': benefit,
-        'max_global_applications': int(max_uses) if max_uses is not None else None,
-        'email_domains': email_domains,
-        'site': site,
-        'partner': site.siteconfiguration.partner if site else None,
-        'priority': OFFER_PRIORITY_VOUCHER,
-    }
+    return condition, benefit
+
+
+def get_or_create_enterprise_offer(
+        benefit_type,
+        benefit_value,
+        enterprise_customer,
+        enterprise_customer_catalog,
+        offer_name,
+        site,
+        max_uses=None,
+        email_domains=None):
+
+    condition, benefit = _get_or_create_enterprise_condition_and_benefit(
+        benefit_type, benefit_value, enterprise_customer, enterprise_customer_catalog, site
+    )
+
+    offer_kwargs = _get_offer_kwargs(condition, benefit, max_uses, site, email_domains=email_domains)
     offer, __ = ConditionalOffer.objects.update_or_create(name=offer_name, defaults=offer_kwargs)
 
     return offer
 
 
-def _generate_code_string(length):
+def _bulk_get_or_create_enterprise_offers(
+        offer_names,
+        benefit_type,
+        benefit_value,
+        enterprise_customer,
+        enterprise_customer_catalog,
+        site,
+        max_uses=None,
+        email_domains=None):
     """
-    Create a string of random characters of specified length
+    Return one enterprise offer per name, sharing a single condition and benefit.
+    """
+    condition, benefit = _get_or_create_enterprise_condition_and_benefit(
+        benefit_type, benefit_value, enterprise_customer, enterprise_customer_catalog, site
+    )
+    offer_kwargs = _get_offer_kwargs(condition, benefit, max_uses, site, email_domains=email_domains)
+    return _bulk_get_or_create_offers(offer_names, offer_kwargs)
+
+
+def _generate_code_strings(length, count):
+    """
+    Create unique strings of random characters of specified length that are not used by any voucher yet.
+
+    Candidates are generated in batches and each batch is checked against the database with a single query.
 
     Args:
-        length (int): Defines the length of randomly generated string.
+        length (int): Defines the length of randomly generated strings.
+        count (int): Number of strings to generate.
 
     Raises:
         ValueError raised if length is less than one.
 
     Returns:
-        str
+        List[str]
     """
     if length < 1:
         raise ValueError("Voucher code length must be a positive number.")
 
-    h = hashlib.sha256()
-    h.update(uuid.uuid4().bytes)
-    voucher_code = base64.b32encode(h.digest())[0:length]
-    if Voucher.objects.filter(code__iexact=voucher_code).exists():
-        return _generate_code_string(length)
+    codes = []
+    seen = set()
+    while len(codes) < count:
+        candidates = set()
+        for __ in range(count - len(codes)):
+            h = hashlib.sha256()
+            h.update(uuid.uuid4().bytes)
+            candidates.add(base64.b32encode(h.digest())[0:length].decode('ascii'))
+        candidates -= seen
+        seen |= candidates
+
+        # Codes are stored upper case, and the generated codes are upper case, so an exact match is sufficient.
+        existing_codes = set(Voucher.objects.filter(code__in=candidates).values_list('code', flat=True))
+        codes.extend(candidates - existing_codes)
 
-    return voucher_code
+    return codes
 
 
-def create_new_voucher(code, end_datetime, name, start_datetime, voucher_type):
+def bulk_create_vouchers(quantity, code, end_datetime, name, start_datetime, voucher_type, offer_lists):
     """
-    Creates a voucher.
+    Creates vouchers in chunks of VOUCHER_BULK_CREATE_CHUNK_SIZE.
 
-    If randomly generated voucher code already exists, new code will be generated and reverified.
+    For each chunk, codes are generated and checked against the database in one query, the vouchers are
+    inserted with a single bulk_create, and their offer relations are inserted with another.
 
     Args:
-        code (str): Code associated with vouchers. If not provided, one will be generated.
+        quantity (int): Number of vouchers to create.
+        code (str): Code associated with vouchers. If not provided, codes will be generated.
         end_datetime (datetime): Voucher end date.
         name (str): Voucher name.
-        offer (Offer): Offer associated with voucher.
         start_datetime (datetime): Voucher start date.
         voucher_type (str): Voucher usage.
+        offer_lists (list): Lists of offers to associate with the vouchers. A list holding a single offer
+            associates that offer with every voucher, otherwise the Nth voucher gets the Nth offer.
 
     Returns:
-        Voucher
+        List[Voucher]
     """
-    voucher_code = code or _generate_code_string(settings.VOUCHER_CODE_LENGTH)
     if not isinstance(start_datetime, datetime.datetime):
         start_datetime = dateutil.parser.parse(start_datetime)
 
     if not isinstance(end_datetime, datetime.datetime):
         end_datetime = dateutil.parser.parse(end_datetime)
 
-    voucher = Voucher.objects.create(
-        name=name[:128],
-        code=voucher_code,
-        usage=voucher_type,
-        start_datetime=start_datetime,
-        end_datetime=end_datetime,
-    )
+    VoucherOffers = Voucher.offers.through
+    chunk_size = settings.VOUCHER_BULK_CREATE_CHUNK_SIZE
+    vouchers = []
+    for chunk_start in range(0, quantity, chunk_size):
+        chunk_quantity = min(chunk_size, quantity - chunk_start)
+        if code:
+            codes = [code.upper()] * chunk_quantity
+        else:
+            codes = _generate_code_strings(settings.VOUCHER_CODE_LENGTH, chunk_quantity)
+
+        new_vouchers = [
+            Voucher(
+                name=name[:128],
+                code=voucher_code,
+                usage=voucher_type,
+                start_datetime=start_datetime,
+                end_datetime=end_datetime,
+            )
+            for voucher_code in codes
+        ]
+        for voucher in new_vouchers:
+            voucher.clean()
+        Voucher.objects.bulk_create(new_vouchers)
+
+        # Primary keys are not set by bulk_create on all databases, so read the new rows back.
+        vouchers_by_code = {voucher.code: voucher for voucher in Voucher.objects.filter(code__in=codes)}
+        new_vouchers = [vouchers_by_code[voucher_code] for voucher_code in codes]
+
+        voucher_offers = []
+        for index, voucher in enumerate(new_vouchers, start=chunk_start):
+            for offers in offer_lists:
+                offer = offers[index] if len(offers) > 1 else offers[0]
+                voucher_offers.append(VoucherOffers(voucher_id=voucher.id, conditionaloffer_id=offer.id))
+        VoucherOffers.objects.bulk_create(voucher_offers)
+
+        vouchers.extend(new_vouchers)
+        logger.info('Created [%d] of [%d] vouchers.', len(vouchers), quantity)
 
-    return voucher
+    return vouchers
 
 
 def validate_voucher_fields(
@@ -623,36 +910,32 @@ def create_enterprise_vouchers(
 
     voucher_types = (Voucher.MULTI_USE, Voucher.ONCE_PER_CUSTOMER, Voucher.MULTI_USE_PER_CUSTOMER)
 
-    offers = []
     quantity = int(quantity)
     num_of_offers = quantity if voucher_type in voucher_types else 1
-    for num in range(num_of_offers):
-        offer_name = generate_offer_name(coupon_id, benefit_type, benefit_value, num, is_enterprise=True)
-        offer = get_or_create_enterprise_offer(
-            benefit_type=benefit_type,
-            benefit_value=benefit_value,
-            enterprise_customer=enterprise_customer,
-            enterprise_customer_catalog=enterprise_customer_catalog,
-            max_uses=max_uses,
-            offer_name=offer_name,
-            email_domains=email_domains,
-            site=site
-        )
-        offers.append(offer)
-
-    vouchers = []
-    for i in range(quantity):
-        voucher = create_new_voucher(
-            end_datetime=end_datetime,
-            start_datetime=start_datetime,
-            voucher_type=voucher_type,
-            code=code,
-            name=name
-        )
-        voucher.offers.add(offers[i] if len(offers) > 1 else offers[0])
-        vouchers.append(voucher)
+    offer_names = [
+        generate_offer_name(coupon_id, benefit_type, benefit_value, num, is_enterprise=True)
+        for num in range(num_of_offers)
+    ]
+    offers = _bulk_get_or_create_enterprise_offers(
+        offer_names,
+        benefit_type=benefit_type,
+        benefit_value=benefit_value,
+        enterprise_customer=enterprise_customer,
+        enterprise_customer_catalog=enterprise_customer_catalog,
+        site=site,
+        max_uses=max_uses,
+        email_domains=email_domains,
+    )
 
-    return vouchers
+    return bulk_create_vouchers(
+        quantity=quantity,
+        code=code,
+        end_datetime=end_datetime,
+        name=name,
+        start_datetime=start_datetime,
+        voucher_type=voucher_type,
+        offer_lists=[offers],
+    )
 
 
 def create_vouchers(
@@ -707,9 +990,6 @@ def create_vouchers(
         List[Voucher]
     """
     logger.info("Creating [%d] vouchers product [%s]", quantity, coupon.id)
-    vouchers = []
-    offers = []
-    enterprise_offers = []
 
     # Validation
     validate_voucher_fields(
@@ -752,51 +1032,45 @@ def create_vouchers(
     # mean all vouchers will have their usage decreased by one, hence each voucher needs
     # its own offer to keep track of its own usages without interfering with others.
     num_of_offers = quantity if voucher_type in (Voucher.MULTI_USE, Voucher.ONCE_PER_CUSTOMER) else 1
-    for num in range(num_of_offers):
-        offer_name = generate_offer_name(coupon.id, benefit_type, benefit_value, num)
-        offer = _get_or_create_offer(
-            product_range=product_range,
+    offer_names = [generate_offer_name(coupon.id, benefit_type, benefit_value, num) for num in range(num_of_offers)]
+
+    # All offers of a coupon share the same condition and benefit, so these are only looked up once.
+    offer_condition, offer_benefit = _get_or_create_offer_condition_and_benefit(
+        product_range, benefit_type, benefit_value, program_uuid=program_uuid
+    )
+    if program_uuid:
+        offer_names = ["{}-{}".format(offer_name, offer_benefit.name) for offer_name in offer_names]
+    offer_kwargs = _get_offer_kwargs(offer_condition, offer_benefit, max_uses, site, email_domains=email_domains)
+    offer_lists = [_bulk_get_or_create_offers(offer_names, offer_kwargs)]
+
+    # This is a temporary measure to create enterprise conditional offers ahead of updating the Coupon creation
+    # and redemption logic to use enterprise conditional offers when appropriate.
+    # This and the surrounding code will be refactored at that point.
+    if enterprise_customer:
+        enterprise_offer_names = [
+            generate_offer_name(coupon.id, benefit_type, benefit_value, num, is_enterprise=True)
+            for num in range(num_of_offers)
+        ]
+        offer_lists.append(_bulk_get_or_create_enterprise_offers(
+            enterprise_offer_names,
             benefit_type=benefit_type,
             benefit_value=benefit_value,
+            enterprise_customer=enterprise_customer,
+            enterprise_customer_catalog=enterprise_customer_catalog,
+            site=site,
             max_uses=max_uses,
-            offer_name=offer_name,
             email_domains=email_domains,
-            program_uuid=program_uuid,
-            site=site
-        )
-        offers.append(offer)
-
-        # This is a temporary measure to create enterprise conditional offers ahead of updating the Coupon creation
-        # and redemption logic to use enterprise conditional offers when appropriate.
-        # This and the surrounding code will be refactored at that point.
-        if enterprise_customer:
-            offer_name = generate_offer_name(coupon.id, benefit_type, benefit_value, num, is_enterprise=True)
-            enterprise_offer = get_or_create_enterprise_offer(
-                benefit_type=benefit_type,
-                benefit_value=benefit_value,
-                enterprise_customer=enterprise_customer,
-                enterprise_customer_catalog=enterprise_customer_catalog,
-                max_uses=max_uses,
-                offer_name=offer_name,
-                email_domains=email_domains,
-                site=site
-            )
-            enterprise_offers.append(enterprise_offer)
-
-    for i in range(quantity):
-        voucher = create_new_voucher(
-            end_datetime=end_datetime,
-            start_datetime=start_datetime,
-            voucher_type=voucher_type,
-            code=code,
-            name=name
-        )
-        voucher.offers.add(offers[i] if len(offers) > 1 else offers[0])
-        if enterprise_customer:
-            voucher.offers.add(enterprise_offers[i] if len(enterprise_offers) > 1 else enterprise_offers[0])
-        vouchers.append(voucher)
+        ))
 
-    return vouchers
+    return bulk_create_vouchers(
+        quantity=quantity,
+        code=code,
+        end_datetime=end_datetime,
+        name=name,
+        start_datetime=start_datetime,
+        voucher_type=voucher_type,
+        offer_lists=offer_lists,
+    )
 
 
 def get_voucher_discount_info(benefit, price):
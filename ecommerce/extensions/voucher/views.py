@@ -1,17 +1,16 @@
 from __future__ import absolute_import
 
-import csv
 import logging
 
 import six
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils.text import slugify
 from django.utils.translation import ugettext_lazy as _
 from django.views.generic import View
 from oscar.core.loading import get_model
 
 from ecommerce.core.views import StaffOnlyMixin
-from ecommerce.extensions.voucher.utils import generate_coupon_report
+from ecommerce.extensions.voucher.utils import generate_coupon_report_rows, iter_coupon_report_csv
 
 logger = logging.getLogger(__name__)
 
@@ -35,21 +34,14 @@ class CouponReportCSVView(StaffOnlyMixin, View):
         filename = "{}.csv".format(slugify(filename))
 
         try:
-            field_names, rows = generate_coupon_report(coupons_vouchers)
+            field_names, rows = generate_coupon_report_rows(coupons_vouchers)
         except StockRecord.DoesNotExist:
             logger.exception(u'Failed to find StockRecord for Coupon [%d].', coupon.id)
             return HttpResponse(_('Failed to find a matching stock record for coupon, report download canceled.'),
                                 status=404)
 
-        response = HttpResponse(content_type='text/csv')
+        # Rows are generated while the response is sent, so the report is never held in memory as a whole.
+        response = StreamingHttpResponse(iter_coupon_report_csv(field_names, rows), content_type='text/csv')
         response['Content-Disposition'] = 'attachment; filename={}'.format(filename)
 
-        writer = csv.DictWriter(response, fieldnames=field_names)
-        writer.writeheader()
-        for row in rows:
-            for key, value in row.items():
-                if isinstance(row[key], six.text_type):
-                    row[key] = value.encode('utf-8')
-            writer.writerow(row)
-
         return response
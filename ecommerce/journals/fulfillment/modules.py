@@ -9,6 +9,7 @@ from ecommerce.extensions.analytics.utils import audit_log
 from ecommerce.extensions.fulfillment.modules import BaseFulfillmentModule
 from ecommerce.extensions.fulfillment.status import LINE
 from ecommerce.journals.client import post_journal_access, revoke_journal_access
+from ecommerce.journals.constants import JOURNAL_PRODUCT_CLASS_NAME
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +18,7 @@ class JournalFulfillmentModule(BaseFulfillmentModule):
     """
     Fulfillment Module for granting learner access to a Journal
     """
+    product_class_names = (JOURNAL_PRODUCT_CLASS_NAME,)
 
     def supports_line(self, line):
         logger.debug('Line order: [%s], is journal: [%s]', line, line.product.is_journal_product)
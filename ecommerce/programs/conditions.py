@@ -13,7 +13,7 @@ from slumber.exceptions import HttpNotFoundError, SlumberBaseException
 from ecommerce.core.utils import deprecated_traverse_pagination, get_cache_key
 from ecommerce.extensions.offer.decorators import check_condition_applicability
 from ecommerce.extensions.offer.mixins import SingleItemConsumptionConditionMixin
-from ecommerce.programs.utils import get_program
+from ecommerce.programs.index import get_program_index
 
 Condition = get_model('offer', 'Condition')
 logger = logging.getLogger(__name__)
@@ -30,20 +30,8 @@ class ProgramCourseRunSeatsCondition(SingleItemConsumptionConditionMixin, Condit
 
     def _get_applicable_skus(self, site_configuration):
         """ SKUs to which this condition applies. """
-        program_skus = set()
-        program = get_program(self.program_uuid, site_configuration)
-        if program:
-            applicable_seat_types = program['applicable_seat_types']
-
-            for course in program['courses']:
-                for course_run in course['course_runs']:
-                    program_skus.update(
-                        set([seat['sku'] for seat in course_run['seats'] if seat['type'] in applicable_seat_types])
-                    )
-                for entitlement in course['entitlements']:
-                    if entitlement['mode'].lower() in applicable_seat_types:
-                        program_skus.add(entitlement['sku'])
-        return program_skus
+        program_index = get_program_index(self.program_uuid, site_configuration)
+        return program_index.skus if program_index else frozenset()
 
     def _get_lms_resource_for_user(self, basket, resource_name, endpoint):
         cache_key = get_cache_key(
@@ -91,15 +79,6 @@ class ProgramCourseRunSeatsCondition(SingleItemConsumptionConditionMixin, Condit
                     entitlements = response
         return enrollments, entitlements
 
-    def _has_entitlements(self, program):
-        """
-        Determines whether an entitlement product exists for any course in the program.
-        """
-        for course in program['courses']:
-            if course['entitlements']:
-                return True
-        return False
-
     @check_condition_applicability()
     def is_satisfied(self, offer, basket):  # pylint: disable=unused-argument
         """
@@ -114,52 +93,45 @@ class ProgramCourseRunSeatsCondition(SingleItemConsumptionConditionMixin, Condit
         """
         basket_skus = set([line.stockrecord.partner_sku for line in basket.all_lines()])
         try:
-            program = get_program(self.program_uuid, basket.site.siteconfiguration)
+            program_index = get_program_index(self.program_uuid, basket.site.siteconfiguration)
         except (HttpNotFoundError, SlumberBaseException, Timeout):
             return False
 
-        if program and program['status'] == 'active':
-            applicable_seat_types = program['applicable_seat_types']
-        else:
+        if not (program_index and program_index.is_active):
             return False
 
-        retrieve_entitlements = self._has_entitlements(program)
-        enrollments, entitlements = self._get_user_ownership_data(basket, retrieve_entitlements)
+        applicable_seat_types = program_index.applicable_seat_types
+        enrollments, entitlements = self._get_user_ownership_data(basket, program_index.has_entitlements)
+        enrolled_course_run_keys = set(
+            enrollment['course_details']['course_id'] for enrollment in enrollments
+            if enrollment['mode'] in applicable_seat_types
+        )
+        entitled_course_uuids = set(
+            entitlement['course_uuid'] for entitlement in entitlements
+            if entitlement['mode'] in applicable_seat_types
+        )
 
-        for course in program['courses']:
-            # If the user is already enrolled in a course, we do not need to check their basket for it
-            if any(enrollment['course_details']['course_id'] in [run['key'] for run in course['course_runs']] and
-                   enrollment['mode'] in applicable_seat_types for enrollment in enrollments):
-                continue
-            if any(course['uuid'] == entitlement['course_uuid'] and
-                   entitlement['mode'] in applicable_seat_types for entitlement in entitlements):
-                continue
+        # If the user is already enrolled in a course, or entitled to it, we do not need to check their basket for it
+        courses = [
+            course for course in program_index.courses
+            if course.uuid not in entitled_course_uuids and course.course_run_keys.isdisjoint(enrolled_course_run_keys)
+        ]
 
-            # If the  basket has no SKUs left, but we still have courses over which
-            # to iterate, the user cannot meet the condition that all courses be represented.
-            if not basket_skus:
-                return False
+        # Every remaining course must be satisfied by at least one SKU in the basket.
+        basket_course_uuids = program_index.get_course_uuids(basket_skus)
+        if any(course.uuid not in basket_course_uuids for course in courses):
+            return False
 
-            # Get all of the SKUs that can satisfy this course
-            skus = set()
-            for course_run in course['course_runs']:
-                skus.update(set([seat['sku'] for seat in course_run['seats'] if seat['type'] in applicable_seat_types]))
-            for entitlement in course['entitlements']:
-                if entitlement['mode'].lower() in applicable_seat_types:
-                    skus.add(entitlement['sku'])
-
-            # The lack of a difference in the set of SKUs in the basket and the course indicates that
-            # that there is no intersection. Therefore, the basket contains no SKUs for the current course.
-            # Because the user is also not enrolled in the course, it follows that the program condition is not met.
-            diff = basket_skus.difference(skus)
-            if diff == basket_skus:
+        for course in courses:
+            # The basket contains no SKUs for the current course. Because the user is also not enrolled in the
+            # course, it follows that the program condition is not met.
+            if basket_skus.isdisjoint(course.skus):
                 return False
 
-            # If there is a difference between the basket SKUs and course SKUs, it represents the basket SKUs
-            # minus the SKUs for the current course. Since we have already verified the course is represented,
-            # its SKUs can be safely removed from the set of SKUs in the basket being checked. Note that this
-            # does NOT affect the actual basket, just our copy of its SKUs.
-            basket_skus = diff
+            # Since we have already verified the course is represented, its SKUs can be safely removed from the set
+            # of SKUs in the basket being checked. Note that this does NOT affect the actual basket, just our copy of
+            # its SKUs.
+            basket_skus -= course.skus
 
         return True
 
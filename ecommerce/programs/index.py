@@ -0,0 +1,117 @@
+"""
+Compiled program index used by program offer conditions.
+
+The program details returned by the Discovery Service are nested course, course run and seat lists. Conditions
+evaluate them for every basket line, so the details are compiled once into frozensets of the SKUs that satisfy each
+course, plus a reverse SKU to course map, and the compiled index is cached per site and program.
+"""
+from __future__ import absolute_import, unicode_literals
+
+import logging
+from collections import defaultdict, namedtuple
+
+from django.conf import settings
+from edx_django_utils.cache import TieredCache
+
+from ecommerce.core.utils import get_cache_key
+from ecommerce.programs.utils import get_program
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout of the compiled index changes, so indexes cached by older code are not read.
+PROGRAM_INDEX_VERSION = 1
+
+# A course of a compiled program. skus holds the seat and entitlement SKUs, of an applicable seat type, that
+# satisfy the course; course_run_keys holds the keys of its course runs.
+ProgramIndexCourse = namedtuple('ProgramIndexCourse', ['uuid', 'course_run_keys', 'skus'])
+
+
+class ProgramIndex(object):
+    """
+    SKUs of a program, indexed by course.
+
+    Attributes:
+        uuid (str): Program UUID.
+        status (str): Program status, e.g. 'active'.
+        applicable_seat_types (frozenset): Seat types and entitlement modes that count towards the program.
+        courses (tuple): ProgramIndexCourse for each course of the program, in program order.
+        skus (frozenset): Every applicable SKU of the program.
+        course_uuids_by_sku (dict): Maps each applicable SKU to the frozenset of UUIDs of the courses it satisfies.
+        has_entitlements (bool): Whether any course of the program has an entitlement product.
+    """
+
+    def __init__(self, program):
+        self.uuid = program['uuid']
+        self.status = program['status']
+        self.applicable_seat_types = frozenset(program['applicable_seat_types'])
+
+        courses = []
+        course_uuids_by_sku = defaultdict(set)
+        has_entitlements = False
+        for course in program['courses']:
+            skus = set()
+            for course_run in course['course_runs']:
+                skus.update(seat['sku'] for seat in course_run['seats'] if seat['type'] in self.applicable_seat_types)
+            for entitlement in course['entitlements']:
+                has_entitlements = True
+                if entitlement['mode'].lower() in self.applicable_seat_types:
+                    skus.add(entitlement['sku'])
+
+            for sku in skus:
+                course_uuids_by_sku[sku].add(course['uuid'])
+            courses.append(ProgramIndexCourse(
+                uuid=course['uuid'],
+                course_run_keys=frozenset(course_run['key'] for course_run in course['course_runs']),
+                skus=frozenset(skus),
+            ))
+
+        self.courses = tuple(courses)
+        self.skus = frozenset(course_uuids_by_sku)
+        self.course_uuids_by_sku = {sku: frozenset(uuids) for sku, uuids in course_uuids_by_sku.items()}
+        self.has_entitlements = has_entitlements
+
+    @property
+    def is_active(self):
+        return self.status == 'active'
+
+    def get_course_uuids(self, skus):
+        """ Returns the UUIDs of the courses satisfied by any of the given SKUs. """
+        course_uuids = set()
+        for sku in skus:
+            course_uuids.update(self.course_uuids_by_sku.get(sku, ()))
+        return course_uuids
+
+
+def get_program_index(program_uuid, site_configuration):
+    """
+    Returns the compiled index of the program identified by program_uuid.
+
+    The index is cached per site and program for ``settings.PROGRAM_CACHE_TIMEOUT`` seconds, the lifetime of the
+    program details it is compiled from.
+
+    Args:
+        program_uuid (uuid): Program UUID.
+        site_configuration (SiteConfiguration): Configuration used to connect to the Discovery Service.
+
+    Returns:
+        ProgramIndex
+        None if the program is not found or another error occurs
+    """
+    cache_key = get_cache_key(
+        site_domain=site_configuration.site.domain,
+        resource='program_index',
+        program_uuid=str(program_uuid),
+        version=PROGRAM_INDEX_VERSION,
+    )
+    program_index_cached_response = TieredCache.get_cached_response(cache_key)
+    if program_index_cached_response.is_found:
+        return program_index_cached_response.value
+
+    program = get_program(program_uuid, site_configuration)
+    if not program:
+        return None
+
+    program_index = ProgramIndex(program)
+    TieredCache.set_all_tiers(cache_key, program_index, settings.PROGRAM_CACHE_TIMEOUT)
+    logger.debug('Compiled index of program [%s] with [%d] SKUs.', program_uuid, len(program_index.skus))
+    return program_index
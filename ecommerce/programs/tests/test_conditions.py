@@ -131,7 +131,7 @@ class ProgramCourseRunSeatsConditionTests(ProgramTestMixin, TestCase):
         # Verify the user enrollments are cached
         basket.site.siteconfiguration.enable_partial_program = True
         httpretty.disable()
-        with mock.patch('ecommerce.programs.conditions.get_program',
+        with mock.patch('ecommerce.programs.index.get_program',
                         return_value=program):
             self.assertTrue(self.condition.is_satisfied(offer, basket))
 
@@ -142,7 +142,7 @@ class ProgramCourseRunSeatsConditionTests(ProgramTestMixin, TestCase):
         basket = BasketFactory(site=self.site, owner=UserFactory())
         basket.add_product(self.test_product)
 
-        with mock.patch('ecommerce.programs.conditions.get_program',
+        with mock.patch('ecommerce.programs.index.get_program',
                         side_effect=value):
             self.assertFalse(self.condition.is_satisfied(offer, basket))
 
@@ -239,7 +239,7 @@ class ProgramCourseRunSeatsConditionTests(ProgramTestMixin, TestCase):
         # Verify the user enrollments are cached
         basket.site.siteconfiguration.enable_partial_program = True
         httpretty.disable()
-        with mock.patch('ecommerce.programs.conditions.get_program',
+        with mock.patch('ecommerce.programs.index.get_program',
                         return_value=program):
             self.assertTrue(self.condition.is_satisfied(offer, basket))
 
@@ -0,0 +1,68 @@
+from __future__ import absolute_import
+
+import uuid
+
+import httpretty
+import mock
+
+from ecommerce.programs.index import ProgramIndex, get_program_index
+from ecommerce.programs.tests.mixins import ProgramTestMixin
+from ecommerce.tests.testcases import TestCase
+
+
+class ProgramIndexTests(ProgramTestMixin, TestCase):
+    def setUp(self):
+        super(ProgramIndexTests, self).setUp()
+        self.program_uuid = uuid.uuid4()
+        self.discovery_api_url = self.site.siteconfiguration.discovery_api_url
+
+    @httpretty.activate
+    def test_program_index(self):
+        """ The index should hold, for every course, the applicable seat and entitlement SKUs. """
+        program = self.mock_program_detail_endpoint(self.program_uuid, self.discovery_api_url)
+        program_index = ProgramIndex(program)
+
+        self.assertTrue(program_index.is_active)
+        self.assertTrue(program_index.has_entitlements)
+        self.assertEqual(len(program_index.courses), len(program['courses']))
+
+        for course, indexed_course in zip(program['courses'], program_index.courses):
+            expected_skus = set(entitlement['sku'] for entitlement in course['entitlements'])
+            for course_run in course['course_runs']:
+                expected_skus.update(seat['sku'] for seat in course_run['seats'] if seat['type'] == 'verified')
+                audit_sku = [seat['sku'] for seat in course_run['seats'] if seat['type'] == 'audit'][0]
+                self.assertNotIn(audit_sku, program_index.skus)
+
+            self.assertEqual(indexed_course.uuid, course['uuid'])
+            self.assertEqual(indexed_course.skus, expected_skus)
+            self.assertEqual(
+                indexed_course.course_run_keys, set(course_run['key'] for course_run in course['course_runs'])
+            )
+            for sku in expected_skus:
+                self.assertEqual(program_index.course_uuids_by_sku[sku], {course['uuid']})
+
+        first_course, last_course = program_index.courses[0], program_index.courses[-1]
+        self.assertEqual(
+            program_index.get_course_uuids(set(first_course.skus) | set(last_course.skus) | {'unknown'}),
+            {first_course.uuid, last_course.uuid}
+        )
+
+    @httpretty.activate
+    def test_get_program_index_cached(self):
+        """ The compiled index should be cached, so program details are compiled once. """
+        self.mock_program_detail_endpoint(self.program_uuid, self.discovery_api_url)
+        program_index = get_program_index(self.program_uuid, self.site.siteconfiguration)
+        self.assertIsInstance(program_index, ProgramIndex)
+
+        with mock.patch('ecommerce.programs.index.get_program') as mock_get_program:
+            self.assertEqual(
+                get_program_index(self.program_uuid, self.site.siteconfiguration).skus, program_index.skus
+            )
+            mock_get_program.assert_not_called()
+
+    def test_get_program_index_not_found(self):
+        """ No index should be returned, or cached, for a program that cannot be retrieved. """
+        with mock.patch('ecommerce.programs.index.get_program', return_value=None) as mock_get_program:
+            self.assertIsNone(get_program_index(self.program_uuid, self.site.siteconfiguration))
+            self.assertIsNone(get_program_index(self.program_uuid, self.site.siteconfiguration))
+            self.assertEqual(mock_get_program.call_count, 2)
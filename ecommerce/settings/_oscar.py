@@ -269,9 +269,29 @@ OSCAR_DASHBOARD_NAVIGATION = [
 # Default timeout for Enrollment API calls
 ENROLLMENT_FULFILLMENT_TIMEOUT = 7
 
+# Default number of order lines posted to the Enrollment API at the same time. Sites may override this and the
+# timeout above on their SiteConfiguration.
+ENROLLMENT_FULFILLMENT_MAX_WORKERS = 1
+
+# Number of keep-alive connections to the Enrollment API kept open by each process
+ENROLLMENT_FULFILLMENT_CONNECTION_POOL_SIZE = 10
+
+# Path of the LMS endpoint that enrolls many learners in one request, used when the
+# enable_bulk_enrollment_fulfillment switch is active
+ENROLLMENT_FULFILLMENT_BULK_API_PATH = '/api/bulk_enroll/v1/enrollments'
+
+# Seconds during which a bulk enrollment endpoint found to be unsupported is not requested again
+ENROLLMENT_FULFILLMENT_BULK_UNSUPPORTED_TIMEOUT = 3600
+
 # Coupon code length
 VOUCHER_CODE_LENGTH = 16
 
+# Number of vouchers (and offers) generated, checked and inserted per batch when creating coupons
+VOUCHER_BULK_CREATE_CHUNK_SIZE = 1000
+
+# Number of vouchers read per query when generating coupon reports
+COUPON_REPORT_CHUNK_SIZE = 1000
+
 THUMBNAIL_DEBUG = False
 
 OSCAR_FROM_EMAIL = 'testing@example.com'
@@ -218,6 +218,7 @@ TEMPLATES = [
 MIDDLEWARE_CLASSES = (
     'corsheaders.middleware.CorsMiddleware',
     'edx_django_utils.cache.middleware.RequestCacheMiddleware',
+    'ecommerce.extensions.analytics.middleware.SegmentEventBufferMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -228,6 +229,7 @@ MIDDLEWARE_CLASSES = (
     'django.contrib.auth.middleware.SessionAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.contrib.sites.middleware.CurrentSiteMiddleware',
+    'ecommerce.core.middleware.SiteContextMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'waffle.middleware.WaffleMiddleware',
     # NOTE: The overridden BasketMiddleware relies on request.site. This middleware
@@ -259,6 +261,9 @@ COMMERCE_API_TIMEOUT = 7
 COURSES_API_CACHE_TIMEOUT = 3600  # Value is in seconds
 PROGRAM_CACHE_TIMEOUT = 3600  # Value is in seconds.
 
+# Cache the seat and enrollment code SKUs of each course. Entries are invalidated whenever the products change.
+SEAT_ENROLLMENT_CODE_SKUS_CACHE_TIMEOUT = 86400  # Value is in seconds.
+
 # Cache catalog results from the enterprise and discovery service.
 CATALOG_RESULTS_CACHE_TIMEOUT = 86400
 
@@ -274,12 +279,25 @@ ANONYMOUS_BASKET_CALCULATE_CACHE_TIMEOUT = 3600  # Value is in seconds.
 
 # LMS API settings used for fetching information from LMS
 LMS_API_CACHE_TIMEOUT = 30  # Value is in seconds.
+
+# Largest page size accepted by the LMS entitlements API
+ENTITLEMENT_API_MAX_PAGE_SIZE = 100
 # END URL CONFIGURATION
 
 VOUCHER_CACHE_TIMEOUT = 10  # Value is in seconds.
 
 SDN_CHECK_REQUEST_TIMEOUT = 5  # Value is in seconds.
 
+# How long the GA client id and LMS user_id last seen for a user are trusted by the TrackingMiddleware.
+TRACKING_CONTEXT_CACHE_TIMEOUT = 300  # Value is in seconds.
+
+# Screen checkouts against the consolidated screening list loaded by the load_sdn_list command, instead of calling
+# the US Treasury SDN API. The API is still called while no list is loaded, if SDN_CHECK_REMOTE_FALLBACK is set.
+SDN_CHECK_USE_LOCAL_INDEX = False
+SDN_CHECK_REMOTE_FALLBACK = True
+# Minimum similarity, between 0 and 1, of two names for the local index to report a hit.
+SDN_CHECK_FUZZY_MATCH_THRESHOLD = 0.9
+
 # APP CONFIGURATION
 DJANGO_APPS = [
     'django.contrib.admin',
@@ -674,6 +692,12 @@ if os.environ.get('ENABLE_DJANGO_TOOLBAR', False):
 # Determines if events are actually sent to Segment. This should only be set to False for testing purposes.
 SEND_SEGMENT_EVENTS = True
 
+# Maximum number of Segment events buffered during a request. Further events are dropped, and counted.
+SEGMENT_EVENT_BUFFER_SIZE = 100
+
+# File to which Segment events are appended as JSON lines, instead of being sent. This should only be set for testing.
+SEGMENT_EVENT_FILE_SINK = None
+
 NEW_CODES_EMAIL_CONFIG = {
     'email_subject': 'New edX codes available',
     'from_email': 'customersuccess@edx.org',
@@ -12,6 +12,9 @@ DEBUG = True
 INTERNAL_IPS = ['127.0.0.1']
 ENABLE_AUTO_AUTH = True
 
+# Render template changes without a restart: unwrap the loaders that production wraps in ThemeCachedLoader.
+TEMPLATES[0]['OPTIONS']['loaders'] = TEMPLATES[0]['OPTIONS']['loaders'][0][1]
+
 # Docker does not support the syslog socket at /dev/log. Rely on the console.
 LOGGING['handlers']['local'] = {
     'class': 'logging.NullHandler',
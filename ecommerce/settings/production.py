@@ -46,6 +46,13 @@ def get_env_setting(setting):
 ALLOWED_HOSTS = ['*']
 # END HOST CONFIGURATION
 
+# TEMPLATE CONFIGURATION
+# Compile each template once per process and theme, instead of finding and compiling it on every render.
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('ecommerce.theming.template_loaders.ThemeCachedLoader', TEMPLATES[0]['OPTIONS']['loaders']),
+]
+# END TEMPLATE CONFIGURATION
+
 # Keep track of the names of settings that represent dicts. Instead of overriding the values in base.py,
 # the values read from disk should UPDATE the pre-configured dicts.
 DICT_UPDATE_KEYS = ('JWT_AUTH',)
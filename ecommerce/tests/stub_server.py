@@ -0,0 +1,105 @@
+"""
+Local HTTP server used by tests that exercise real network round trips.
+
+Unlike httpretty, the stub server runs on a local port in a background thread, so it can be used with connection
+pools and worker threads. Every request is recorded, and responses are produced by a handler callable.
+"""
+from __future__ import absolute_import, unicode_literals
+
+import json
+import threading
+
+from six.moves import BaseHTTPServer, socketserver
+
+
+class ThreadingHTTPServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class StubRequest(object):
+    """ A request received by the stub server. """
+
+    def __init__(self, method, path, headers, body, client_address=None):
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.body = body
+        self.client_address = client_address
+
+    def json(self):
+        return json.loads(self.body.decode('utf-8'))
+
+
+class StubServer(object):
+    """
+    HTTP server that records requests and answers them with a handler.
+
+    The handler receives a StubRequest and returns a (status, body) pair, where body is serialized as JSON. It may
+    be replaced at any time. The server is meant to be used as a context manager:
+
+        with StubServer(handler) as server:
+            requests.post(server.url + '/path', ...)
+            assert len(server.requests) == 1
+    """
+
+    def __init__(self, handler=None):
+        self.handler = handler or (lambda request: (200, {}))
+        self.requests = []
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return 'http://{host}:{port}'.format(host=host, port=port)
+
+    def requests_to(self, path):
+        """ Returns the requests received for the given path. """
+        return [request for request in self.requests if request.path == path]
+
+    def _handle(self, request):
+        with self._lock:
+            self.requests.append(request)
+        return self.handler(request)
+
+    def start(self):
+        stub = self
+
+        class RequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _respond(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                request = StubRequest(
+                    self.command, self.path, dict(self.headers.items()), self.rfile.read(length), self.client_address
+                )
+                status, body = stub._handle(request)  # pylint: disable=protected-access
+                content = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _respond
+
+            def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), RequestHandler)
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
@@ -26,7 +26,7 @@ from django.contrib.staticfiles import utils
 from django.contrib.staticfiles.finders import BaseFinder
 from django.utils import six
 
-from ecommerce.theming.helpers import get_themes
+from ecommerce.theming.helpers import get_themes, is_comprehensive_theming_enabled
 from ecommerce.theming.storage import ThemeStorage
 
 
@@ -73,12 +73,11 @@ class ThemeFilesFinder(BaseFinder):
         matches = []
         theme_dir = path.split("/", 1)[0]
 
-        themes = {t.theme_dir_name: t for t in get_themes()}
         # if path is prefixed by theme name then search in the corresponding storage other wise search all storages.
-        if theme_dir in themes:
-            theme = themes[theme_dir]
+        # Themes are read once, when the finder is created, rather than from the themes directories on every lookup.
+        if theme_dir in self.storages and is_comprehensive_theming_enabled():
             path = "/".join(path.split("/")[1:])
-            match = self.find_in_theme(theme.theme_dir_name, path)
+            match = self.find_in_theme(theme_dir, path)
             if match:
                 if not all:
                     return match
@@ -9,11 +9,33 @@ import os
 import six
 import waffle
 from django.conf import ImproperlyConfigured, settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 from path import Path
 from threadlocals.threadlocals import get_current_request
 
 logger = logging.getLogger(__name__)
 
+# Themes are only installed with a deployment, so the themes directories are scanned once per process. The results
+# are kept here: the directory that contains each theme, keyed by theme directory name, and the list of all themes,
+# keyed by the themes directory they were found in, None for all themes directories.
+_theme_base_dir_cache = {}
+_themes_cache = {}
+
+
+def clear_theme_caches():
+    """
+    Forget the themes found in the themes directories, so they are scanned again on the next lookup.
+    """
+    _theme_base_dir_cache.clear()
+    _themes_cache.clear()
+
+
+@receiver(setting_changed)
+def clear_theme_caches_on_setting_changed(setting, **kwargs):  # pylint: disable=unused-argument
+    if setting == 'COMPREHENSIVE_THEME_DIRS':
+        clear_theme_caches()
+
 
 def get_current_site_theme():
     """
@@ -68,12 +90,18 @@ def get_theme_base_dir(theme_dir_name, suppress_error=False):
     Returns:
         (str): Base directory that contains the given theme
     """
-    for themes_dir in get_theme_base_dirs():
-        if theme_dir_name in (_dir for _dir in os.listdir(themes_dir) if is_theme_dir(themes_dir / _dir)):
-            return themes_dir
+    if theme_dir_name not in _theme_base_dir_cache:
+        _theme_base_dir_cache[theme_dir_name] = next(
+            (
+                themes_dir for themes_dir in get_theme_base_dirs()
+                if theme_dir_name in (_dir for _dir in os.listdir(themes_dir) if is_theme_dir(themes_dir / _dir))
+            ),
+            None
+        )
 
-    if suppress_error:
-        return None
+    themes_dir = _theme_base_dir_cache[theme_dir_name]
+    if themes_dir or suppress_error:
+        return themes_dir
 
     raise ValueError(
         "Theme '{theme}' not found in any of the following themes dirs, \nTheme dirs: \n{dir}".format(
@@ -177,13 +205,15 @@ def get_themes(themes_dir=None):
     if not is_comprehensive_theming_enabled():
         return []
 
-    themes_dirs = [Path(themes_dir)] if themes_dir else get_theme_base_dirs()
-    # pick only directories and discard files in themes directory
-    themes = []
-    for tdir in themes_dirs:
-        themes.extend([Theme(name, name, tdir) for name in get_theme_dirs(tdir)])
+    if themes_dir not in _themes_cache:
+        themes_dirs = [Path(themes_dir)] if themes_dir else get_theme_base_dirs()
+        # pick only directories and discard files in themes directory
+        themes = []
+        for tdir in themes_dirs:
+            themes.extend([Theme(name, name, tdir) for name in get_theme_dirs(tdir)])
+        _themes_cache[themes_dir] = themes
 
-    return themes
+    return list(_themes_cache[themes_dir])
 
 
 def get_theme_dirs(themes_dir=None):
@@ -8,6 +8,7 @@ Note:
 
 from __future__ import absolute_import
 
+from ecommerce.core.site_context import site_context_registry
 from ecommerce.theming.models import SiteTheme
 
 
@@ -17,7 +18,8 @@ class CurrentSiteThemeMiddleware(object):
     """
 
     def process_request(self, request):
-        request.site_theme = SiteTheme.get_theme(request.site)
+        site_context = site_context_registry.get_context(request.site)
+        request.site_theme = site_context.theme if site_context else None
 
 
 class ThemePreviewMiddleware(object):
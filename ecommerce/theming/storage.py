@@ -4,13 +4,25 @@ See https://docs.djangoproject.com/en/1.8/ref/contrib/staticfiles/
 """
 from __future__ import absolute_import
 
+import json
+import logging
 import os.path
 
 from django.conf import settings
 from django.contrib.staticfiles.storage import StaticFilesStorage
+from django.contrib.staticfiles.utils import get_files
+from django.core.files.base import ContentFile
 from django.utils._os import safe_join
+from django.utils.functional import cached_property
 
-from ecommerce.theming.helpers import get_current_theme, get_theme_base_dir, is_comprehensive_theming_enabled
+from ecommerce.theming.helpers import (
+    get_current_theme,
+    get_theme_base_dir,
+    get_themes,
+    is_comprehensive_theming_enabled
+)
+
+logger = logging.getLogger(__name__)
 
 
 class ThemeStorage(StaticFilesStorage):
@@ -23,6 +35,9 @@ class ThemeStorage(StaticFilesStorage):
     # instead of "images/logo.png"
     prefix = None
 
+    # Name of the manifest listing the collected assets of each theme, written by collectstatic.
+    theme_asset_manifest_name = 'theme-assets.json'
+
     def __init__(self, location=None, base_url=None, file_permissions_mode=None,
                  directory_permissions_mode=None, prefix=None):
 
@@ -93,4 +108,61 @@ class ThemeStorage(StaticFilesStorage):
             return os.path.exists(path)
         # in live mode check static asset in the static files dir defined by "STATIC_ROOT" setting
         else:
+            theme_assets = self.theme_assets
+            if theme_assets is not None:
+                return name in theme_assets.get(theme, ())
             return self.exists(os.path.join(theme, name))
+
+    @cached_property
+    def theme_assets(self):
+        """
+        Returns the collected assets of each theme, keyed by theme name, as read from the theme asset manifest.
+
+        The manifest is read once per storage, and collected assets only change with a deployment, so a process
+        does not need to check for overrides on disk. Returns None if there is no manifest.
+
+        Returns:
+            dict: set of asset names, e.g. 'images/logo.png', keyed by theme name, e.g. 'red-theme'
+        """
+        if not self.exists(self.theme_asset_manifest_name):
+            return None
+
+        try:
+            with self.open(self.theme_asset_manifest_name) as manifest:
+                themes = json.loads(manifest.read().decode('utf-8'))['themes']
+        except (IOError, KeyError, ValueError):
+            logger.exception('Failed to read the theme asset manifest [%s].', self.path(self.theme_asset_manifest_name))
+            return None
+
+        return {theme: set(names) for theme, names in themes.items()}
+
+    def save_theme_asset_manifest(self):
+        """
+        Writes the manifest listing the collected assets of each theme.
+        """
+        themes = {}
+        for theme in get_themes():
+            theme_dir_name = theme.theme_dir_name
+            if self.exists(theme_dir_name):
+                themes[theme_dir_name] = sorted(
+                    os.path.relpath(path, theme_dir_name) for path in get_files(self, location=theme_dir_name)
+                )
+
+        if self.exists(self.theme_asset_manifest_name):
+            self.delete(self.theme_asset_manifest_name)
+        content = json.dumps({'themes': themes}, indent=2, sort_keys=True)
+        self.save(self.theme_asset_manifest_name, ContentFile(content.encode('utf-8')))
+
+        self.__dict__['theme_assets'] = {theme: set(names) for theme, names in themes.items()}
+        logger.info('Saved the theme asset manifest with the assets of [%d] themes.', len(themes))
+
+    def post_process(self, paths, dry_run=False, **options):  # pylint: disable=unused-argument
+        """
+        Writes the theme asset manifest once collectstatic has collected the assets.
+
+        Returns:
+            list: processed files, none since assets are left unchanged.
+        """
+        if not dry_run:
+            self.save_theme_asset_manifest()
+        return []
@@ -3,11 +3,30 @@ Theming aware template loaders.
 """
 from __future__ import absolute_import
 
+from django.template.loaders.cached import Loader as CachedLoader
 from django.template.loaders.filesystem import Loader
 from threadlocals.threadlocals import get_current_request
 
 from ecommerce.theming.helpers import get_all_theme_template_dirs, get_current_theme
 
+# Theme key used outside of requests, when the templates of all themes are searched.
+ALL_THEMES_KEY = '*'
+
+
+def get_template_theme_key():
+    """
+    Returns a key for the theme whose template directories ThemeTemplateLoader searches first.
+
+    Returns:
+        (str): the theme directory name of the current theme, '' if there is none, or ALL_THEMES_KEY outside of
+            a request.
+    """
+    if not get_current_request():
+        return ALL_THEMES_KEY
+
+    theme = get_current_theme()
+    return theme.theme_dir_name if theme else ''
+
 
 class ThemeTemplateLoader(Loader):
     """
@@ -30,3 +49,17 @@ class ThemeTemplateLoader(Loader):
             theme_dirs = get_all_theme_template_dirs()
 
         return theme_dirs + dirs
+
+
+class ThemeCachedLoader(CachedLoader):
+    """
+    Cached template loader that keeps the templates of each theme apart.
+
+    Wraps ThemeTemplateLoader like Django's cached loader, so each template is found and compiled once per theme
+    rather than on every lookup.
+    """
+    def cache_key(self, template_name, skip=None):
+        return '{theme}:{key}'.format(
+            theme=get_template_theme_key(),
+            key=super(ThemeCachedLoader, self).cache_key(template_name, skip),
+        )
@@ -3,6 +3,8 @@ Tests of comprehensive theming.
 """
 from __future__ import absolute_import
 
+import os
+
 import six
 from django.conf import ImproperlyConfigured, settings
 from django.test import override_settings
@@ -11,6 +13,7 @@ from mock import patch
 from ecommerce.tests.testcases import TestCase
 from ecommerce.theming.helpers import (
     Theme,
+    clear_theme_caches,
     get_all_theme_template_dirs,
     get_current_site_theme,
     get_current_theme,
@@ -39,6 +42,27 @@ class TestHelpers(TestCase):
         actual_themes = get_themes()
         self.assertItemsEqual(expected_themes, actual_themes)
 
+    def test_theme_dirs_scanned_once(self):
+        """
+        Tests themes directories are scanned once, until COMPREHENSIVE_THEME_DIRS changes.
+        """
+        clear_theme_caches()
+        with patch('ecommerce.theming.helpers.os.listdir', wraps=os.listdir) as mock_listdir:
+            themes = get_themes()
+            theme_base_dir = get_theme_base_dir('test-theme')
+            scans = mock_listdir.call_count
+
+            self.assertEqual(get_themes(), themes)
+            self.assertEqual(get_theme_base_dir('test-theme'), theme_base_dir)
+            self.assertEqual(get_all_theme_template_dirs(), get_all_theme_template_dirs())
+            self.assertEqual(mock_listdir.call_count, scans)
+
+            with override_settings(COMPREHENSIVE_THEME_DIRS=[settings.COMPREHENSIVE_THEME_DIRS[0]]):
+                self.assertEqual(len(get_themes()), 2)
+                self.assertGreater(mock_listdir.call_count, scans)
+
+        self.assertEqual(get_themes(), themes)
+
     def test_get_themes_with_theming_disabled(self):
         """
         Tests get_themes returns empty list when theming is disabled.
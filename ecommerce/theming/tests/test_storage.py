@@ -3,6 +3,11 @@ Tests for comprehensive theme static files storage classes.
 """
 from __future__ import absolute_import
 
+import json
+import os
+import shutil
+import tempfile
+
 from django.conf import settings
 from django.test import override_settings
 from mock import patch
@@ -83,3 +88,54 @@ class TestThemeStorage(TestCase):
             expected_path = self.themes_dir / self.enabled_theme / "static" / asset
 
             self.assertEqual(expected_path, returned_path)
+
+
+@override_settings(DEBUG=False)
+class TestThemeAssetManifest(TestCase):
+    """
+    Test the manifest of collected theme assets.
+    """
+
+    def setUp(self):
+        super(TestThemeAssetManifest, self).setUp()
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location)
+        os.makedirs(os.path.join(self.location, 'test-theme', 'images'))
+        open(os.path.join(self.location, 'test-theme', 'images', 'default-logo.png'), 'w').close()
+        self.storage = ThemeStorage(location=self.location)
+
+    def test_post_process(self):
+        """
+        Verify collectstatic writes the collected assets of each theme to the manifest.
+        """
+        self.assertEqual(self.storage.post_process({}), [])
+
+        with open(os.path.join(self.location, ThemeStorage.theme_asset_manifest_name)) as manifest:
+            self.assertEqual(json.load(manifest)['themes'], {'test-theme': ['images/default-logo.png']})
+        self.assertEqual(ThemeStorage(location=self.location).theme_assets, self.storage.theme_assets)
+
+    def test_post_process_dry_run(self):
+        """
+        Verify no manifest is written by a dry run.
+        """
+        self.storage.post_process({}, dry_run=True)
+        self.assertIsNone(self.storage.theme_assets)
+
+    def test_themed_with_manifest(self):
+        """
+        Verify the manifest is used instead of the file system once written.
+        """
+        self.storage.save_theme_asset_manifest()
+
+        with patch.object(ThemeStorage, 'exists') as mock_exists:
+            self.assertTrue(self.storage.themed('images/default-logo.png', 'test-theme'))
+            self.assertFalse(self.storage.themed('images/cap.png', 'test-theme'))
+            self.assertFalse(self.storage.themed('images/default-logo.png', 'test-theme-2'))
+            self.assertFalse(mock_exists.called)
+
+    def test_themed_without_manifest(self):
+        """
+        Verify the file system is checked if there is no manifest.
+        """
+        self.assertTrue(self.storage.themed('images/default-logo.png', 'test-theme'))
+        self.assertFalse(self.storage.themed('images/cap.png', 'test-theme'))
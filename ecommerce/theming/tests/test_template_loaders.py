@@ -0,0 +1,59 @@
+"""
+Tests for comprehensive theme template loaders.
+"""
+from __future__ import absolute_import
+
+from django.conf import settings
+from django.template.engine import Engine
+from mock import Mock, patch
+
+from ecommerce.tests.testcases import TestCase
+from ecommerce.theming.models import SiteTheme
+from ecommerce.theming.template_loaders import ALL_THEMES_KEY, get_template_theme_key
+
+
+class TestThemeCachedLoader(TestCase):
+    """
+    Test the theme aware cached template loader.
+    """
+
+    def setUp(self):
+        super(TestThemeCachedLoader, self).setUp()
+        self.engine = Engine(
+            dirs=settings.TEMPLATES[0]['DIRS'],
+            loaders=[(
+                'ecommerce.theming.template_loaders.ThemeCachedLoader',
+                ['ecommerce.theming.template_loaders.ThemeTemplateLoader'],
+            )],
+        )
+
+    def get_template(self, theme_dir_name):
+        with patch('ecommerce.theming.template_loaders.get_current_request', return_value=Mock()):
+            with patch(
+                'ecommerce.theming.helpers.get_current_site_theme',
+                return_value=SiteTheme(theme_dir_name=theme_dir_name),
+            ):
+                return self.engine.get_template('dashboard/index.html')
+
+    def test_templates_cached_per_theme(self):
+        """
+        Verify templates are compiled once per theme, and each theme gets its own templates.
+        """
+        template = self.get_template('test-theme')
+        self.assertIn('test-theme/templates', template.origin.name)
+        self.assertIs(self.get_template('test-theme'), template)
+
+        other_template = self.get_template('test-theme-2')
+        self.assertIn('test-theme-2/templates', other_template.origin.name)
+        self.assertIsNot(other_template, template)
+
+    def test_get_template_theme_key(self):
+        """
+        Verify templates loaded outside of a request are cached apart from those of any theme.
+        """
+        with patch('ecommerce.theming.template_loaders.get_current_request', return_value=None):
+            self.assertEqual(get_template_theme_key(), ALL_THEMES_KEY)
+
+        with patch('ecommerce.theming.template_loaders.get_current_request', return_value=Mock()):
+            with patch('ecommerce.theming.helpers.get_current_site_theme', return_value=None):
+                self.assertEqual(get_template_theme_key(), '')